@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import threading
+from datetime import UTC, datetime, timedelta
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel, Field
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+from app import config
+from app.core.logger import log
+from app.database.analytics import BUDGET_VIEW, budget_view_age, refresh_budget_view
+from app.database.database import SessionLocal, get_db
+from app.models.step_event import StepRollupHourly as DBStepRollupHourly
+from app.schemas.enums import StepName
+
+router = APIRouter()
+
+# Funnel order; steps not listed here (e.g. clarify loops) are reported after these
+FUNNEL_STEPS = [s.value for s in (StepName.start, StepName.research, StepName.create_jd, StepName.create_plan, StepName.post_notion)]
+MAX_FUNNEL_DAYS = 366
+
+
+class BudgetBucket(BaseModel):
+    role: str
+    experience_level: str
+    currency: str
+    contexts: int
+    min: int
+    max: int
+    mean: float
+    p25: float
+    median: float
+    p75: float
+
+
+class BudgetDistribution(BaseModel):
+    buckets: List[BudgetBucket] = Field(default_factory=list)
+    view_age_seconds: Optional[float] = None
+
+
+class FunnelStep(BaseModel):
+    step: str
+    sessions: int
+    entered: int
+    conversion: Optional[float] = None  # sessions / sessions of the previous funnel step
+    avg_duration_seconds: Optional[float] = None
+
+
+class Funnel(BaseModel):
+    since: datetime
+    until: datetime
+    steps: List[FunnelStep] = Field(default_factory=list)
+
+
+#-------------------------------
+# Helper functions
+#-------------------------------
+
+# Held while a background refresh is running, so requests don't each start one
+_refreshing = threading.Lock()
+
+
+def _refresh_in_background():
+    try:
+        with SessionLocal() as db:
+            refresh_budget_view(db)
+    except Exception as e:
+        log.error(f"Refreshing {BUDGET_VIEW} failed: {e}")
+    finally:
+        _refreshing.release()
+
+
+def _maybe_refresh():
+    """Serve the cached view and revalidate it off the request path once it is older than the refresh interval."""
+    age = budget_view_age()
+    if age is not None and age < config.BUDGET_VIEW_REFRESH_SECONDS:
+        return
+    if not _refreshing.acquire(blocking=False):
+        return
+    try:
+        threading.Thread(target=_refresh_in_background, name="budget-view-refresh", daemon=True).start()
+    except BaseException:
+        _refreshing.release()
+        raise
+
+
+#-------------------------------
+# Routes
+#-------------------------------
+
+@router.get("/budgets", response_model=BudgetDistribution)
+def budget_distribution(
+    role: Optional[str] = Query(default=None, description="Case-insensitive role filter"),
+    experience_level: Optional[str] = Query(default=None),
+    currency: Optional[str] = Query(default=None, min_length=3, max_length=3),
+    db: Session = Depends(get_db),
+):
+    """Budget distribution (annual, normalized) by role, experience level and currency."""
+    _maybe_refresh()
+    rows = db.execute(
+        text(
+            f"""
+            SELECT role, experience_level, currency, contexts, min, max, mean, p25, median, p75
+            FROM {BUDGET_VIEW}
+            WHERE (CAST(:role AS text) IS NULL OR role = lower(:role))
+              AND (CAST(:level AS text) IS NULL OR experience_level = lower(:level))
+              AND (CAST(:currency AS text) IS NULL OR currency = upper(:currency))
+            ORDER BY contexts DESC, role, experience_level
+            """
+        ),
+        {"role": role, "level": experience_level, "currency": currency},
+    ).mappings()
+    return BudgetDistribution(
+        buckets=[BudgetBucket(**row) for row in rows],
+        view_age_seconds=budget_view_age(),
+    )
+
+
+@router.get("/funnel", response_model=Funnel)
+def funnel(
+    since: Optional[datetime] = Query(default=None, description="Start of the window (default: 30 days ago)"),
+    until: Optional[datetime] = Query(default=None, description="End of the window (default: now)"),
+    db: Session = Depends(get_db),
+):
+    """
+    Sessions reaching each step and the average time spent in it, answered
+    from step_rollup_hourly: the work is bounded by hours x steps in the
+    window, independent of how many sessions or messages exist.
+    """
+    until = until or datetime.now(UTC)
+    since = since or until - timedelta(days=30)
+    if since >= until or until - since > timedelta(days=MAX_FUNNEL_DAYS):
+        raise HTTPException(status_code=422, detail=f"Window must be positive and at most {MAX_FUNNEL_DAYS} days")
+
+    r = DBStepRollupHourly
+    rows = db.execute(
+        select(
+            r.step,
+            func.sum(r.reached).label("sessions"),
+            func.sum(r.entered).label("entered"),
+            func.sum(r.timed_exits).label("timed_exits"),
+            func.sum(r.duration_ms_sum).label("duration_ms_sum"),
+        )
+        .where(r.hour >= since.replace(minute=0, second=0, microsecond=0), r.hour < until)
+        .group_by(r.step)
+    ).all()
+
+    by_step = {row.step: row for row in rows}
+    ordered = FUNNEL_STEPS + sorted(set(by_step) - set(FUNNEL_STEPS))
+    steps: List[FunnelStep] = []
+    previous = None
+    for name in ordered:
+        row = by_step.get(name)
+        sessions = int(row.sessions) if row else 0
+        steps.append(FunnelStep(
+            step=name,
+            sessions=sessions,
+            entered=int(row.entered) if row else 0,
+            conversion=sessions / previous if previous and name in FUNNEL_STEPS else None,
+            avg_duration_seconds=(row.duration_ms_sum / row.timed_exits / 1000) if row and row.timed_exits else None,
+        ))
+        if name in FUNNEL_STEPS:
+            previous = sessions
+    return Funnel(since=since, until=until, steps=steps)
@@ -1,12 +1,24 @@
 from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
 from .chat import router as chatbot_router
+from .chat_ws import router as chatbot_ws_router
+from .checklist import router as checklist_router
+from .artifacts import router as artifacts_router
+from .analytics import router as analytics_router
+from .export import router as export_router
 from app.core.logger import log
+from app.core.metrics import render_prometheus
 # from .session import router as session_router
 
 api_router = APIRouter()
 
 # api_router.include_router(session_router, prefix="/session", tags=["auth"])
 api_router.include_router(chatbot_router, prefix="/chatbot", tags=["chatbot"])
+api_router.include_router(chatbot_ws_router, prefix="/chatbot", tags=["chatbot"])
+api_router.include_router(checklist_router, prefix="/checklists", tags=["checklists"])
+api_router.include_router(artifacts_router, prefix="/artifacts", tags=["artifacts"])
+api_router.include_router(analytics_router, prefix="/analytics", tags=["analytics"])
+api_router.include_router(export_router, prefix="/export", tags=["export"])
 
 @api_router.get("/health")
 def health_check():
@@ -16,4 +28,9 @@ def health_check():
         dict: Health status information.
     """
     log.info("Health check endpoint called")
-    return {"status": "healthy", "version": "1.0.0"}
\ No newline at end of file
+    return {"status": "healthy", "version": "1.0.0"}
+
+@api_router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus text exposition of in-process metrics."""
+    return render_prometheus()
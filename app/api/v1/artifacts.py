@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Dict
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel, Field
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.database.artifact_store import artifact_content
+from app.database.database import get_db
+from app.models.artifact import Artifact as DBArtifact
+
+router = APIRouter()
+
+
+class ArtifactResponse(BaseModel):
+    id: UUID
+    session_id: UUID
+    type: str
+    version: int
+    title: str
+    content_md: str
+    meta: Dict[str, Any] = Field(default_factory=dict)
+    created_at: datetime
+
+
+#-------------------------------
+# Routes
+#-------------------------------
+
+@router.get("/{artifact_id}", response_model=ArtifactResponse)
+def get_artifact(artifact_id: UUID, db: Session = Depends(get_db)):
+    """One artifact version, as referenced by [[artifact:type:id]] in chat messages."""
+    row = db.execute(
+        select(DBArtifact.id, DBArtifact.session_id, DBArtifact.type, DBArtifact.version,
+               DBArtifact.title, DBArtifact.meta_json, DBArtifact.created_at)
+        .where(DBArtifact.id == artifact_id)
+    ).one_or_none()
+    content = artifact_content(db, artifact_id) if row is not None else None
+    if content is None:
+        raise HTTPException(status_code=404, detail="Artifact not found")
+    return ArtifactResponse(
+        id=row.id,
+        session_id=row.session_id,
+        type=row.type,
+        version=row.version,
+        title=row.title or "",
+        content_md=content,
+        meta=row.meta_json or {},
+        created_at=row.created_at,
+    )
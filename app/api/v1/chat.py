@@ -1,36 +1,57 @@
 from __future__ import annotations
 
 import traceback
-from typing import Dict, Optional, Any, List
+from typing import Dict, Literal, Optional, Any, List, Tuple
 from uuid import UUID, uuid4
-from datetime import datetime
+from datetime import datetime, UTC
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
 from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
-from langchain_core.messages import HumanMessage, AIMessage, BaseMessage
+from langchain_core.messages import HumanMessage, AIMessage
 
+from app import config
+from app.core import session_queue
+from app.core.admission import AdmissionRejected
+from app.core.idempotency import fingerprint, run_idempotent
+from app.core.lifecycle import ShuttingDown, turn
 from app.core.logger import log
-from app.database.database import get_db
-from app.models.sessions import Session as DBSession
-from app.models.message import Message as DBMessage
-from app.models.hiring import HiringContext as DBHiringContext
-from app.schemas.enums import SessionStatus, StepName, Sender, Role
+from app.core.nodes import schedule_jd_refinement
+from app.core.tracing import set_attribute, set_trace_attribute, span
+from app.core.retrieval import index_artifacts
+from app.core.tokens import fit_messages
+from app.database.artifact_store import schedule_compaction
+from app.database.database import get_db, count_statements
+from app.database.turns import (
+    TURN_STATEMENT_BUDGET,
+    StepLog,
+    context_row_to_hiring_dict,
+    load_turn_state,
+    lock_session,
+    persist_turn,
+    step_transitions,
+)
+from app.schemas.enums import SessionStatus, StepName
 
 from app.core.agent import build_graph
 
 router = APIRouter()
 agent = build_graph()
+_STEP_VALUES = {step.value for step in StepName}
 
 class ChatRequest(BaseModel):
     message: str
     session_id: Optional[UUID] = None
+    # "template": instant role-family JD, refined by the LLM after the turn; default config.JD_MODE
+    jd_mode: Optional[Literal["template", "llm"]] = None
 
 class ChatResponse(BaseModel):
     session_id: UUID
     response: str
     current_step: StepName
     hiring_context: Dict[str, Any] = Field(default_factory=dict)
+    # Id the refined JD will be stored under (GET /artifacts/{id} returns 404 until it is ready)
+    refining_artifact_id: Optional[UUID] = None
 
 class SessionSummary(BaseModel):
     id: UUID
@@ -40,168 +61,167 @@ class SessionSummary(BaseModel):
     status: SessionStatus
 
 
-#-------------------------------
-# Helper functions
-#-------------------------------
-
-def _load_langchain_messages(db:Session, session_id:UUID) -> List[BaseMessage]:
-    rows = (
-        db.query(DBMessage)
-        .filter(DBMessage.session_id == session_id)
-        .order_by(DBMessage.created_at.asc())
+@router.post("/chat", response_model=ChatResponse)
+def chat(
+    request: ChatRequest,
+    response: Response,
+    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key"),
+) -> ChatResponse:
+    """
+    Chat entrypoint. With an Idempotency-Key header, retries within the TTL
+    replay the stored response instead of re-running the turn.
+    The request is the root span of its trace (X-Trace-Id when tracing is on).
+    """
+    with span("POST /chat", root=True, idempotency_key=idempotency_key) as root:
+        if root is not None:
+            response.headers["X-Trace-Id"] = root.trace_id
+            if request.session_id:
+                set_trace_attribute("session_id", str(request.session_id))
+        if not idempotency_key:
+            return _serialized_turn(request, db)
+
+        fp = fingerprint(request.model_dump(mode="json"))
+        payload, replayed = run_idempotent(
+            db, idempotency_key, fp, lambda: _serialized_turn(request, db).model_dump(mode="json")
+        )
+        if replayed:
+            response.headers["Idempotent-Replayed"] = "true"
+            set_attribute("replayed", True)
+        return ChatResponse.model_validate(payload)
+
+
+def _serialized_turn(request: ChatRequest, db: Session) -> ChatResponse:
+    """Run the turn with per-session mutual exclusion; messages queued behind a busy session are coalesced."""
+    return session_queue.submit(
+        request.session_id,
+        request.message,
+        lambda message: _run_turn(ChatRequest(message=message, session_id=request.session_id, jd_mode=request.jd_mode), db),
+        key=request.jd_mode,
     )
 
-    out: List[BaseMessage] = []
-
-    for r in rows:
-        if r.role == Role.user.value:
-            out.append(HumanMessage(content=r.content))
-        else:
-            out.append(AIMessage(content=r.content))
-    return out
-
-def _context_to_hiring_dict(ctx: Optional[DBHiringContext]) -> Dict[str, Any]:
-    if not ctx:
-        return {}
-    return {
-        "roles": [ctx.primary_role] if ctx.primary_role else [],
-        "budget": ctx.budget,
-        "timeline": ctx.timeline,
-        "location": ctx.location,
-        "experience_level": ctx.experience_level,
-        "skills": ctx.skills_json or [],
-        "extras": ctx.extras_json or {},
-    }
-
-def _upsert_hiring_context(db:Session,session_id: UUID,incoming: Dict[str, Any]) -> DBHiringContext:
-    ctx = db.query(DBHiringContext).filter(DBHiringContext.session_id == session_id).first()
-    roles = (incoming or {}).get("roles") or []
-    primary_role = roles[0] if roles else None
-
-    patch = {
-        "primary_role": primary_role,
-        "budget": incoming.get("budget"),
-        "timeline": incoming.get("timeline"),
-        "location": incoming.get("location"),
-        "experience_level": incoming.get("experience_level"),
-        "skills_json": incoming.get("skills"),
-        "extras_json": incoming.get("extras"),
-    }
-
-    if ctx:
-        for k,v in patch.items():
-            if v is not None:
-                setattr(ctx, k, v)
-        return ctx
-    else:
-        new_ctx = DBHiringContext(session_id=session_id, **patch)
-        db.add(new_ctx)
-        return new_ctx
 
+def _turn_outcome(
+    result: Any,
+    stored_step: Optional[str],
+    step_log: StepLog,
+    received_at: datetime,
+) -> Tuple[str, str, List[Dict[str, Any]]]:
+    """
+    Validate an agent result and return (ai_response, new_step, step_events).
 
-@router.post("/chat", response_model=ChatResponse)
-def chat(request: ChatRequest, db: Session = Depends(get_db)) -> ChatResponse:
+    An unknown step keeps the prior one; a new session first enters "start".
     """
-    Chat entrypoint:
-    - Ensure session exists
-    - Persist user message
+    current_step = stored_step or StepName.start.value
+    if not isinstance(result, dict):
+        log.error("Agent result is not a dictionary", extra={"result_type": type(result), "result": result})
+        raise ValueError("Invalid agent output structure: expected a dictionary.")
+
+    if "messages" not in result or not isinstance(result["messages"], list):
+        log.error("Agent result is missing 'messages' list", extra={"result": result})
+        raise ValueError("Invalid agent output: 'messages' key is missing or not a list.")
+
+    msgs = result.get("messages") or []
+    ai_msgs = [m for m in msgs if isinstance(m, AIMessage)]
+    ai_response = ai_msgs[-1].content if ai_msgs else "I'm processing your request..."
+
+    new_step_raw = result.get("current_step") or current_step
+    try:
+        new_step = StepName(new_step_raw).value
+    except ValueError:
+        new_step = current_step
+
+    trail = [(step, at) for step, at in result.get("step_trail") or [] if step in _STEP_VALUES]
+    if stored_step is None:
+        trail.insert(0, (StepName.start.value, received_at))
+    return ai_response, new_step, step_transitions(stored_step, step_log, trail)
+
+
+def _run_turn(request: ChatRequest, db: Session) -> ChatResponse:
+    """
+    Run one chat turn:
+    - Take the per-session advisory lock
+    - Load session, hiring context and history (one SELECT)
     - Invoke agent with normalized state
-    - Persist AI reply
-    - Upsert HiringContext
-    - Update Session.current_step
+    - Upsert session, insert user + AI messages, upsert HiringContext (one INSERT ... RETURNING)
+    - Commit once
     """
     # 1) Session (UUID end-to-end)
     sid: UUID = request.session_id or uuid4()
+    set_trace_attribute("session_id", str(sid))
     log.info("Chat request received", extra={"session_id": str(sid), "msg_len": len(request.message), "Chat request type":type(request.message)})
-    session_row = db.query(DBSession).filter(DBSession.id == sid).first()
+    received_at = datetime.now(UTC)
 
     try:
-        if not session_row:
-            session_row = DBSession(
-                id=sid,
-                status=SessionStatus.active.value,
-                current_step=StepName.start.value,
-                context_json={},  # lightweight debug bag
+        with turn(), count_statements() as statements:
+            # 2) Lock the session across workers, then load prior state in one round-trip
+            lock_session(db, sid)
+            stored_step, hiring_data, prior_msgs, step_log = load_turn_state(db, sid)
+            current_step = stored_step or StepName.start.value
+            log.info("Loaded prior messages", extra={"count": len(prior_msgs), "prior_msgs" : type(prior_msgs) })
+
+            prior_msgs.append(HumanMessage(content=request.message))
+
+            # 3) Prepare agent state from normalized DB
+            agent_state = {
+                "messages": fit_messages(prior_msgs, config.HISTORY_TOKEN_BUDGET),
+                "hiring_data": hiring_data,
+                "current_step": current_step,
+                "session_id": str(sid),  # if your graph expects str; otherwise keep UUID
+                "jd_mode": request.jd_mode,
+            }
+
+            result = agent.invoke(agent_state)
+            log.info("Agent invoked successfully", extra={"result_keys": list(result.keys()), "result": result, "type": type(result)})
+            # 4) Extract the AI response, validate the step and derive funnel step events
+            ai_response, new_step, step_events = _turn_outcome(result, stored_step, step_log, received_at)
+
+            # 5) Persist the whole turn in one statement
+            ctx = persist_turn(
+                db,
+                sid,
+                current_step=new_step,
+                user_content=request.message,
+                user_at=received_at,
+                ai_content=ai_response,
+                hiring_data=result.get("hiring_data") or {},
+                artifacts=result.get("artifacts") or [],
+                step_events=step_events,
             )
-            db.add(session_row)
-            db.flush()  # get PK early
-
-        # 2) Load prior messages & persist the new user message BEFORE invoking agent
-        prior_msgs = _load_langchain_messages(db, session_row.id)
-        log.info("Loaded prior messages", extra={"count": len(prior_msgs), "prior_msgs" : type(prior_msgs) })
-
-        user_msg = DBMessage(
-            session_id=session_row.id,
-            sender=Sender.user.value,
-            role=Role.user.value,
-            content=request.message,
-            meta_json={},
-        )
-        db.add(user_msg)
-        db.flush()
-
-        prior_msgs.append(HumanMessage(content=request.message))
-
-        # 3) Prepare agent state from normalized DB
-        hiring_ctx = db.query(DBHiringContext).filter(DBHiringContext.session_id == session_row.id).first()
-        agent_state = {
-            "messages": prior_msgs,
-            "hiring_data": _context_to_hiring_dict(hiring_ctx),
-            "current_step": session_row.current_step,
-            "session_id": str(session_row.id),  # if your graph expects str; otherwise keep UUID
-        }
-
-        result = agent.invoke(agent_state)
-        # print('-'*100)
-        # print(result['messages'])
-        # print('-'*100)
-        log.info("Agent invoked successfully", extra={"result_keys": list(result.keys()), "result": result, "type": type(result)})
-        # 5) Extract AI response safely
-        if not isinstance(result, dict):
-            log.error("Agent result is not a dictionary", extra={"result_type": type(result), "result": result})
-            raise ValueError("Invalid agent output structure: expected a dictionary.")
-
-        if "messages" not in result or not isinstance(result["messages"], list):
-            log.error("Agent result is missing 'messages' list", extra={"result": result})
-            raise ValueError("Invalid agent output: 'messages' key is missing or not a list.")
-
-        msgs = result.get("messages") or []
-        ai_msgs = [m for m in msgs if isinstance(m, AIMessage)]
-        ai_response = ai_msgs[-1].content if ai_msgs else "I'm processing your request..."
-
-        # 6) Persist AI message
-        ai_msg = DBMessage(
-            session_id=session_row.id,
-            sender=Sender.agent.value,
-            role=Role.assistant.value,
-            content=ai_response,
-            meta_json={},
-        )
-        db.add(ai_msg)
-
-        # 7) Upsert hiring context from result (if any)
-        updated_hiring = result.get("hiring_data") or {}
-        ctx = _upsert_hiring_context(db, session_row.id, updated_hiring)
-
-        # 8) Validate & update current_step
-        new_step_raw = result.get("current_step") or session_row.current_step
-        try:
-            session_row.current_step = StepName(new_step_raw).value  # normalize to enum value
-        except ValueError:
-            # keep prior step if agent returned an unknown one
-            pass
 
         db.commit()
-        response = ChatResponse(
-            session_id=session_row.id,
+        index_artifacts(result.get("artifacts") or [])
+        schedule_compaction(sid, result.get("artifacts") or [])
+        refining_artifact_id = schedule_jd_refinement(sid, result.get("jd_refinement"))
+        if statements[0] > TURN_STATEMENT_BUDGET:
+            log.warning("Chat turn exceeded statement budget", extra={"session_id": str(sid), "statements": statements[0], "budget": TURN_STATEMENT_BUDGET})
+
+        chat_response = ChatResponse(
+            session_id=sid,
             response=ai_response,
-            current_step=StepName(session_row.current_step),
-            hiring_context=_context_to_hiring_dict(ctx),
+            current_step=StepName(new_step),
+            hiring_context=context_row_to_hiring_dict(ctx),
+            refining_artifact_id=refining_artifact_id,
         )
-        log.info("Chat response generated", extra={"Chat response" : response, "type": type(response)})
+        log.info("Chat response generated", extra={"Chat response" : chat_response, "type": type(chat_response)})
 
-        return response
+        return chat_response
 
+    except AdmissionRejected as e:
+        db.rollback()
+        log.warning(f"Chat turn rejected by LLM admission control for session {sid}: {e.reason}")
+        raise HTTPException(
+            status_code=429,
+            detail="The assistant is busy; please retry shortly.",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    except ShuttingDown as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=503,
+            detail="The server is restarting; please retry shortly.",
+            headers={"Retry-After": str(e.retry_after)},
+        )
     except Exception as e:
         # 🔥 --- NEW: More Detailed Exception Logging --- 🔥
         log.error(
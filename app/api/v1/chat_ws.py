@@ -0,0 +1,313 @@
+"""
+WebSocket chat channel (/chatbot/ws).
+
+Session state (history, hiring context, step log) is loaded once when the
+connection opens and kept in memory; each turn only writes its deltas
+(the two messages, artifacts, step events and the hiring-context upsert)
+with persist_turn's single INSERT. Agent output is streamed node by node.
+
+Protocol (JSON text frames):
+  client -> {"type": "message", "message": "..."} | {"type": "ping"} | {"type": "pong"}
+  server -> {"type": "session", ...} on connect, {"type": "step", ...} per node,
+            {"type": "turn", ...} per finished turn, {"type": "error", ...},
+            {"type": "artifact", ...} when a background JD refinement lands,
+            {"type": "ping"} heartbeats and {"type": "pong"} replies
+
+The JD path for the connection's turns is chosen with ?jd_mode=template|llm.
+
+Messages that arrive while a turn runs are queued (up to WS_MAX_PENDING,
+beyond which the client gets a "busy" error) and coalesced into the next
+turn, like app.core.session_queue does for /chat. Persisting a turn takes the
+session's advisory lock, so writes from other workers (/chat, another socket
+on the session) are serialized with it. Under the lock the turn compares
+sessions.updated_at with the version its state was loaded at; if another
+worker wrote since, the state is reloaded and the turn is rebased onto it
+(its own hiring-field changes over the stored ones, step events from the
+stored step) instead of writing back the stale snapshot. A turn is thus the
+lock, the version check and the persist, plus a load only after such a write.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import Any, Callable, Dict, List, Literal, Optional
+from uuid import UUID, uuid4
+
+import orjson
+from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from sqlalchemy.orm import Session
+
+from app import config
+from app.core.admission import AdmissionRejected
+from app.core.lifecycle import ShuttingDown, turn
+from app.core.logger import log
+from app.core.metrics import Counter, Gauge
+from app.core.nodes import schedule_jd_refinement
+from app.core.retrieval import index_artifacts
+from app.core.session_events import subscribe
+from app.core.session_queue import COALESCE_SEPARATOR
+from app.core.tracing import set_trace_attribute, span
+from app.core.tokens import TOKEN_COUNT_KEY, count_tokens, fit_messages
+from app.database.artifact_store import schedule_compaction
+from app.database.database import SessionLocal
+from app.database.turns import (
+    StepLog,
+    context_row_to_hiring_dict,
+    load_turn_state,
+    lock_session,
+    persist_turn,
+    session_version,
+)
+from app.schemas.enums import StepName
+
+from .chat import _turn_outcome, agent
+
+router = APIRouter()
+
+ws_connections = Gauge("chat_ws_connections", "Open chat WebSocket connections")
+ws_turns = Counter("chat_ws_turns_total", "Turns run over chat WebSockets")
+ws_dropped_events = Counter("chat_ws_dropped_events_total", "Streamed events dropped because the client stopped reading")
+
+
+@dataclass
+class _ConnectionState:
+    session_id: UUID
+    stored_step: Optional[str]
+    hiring_data: Dict[str, Any]
+    history: List[BaseMessage]
+    step_log: StepLog
+    jd_mode: Optional[str] = None
+    # sessions.updated_at the state reflects (None: the session did not exist)
+    version: Optional[datetime] = None
+    closed: bool = False
+
+    @property
+    def current_step(self) -> str:
+        return self.stored_step or StepName.start.value
+
+
+#-------------------------------
+# Helper functions
+#-------------------------------
+
+def _load_state(session_id: UUID, jd_mode: Optional[str]) -> _ConnectionState:
+    with SessionLocal() as db:
+        # Version first: a write landing in between only costs a reload at the next turn
+        version, _ = session_version(db, session_id)
+        stored_step, hiring_data, history, step_log = load_turn_state(db, session_id)
+    return _ConnectionState(session_id, stored_step, hiring_data, history, step_log, jd_mode, version)
+
+
+def _rebase(db: Session, state: _ConnectionState, hiring_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Another worker wrote to the session since `state` was loaded: reload it in
+    place and return the hiring data to persist, the fields this turn changed
+    applied over the stored ones.
+    """
+    changed = {k: v for k, v in hiring_data.items() if state.hiring_data.get(k) != v}
+    state.stored_step, state.hiring_data, state.history, state.step_log = load_turn_state(db, state.session_id)
+    log.info("Session changed by another worker; rebasing the WebSocket turn",
+             extra={"session_id": str(state.session_id), "changed_fields": sorted(changed)})
+    return {**state.hiring_data, **changed}
+
+
+def _run_turn(state: _ConnectionState, message: str, emit: Callable[[Dict[str, Any]], None]) -> Dict[str, Any]:
+    """Run one turn against the in-memory state, stream node output, persist only the deltas."""
+    with turn(), span("ws.turn", root=True):
+        set_trace_attribute("session_id", str(state.session_id))
+        received_at = datetime.now(UTC)
+        user_message = HumanMessage(content=message)
+        agent_state = {
+            "messages": fit_messages(state.history + [user_message], config.HISTORY_TOKEN_BUDGET),
+            "hiring_data": dict(state.hiring_data),
+            "current_step": state.current_step,
+            "session_id": str(state.session_id),
+            "jd_mode": state.jd_mode,
+        }
+
+        result = None
+        last_ai = None
+        for value in agent.stream(agent_state, stream_mode="values"):
+            result = value
+            msgs = value.get("messages") or []
+            if msgs and isinstance(msgs[-1], AIMessage) and msgs[-1] is not last_ai:
+                last_ai = msgs[-1]
+                emit({"type": "step", "current_step": value.get("current_step"), "content": last_ai.content})
+
+        ai_response, new_step, step_events = _turn_outcome(result, state.stored_step, state.step_log, received_at)
+        hiring_data = result.get("hiring_data") or {}
+
+        with SessionLocal() as db:
+            try:
+                lock_session(db, state.session_id)
+                version, written_at = session_version(db, state.session_id)
+                if version != state.version:
+                    hiring_data = _rebase(db, state, hiring_data)
+                    state.version = version
+                    _, new_step, step_events = _turn_outcome(result, state.stored_step, state.step_log, received_at)
+                ctx = persist_turn(
+                    db,
+                    state.session_id,
+                    current_step=new_step,
+                    user_content=message,
+                    user_at=received_at,
+                    ai_content=ai_response,
+                    hiring_data=hiring_data,
+                    artifacts=result.get("artifacts") or [],
+                    step_events=step_events,
+                )
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+        index_artifacts(result.get("artifacts") or [])
+        schedule_compaction(state.session_id, result.get("artifacts") or [])
+        refining_artifact_id = schedule_jd_refinement(state.session_id, result.get("jd_refinement"))
+        ws_turns.inc()
+
+        # Apply the same deltas to the in-memory state instead of reloading it
+        ai_message = AIMessage(content=ai_response, response_metadata={TOKEN_COUNT_KEY: count_tokens(ai_response)})
+        state.history = state.history + [user_message, ai_message]
+        state.hiring_data = context_row_to_hiring_dict(ctx)
+        state.stored_step = new_step
+        state.version = written_at
+        if step_events:
+            state.step_log = StepLog(
+                step_events[-1]["created_at"],
+                state.step_log.reached | {e["to_step"] for e in step_events},
+            )
+
+        return {
+            "type": "turn",
+            "session_id": str(state.session_id),
+            "response": ai_response,
+            "current_step": new_step,
+            "hiring_context": state.hiring_data,
+            "refining_artifact_id": refining_artifact_id,
+        }
+
+
+#-------------------------------
+# Routes
+#-------------------------------
+
+@router.websocket("/ws")
+async def chat_ws(
+    websocket: WebSocket,
+    session_id: Optional[UUID] = Query(default=None),
+    jd_mode: Optional[Literal["template", "llm"]] = Query(default=None),
+):
+    await websocket.accept()
+    ws_connections.inc()
+    loop = asyncio.get_running_loop()
+    sid = session_id or uuid4()
+    state: Optional[_ConnectionState] = None
+    unsubscribe = None
+    try:
+        try:
+            state = await run_in_threadpool(_load_state, sid, jd_mode)
+        except Exception:
+            log.error(f"Could not load session {sid} for WebSocket chat", exc_info=True)
+            await websocket.close(code=1011)
+            return
+
+        inbox: asyncio.Queue[str] = asyncio.Queue(maxsize=config.WS_MAX_PENDING)
+        # Bounded so a client that stops reading stalls streaming instead of growing memory
+        outbox: asyncio.Queue[Dict[str, Any]] = asyncio.Queue(maxsize=config.WS_SEND_QUEUE)
+        last_seen = loop.time()
+
+        def emit(event: Dict[str, Any]):
+            """Called from the turn's worker thread; waits for room in the outbox, then gives up."""
+            if state.closed:
+                return
+            future = asyncio.run_coroutine_threadsafe(outbox.put(event), loop)
+            try:
+                future.result(timeout=config.WS_SEND_TIMEOUT_SECONDS)
+            except Exception:
+                future.cancel()
+                ws_dropped_events.inc()
+
+        async def sender():
+            while True:
+                event = await outbox.get()
+                await websocket.send_text(orjson.dumps(event).decode("utf-8"))
+
+        async def receiver():
+            nonlocal last_seen
+            while True:
+                try:
+                    raw = await websocket.receive_text()
+                except WebSocketDisconnect:
+                    return
+                last_seen = loop.time()
+                try:
+                    frame = json.loads(raw)
+                except json.JSONDecodeError:
+                    await outbox.put({"type": "error", "status": 400, "detail": "Frames must be JSON"})
+                    continue
+                kind = frame.get("type")
+                if kind == "ping":
+                    await outbox.put({"type": "pong"})
+                elif kind == "message" and isinstance(frame.get("message"), str) and frame["message"].strip():
+                    try:
+                        inbox.put_nowait(frame["message"])
+                    except asyncio.QueueFull:
+                        await outbox.put({"type": "error", "status": 429, "detail": "busy", "retry_after": 1})
+                elif kind != "pong":
+                    await outbox.put({"type": "error", "status": 400, "detail": f"Unsupported frame type: {kind!r}"})
+
+        async def worker():
+            while True:
+                batch = [await inbox.get()]
+                while not inbox.empty():
+                    batch.append(inbox.get_nowait())
+                try:
+                    payload = await run_in_threadpool(_run_turn, state, COALESCE_SEPARATOR.join(batch), emit)
+                except AdmissionRejected as e:
+                    payload = {"type": "error", "status": 429, "detail": "The assistant is busy; please retry shortly.",
+                               "retry_after": e.retry_after}
+                except ShuttingDown as e:
+                    payload = {"type": "error", "status": 503, "detail": "The server is restarting; please reconnect shortly.",
+                               "retry_after": e.retry_after}
+                except Exception as e:
+                    log.error(f"WebSocket chat turn failed for session {sid}", exc_info=True)
+                    payload = {"type": "error", "status": 500, "detail": f"An internal error occurred: {e}"}
+                await outbox.put(payload)
+
+        async def heartbeat():
+            while True:
+                await asyncio.sleep(config.WS_HEARTBEAT_SECONDS)
+                if loop.time() - last_seen > config.WS_IDLE_TIMEOUT_SECONDS:
+                    log.info(f"Closing idle chat WebSocket for session {sid}")
+                    await websocket.close(code=1001)
+                    return
+                if not outbox.full():
+                    outbox.put_nowait({"type": "ping"})
+
+        await outbox.put({
+            "type": "session",
+            "session_id": str(sid),
+            "current_step": state.current_step,
+            "hiring_context": state.hiring_data,
+        })
+        # Background results for this session (refined JDs) are pushed like streamed steps
+        unsubscribe = subscribe(sid, emit)
+        tasks = [asyncio.create_task(t()) for t in (sender, receiver, worker, heartbeat)]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() and not isinstance(task.exception(), (WebSocketDisconnect, RuntimeError)):
+                    log.error(f"Chat WebSocket task failed for session {sid}", exc_info=task.exception())
+        finally:
+            for task in tasks:
+                task.cancel()
+    finally:
+        if unsubscribe is not None:
+            unsubscribe()
+        if state is not None:
+            state.closed = True
+        ws_connections.dec()
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+from typing import Dict, List, Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel, Field
+from sqlalchemy import Boolean, Integer, and_, cast, column, func, select, update, values
+from sqlalchemy.dialects.postgresql import UUID as PGUUID
+from sqlalchemy.orm import Session
+
+from app.core.logger import log
+from app.database.database import get_db
+from app.models.checklist import ChecklistItem as DBChecklistItem
+
+router = APIRouter()
+
+
+class ChecklistItemOut(BaseModel):
+    id: UUID
+    text: str
+    position: int
+    is_done: bool
+
+
+class ChecklistProgress(BaseModel):
+    artifact_id: UUID
+    total: int = 0
+    done: int = 0
+
+
+class ChecklistResponse(BaseModel):
+    artifact_id: UUID
+    items: List[ChecklistItemOut] = Field(default_factory=list)
+    progress: ChecklistProgress
+
+
+class ChecklistItemUpdate(BaseModel):
+    id: UUID
+    is_done: Optional[bool] = None
+    position: Optional[int] = None
+
+
+class ChecklistBatchUpdate(BaseModel):
+    updates: List[ChecklistItemUpdate] = Field(min_length=1)
+
+
+class ChecklistBatchResponse(BaseModel):
+    updated: int
+    progress: ChecklistProgress
+
+
+#-------------------------------
+# Helper functions
+#-------------------------------
+
+def _progress_query(artifact_ids: List[UUID]):
+    """Per-artifact (total, done) counts computed in SQL."""
+    return (
+        select(
+            DBChecklistItem.artifact_id,
+            func.count().label("total"),
+            func.count().filter(DBChecklistItem.is_done.is_(True)).label("done"),
+        )
+        .where(DBChecklistItem.artifact_id.in_(artifact_ids))
+        .group_by(DBChecklistItem.artifact_id)
+    )
+
+
+def _apply_updates(db: Session, artifact_id: UUID, updates: List[ChecklistItemUpdate]):
+    """
+    Apply all toggles/reorders with one UPDATE ... FROM (VALUES ...) and
+    return (updated, total, done) from the same statement.
+
+    The outer SELECT sees the pre-update snapshot, so `done` is the stored
+    count for untouched rows plus the RETURNING rows that are now done.
+    """
+    v = values(
+        column("id", PGUUID(as_uuid=True)),
+        column("is_done", Boolean),
+        column("position", Integer),
+        name="v",
+    ).data([(u.id, u.is_done, u.position) for u in updates])
+
+    upd = (
+        update(DBChecklistItem)
+        .where(
+            DBChecklistItem.id == cast(v.c.id, PGUUID(as_uuid=True)),
+            DBChecklistItem.artifact_id == artifact_id,
+        )
+        .values(
+            is_done=func.coalesce(cast(v.c.is_done, Boolean), DBChecklistItem.is_done),
+            position=func.coalesce(cast(v.c.position, Integer), DBChecklistItem.position),
+            updated_at=func.now(),
+        )
+        .returning(DBChecklistItem.id, DBChecklistItem.is_done)
+        .cte("upd")
+    )
+
+    untouched_done = (
+        select(func.count())
+        .where(
+            DBChecklistItem.artifact_id == artifact_id,
+            DBChecklistItem.is_done.is_(True),
+            DBChecklistItem.id.not_in(select(upd.c.id)),
+        )
+        .scalar_subquery()
+    )
+    stmt = select(
+        select(func.count()).select_from(upd).scalar_subquery().label("updated"),
+        select(func.count()).where(DBChecklistItem.artifact_id == artifact_id).scalar_subquery().label("total"),
+        (untouched_done + select(func.count()).select_from(upd).where(upd.c.is_done.is_(True)).scalar_subquery()).label("done"),
+    )
+    return db.execute(stmt).one()
+
+
+#-------------------------------
+# Routes
+#-------------------------------
+
+@router.get("/progress", response_model=List[ChecklistProgress])
+def checklist_progress(artifact_ids: List[UUID] = Query(...), db: Session = Depends(get_db)) -> List[ChecklistProgress]:
+    """Completion counts for many plans at once (one GROUP BY query)."""
+    rows = db.execute(_progress_query(artifact_ids)).all()
+    found: Dict[UUID, ChecklistProgress] = {
+        r.artifact_id: ChecklistProgress(artifact_id=r.artifact_id, total=r.total, done=r.done) for r in rows
+    }
+    return [found.get(aid) or ChecklistProgress(artifact_id=aid) for aid in artifact_ids]
+
+
+@router.get("/{artifact_id}", response_model=ChecklistResponse)
+def get_checklist(artifact_id: UUID, db: Session = Depends(get_db)) -> ChecklistResponse:
+    """List a plan's checklist items in position order with completion counts."""
+    total = func.count().over().label("total")
+    done = func.count().filter(DBChecklistItem.is_done.is_(True)).over().label("done")
+    rows = db.execute(
+        select(DBChecklistItem.id, DBChecklistItem.text, DBChecklistItem.position, DBChecklistItem.is_done, total, done)
+        .where(DBChecklistItem.artifact_id == artifact_id)
+        .order_by(DBChecklistItem.position.asc())
+    ).all()
+    if not rows:
+        raise HTTPException(status_code=404, detail="Checklist not found")
+
+    return ChecklistResponse(
+        artifact_id=artifact_id,
+        items=[ChecklistItemOut(id=r.id, text=r.text, position=r.position, is_done=r.is_done) for r in rows],
+        progress=ChecklistProgress(artifact_id=artifact_id, total=rows[0].total, done=rows[0].done),
+    )
+
+
+@router.patch("/{artifact_id}/items", response_model=ChecklistBatchResponse)
+def update_checklist_items(artifact_id: UUID, body: ChecklistBatchUpdate, db: Session = Depends(get_db)) -> ChecklistBatchResponse:
+    """Apply a batch of toggles/reorders in one set-based UPDATE."""
+    # UPDATE ... FROM VALUES would apply one of two rows for the same item, chosen arbitrarily
+    ids = [u.id for u in body.updates]
+    if len(set(ids)) != len(ids):
+        raise HTTPException(status_code=422, detail="Each checklist item may appear only once per batch")
+
+    try:
+        row = _apply_updates(db, artifact_id, body.updates)
+        db.commit()
+    except Exception as e:
+        log.error(f"Checklist update failed for artifact {artifact_id}", exc_info=True)
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"An internal error occurred: {str(e)}")
+
+    if row.total == 0:
+        raise HTTPException(status_code=404, detail="Checklist not found")
+
+    log.info("Checklist items updated", extra={"artifact_id": str(artifact_id), "updated": row.updated})
+    return ChecklistBatchResponse(
+        updated=row.updated,
+        progress=ChecklistProgress(artifact_id=artifact_id, total=row.total, done=row.done),
+    )
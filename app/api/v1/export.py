@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Iterator, Literal, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from app.core.logger import log
+from app.database.database import SessionLocal
+from app.database.export import DEFAULT_BATCH, ExportFilter, ExportStats, iter_ndjson, iter_parquet, pa
+
+router = APIRouter()
+
+
+#-------------------------------
+# Helper functions
+#-------------------------------
+
+def _stream(kind: str, f: ExportFilter, batch: int, entity: str) -> Iterator[bytes]:
+    """
+    Generator body for the streaming response. It owns its DB session: the
+    request-scoped one from get_db is closed before the body is streamed.
+    """
+    stats = ExportStats()
+    with SessionLocal() as db:
+        if kind == "ndjson":
+            yield from iter_ndjson(db, f, batch, stats)
+        else:
+            yield from iter_parquet(db, f, entity, batch, stats)
+    log.info(f"Export ({kind}) finished: {stats.summary()}")
+
+
+#-------------------------------
+# Routes
+#-------------------------------
+
+@router.get("/sessions")
+def export_sessions(
+    format: Literal["ndjson", "parquet"] = Query(default="ndjson"),
+    entity: Literal["sessions", "messages", "artifacts"] = Query(
+        default="sessions", description="Table to export when format=parquet (NDJSON nests all three)"
+    ),
+    since: Optional[datetime] = Query(default=None, description="Sessions created at or after"),
+    until: Optional[datetime] = Query(default=None, description="Sessions created before"),
+    status: Optional[str] = Query(default=None),
+    batch: int = Query(default=DEFAULT_BATCH, ge=1, le=10_000),
+):
+    """Stream sessions with hiring context, messages and artifacts without materializing the export."""
+    if format == "parquet" and pa is None:
+        raise HTTPException(status_code=501, detail="Parquet export requires pyarrow on the server")
+
+    f = ExportFilter(since=since, until=until, status=status)
+    if format == "ndjson":
+        return StreamingResponse(
+            _stream("ndjson", f, batch, entity),
+            media_type="application/x-ndjson",
+            headers={"Content-Disposition": 'attachment; filename="sessions.ndjson"'},
+        )
+    return StreamingResponse(
+        _stream("parquet", f, batch, entity),
+        media_type="application/vnd.apache.parquet",
+        headers={"Content-Disposition": f'attachment; filename="{entity}.parquet"'},
+    )
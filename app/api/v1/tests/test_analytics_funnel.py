@@ -0,0 +1,70 @@
+"""Funnel: fixed step order first, conversion against the previous funnel step, durations from timed exits."""
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
+
+from app.api.v1.analytics import FUNNEL_STEPS, MAX_FUNNEL_DAYS, funnel
+
+UNTIL = datetime(2026, 3, 2, 12, 30, tzinfo=UTC)
+UTC_DAY_AGO = UNTIL - timedelta(days=1)
+
+
+class _RollupDb:
+    def __init__(self, rows):
+        self.rows, self.statements = rows, []
+
+    def execute(self, stmt):
+        self.statements.append(stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+        return SimpleNamespace(all=lambda: self.rows)
+
+
+def row(step, sessions, entered=None, timed_exits=0, duration_ms_sum=0):
+    return SimpleNamespace(step=step, sessions=sessions, entered=entered or sessions,
+                           timed_exits=timed_exits, duration_ms_sum=duration_ms_sum)
+
+
+def test_steps_follow_the_funnel_then_the_rest_alphabetically():
+    db = _RollupDb([row("post_notion", 1), row("start", 10), row("clarify", 6), row("complete", 1), row("research", 8)])
+    steps = funnel(since=UTC_DAY_AGO, until=UNTIL, db=db).steps
+    assert [s.step for s in steps] == FUNNEL_STEPS + ["clarify", "complete"]
+
+
+def test_conversion_is_against_the_previous_funnel_step():
+    db = _RollupDb([row("start", 10), row("research", 8), row("create_jd", 6, entered=9), row("clarify", 7)])
+    steps = {s.step: s for s in funnel(since=UTC_DAY_AGO, until=UNTIL, db=db).steps}
+    assert steps["start"].conversion is None
+    assert steps["research"].conversion == 0.8
+    assert steps["create_jd"].conversion == 0.75 and steps["create_jd"].entered == 9
+    # Nobody reached create_plan: it converts at 0, and the step after it has nothing to convert from
+    assert (steps["create_plan"].sessions, steps["create_plan"].conversion) == (0, 0.0)
+    assert steps["post_notion"].conversion is None
+    assert steps["clarify"].conversion is None
+
+
+def test_average_duration_uses_timed_exits_only():
+    db = _RollupDb([row("start", 4, timed_exits=2, duration_ms_sum=5000), row("research", 3)])
+    steps = {s.step: s for s in funnel(since=UTC_DAY_AGO, until=UNTIL, db=db).steps}
+    assert steps["start"].avg_duration_seconds == 2.5
+    assert steps["research"].avg_duration_seconds is None
+
+
+def test_window_is_rounded_down_to_whole_hours():
+    db = _RollupDb([])
+    funnel(since=UNTIL - timedelta(hours=3), until=UNTIL, db=db)
+    sql = str(db.statements[0])
+    assert "step_rollup_hourly.hour >= '2026-03-02 09:00:00+00:00'" in sql
+    assert "step_rollup_hourly.hour < '2026-03-02 12:30:00+00:00'" in sql
+    assert "GROUP BY step_rollup_hourly.step" in sql
+
+
+@pytest.mark.parametrize("since", [UNTIL, UNTIL + timedelta(hours=1), UNTIL - timedelta(days=MAX_FUNNEL_DAYS + 1)])
+def test_empty_or_oversized_windows_are_rejected(since):
+    with pytest.raises(HTTPException) as rejected:
+        funnel(since=since, until=UNTIL, db=_RollupDb([]))
+    assert rejected.value.status_code == 422
+
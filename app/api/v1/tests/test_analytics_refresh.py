@@ -0,0 +1,33 @@
+"""The budget view is revalidated by at most one background refresh at a time."""
+from __future__ import annotations
+
+import threading
+
+from app.api.v1 import analytics
+
+
+def test_one_refresh_in_flight(monkeypatch):
+    started, release = [], threading.Event()
+
+    def slow_refresh(db):
+        started.append(1)
+        release.wait(5)
+
+    monkeypatch.setattr(analytics, "budget_view_age", lambda: None)
+    monkeypatch.setattr(analytics, "refresh_budget_view", slow_refresh)
+    monkeypatch.setattr(analytics, "SessionLocal", lambda: _NullSession())
+
+    for _ in range(5):
+        analytics._maybe_refresh()
+    release.set()
+    with analytics._refreshing:  # the background refresh has finished and released it
+        pass
+    assert started == [1]
+
+
+class _NullSession:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
@@ -0,0 +1,39 @@
+"""The /chat turn must stay within TURN_STATEMENT_BUDGET statements (lock, load, persist)."""
+from __future__ import annotations
+
+from datetime import UTC, datetime
+
+import pytest
+from langchain_core.messages import AIMessage
+
+
+
+class _StubAgent:
+    """Stands in for the compiled graph: echoes a reply, a JD and a plan with a checklist."""
+
+    def invoke(self, state):
+        return {
+            "messages": [*state["messages"], AIMessage(content="Here is your job description:\n\n## Backend Engineer\n\nJD body")],
+            "hiring_data": {"roles": ["Backend Engineer"], "budget": "$120k-$140k", "timeline": "6 weeks"},
+            "current_step": "create_plan",
+            "step_trail": [("create_jd", datetime.now(UTC)), ("create_plan", datetime.now(UTC))],
+            "artifacts": [
+                {"type": "job_description", "title": "Backend Engineer", "content_md": "JD body"},
+                {"type": "hiring_plan", "title": "Plan", "content_md": "# Hiring Plan", "checklist": ["Post the JD", "Screen"]},
+            ],
+        }
+
+
+@pytest.mark.parametrize("turns", [1, 3])
+def test_turn_statement_count(pg_session, session_id, monkeypatch, turns):
+    # Imported after pg_session so collection needs neither a database nor the graph's LLM client
+    from app.api.v1 import chat
+    from app.database.database import count_statements
+    from app.database.turns import TURN_STATEMENT_BUDGET
+
+    monkeypatch.setattr(chat, "agent", _StubAgent())
+    for i in range(turns):  # the first turn creates the session, later ones load history and bump versions
+        with count_statements() as statements:
+            response = chat._run_turn(chat.ChatRequest(message=f"message {i}", session_id=session_id), pg_session)
+        assert response.session_id == session_id
+        assert statements[0] == TURN_STATEMENT_BUDGET
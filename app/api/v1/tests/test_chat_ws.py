@@ -0,0 +1,174 @@
+"""WebSocket chat: the persist takes the session lock and rebases on other workers' writes, queued messages coalesce, overflow is refused, idle sockets close."""
+from __future__ import annotations
+
+import threading
+from datetime import UTC, datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+pytest.importorskip("langchain_google_genai", reason="the graph's LLM client is not installed")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from app import config
+from app.api.v1 import chat_ws
+from app.core.session_queue import COALESCE_SEPARATOR
+from app.database.turns import StepLog
+
+
+class _StubAgent:
+    """Adds a timeline to whatever hiring data the turn starts from and moves to create_jd."""
+
+    def __init__(self):
+        self.seen = []
+
+    def stream(self, state, stream_mode):
+        self.seen.append(state)
+        yield {
+            "messages": [*state["messages"], AIMessage(content="reply")],
+            "hiring_data": {**state["hiring_data"], "roles": ["Backend Engineer"], "timeline": "6 weeks"},
+            "current_step": "create_jd",
+            "step_trail": [("create_jd", datetime.now(UTC))],
+            "artifacts": [],
+        }
+
+
+class _FakeSession:
+    def __init__(self, calls):
+        self.calls = calls
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def commit(self):
+        self.calls.append("commit")
+
+    def rollback(self):
+        self.calls.append("rollback")
+
+
+def _state(session_id, version=None) -> chat_ws._ConnectionState:
+    return chat_ws._ConnectionState(session_id, None, {}, [], StepLog(None, frozenset()), version=version)
+
+
+T0 = datetime(2026, 3, 2, 9, 0, tzinfo=UTC)
+
+
+class _Calls(list):
+    stored_version = None  # what session_version reports as sessions.updated_at
+
+
+@pytest.fixture
+def db_calls(monkeypatch):
+    """Records lock/version/load/persist; this turn's write happens at T0 + 1h."""
+    calls = _Calls()
+    monkeypatch.setattr(chat_ws, "SessionLocal", lambda: _FakeSession(calls))
+    monkeypatch.setattr(chat_ws, "lock_session", lambda db, sid: calls.append(("lock", sid)))
+
+    def session_version(db, sid):
+        calls.append(("version", sid))
+        return calls.stored_version, T0 + timedelta(hours=1)
+
+    def persist_turn(db, sid, **kw):
+        calls.append(("persist", kw))
+        return SimpleNamespace(hiring=kw["hiring_data"])
+
+    monkeypatch.setattr(chat_ws, "session_version", session_version)
+    monkeypatch.setattr(chat_ws, "persist_turn", persist_turn)
+    monkeypatch.setattr(chat_ws, "context_row_to_hiring_dict", lambda ctx: ctx.hiring)
+    for name in ("index_artifacts", "schedule_compaction", "schedule_jd_refinement"):
+        monkeypatch.setattr(chat_ws, name, lambda *args: None)
+    return calls
+
+
+def test_persist_takes_the_session_lock_first(monkeypatch, session_id, db_calls):
+    monkeypatch.setattr(chat_ws, "agent", _StubAgent())
+    monkeypatch.setattr(chat_ws, "load_turn_state", lambda *args: pytest.fail("an unchanged session is not reloaded"))
+
+    state = _state(session_id)
+    payload = chat_ws._run_turn(state, "hire a backend engineer", lambda event: None)
+    assert payload["response"] == "reply"
+    assert [c[0] if isinstance(c, tuple) else c for c in db_calls] == ["lock", "version", "persist", "commit"]
+    assert state.version == T0 + timedelta(hours=1)  # what this turn wrote, so the next turn needs no reload
+    assert len(state.history) == 2
+
+
+def test_turn_is_rebased_on_another_workers_write(monkeypatch, session_id, db_calls):
+    agent = _StubAgent()
+    monkeypatch.setattr(chat_ws, "agent", agent)
+    db_calls.stored_version = T0 + timedelta(minutes=5)  # written by /chat after this socket loaded the session
+    fresh = (
+        "research",
+        {"roles": ["Backend Engineer"], "budget": "$150k", "location": "Berlin"},
+        [HumanMessage(content="from /chat"), AIMessage(content="ok")],
+        StepLog(T0 + timedelta(minutes=5), frozenset({"start", "research"})),
+    )
+    monkeypatch.setattr(chat_ws, "load_turn_state", lambda db, sid: db_calls.append(("load", sid)) or fresh)
+
+    state = _state(session_id, version=T0)
+    state.hiring_data = {"roles": ["Backend Engineer"], "budget": "$120k"}
+    chat_ws._run_turn(state, "within 6 weeks", lambda event: None)
+
+    assert [c[0] if isinstance(c, tuple) else c for c in db_calls] == ["lock", "version", "load", "persist", "commit"]
+    persisted = db_calls[3][1]
+    # The other worker's budget and location survive; this turn's timeline is applied on top
+    assert persisted["hiring_data"] == {"roles": ["Backend Engineer"], "budget": "$150k", "location": "Berlin",
+                                        "timeline": "6 weeks"}
+    assert [(e["from_step"], e["to_step"], e["first_reach"]) for e in persisted["step_events"]] == [
+        ("research", "create_jd", True)
+    ]
+    assert persisted["current_step"] == "create_jd"
+    assert [m.content for m in state.history] == ["from /chat", "ok", "within 6 weeks", "reply"]
+    assert state.version == T0 + timedelta(hours=1)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(chat_ws, "_load_state", lambda sid, jd_mode: _state(sid))
+    app = FastAPI()
+    app.include_router(chat_ws.router)
+    return TestClient(app)
+
+
+def test_queued_messages_coalesce_and_overflow_is_busy(client, monkeypatch):
+    monkeypatch.setattr(config, "WS_MAX_PENDING", 2)
+    started, release, turns = threading.Event(), threading.Event(), []
+
+    def fake_turn(state, message, emit):
+        turns.append(message)
+        started.set()
+        release.wait(5)
+        return {"type": "turn", "response": message}
+
+    monkeypatch.setattr(chat_ws, "_run_turn", fake_turn)
+    with client.websocket_connect("/ws") as ws:
+        assert ws.receive_json()["type"] == "session"
+        ws.send_json({"type": "message", "message": "first"})
+        assert started.wait(5)
+        for text in ("second", "third", "fourth"):
+            ws.send_json({"type": "message", "message": text})
+
+        busy = ws.receive_json()
+        assert (busy["type"], busy["status"], busy["detail"]) == ("error", 429, "busy")
+        release.set()
+        assert ws.receive_json()["response"] == "first"
+        assert ws.receive_json()["response"] == COALESCE_SEPARATOR.join(["second", "third"])
+    assert turns == ["first", COALESCE_SEPARATOR.join(["second", "third"])]
+
+
+def test_idle_connection_is_closed(client, monkeypatch):
+    monkeypatch.setattr(config, "WS_HEARTBEAT_SECONDS", 0.05)
+    monkeypatch.setattr(config, "WS_IDLE_TIMEOUT_SECONDS", 0.2)
+    with client.websocket_connect("/ws") as ws:
+        assert ws.receive_json()["type"] == "session"
+        with pytest.raises(WebSocketDisconnect) as closed:
+            while True:
+                assert ws.receive_json()["type"] == "ping"
+        assert closed.value.code == 1001
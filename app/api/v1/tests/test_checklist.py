@@ -0,0 +1,70 @@
+"""Checklist batch updates: one statement per batch, and an item may appear only once."""
+from __future__ import annotations
+
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1 import checklist
+from app.database.database import get_db
+
+
+class _RecordingDb:
+    def __init__(self):
+        self.calls = []
+
+    def commit(self):
+        self.calls.append("commit")
+
+    def rollback(self):
+        self.calls.append("rollback")
+
+
+@pytest.fixture
+def db():
+    return _RecordingDb()
+
+
+@pytest.fixture
+def client(db):
+    app = FastAPI()
+    app.include_router(checklist.router, prefix="/checklist")
+    app.dependency_overrides[get_db] = lambda: db
+    return TestClient(app)
+
+
+def test_duplicate_item_ids_are_rejected_before_the_update(client, db, monkeypatch):
+    monkeypatch.setattr(checklist, "_apply_updates", lambda *args: pytest.fail("the batch must not reach the database"))
+    item = str(uuid4())
+    resp = client.patch(f"/checklist/{uuid4()}/items", json={"updates": [
+        {"id": item, "is_done": True},
+        {"id": str(uuid4()), "position": 2},
+        {"id": item, "is_done": False},
+    ]})
+    assert resp.status_code == 422
+    assert db.calls == []
+
+
+def test_distinct_item_ids_are_applied_in_one_update(client, db, monkeypatch):
+    applied = []
+
+    def apply_updates(session, artifact_id, updates):
+        applied.append([u.id for u in updates])
+        return SimpleNamespace(updated=2, total=3, done=1)
+
+    monkeypatch.setattr(checklist, "_apply_updates", apply_updates)
+    artifact_id, ids = uuid4(), [uuid4(), uuid4()]
+    resp = client.patch(f"/checklist/{artifact_id}/items", json={"updates": [
+        {"id": str(ids[0]), "is_done": True},
+        {"id": str(ids[1]), "position": 0},
+    ]})
+    assert resp.status_code == 200
+    assert resp.json() == {"updated": 2, "progress": {"artifact_id": str(artifact_id), "total": 3, "done": 1}}
+    assert applied == [ids] and db.calls == ["commit"]
+
+
+def test_empty_batch_is_rejected(client):
+    assert client.patch(f"/checklist/{uuid4()}/items", json={"updates": []}).status_code == 422
@@ -0,0 +1,117 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def _flag(name: str, default: bool) -> bool:
+    raw = os.getenv(name)
+    if raw is None:
+        return default
+    return raw.strip().lower() in ("1", "true", "yes", "on")
+
+
+# Ask the parse call to also draft the JD when the request is complete,
+# saving the second LLM round-trip in create_jd_node. Opt-in: the combined
+# prompt is longer and its JD is only kept when it passes _is_valid_jd.
+COMBINED_PARSE_JD = _flag("COMBINED_PARSE_JD", False)
+
+# When the stored context is already complete, start JD generation from it
+# in parallel with the parse call and keep it if the parse changes nothing
+# the JD depends on.
+SPECULATIVE_JD = _flag("SPECULATIVE_JD", False)
+
+# Default JD path when a request does not choose one: "llm" drafts the JD
+# with the model during the turn; "template" fills a role-family template
+# instantly and refines it with the model in the background after the turn.
+JD_MODE = os.getenv("JD_MODE", "llm")
+
+# Token budgets (estimated tokens) for what reaches the model.
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "2000"))
+PARSE_HISTORY_TOKEN_BUDGET = int(os.getenv("PARSE_HISTORY_TOKEN_BUDGET", "400"))
+INPUT_TOKEN_BUDGET = int(os.getenv("INPUT_TOKEN_BUDGET", "1500"))
+
+# Idempotency-Key handling for /chat retries.
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", str(24 * 3600)))
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "120"))
+# A pending claim older than this is treated as abandoned (owner crashed) and can be reclaimed
+IDEMPOTENCY_PENDING_TIMEOUT_SECONDS = float(os.getenv("IDEMPOTENCY_PENDING_TIMEOUT_SECONDS", "300"))
+
+# Global admission control for LLM calls.
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_RPM = float(os.getenv("LLM_RPM", "60"))
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "32"))
+LLM_MAX_WAIT_SECONDS = float(os.getenv("LLM_MAX_WAIT_SECONDS", "10"))
+
+# LLM resilience: per-call timeout, hedging and circuit breaker with a
+# secondary provider (the Ollama container from docker-compose).
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+LLM_HEDGE_ENABLED = _flag("LLM_HEDGE_ENABLED", True)
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+LLM_HEDGE_DEFAULT_DELAY_SECONDS = float(os.getenv("LLM_HEDGE_DEFAULT_DELAY_SECONDS", "4"))
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL")
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "tinyllama")
+
+# Local BM25 research over past JDs and job postings.
+RESEARCH_ENABLED = _flag("RESEARCH_ENABLED", True)
+RESEARCH_INDEX_DIR = os.getenv("RESEARCH_INDEX_DIR", "data/research_index")
+RESEARCH_TOP_K = int(os.getenv("RESEARCH_TOP_K", "3"))
+RESEARCH_SNIPPET_CHARS = int(os.getenv("RESEARCH_SNIPPET_CHARS", "400"))
+RESEARCH_COMPACT_THRESHOLD = int(os.getenv("RESEARCH_COMPACT_THRESHOLD", "5000"))
+
+# Semantic near-duplicate JD cache (hashing-vectorizer embeddings, mmap'd NumPy matrix).
+SEMANTIC_CACHE_ENABLED = _flag("SEMANTIC_CACHE_ENABLED", True)
+SEMANTIC_CACHE_DIR = os.getenv("SEMANTIC_CACHE_DIR", "data/jd_cache")
+SEMANTIC_CACHE_DIMS = int(os.getenv("SEMANTIC_CACHE_DIMS", "512"))
+SEMANTIC_CACHE_CAPACITY = int(os.getenv("SEMANTIC_CACHE_CAPACITY", "100000"))
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.9"))
+
+# Analytics: budget_stats_mv is checked for staleness at most this often.
+BUDGET_VIEW_REFRESH_SECONDS = float(os.getenv("BUDGET_VIEW_REFRESH_SECONDS", "60"))
+
+# Response compression (brotli if installed and accepted, else gzip).
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+
+# /chatbot/ws: heartbeat cadence, idle cutoff and per-connection queue bounds.
+WS_HEARTBEAT_SECONDS = float(os.getenv("WS_HEARTBEAT_SECONDS", "20"))
+WS_IDLE_TIMEOUT_SECONDS = float(os.getenv("WS_IDLE_TIMEOUT_SECONDS", "60"))
+WS_MAX_PENDING = int(os.getenv("WS_MAX_PENDING", "4"))
+WS_SEND_QUEUE = int(os.getenv("WS_SEND_QUEUE", "32"))
+WS_SEND_TIMEOUT_SECONDS = float(os.getenv("WS_SEND_TIMEOUT_SECONDS", "10"))
+
+# Notion: re-generated artifacts update their existing blocks in place
+# (changed blocks only) instead of appending a fresh copy to the page.
+NOTION_INCREMENTAL_SYNC = _flag("NOTION_INCREMENTAL_SYNC", True)
+
+# Dry runs (scripts/run_batch.py --dry-run): the graph runs as usual but JDs are
+# not posted to Notion and nothing is written to the semantic cache or research index.
+DRY_RUN = _flag("DRY_RUN", False)
+
+# Graceful shutdown: running turns and queued background jobs get this long to
+# finish; queued Notion uploads that can't are spooled here and replayed on start.
+SHUTDOWN_DRAIN_SECONDS = float(os.getenv("SHUTDOWN_DRAIN_SECONDS", "25"))
+SHUTDOWN_SPOOL_PATH = os.getenv("SHUTDOWN_SPOOL_PATH", "data/pending_jobs.jsonl")
+
+# Worker processes serving the app (read by uvicorn/gunicorn too); per-process
+# limits such as LLM admission are divided by it.
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+
+# Artifact versions: every Nth version (and the newest) is stored in full, the
+# rest as compressed reverse deltas; reads rebuild them through an LRU.
+ARTIFACT_SNAPSHOT_EVERY = int(os.getenv("ARTIFACT_SNAPSHOT_EVERY", "10"))
+ARTIFACT_CACHE_SIZE = int(os.getenv("ARTIFACT_CACHE_SIZE", "512"))
+
+# Tracing: "json" appends finished spans to TRACING_JSON_PATH as NDJSON,
+# "collector" POSTs them in batches to TRACING_COLLECTOR_URL
+# (scripts/trace_collector.py is a local stand-in); empty disables tracing.
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "").strip().lower()
+TRACING_JSON_PATH = os.getenv("TRACING_JSON_PATH", "data/traces.jsonl")
+TRACING_COLLECTOR_URL = os.getenv("TRACING_COLLECTOR_URL", "http://127.0.0.1:4318/v1/traces")
+TRACING_SAMPLE_RATE = float(os.getenv("TRACING_SAMPLE_RATE", "1.0"))
+TRACING_QUEUE_SIZE = int(os.getenv("TRACING_QUEUE_SIZE", "10000"))
+TRACING_BATCH_SIZE = int(os.getenv("TRACING_BATCH_SIZE", "512"))
+TRACING_FLUSH_SECONDS = float(os.getenv("TRACING_FLUSH_SECONDS", "1.0"))
@@ -0,0 +1,158 @@
+"""
+Admission control for LLM calls.
+
+Every call through get_llm() takes a slot from a global controller that
+enforces a concurrency limit and a requests-per-minute token bucket. Callers
+wait in a bounded queue up to a deadline; when the queue is full, or the
+deadline passes, AdmissionRejected is raised so /chat can answer 429 with
+Retry-After instead of timing out against the provider.
+"""
+from __future__ import annotations
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Optional
+
+from langchain_core.runnables import Runnable
+
+from app import config
+from app.core.logger import log
+from app.core.metrics import Counter, Gauge, Histogram
+from app.core.workers import after_fork
+
+llm_queue_depth = Gauge("llm_admission_queue_depth", "LLM calls waiting for admission")
+llm_in_flight = Gauge("llm_admission_in_flight", "LLM calls currently admitted")
+llm_wait_seconds = Histogram("llm_admission_wait_seconds", "Time LLM calls waited for admission")
+llm_rejected = Counter("llm_admission_rejected_total", "LLM calls rejected by admission control")
+
+
+class AdmissionRejected(Exception):
+    """Raised when an LLM call cannot be admitted; retry_after is in seconds."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"LLM admission rejected: {reason}")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    def __init__(self, max_concurrency: int, rpm: float, max_queue: int, max_wait: float):
+        self.max_concurrency = max_concurrency
+        self.rate = rpm / 60.0
+        self.burst = max(1.0, min(rpm, float(max_concurrency)))
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self._tokens = self.burst
+        self._refilled_at = time.monotonic()
+        self._active = 0
+        self._waiting = 0
+        self._cond = threading.Condition()
+
+    def _refill(self, now: float):
+        if self.rate > 0:
+            self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def _retry_after(self) -> int:
+        # Time for the bucket to serve everyone already queued plus this caller.
+        if self.rate <= 0:
+            return max(1, math.ceil(self.max_wait))
+        return max(1, math.ceil((self._waiting + 1 - self._tokens) / self.rate))
+
+    def _reject(self, reason: str):
+        llm_rejected.inc()
+        retry_after = self._retry_after()
+        log.warning(f"LLM admission rejected ({reason}); retry after {retry_after}s")
+        raise AdmissionRejected(reason, retry_after)
+
+    def acquire(self, timeout: Optional[float] = None):
+        start = time.monotonic()
+        deadline = start + (self.max_wait if timeout is None else timeout)
+        with self._cond:
+            self._refill(start)
+            must_wait = self._waiting > 0 or self._active >= self.max_concurrency or self._tokens < 1
+            if must_wait and self._waiting >= self.max_queue:
+                self._reject("queue full")
+            self._waiting += 1
+            llm_queue_depth.set(self._waiting)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if self._active < self.max_concurrency and self._tokens >= 1:
+                        break
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self._reject("wait deadline exceeded")
+                    if self._active < self.max_concurrency and self.rate > 0:
+                        remaining = min(remaining, (1 - self._tokens) / self.rate)
+                    self._cond.wait(remaining)
+                self._tokens -= 1
+                self._active += 1
+                llm_in_flight.set(self._active)
+            finally:
+                self._waiting -= 1
+                llm_queue_depth.set(self._waiting)
+        llm_wait_seconds.observe(time.monotonic() - start)
+
+    def try_acquire(self) -> bool:
+        """Take a slot only if one is free right now and nobody is queued (used for optional work such as hedges)."""
+        with self._cond:
+            self._refill(time.monotonic())
+            if self._waiting or self._active >= self.max_concurrency or self._tokens < 1:
+                return False
+            self._tokens -= 1
+            self._active += 1
+            llm_in_flight.set(self._active)
+            return True
+
+    def release(self):
+        with self._cond:
+            self._active -= 1
+            llm_in_flight.set(self._active)
+            self._cond.notify()
+
+    @contextmanager
+    def slot(self):
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+
+def _admission_limits() -> dict:
+    """Provider-wide limits, split evenly across WEB_CONCURRENCY worker processes."""
+    workers = max(1, config.WEB_CONCURRENCY)
+    return dict(
+        max_concurrency=max(1, math.ceil(config.LLM_MAX_CONCURRENCY / workers)),
+        rpm=config.LLM_RPM / workers,
+        max_queue=config.LLM_MAX_QUEUE,
+        max_wait=config.LLM_MAX_WAIT_SECONDS,
+    )
+
+
+llm_admission = AdmissionController(**_admission_limits())
+
+
+@after_fork
+def _reset_admission():
+    # Fresh condition and counters in the worker; AdmittedLLMs keep their reference
+    llm_admission.__init__(**_admission_limits())
+
+
+class AdmittedLLM(Runnable):
+    """Runnable wrapper that admits each call through a controller; other attributes delegate to the wrapped model."""
+
+    def __init__(self, inner: Runnable, controller: AdmissionController = llm_admission):
+        self.inner = inner
+        self.controller = controller
+
+    def invoke(self, input: Any, config: Any = None, **kwargs: Any) -> Any:
+        with self.controller.slot():
+            return self.inner.invoke(input, config, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.inner, name)
@@ -1,10 +1,13 @@
-from typing import TypedDict, List
+from typing import Annotated, Callable, TypedDict, List, Optional, Tuple
+from datetime import datetime, UTC
+import operator
 from langgraph.graph import StateGraph, END
 from langchain_core.messages import BaseMessage, HumanMessage
 from pathlib import Path
 from utils import print_out_md
 import uuid
 from app.schemas.enums import StepName
+from app.core.tracing import span
 
 from app.core.nodes import parse_input_node, research_node, create_jd_node, create_hiring_plan_node, post_notion_node
 
@@ -14,6 +17,26 @@ class AgentState(TypedDict):
     hiring_data: dict
     current_step: str
     session_id: uuid.UUID
+    # Accumulated across nodes so the JD and plan produced in one run are both persisted
+    artifacts: Annotated[List[dict], operator.add]
+    draft_jd: Optional[str]
+    jd_cached: bool
+    # "template" | "llm" for this request (None: config.JD_MODE); a template JD leaves a refinement to schedule
+    jd_mode: Optional[str]
+    jd_refinement: Optional[dict]
+    research_snippets: List[str]
+    # (step, entered_at) for every current_step a node set during this run; feeds the step funnel
+    step_trail: Annotated[List[Tuple[str, datetime]], operator.add]
+
+def _track_step(name: str, node: Callable[[dict], dict]) -> Callable[[dict], dict]:
+    """Run a graph node in its own trace span and record the step it sets."""
+    def run(state):
+        with span(f"node.{name}"):
+            out = node(state)
+        if out.get("current_step"):
+            out = {**out, "step_trail": [(out["current_step"], datetime.now(UTC))]}
+        return out
+    return run
 
 def route_next_step(state: AgentState):
     """Determine the next step based on the current state."""
@@ -44,11 +67,11 @@ def build_graph():
 
     workflow = StateGraph(AgentState)
 
-    workflow.add_node("parse_input", parse_input_node)
-    workflow.add_node("research", research_node)
-    workflow.add_node("create_jd", create_jd_node)
-    workflow.add_node("create_plan", create_hiring_plan_node)
-    workflow.add_node("post_notion", post_notion_node)
+    workflow.add_node("parse_input", _track_step("parse_input", parse_input_node))
+    workflow.add_node("research", _track_step("research", research_node))
+    workflow.add_node("create_jd", _track_step("create_jd", create_jd_node))
+    workflow.add_node("create_plan", _track_step("create_plan", create_hiring_plan_node))
+    workflow.add_node("post_notion", _track_step("post_notion", post_notion_node))
 
     workflow.set_entry_point("parse_input")
 
@@ -57,19 +80,19 @@ def build_graph():
         "parse_input",
         route_next_step,
         {
+            "research": "research",
             "create_jd": "create_jd",
             "end": END,
         }
     )
-    # Update above step to have research after tools implementation
-    # workflow.add_conditional_edges(
-    #     "research",
-    #     route_next_step,
-    #     {
-    #         "create_jd": "create_jd",
-    #         "end": END
-    #     }
-    # )
+    workflow.add_conditional_edges(
+        "research",
+        route_next_step,
+        {
+            "create_jd": "create_jd",
+            "end": END
+        }
+    )
     
     workflow.add_conditional_edges(
         "create_jd",
@@ -0,0 +1,155 @@
+"""
+Budget normalization.
+
+HiringContext.budget is whatever the user typed ("$150k for engineer, $50k
+for intern", "100-150k", "€80,000/yr", "25 LPA"). parse_budget splits it into
+per-role annual ranges with a currency so budgets can be aggregated in SQL;
+normalize_budget picks the range that applies to the context's primary role.
+"""
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+DEFAULT_CURRENCY = "USD"
+
+_SYMBOLS = {"$": "USD", "€": "EUR", "£": "GBP", "₹": "INR", "¥": "JPY"}
+_CODES = {"usd", "eur", "gbp", "inr", "cad", "aud", "jpy", "chf", "sgd"}
+_MULTIPLIERS = {"k": 1e3, "thousand": 1e3, "m": 1e6, "mm": 1e6, "million": 1e6, "l": 1e5, "lakh": 1e5, "lakhs": 1e5,
+                "lpa": 1e5, "cr": 1e7, "crore": 1e7}
+_PERIODS = {"hour": 2080, "hr": 2080, "hourly": 2080, "h": 2080, "month": 12, "mo": 12, "monthly": 12,
+            "year": 1, "yr": 1, "annual": 1, "annually": 1, "pa": 1, "annum": 1}
+
+_AMOUNT = r"(?P<{n}sym>[$€£₹¥])?\s*(?P<{n}num>\d+(?:[.,]\d+)*)\s*(?P<{n}mult>k|thousand|mm|m|million|lakhs?|l|lpa|cr|crore)?\b"
+_RANGE_RE = re.compile(
+    _AMOUNT.format(n="a")
+    + r"(?:\s*(?:-|–|to)\s*" + _AMOUNT.format(n="b") + r")?"
+    + r"(?:\s*(?P<code>usd|eur|gbp|inr|cad|aud|jpy|chf|sgd))?"
+    + r"(?:\s*(?:/|per|an|a)\s*(?P<period>hour|hr|h|month|mo|year|yr|annum)\b|\s+(?P<period2>hourly|monthly|annually|annual|pa)\b)?",
+    re.IGNORECASE,
+)
+# "between $100k and $130k" is one range, not two amounts joined by "and"
+_BETWEEN_RE = re.compile(
+    r"\bbetween\s+([$€£₹¥]?\s*\d[\d.,]*\s*(?:k|thousand|mm|m|million|lakhs?|l|lpa|cr|crore)?)\s+and\s+(?=[$€£₹¥\d])",
+    re.IGNORECASE,
+)
+_SEGMENT_SPLIT_RE = re.compile(r"[;,]\s*(?![\d])|\band\b(?=\s*[$€£₹¥\d])|\n", re.IGNORECASE)
+_PERIOD_WORDS = r"(?:year|yr|annum|month|mo|week|day|hour|hr)s?\b"
+# "per year" / "a month" say how often, not for whom
+_ROLE_AFTER_RE = re.compile(
+    r"\b(?:for|per)\s+(?:an?\s+|the\s+|each\s+)?(?!" + _PERIOD_WORDS + r")(?P<role>[a-z][a-z ./+-]{1,60})",
+    re.IGNORECASE,
+)
+_TRAILING_PERIOD_RE = re.compile(r"\s*(?:/|\bper\b|\ban?\b)\s*" + _PERIOD_WORDS + r".*$", re.IGNORECASE)
+_ROLE_BEFORE_RE = re.compile(r"^\s*(?P<role>[a-z][a-z ./+-]{1,60}?)\s*[:=]", re.IGNORECASE)
+
+
+class BudgetRange(NamedTuple):
+    role: Optional[str]
+    min: int
+    max: int
+    currency: str
+
+    def as_dict(self) -> Dict[str, Any]:
+        return self._asdict()
+
+
+def _number(raw: str) -> float:
+    # "150,000" / "1.5" / "1.234.567"
+    if raw.count(",") and not raw.count("."):
+        parts = raw.split(",")
+        raw = raw.replace(",", "" if all(len(p) == 3 for p in parts[1:]) else ".")
+    elif raw.count(".") > 1:
+        raw = raw.replace(".", "")
+    else:
+        raw = raw.replace(",", "")
+    return float(raw)
+
+
+def _role_of(segment: str) -> Optional[str]:
+    m = _ROLE_BEFORE_RE.match(segment) or _ROLE_AFTER_RE.search(segment)
+    if not m:
+        return None
+    role = _TRAILING_PERIOD_RE.sub("", m.group("role"))
+    role = re.sub(r"\b(role|position|hire|budget|salary|each)s?\b", " ", role, flags=re.IGNORECASE)
+    role = " ".join(role.split()).strip(" .-")
+    return role or None
+
+
+def _parse_segment(segment: str, default_currency: str) -> Optional[BudgetRange]:
+    for m in _RANGE_RE.finditer(segment):
+        lo_mult = (m.group("amult") or "").lower()
+        hi_mult = (m.group("bmult") or "").lower()
+        # "100-150k": the trailing multiplier applies to both ends
+        lo = _number(m.group("anum")) * _MULTIPLIERS.get(lo_mult or hi_mult, 1)
+        hi = _number(m.group("bnum")) * _MULTIPLIERS.get(hi_mult or lo_mult, 1) if m.group("bnum") else lo
+
+        symbol = m.group("asym") or m.group("bsym")
+        code = (m.group("code") or "").upper()
+        currency = code or _SYMBOLS.get(symbol or "") or ("INR" if (lo_mult or hi_mult) in ("l", "lakh", "lakhs", "lpa", "cr", "crore") else None)
+        if currency is None:
+            found = next((c for c in re.findall(r"[a-z]{3}", segment.lower()) if c in _CODES), None)
+            currency = found.upper() if found else default_currency
+
+        period = (m.group("period") or m.group("period2") or "").lower()
+        factor = _PERIODS.get(period, 1)
+        lo, hi = lo * factor, hi * factor
+
+        # Bare small numbers ("within 6 weeks", "2 engineers") are not budgets
+        if not (symbol or code or lo_mult or hi_mult or period) and hi < 1000:
+            continue
+        return BudgetRange(_role_of(segment), int(round(min(lo, hi))), int(round(max(lo, hi))), currency)
+    return None
+
+
+def parse_budget(text: Optional[str], default_currency: str = DEFAULT_CURRENCY) -> List[BudgetRange]:
+    """All ranges found in a free-form budget string, one per role-bearing segment."""
+    if not text:
+        return []
+    ranges = []
+    for segment in _SEGMENT_SPLIT_RE.split(_BETWEEN_RE.sub(r"\1 to ", text)):
+        if segment and segment.strip():
+            parsed = _parse_segment(segment, default_currency)
+            if parsed:
+                ranges.append(parsed)
+    return ranges
+
+
+def _role_overlap(a: str, b: str) -> int:
+    return len(set(a.lower().split()) & set(b.lower().split()))
+
+
+def pick_range(ranges: List[BudgetRange], role: Optional[str]) -> Optional[BudgetRange]:
+    """The range for `role`: best word overlap, else the first role-less range, else the first."""
+    if not ranges:
+        return None
+    if role:
+        scored = [(r, _role_overlap(r.role, role)) for r in ranges if r.role]
+        best = max(scored, key=lambda s: s[1], default=(None, 0))
+        if best[1]:
+            return best[0]
+    return next((r for r in ranges if not r.role), ranges[0])
+
+
+def normalize_budget(text: Optional[str], role: Optional[str] = None) -> Dict[str, Any]:
+    """Column values for HiringContext: budget_min/max/currency for the primary role plus the full breakdown."""
+    ranges = parse_budget(text)
+    chosen = pick_range(ranges, role)
+    return {
+        "budget_min": chosen.min if chosen else None,
+        "budget_max": chosen.max if chosen else None,
+        "budget_currency": chosen.currency if chosen else None,
+        "budget_ranges_json": [r.as_dict() for r in ranges],
+    }
+
+
+def normalize_budgets(rows: Iterable[tuple]) -> List[Dict[str, Any]]:
+    """Batch form of normalize_budget over (id, budget, primary_role) rows, memoizing repeated inputs."""
+    memo: Dict[tuple, Dict[str, Any]] = {}
+    out = []
+    for row_id, budget, role in rows:
+        key = (budget, role)
+        if key not in memo:
+            memo[key] = normalize_budget(budget, role)
+        out.append({"id": row_id, **memo[key]})
+    return out
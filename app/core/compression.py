@@ -0,0 +1,121 @@
+"""
+Response compression middleware (brotli when the client accepts it and the
+`brotli` package is installed, else gzip).
+
+Pure ASGI so streaming responses (e.g. the NDJSON export) are compressed
+chunk by chunk instead of being buffered. Responses smaller than
+minimum_size, already-encoded responses and non-compressible media types
+(e.g. Parquet, which is zstd-compressed internally) pass through untouched.
+"""
+from __future__ import annotations
+
+import zlib
+from typing import Callable, List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "application/problem+json",
+)
+
+
+def _accepted(accept_encoding: str) -> List[str]:
+    accepted = []
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.append(coding.strip())
+    return accepted
+
+
+class _Encoder:
+    def __init__(self, coding: str, gzip_level: int, brotli_quality: int):
+        self.coding = coding
+        if coding == "br":
+            self._c = brotli.Compressor(quality=brotli_quality)
+            self.compress, self._flush, self._finish = self._c.process, self._c.flush, self._c.finish
+        else:
+            self._c = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)  # wbits=31: gzip container
+            self.compress = self._c.compress
+            self._flush = lambda: self._c.flush(zlib.Z_SYNC_FLUSH)
+            self._finish = self._c.flush
+
+    def chunk(self, data: bytes, more: bool) -> bytes:
+        # Flush at every chunk boundary so streamed output reaches the client promptly
+        out = self.compress(data)
+        return out + (self._flush() if more else self._finish())
+
+
+class CompressionMiddleware:
+    def __init__(self, app: Callable, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def _choose(self, scope) -> Optional[str]:
+        header = next((v.decode("latin-1") for k, v in scope.get("headers", []) if k == b"accept-encoding"), "")
+        accepted = _accepted(header)
+        if "br" in accepted and brotli is not None:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        coding = self._choose(scope) if scope["type"] == "http" else None
+        if coding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[dict] = None
+        encoder: Optional[_Encoder] = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, encoder, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body, more = message.get("body", b""), message.get("more_body", False)
+            if encoder is None:
+                headers: List[Tuple[bytes, bytes]] = list(start_message.get("headers", []))
+                names = {k.lower(): v for k, v in headers}
+                media_type = names.get(b"content-type", b"").decode("latin-1").lower()
+                skip = (
+                    b"content-encoding" in names
+                    or not media_type.startswith(COMPRESSIBLE_TYPES)
+                    or (not more and len(body) < self.minimum_size)
+                )
+                if skip:
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+                encoder = _Encoder(coding, self.gzip_level, self.brotli_quality)
+                headers = [(k, v) for k, v in headers if k.lower() != b"content-length"]
+                headers += [(b"content-encoding", coding.encode()), (b"vary", b"Accept-Encoding")]
+                if not more:
+                    compressed = encoder.chunk(body, more=False)
+                    headers.append((b"content-length", str(len(compressed)).encode()))
+                    await send({**start_message, "headers": headers})
+                    await send({"type": "http.response.body", "body": compressed})
+                    return
+                await send({**start_message, "headers": headers})
+
+            await send({"type": "http.response.body", "body": encoder.chunk(body, more), "more_body": more})
+
+        await self.app(scope, receive, send_compressed)
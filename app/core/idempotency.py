@@ -0,0 +1,164 @@
+"""
+Idempotency-Key support for /chat.
+
+The first request with a key claims it (a 'pending' row) and runs the turn;
+the response is stored on the row. Repeats within the TTL replay the stored
+response. Duplicates that arrive while the first is still running wait for
+it: in-process through a shared Future, across workers by polling the row.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from datetime import datetime, timedelta, UTC
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import and_, delete, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app import config
+from app.core.logger import log
+from app.models.idempotency import IdempotencyKey
+
+_POLL_INTERVAL_SECONDS = 0.25
+_RETRY_AFTER_SECONDS = 5
+
+_inflight: Dict[str, Tuple[str, Future]] = {}
+_inflight_lock = threading.Lock()
+
+
+def fingerprint(payload: Any) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _mismatch() -> HTTPException:
+    return HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request body")
+
+
+def _in_progress() -> HTTPException:
+    return HTTPException(
+        status_code=409,
+        detail="A request with this Idempotency-Key is still in progress",
+        headers={"Retry-After": str(_RETRY_AFTER_SECONDS)},
+    )
+
+
+def _claim(db: Session, key: str, fp: str) -> Optional[datetime]:
+    """
+    Insert a pending row for `key`, or take over an expired row or an
+    abandoned pending one. Returns the claim time if we own it, else None.
+    """
+    now = datetime.now(UTC)
+    stmt = insert(IdempotencyKey).values(
+        key=key,
+        fingerprint=fp,
+        status="pending",
+        claimed_at=now,
+        expires_at=now + timedelta(seconds=config.IDEMPOTENCY_TTL_SECONDS),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[IdempotencyKey.key],
+        set_={
+            "fingerprint": stmt.excluded.fingerprint,
+            "status": "pending",
+            "response_json": None,
+            "claimed_at": stmt.excluded.claimed_at,
+            "expires_at": stmt.excluded.expires_at,
+        },
+        where=or_(
+            IdempotencyKey.expires_at < now,
+            and_(
+                IdempotencyKey.status == "pending",
+                IdempotencyKey.claimed_at < now - timedelta(seconds=config.IDEMPOTENCY_PENDING_TIMEOUT_SECONDS),
+            ),
+        ),
+    ).returning(IdempotencyKey.key)
+    owned = db.execute(stmt).first() is not None
+    db.commit()
+    return now if owned else None
+
+
+def _wait_for_stored(db: Session, key: str, fp: str) -> Dict[str, Any]:
+    """Poll another worker's claim until it completes or the wait deadline passes."""
+    deadline = time.monotonic() + config.IDEMPOTENCY_WAIT_SECONDS
+    while True:
+        row = db.execute(
+            select(IdempotencyKey.fingerprint, IdempotencyKey.status, IdempotencyKey.response_json)
+            .where(IdempotencyKey.key == key)
+        ).first()
+        db.rollback()  # end the read transaction so the next poll sees fresh data
+        if row is None:
+            # The owner failed and released the key; the client should retry.
+            raise HTTPException(status_code=409, detail="Original request with this Idempotency-Key failed; retry")
+        if row.fingerprint != fp:
+            raise _mismatch()
+        if row.status == "completed":
+            return row.response_json
+        if time.monotonic() >= deadline:
+            raise _in_progress()
+        time.sleep(_POLL_INTERVAL_SECONDS)
+
+
+def run_idempotent(db: Session, key: str, fp: str, run: Callable[[], Dict[str, Any]]) -> Tuple[Dict[str, Any], bool]:
+    """
+    Run `run` at most once per key. Returns (response_payload, replayed).
+
+    `run` must return a JSON-serializable dict; it is stored as the replay.
+    """
+    with _inflight_lock:
+        entry = _inflight.get(key)
+        if entry is None:
+            future: Future = Future()
+            _inflight[key] = (fp, future)
+    if entry is not None:
+        inflight_fp, inflight = entry
+        if inflight_fp != fp:
+            raise _mismatch()
+        log.info("Waiting on in-flight request for Idempotency-Key", extra={"idempotency_key": key})
+        try:
+            return inflight.result(timeout=config.IDEMPOTENCY_WAIT_SECONDS), True
+        except FutureTimeoutError:
+            raise _in_progress() from None
+
+    try:
+        claimed_at = _claim(db, key, fp)
+        if claimed_at is None:
+            payload = _wait_for_stored(db, key, fp)
+            future.set_result(payload)
+            return payload, True
+
+        # Only touch the row while it is still our claim; after the lease ran out it may belong to a retry
+        ours = and_(IdempotencyKey.key == key, IdempotencyKey.status == "pending", IdempotencyKey.claimed_at == claimed_at)
+        try:
+            payload = run()
+        except BaseException:
+            db.rollback()
+            db.execute(delete(IdempotencyKey).where(ours))
+            db.commit()
+            raise
+
+        stored = db.execute(update(IdempotencyKey).where(ours).values(status="completed", response_json=payload))
+        db.commit()
+        if not stored.rowcount:
+            log.warning("Idempotency-Key claim was taken over before the turn finished", extra={"idempotency_key": key})
+        future.set_result(payload)
+        return payload, False
+    except BaseException as e:
+        if not future.done():
+            future.set_exception(e)
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+
+
+def purge_expired(db: Session) -> int:
+    """Delete expired keys; returns the number removed."""
+    result = db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at < datetime.now(UTC)))
+    db.commit()
+    return result.rowcount or 0
@@ -0,0 +1,156 @@
+"""
+Template JDs for common role families.
+
+The fast JD path (jd_mode "template"): a JD is filled from precompiled
+per-(family, seniority) templates using the parsed hiring data, with no LLM
+call, and an LLM refinement runs after the turn (see nodes.refine_jd).
+Roles that classify as "general", or whose title names more than one family
+("Data Engineer", "Product Designer"), have no template and take the LLM path.
+Sections follow prompts.JD_SECTIONS so both paths read the same.
+"""
+from __future__ import annotations
+
+from string import Template
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.plan import classify_role, role_families
+from app.core.prompts import jd_fields
+
+_OVERVIEW: Dict[str, str] = {
+    "engineering": "You will design, build and ship the software our product runs on, owning features from idea to production.",
+    "data": "You will turn our data into models, insights and product features, taking work from exploration to production.",
+    "design": "You will shape how our product looks, feels and works, from early research through polished interfaces.",
+    "product": "You will decide what we build and why, turning customer problems into a clear roadmap and shipped outcomes.",
+    "sales": "You will find, win and grow customers, building the pipeline and relationships that drive our revenue.",
+}
+
+_RESPONSIBILITIES: Dict[str, Tuple[str, ...]] = {
+    "engineering": (
+        "Design, build and maintain reliable, well-tested services and features",
+        "Review code and raise the quality bar across the codebase",
+        "Work with product and design to scope and ship iteratively",
+        "Own production health: monitoring, incidents and performance",
+    ),
+    "data": (
+        "Build, evaluate and deploy models and data pipelines",
+        "Define metrics and run analyses that guide product decisions",
+        "Partner with engineering to take prototypes to production",
+        "Keep data quality, lineage and documentation in good shape",
+    ),
+    "design": (
+        "Lead design from user research and flows to high-fidelity UI",
+        "Prototype and test ideas quickly with real users",
+        "Build and evolve our design system",
+        "Collaborate closely with product and engineering through delivery",
+    ),
+    "product": (
+        "Own the roadmap for your area and keep it tied to customer outcomes",
+        "Write clear problem statements, specs and success metrics",
+        "Run discovery with customers and turn findings into priorities",
+        "Coordinate engineering, design and go-to-market through launch",
+    ),
+    "sales": (
+        "Build and manage a healthy pipeline from prospecting to close",
+        "Run discovery calls, demos and commercial negotiations",
+        "Keep CRM data accurate and forecast reliably",
+        "Feed customer insight back to product and marketing",
+    ),
+}
+
+_NICE_TO_HAVE: Dict[str, Tuple[str, ...]] = {
+    "engineering": ("Experience at an early-stage startup", "Open-source contributions or side projects"),
+    "data": ("Experience shipping ML or GenAI features to users", "Publications, Kaggle results or open-source work"),
+    "design": ("Front-end prototyping skills", "Experience designing for B2B or data-heavy products"),
+    "product": ("A technical background or hands-on data skills", "Experience taking a product from zero to one"),
+    "sales": ("Experience selling to technical buyers", "A track record in a first sales hire or founding team role"),
+}
+
+_FAMILY_SKILL = {
+    "engineering": "software engineering",
+    "data": "data science or machine learning",
+    "design": "product design",
+    "product": "product management",
+    "sales": "B2B sales",
+}
+
+# (experience line, extra responsibility) per seniority
+_SENIORITY: Dict[str, Tuple[str, Optional[str]]] = {
+    "intern": ("Currently studying or recently graduated in a relevant field", "Learn fast alongside a dedicated mentor"),
+    "junior": ("1-2 years of experience in $family_skill", None),
+    "mid": ("3-5 years of experience in $family_skill", None),
+    "senior": ("5+ years of experience in $family_skill", "Mentor teammates and lead projects end to end"),
+    "lead": ("8+ years of experience in $family_skill, including leading teams or functions",
+             "Set direction, hire and grow the team as we scale"),
+}
+
+# The "$experience" shown in the overview, matching the template's seniority
+_SENIORITY_LABELS: Dict[str, str] = {
+    "intern": "Internship",
+    "junior": "Junior level",
+    "mid": "Mid-level",
+    "senior": "Senior level",
+    "lead": "Lead level",
+}
+
+_OFFER = (
+    "Competitive salary and meaningful equity",
+    "$location_perk",
+    "Real ownership and a direct line to the founders",
+)
+
+
+def _compile(family: str, seniority: str) -> Template:
+    experience_line, extra = _SENIORITY[seniority]
+    responsibilities = _RESPONSIBILITIES[family] + ((extra,) if extra else ())
+    lines = [
+        "### Role Overview",
+        f"$intro ({_SENIORITY_LABELS[seniority]}, $location). {_OVERVIEW[family]}",
+        "",
+        "### Key Responsibilities",
+        *(f"- {r}" for r in responsibilities),
+        "",
+        "### Required Qualifications",
+        f"- {experience_line}",
+        "$skills_lines",
+        "- Clear written and verbal communication",
+        "",
+        "### Nice-to-Have",
+        *(f"- {n}" for n in _NICE_TO_HAVE[family]),
+        "",
+        "### What We Offer",
+        *(f"- {o}" for o in _OFFER),
+    ]
+    return Template(Template("\n".join(lines)).safe_substitute(family_skill=_FAMILY_SKILL[family]))
+
+
+_TEMPLATES: Dict[Tuple[str, str], Template] = {
+    (family, seniority): _compile(family, seniority)
+    for family in _OVERVIEW
+    for seniority in _SENIORITY
+}
+
+
+def template_jd(hiring_data: Dict[str, Any]) -> Optional[str]:
+    """Fill the role family's JD template from hiring data; None when the role has no template or an ambiguous one."""
+    f = jd_fields(hiring_data)
+    if len(role_families(f["role"])) != 1:
+        return None
+    template = _TEMPLATES[classify_role(f["role"], hiring_data.get("experience_level"))]
+    company = hiring_data.get("company")
+    if company:
+        intro = f"Join {company} as our {f['role']}"
+    else:
+        article = "an" if f["role"][:1].lower() in "aeiou" else "a"
+        intro = f"Join our early-stage startup as {article} {f['role']}"
+    skills = f["skills"][:5]
+    skills_lines = (
+        "\n".join(f"- Hands-on experience with {s}" for s in skills)
+        if skills else "- Strong fundamentals in the core tools of the role"
+    )
+    remote = f["location"].strip().lower() in ("remote", "anywhere", "fully remote")
+    return template.substitute(
+        intro=intro,
+        location=f["location"],
+        skills_lines=skills_lines,
+        location_perk="Fully remote with flexible hours" if remote else f"A great workspace in {f['location']} with flexible hours",
+    )
@@ -0,0 +1,227 @@
+"""
+Graceful shutdown.
+
+When the app shuts down it:
+1. stops admitting chat turns as soon as SIGTERM/SIGINT arrives (see
+   install_signal_handlers): turn() raises ShuttingDown, which /chat answers
+   with 503 + Retry-After. uvicorn keeps serving the requests already in
+   flight until they finish, so requests still queued behind a session's
+   running turn, and messages on open WebSockets, get the 503 instead of
+   starting a turn the drain would have to wait for,
+2. (lifespan exit, once uvicorn has stopped serving) waits for turns already
+   running (graph run + persist) to finish,
+3. drains the background executors against the same deadline. Queued jobs
+   that cannot start in time are spooled to disk if their function was
+   registered with register_durable (Notion uploads), and replayed by the
+   next process that starts; everything else still unfinished is abandoned.
+
+Executors whose work only matters to the turn that submitted it (hedged LLM
+requests, speculative JDs) are created with drain=False and just cancelled.
+"""
+from __future__ import annotations
+
+import json
+import os
+import signal
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app import config
+from app.core.logger import log
+from app.core.tracing import bind
+from app.core.workers import after_fork
+
+_draining = threading.Event()
+_turns = 0
+_turns_cond = threading.Condition()
+
+_executors: Dict[str, "TrackedExecutor"] = {}
+_durable: Dict[Callable, str] = {}
+
+
+class ShuttingDown(Exception):
+    """Raised when a turn is started after shutdown began; retry_after is in seconds."""
+
+    def __init__(self, retry_after: int = 5):
+        super().__init__("Server is shutting down")
+        self.retry_after = retry_after
+
+
+def is_draining() -> bool:
+    return _draining.is_set()
+
+
+@contextmanager
+def turn():
+    """Track a chat turn so shutdown waits for it; refuses new turns once draining."""
+    global _turns
+    with _turns_cond:
+        if _draining.is_set():
+            raise ShuttingDown()
+        _turns += 1
+    try:
+        yield
+    finally:
+        with _turns_cond:
+            _turns -= 1
+            _turns_cond.notify_all()
+
+
+def install_signal_handlers():
+    """
+    Mark the process as draining on SIGTERM/SIGINT, then hand the signal to
+    the handler it replaces (uvicorn's, which starts its own shutdown). Call
+    from the main thread once the server is running, e.g. at lifespan startup.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        previous = signal.getsignal(sig)
+
+        def handler(signum, frame, previous=previous):
+            if not _draining.is_set():
+                log.info(f"Received {signal.Signals(signum).name}; refusing new turns")
+            _draining.set()
+            if callable(previous):
+                previous(signum, frame)
+            elif previous == signal.SIG_DFL:
+                signal.signal(signum, signal.SIG_DFL)
+                signal.raise_signal(signum)
+
+        signal.signal(sig, handler)
+
+
+def register_durable(name: str, fn: Callable):
+    """Jobs running `fn` are spooled instead of dropped at shutdown; args must be JSON-serializable (str() fallback)."""
+    _durable[fn] = name
+
+
+class TrackedExecutor(ThreadPoolExecutor):
+    """ThreadPoolExecutor that remembers its unfinished jobs so shutdown can drain or spool them."""
+
+    def __init__(self, name: str, max_workers: int, drain: bool = True):
+        super().__init__(max_workers=max_workers, thread_name_prefix=name)
+        self.name = name
+        self.drain = drain
+        self._jobs: Dict[Future, Optional[Tuple[str, tuple, dict]]] = {}
+        self._jobs_lock = threading.Lock()
+        _executors[name] = self
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        # The job runs as a child span of whatever trace submitted it
+        future = super().submit(bind(fn, f"job.{self.name}"), *args, **kwargs)
+        job = (_durable[fn], args, kwargs) if fn in _durable else None
+        with self._jobs_lock:
+            if not future.done():
+                self._jobs[future] = job
+        future.add_done_callback(self._forget)
+        return future
+
+    def _forget(self, future: Future):
+        with self._jobs_lock:
+            self._jobs.pop(future, None)
+
+    def unfinished(self) -> Dict[Future, Optional[Tuple[str, tuple, dict]]]:
+        with self._jobs_lock:
+            return dict(self._jobs)
+
+    def _reset(self):
+        """Forget the parent's threads, queue and jobs (none of them exist in a forked child)."""
+        ThreadPoolExecutor.__init__(self, max_workers=self._max_workers, thread_name_prefix=self._thread_name_prefix)
+        self._jobs = {}
+        self._jobs_lock = threading.Lock()
+
+
+@after_fork
+def _reset_after_fork():
+    global _turns, _turns_cond
+    _draining.clear()
+    _turns, _turns_cond = 0, threading.Condition()
+    for executor in _executors.values():
+        executor._reset()
+
+
+# ---------- Spool ----------
+
+def _spool(records: List[Dict[str, Any]]):
+    if not records:
+        return
+    path = Path(config.SHUTDOWN_SPOOL_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a", encoding="utf-8") as f:
+        for r in records:
+            f.write(json.dumps(r, default=str) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def replay_spooled() -> int:
+    """Resubmit jobs spooled by a previous shutdown. The file is claimed by rename so only one worker replays it."""
+    path = Path(config.SHUTDOWN_SPOOL_PATH)
+    claimed = path.with_name(f"{path.name}.{os.getpid()}")
+    try:
+        os.replace(path, claimed)
+    except FileNotFoundError:
+        return 0
+
+    fns = {name: fn for fn, name in _durable.items()}
+    replayed = 0
+    for line in claimed.read_text(encoding="utf-8").splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        executor, fn = _executors.get(record["executor"]), fns.get(record["job"])
+        if executor is None or fn is None:
+            log.warning(f"Dropping spooled job {record['job']!r}: no executor or function registered for it")
+            continue
+        executor.submit(fn, *record["args"], **record["kwargs"])
+        replayed += 1
+    claimed.unlink()
+    log.info(f"Replayed {replayed} job(s) spooled at the last shutdown")
+    return replayed
+
+
+# ---------- Drain ----------
+
+def drain(timeout: float) -> Dict[str, int]:
+    """Stop new turns, wait for running ones, then drain or spool executor work; all within `timeout` seconds."""
+    _draining.set()
+    deadline = time.monotonic() + timeout
+    counts = dict.fromkeys(("turns_abandoned", "drained", "spooled", "cancelled", "abandoned"), 0)
+
+    with _turns_cond:
+        if not _turns_cond.wait_for(lambda: _turns == 0, timeout=max(0.0, deadline - time.monotonic())):
+            counts["turns_abandoned"] = _turns
+
+    spool: List[Dict[str, Any]] = []
+    for executor in list(_executors.values()):
+        jobs = executor.unfinished()
+        if executor.drain:
+            done, not_done = wait(jobs, timeout=max(0.0, deadline - time.monotonic()))
+            counts["drained"] += len(done)
+        else:
+            not_done = set(jobs)
+        for future in not_done:
+            job = jobs[future]
+            if not future.cancel():
+                counts["abandoned"] += 1  # already running; the process exits under it
+            elif job is not None:
+                name, args, kwargs = job
+                spool.append({"executor": executor.name, "job": name, "args": list(args), "kwargs": kwargs})
+                counts["spooled"] += 1
+            else:
+                counts["cancelled"] += 1
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    _spool(spool)
+    log.info(
+        "Shutdown drain finished: "
+        f"{counts['drained']} job(s) drained, {counts['spooled']} spooled to {config.SHUTDOWN_SPOOL_PATH}, "
+        f"{counts['cancelled']} cancelled, {counts['abandoned']} abandoned while running, "
+        f"{counts['turns_abandoned']} turn(s) still running"
+    )
+    return counts
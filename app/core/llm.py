@@ -1,4 +1,5 @@
 from dotenv import load_dotenv
+from typing import List
 import os
 
 
@@ -8,5 +9,43 @@ os.environ['GOOGLE_APPLICATION_CREDENTIALS']=path_to_json
 
 from langchain_google_genai import ChatGoogleGenerativeAI
 
+try:
+    from langchain_ollama import ChatOllama
+except ImportError:
+    ChatOllama = None
+
+from app import config
+from app.core.admission import AdmittedLLM
+from app.core.logger import log
+from app.core.resilience import CircuitBreaker, LatencyTracker, ResilientLLM
+from app.core.workers import after_fork
+
+# Every client handed out, so forked workers can swap in their own connections
+_clients: List[ResilientLLM] = []
+
+def get_fallback_llm():
+    """Secondary provider for when the primary's circuit is open (the Ollama container), if configured; admitted like the primary."""
+    if not config.OLLAMA_BASE_URL:
+        return None
+    if ChatOllama is None:
+        log.warning("OLLAMA_BASE_URL is set but langchain-ollama is not installed; no LLM fallback")
+        return None
+    return AdmittedLLM(ChatOllama(model=config.OLLAMA_MODEL, base_url=config.OLLAMA_BASE_URL))
+
+def _primary_client():
+    return ChatGoogleGenerativeAI(model="gemini-2.5-flash-lite", timeout=config.LLM_TIMEOUT_SECONDS)
+
 def get_llm():
-    return ChatGoogleGenerativeAI(model="gemini-2.5-flash-lite")
+    llm = ResilientLLM(AdmittedLLM(_primary_client()), get_fallback_llm())
+    _clients.append(llm)
+    return llm
+
+@after_fork
+def _reconnect_clients():
+    # Chains built at import hold these wrappers, so replace what is inside them:
+    # provider clients (their HTTP/gRPC channels are not fork-safe) and the locked state
+    for llm in _clients:
+        llm.primary.inner = _primary_client()
+        llm.fallback = get_fallback_llm()
+        llm.latency = LatencyTracker()
+        llm.breaker = CircuitBreaker(config.LLM_BREAKER_FAILURES, config.LLM_BREAKER_RESET_SECONDS)
@@ -0,0 +1,106 @@
+"""
+Minimal in-process metrics with Prometheus text exposition.
+
+Served at /api/metrics. Metric objects are module-level singletons created
+where they are updated.
+"""
+from __future__ import annotations
+
+import threading
+from typing import Dict, List, Optional, Tuple
+
+_DEFAULT_BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._lock = threading.Lock()
+        _REGISTRY.append(self)
+
+    def samples(self) -> List[Tuple[str, float]]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        super().__init__(name, help_text)
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def samples(self):
+        return [(self.name, self.value)]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str):
+        super().__init__(name, help_text)
+        self.value = 0.0
+
+    def set(self, value: float):
+        with self._lock:
+            self.value = value
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.inc(-amount)
+
+    def samples(self):
+        return [(self.name, self.value)]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: Optional[Tuple[float, ...]] = None):
+        super().__init__(name, help_text)
+        self.buckets = tuple(buckets or _DEFAULT_BUCKETS)
+        self.counts = [0] * len(self.buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        with self._lock:
+            self.total += value
+            self.count += 1
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[i] += 1
+
+    def samples(self):
+        out = [(f'{self.name}_bucket{{le="{b}"}}', c) for b, c in zip(self.buckets, self.counts)]
+        out.append((f'{self.name}_bucket{{le="+Inf"}}', self.count))
+        out.append((f"{self.name}_sum", self.total))
+        out.append((f"{self.name}_count", self.count))
+        return out
+
+
+_REGISTRY: List[_Metric] = []
+
+
+def render_prometheus() -> str:
+    lines = []
+    for metric in _REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for name, value in metric.samples():
+            lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def snapshot() -> Dict[str, float]:
+    """Flat name -> value view, handy for logs and benchmarks."""
+    return {name: value for metric in _REGISTRY for name, value in metric.samples()}
@@ -1,35 +1,104 @@
 from langchain_core.messages import BaseMessage, AIMessage
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 from app.core.logger import log
-from app.core.parser import update_hiring_data
+from app import config
+from app.core.parser import update_hiring_data, parse_and_draft_jd
+from app.core.prompts import JD_SECTION_TITLES, jd_fields, jd_prompt, jd_refine_prompt, references_block
+from app.core.jd_templates import template_jd
+from app.core.retrieval import index_artifacts, research_query, research_snippets
+from app.core.session_events import publish
+from app.core.semantic_cache import cache_scope, cache_text, get_jd_cache
+from app.core.plan import generate_hiring_plan
+from app.core.tokens import clip_text, fit_messages, render_history
+from app.core.admission import AdmissionRejected
 from app.core.llm import get_llm
+from app.core.lifecycle import TrackedExecutor, register_durable
+from app.core.notion_sync import sync_artifact
 from app.utils.save_to_notion import upload_to_notion
-import concurrent.futures
+from app.database.artifact_store import schedule_compaction
+from app.database.database import SessionLocal
+from app.database.turns import lock_session, persist_artifact
+from app.schemas.enums import ArtifactType
 import re
+import uuid
 from dotenv import load_dotenv
 import os
 load_dotenv()
-_executor = concurrent.futures.ThreadPoolExecutor(max_workers=3)    
+# Notion uploads are drained (or spooled) at shutdown; speculative JDs only matter to their turn
+_executor = TrackedExecutor("notion-upload", max_workers=3)
+_speculation_executor = TrackedExecutor("jd-speculation", max_workers=4, drain=False)
+_refinement_executor = TrackedExecutor("jd-refinement", max_workers=2)
+register_durable("notion.upload", upload_to_notion)
+register_durable("notion.sync_artifact", sync_artifact)
 
 llm = get_llm()
 
 NOTION_PAGE_ID = os.getenv("NOTION_PAGE_ID")
 
 
+def _is_complete(data: Dict[str, Any]) -> bool:
+    return bool(data.get("roles") and data.get("budget") and data.get("timeline"))
+
+def _jd_mode(state) -> str:
+    """"template" or "llm": the request's choice, else config.JD_MODE."""
+    return state.get("jd_mode") or config.JD_MODE
+
+def _jd_signature(data: Dict[str, Any]) -> tuple:
+    """The inputs the JD prompt depends on; skills compared as a set since merging reorders them."""
+    f = jd_fields(data)
+    return (f["role"], f["experience"], f["location"], f["company"], frozenset(f["skills"]))
+
+def _speculative_jd(existing_data: Dict[str, Any]) -> str:
+    return llm.invoke(jd_prompt(existing_data)).content
+
 def parse_input_node(state) -> Dict[str, Any]:
     last_message = state["messages"][-1]
-    user_input = last_message.content
+    user_input = clip_text(last_message.content, config.INPUT_TOKEN_BUDGET)
+    history = render_history(fit_messages(state["messages"][:-1], config.PARSE_HISTORY_TOKEN_BUDGET))
 
     existing_data = state.get("hiring_data", {})
-    updated_data = update_hiring_data(existing_data, user_input)
+    draft_jd = None
+    # The template path drafts no JD with the model here, so it takes the plain (shorter) parse
+    templated = _jd_mode(state) == "template"
+    if config.SPECULATIVE_JD and not templated and _is_complete(existing_data):
+        # Start the JD from the stored context while the parse call runs; the
+        # plain parse is used here because the combined call would serialize them.
+        speculation = _speculation_executor.submit(_speculative_jd, existing_data)
+        try:
+            updated_data = update_hiring_data(existing_data, user_input, history)
+            if _jd_signature(updated_data) == _jd_signature(existing_data):
+                try:
+                    draft_jd = speculation.result()
+                    log.info("Speculative JD kept")
+                except AdmissionRejected:
+                    raise
+                except Exception as e:
+                    log.error(f"Speculative JD failed, regenerating: {e}")
+            else:
+                log.info("Speculative JD discarded; JD-relevant fields changed")
+        finally:
+            # Also when the parse raises: a speculation still queued never takes an
+            # admission slot. One already running finishes; its result is dropped.
+            speculation.cancel()
+    elif config.COMBINED_PARSE_JD and not templated:
+        # Retrieval is local and fast, so ground the combined draft on the raw message plus stored context
+        references = references_block(_safe_research(research_query(existing_data, user_input)))
+        updated_data, draft_jd = parse_and_draft_jd(existing_data, user_input, history, references)
+        draft_jd = draft_jd if _is_valid_jd(draft_jd) else None
+    else:
+        updated_data = update_hiring_data(existing_data, user_input, history)
 
-    has_roles = updated_data.get("roles")
     has_budget = updated_data.get("budget")
     has_timeline = updated_data.get("timeline")
 
-    if has_roles and has_budget and has_timeline:
-        # next_step = "research"
-        next_step = "create_jd"
+    jd_cached = False
+    if _is_complete(updated_data) and not draft_jd:
+        draft_jd = _cached_jd(updated_data)
+        jd_cached = draft_jd is not None
+
+    if _is_complete(updated_data):
+        # A JD drafted during parse (or found in the cache) needs no research
+        next_step = "research" if config.RESEARCH_ENABLED and not draft_jd else "create_jd"
         response = f"Got it! I'll help you hire {', '.join(updated_data['roles'])}. Let me research some details..."
     else:
         next_step = "clarify"
@@ -44,12 +113,32 @@ def parse_input_node(state) -> Dict[str, Any]:
     return {
     "hiring_data": updated_data,
     "current_step": next_step,
+    "draft_jd": draft_jd if next_step == "create_jd" else None,
+    "jd_cached": jd_cached and next_step == "create_jd",
     "messages": [AIMessage(content=response)]
     }
 
+def _safe_research(query: str) -> List[str]:
+    """Retrieval must never fail a turn; an unreadable index just means no references."""
+    if not config.RESEARCH_ENABLED:
+        return []
+    try:
+        return research_snippets(query)
+    except Exception as e:
+        log.error(f"Research lookup failed: {e}")
+        return []
+
 def research_node(state) -> Dict[str, Any]:
-    """ Implement tools fist - next step """
-    pass
+    """Retrieve snippets from our past JDs and job postings to ground the JD prompt (local BM25, no network)."""
+    hiring_data = state.get("hiring_data", {}) or {}
+    snippets = _safe_research(research_query(hiring_data))
+    log.info(f"Research found {len(snippets)} reference snippets")
+
+    return {
+        "hiring_data": hiring_data,
+        "current_step": "create_jd",
+        "research_snippets": snippets,
+    }
 
 
 
@@ -61,124 +150,219 @@ def _strip_fences(text: str) -> str:
     m = re.search(r"```(?:md|markdown|text)?\s*(.*?)\s*```", text, flags=re.S | re.I)
     return m.group(1) if m else text.strip()
 
+def _cached_jd(data: Dict[str, Any]) -> Optional[str]:
+    """A previously generated JD for a near-identical role/level/skills, if any."""
+    if not config.SEMANTIC_CACHE_ENABLED:
+        return None
+    try:
+        hit = get_jd_cache().lookup(cache_text(data), cache_scope(data))
+    except Exception as e:
+        log.error(f"Semantic JD cache lookup failed: {e}")
+        return None
+    if hit is None:
+        return None
+    payload, similarity = hit
+    log.info(f"Semantic JD cache hit ({similarity:.3f}) for '{payload['text']}'")
+    return payload["jd"]
+
+def _cache_jd(data: Dict[str, Any], jd_md: str):
+    if not config.SEMANTIC_CACHE_ENABLED or config.DRY_RUN:
+        return
+    try:
+        get_jd_cache().add(cache_text(data), cache_scope(data), {"jd": jd_md})
+    except Exception as e:
+        log.error(f"Semantic JD cache insert failed: {e}")
+
+def _heading_key(line: str) -> str:
+    """'### 2) Key Responsibilities:' / '**Nice to have**' -> 'key responsibilities' / 'nice to have'."""
+    text = line.strip().lstrip("#*_ ").rstrip("*_: ")
+    text = re.sub(r"^\d+[.)]\s*", "", text).lstrip("*_ ")
+    return text.replace("-", " ").lower()
+
+_JD_HEADING_KEYS = [_heading_key(title) for title in JD_SECTION_TITLES]
+
+def _is_valid_jd(text: Any) -> bool:
+    """Cheap sanity check on a model-written JD: long enough and has a line for every JD_SECTIONS heading."""
+    if not isinstance(text, str) or len(text.strip()) < 200:
+        return False
+    headings = {_heading_key(line) for line in text.splitlines()}
+    return all(key in headings for key in _JD_HEADING_KEYS)
+
+def _post_jd(jd_md: str, *, session_id: Optional[str], page_id_or_url: str, title: str, artifact_id: uuid.UUID):
+    """Queue the JD for Notion (role becomes the Notion heading_2 inside the uploader).
+    With a session, a re-generated JD updates its existing blocks in place."""
+    if config.DRY_RUN:
+        log.info(f"Dry run: not posting JD '{title}' to Notion")
+        return
+    if config.NOTION_INCREMENTAL_SYNC and session_id:
+        _executor.submit(
+            sync_artifact,
+            jd_md,
+            session_id=uuid.UUID(str(session_id)),
+            artifact_type=ArtifactType.job_description.value,
+            page_id=page_id_or_url,
+            title=title,
+            artifact_id=artifact_id,
+        )
+    else:
+        _executor.submit(
+            upload_to_notion,
+            jd_md,
+            page_id_or_url=page_id_or_url,
+            title=title
+        )
+
+def refine_jd(session_id: str, *, refined_id: str, draft_id: str, draft_md: str, hiring_data: Dict[str, Any],
+              snippets: Optional[List[str]], page_id_or_url: str, title: str) -> Optional[str]:
+    """
+    Background half of the template JD path: have the LLM rewrite the template
+    draft, store it as the next JD version under the pre-assigned refined_id,
+    post it to Notion and push it to the session's open WebSockets. If the
+    refinement fails the template draft is what goes to Notion.
+    """
+    sid = uuid.UUID(str(session_id))
+    try:
+        refined = _strip_fences(llm.invoke(jd_refine_prompt(hiring_data, draft_md, snippets)).content)
+        if not _is_valid_jd(refined):
+            raise ValueError("refined JD failed the sanity check")
+        artifact = {
+            "id": uuid.UUID(str(refined_id)),
+            "type": ArtifactType.job_description.value,
+            "title": title,
+            "content_md": refined,
+            "meta": {"refines": str(draft_id)},
+        }
+        with SessionLocal() as db:
+            try:
+                lock_session(db, sid)
+                version = persist_artifact(db, sid, artifact)
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+    except Exception as e:
+        log.error(f"JD refinement failed for session {sid}; keeping the template draft: {e}")
+        _post_jd(draft_md, session_id=str(sid), page_id_or_url=page_id_or_url, title=title, artifact_id=uuid.UUID(str(draft_id)))
+        publish(sid, {"type": "artifact_refinement_failed", "artifact_id": str(refined_id), "draft_id": str(draft_id)})
+        return None
+
+    index_artifacts([artifact])
+    schedule_compaction(sid, [artifact])
+    _cache_jd(hiring_data, refined)
+    _post_jd(refined, session_id=str(sid), page_id_or_url=page_id_or_url, title=title, artifact_id=artifact["id"])
+    publish(sid, {
+        "type": "artifact",
+        "artifact_id": str(refined_id),
+        "artifact_type": artifact["type"],
+        "version": version,
+        "title": title,
+        "content_md": refined,
+        "refines": str(draft_id),
+    })
+    log.info(f"Refined template JD for session {sid} stored as version {version}")
+    return str(refined_id)
+
+register_durable("jd.refine", refine_jd)
+
+def schedule_jd_refinement(session_id, refinement: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Called after the turn that produced a template JD commits; returns the id the refined version will get."""
+    if not refinement:
+        return None
+    _refinement_executor.submit(refine_jd, str(session_id), **refinement)
+    return refinement["refined_id"]
+
 def create_jd_node(state: Dict[str, Any]):
-    """Generate ONE job description via LLM (markdown) and upload to Notion."""
-    hiring_data = state.get("hiring_data", {}) or {}
+    """
+    Produce ONE job description (markdown) and upload it to Notion.
 
-    # Role can be either `role` (str) or `roles` (list with one item)
-    role = hiring_data.get("role")
-    if not role:
-        roles = hiring_data.get("roles") or []
-        role = roles[0] if roles else "Job Role"
+    On the template path (jd_mode "template", for role families with a
+    template) the JD is filled in without an LLM call and a refinement is
+    requested for after the turn; Notion then receives the refined version.
+    """
+    hiring_data = state.get("hiring_data", {}) or {}
 
-    experience = hiring_data.get("experience_level", "Mid-level")
-    location = hiring_data.get("location", "Remote")
-    skills = hiring_data.get("skills", [])
-    company = hiring_data.get("company", "Early-stage startup")
+    role = jd_fields(hiring_data)["role"]
 
     # Target Notion page
     page_id_or_url = hiring_data.get("notion_page_id") or NOTION_PAGE_ID
-    if not page_id_or_url:
+    if not page_id_or_url and not config.DRY_RUN:
         raise ValueError("Missing Notion page id/url. Set NOTION_PAGE_ID or provide hiring_data['notion_page_id'].")
 
-    # Prompt (light guidance only). If you already supply a prompt elsewhere, you can replace this.
-    prompt = f"""
-Write a compelling, concise job description in **markdown** for the role: {role}.
-Context:
-- Experience Level: {experience}
-- Location: {location}
-- Company: {company}
-- Key Skills: {', '.join(skills) if skills else 'to be determined'}
-
-Sections:
-1) Role Overview (2-3 sentences)
-2) Key Responsibilities (3-5 bullets)
-3) Required Qualifications (3-5 bullets)
-4) Nice-to-Have (2-3 bullets)
-5) What We Offer (2-3 bullets)
-
-Return ONLY the markdown for the JD (no preface or commentary).
-""".strip()
-
-    # 1) Get JD markdown from the LLM
-    jd_raw = llm.invoke(prompt).content
-    jd_md = _strip_fences(jd_raw)
-
-    # 2) Append to Notion (role becomes the Notion heading_2 inside the uploader)
-    # NOTE: upload_to_notion should be your fixed PATCH /v1/blocks/{id}/children version.
-    _executor.submit(
-        upload_to_notion,
-        jd_md,
-        page_id_or_url=page_id_or_url,
-        title=role
-    )
+    # 1) Reuse the JD drafted during parse (combined, speculative or cached),
+    # else fill the role family's template if asked to, else ask the LLM
+    draft_jd = state.get("draft_jd")
+    templated = None
+    if draft_jd:
+        jd_md = _strip_fences(draft_jd)
+        log.info("Using JD drafted during parse; skipping JD LLM call")
+    elif _jd_mode(state) == "template" and (templated := template_jd(hiring_data)) is not None:
+        jd_md = templated
+        log.info("Using template JD; LLM refinement deferred to after the turn")
+    else:
+        jd_raw = llm.invoke(jd_prompt(hiring_data, state.get("research_snippets"))).content
+        jd_md = _strip_fences(jd_raw)
+    if not state.get("jd_cached") and templated is None:
+        _cache_jd(hiring_data, jd_md)
+
+    artifact_id = uuid.uuid4()
+    session_id = state.get("session_id")
+
+    # 2) Sync to Notion; a template JD waits for its refinement (which posts the template if it fails)
+    refinement = None
+    if templated is not None and session_id:
+        refinement = {
+            "refined_id": str(uuid.uuid4()),
+            "draft_id": str(artifact_id),
+            "draft_md": jd_md,
+            "hiring_data": hiring_data,
+            "snippets": state.get("research_snippets"),
+            "page_id_or_url": page_id_or_url,
+            "title": role,
+        }
+    else:
+        _post_jd(jd_md, session_id=session_id, page_id_or_url=page_id_or_url, title=role, artifact_id=artifact_id)
 
     # 3) Chat preview (optional: include a top-level header just for the chat view)
     chat_preview = f"## {role}\n\n{jd_md}"
+    if refinement:
+        chat_preview += "\n\n_A tailored version is being written and will replace this draft shortly._"
 
     return {
         "hiring_data": hiring_data,
         "current_step": "create_plan",
+        "draft_jd": None,
+        "jd_cached": False,
+        "jd_refinement": refinement,
+        "artifacts": [{
+            "id": artifact_id,
+            "type": ArtifactType.job_description.value,
+            "title": role,
+            "content_md": jd_md,
+            "meta": {"source": "template"} if templated is not None else {},
+        }],
         "messages": [
             AIMessage(content=f"Here is your job description:\n\n{chat_preview}\n\nShould I create a hiring plan now?")
         ]
     }
 
-### Use LLM call for every hiring plan is different
-
 def create_hiring_plan_node(state) -> Dict[str, Any]:
-    """Create a structured hiring plan"""
-    
+    """Create a hiring plan scheduled over the parsed timeline (template-based, no LLM call)."""
+
     hiring_data = state["hiring_data"]
-    timeline = hiring_data.get("timeline", "4-6 weeks")
-    budget = hiring_data.get("budget", "TBD")
-    roles = hiring_data.get("roles", [])
-    
-    plan = f"""# Hiring Plan
-
-                ## Roles
-                {chr(10).join(f'- {role}' for role in roles)}
-
-                ## Timeline: {timeline}
-
-                ## Budget: {budget}
-
-                ## Hiring Checklist
-
-                ### Week 1: Preparation
-                - [ ] Finalize job descriptions
-                - [ ] Set up interview process
-                - [ ] Post on job boards (LinkedIn, Indeed, AngelList)
-                - [ ] Reach out to network for referrals
-
-                ### Week 2-3: Sourcing & Screening
-                - [ ] Review applications daily
-                - [ ] Conduct initial phone screens
-                - [ ] Shortlist candidates for technical rounds
-
-                ### Week 3-4: Interviews
-                - [ ] Technical/skills assessment
-                - [ ] Team fit interviews
-                - [ ] Final round with leadership
-
-                ### Week 4-5: Closing
-                - [ ] Reference checks
-                - [ ] Prepare offers
-                - [ ] Negotiate and close
-
-                ## Next Steps
-                1. Review and customize job descriptions
-                2. Set up tracking in ATS or spreadsheet
-                3. Activate job postings
-                4. Begin outreach to your network
-            """
-    # filepath = save(plan, "hiring_plan.md")
-    # log.info(f"Saved job descriptions to {filepath}")
-    
+    plan = generate_hiring_plan(hiring_data)
+    log.info(f"Generated hiring plan: {plan.family}/{plan.seniority} over {plan.timeline_days} days")
+
     return {
         "hiring_data": hiring_data,
         "current_step": "post_notion",
-        "messages": [AIMessage(content=f"{plan}\n\nWould you like me to post these job descriptions to Notion?")]
+        "artifacts": [{
+            "type": ArtifactType.hiring_plan.value,
+            "title": plan.title,
+            "content_md": plan.markdown,
+            "checklist": plan.checklist,
+            "meta": {"timeline_days": plan.timeline_days, "family": plan.family, "seniority": plan.seniority},
+        }],
+        "messages": [AIMessage(content=f"{plan.markdown}\n\nWould you like me to post these job descriptions to Notion?")]
     }
 
 def post_notion_node(state) -> Dict[str, Any]:
@@ -0,0 +1,73 @@
+"""
+Incremental Notion sync for artifacts.
+
+Each (session, artifact type) maps to one document on a Notion page; the ids
+and content hashes of its blocks are kept in notion_documents. A new version
+of the artifact is diffed against that state so only changed blocks are
+updated, inserted or deleted (see save_to_notion.sync_blocks). A sync that
+fails part-way records the blocks it left on the page, so the next one
+carries on from there instead of appending a second copy.
+"""
+from __future__ import annotations
+
+import hashlib
+from typing import Optional
+from uuid import UUID
+
+import httpx
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.logger import log
+from app.database.database import SessionLocal
+from app.models.notion_document import NotionDocument
+from app.utils.save_to_notion import NotionClient, SyncInterrupted, document_blocks, notion_id, sync_blocks
+
+
+def _lock_document(db: Session, session_id: UUID, artifact_type: str) -> None:
+    """
+    Serialize syncs of one document across workers so none diffs against a
+    stale state: a transaction-scoped advisory lock, held until the new state
+    is committed.
+    """
+    key = hashlib.blake2b(f"notion:{session_id}:{artifact_type}".encode("utf-8"), digest_size=8).digest()
+    db.execute(select(func.pg_advisory_xact_lock(int.from_bytes(key, "big", signed=True))))
+
+
+def sync_artifact(
+    markdown: str,
+    *,
+    session_id: UUID,
+    artifact_type: str,
+    page_id: str,
+    title: str,
+    artifact_id: Optional[UUID] = None,
+):
+    """Create or update the artifact's Notion document and record its new block state."""
+    # Spooled jobs come back from JSON with string ids
+    session_id = UUID(str(session_id))
+    artifact_id = UUID(str(artifact_id)) if artifact_id else None
+    page_id = notion_id(page_id)
+    with SessionLocal() as db:
+        _lock_document(db, session_id, artifact_type)
+        doc = db.get(NotionDocument, (session_id, artifact_type))
+        # A document moved to another page starts over there
+        old = list(doc.blocks_json) if doc is not None and doc.page_id == page_id else []
+
+        with httpx.Client(timeout=20) as client:
+            try:
+                state = sync_blocks(NotionClient(client), page_id, old, document_blocks(markdown, title))
+            except SyncInterrupted as e:
+                # Record what the page now holds so the next sync diffs against it;
+                # artifact_id stays at the last version that fully synced
+                log.error(f"Notion sync failed for {artifact_type} of session {session_id}", exc_info=True)
+                state, artifact_id = e.state, doc.artifact_id if doc is not None else None
+
+        values = dict(page_id=page_id, artifact_id=artifact_id, blocks_json=state, synced_at=func.now())
+        db.execute(
+            insert(NotionDocument)
+            .values(session_id=session_id, artifact_type=artifact_type, **values)
+            .on_conflict_do_update(index_elements=["session_id", "artifact_type"], set_=values)
+        )
+        db.commit()
@@ -1,9 +1,12 @@
-from typing import Dict, List, Optional
+import json
+from typing import Dict, List, Optional, Tuple
 from pydantic import BaseModel, Field
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
+from app.core.admission import AdmissionRejected
 from app.core.llm import get_llm
 from app.core.logger import log
+from app.core.prompts import JD_SECTIONS
 
 class HiringInfo(BaseModel):
     """Structured hiring information extracted from user input"""
@@ -15,6 +18,13 @@ class HiringInfo(BaseModel):
     location: Optional[str] = Field(description="Job location or remote", default=None)
     experience_level: Optional[str] = Field(description="Experience level (junior, mid, senior)", default=None)
 
+class HiringInfoWithJD(HiringInfo):
+    """Hiring information plus a drafted JD when the request is complete"""
+    job_description: Optional[str] = Field(
+        description="Markdown job description for the first role, only when roles, budget and timeline are all known; otherwise null",
+        default=None,
+    )
+
 llm = get_llm()
 parser = JsonOutputParser(pydantic_object=HiringInfo)
 
@@ -31,6 +41,9 @@ prompt = ChatPromptTemplate.from_messages([
     - experience_level: Junior, mid-level, senior?
     
     If information isn't mentioned, leave it as null or empty.
+
+    Recent conversation, for resolving references only:
+    {history}
     
     {format_instructions}
     """),
@@ -39,47 +52,112 @@ prompt = ChatPromptTemplate.from_messages([
 
 chain = prompt | llm | parser
 
-def parse_hiring_request(user_input):
+def parse_hiring_request(user_input, history: str = "(none)"):
 
     try:
         result = chain.invoke({
             "input" : user_input,
+            "history" : history,
             "format_instructions" : parser.get_format_instructions()
         })
         # print(f"Parsed hiring request: {result}")
         log.info(f"Parsed hiring request: {result}")
         return result
+    except AdmissionRejected:
+        raise
     except Exception as e:
         # print(f"Error parsing hiring request: {e}")
         log.info(f"Error parsing hiring request: {e}")
         return e
     
 
-def update_hiring_data(existing_data: Dict, new_input: str) -> Dict:
-    """
-    Update existing hiring data with new information from user
-    """
-    parsed = parse_hiring_request(new_input)
-    
-    # Merge with existing data (new data takes precedence)
+combined_parser = JsonOutputParser(pydantic_object=HiringInfoWithJD)
+
+combined_prompt = ChatPromptTemplate.from_messages([
+    ("system", """You are an expert HR assistant. Extract hiring information from user requests
+    and, when the request is complete, draft the job description in the same answer.
+
+    Already known about this hiring request (JSON):
+    {known_context}
+
+    Extract as much NEW detail from the user's message as possible:
+    - roles, count, budget, timeline, skills, location, experience_level
+
+    If information isn't mentioned, leave it as null or empty.
+
+    Recent conversation, for resolving references only:
+    {history}
+
+    job_description: combine the known context with what you extracted. If roles, budget
+    and timeline are ALL known, write a compelling, concise job description in markdown
+    for the first role. Otherwise set it to null.
+    {jd_sections}
+
+    Excerpts from our past job descriptions (match tone and level of detail; do not copy verbatim):
+    {references}
+
+    {format_instructions}
+    """),
+    ("human", "{input}")
+])
+
+combined_chain = combined_prompt | llm | combined_parser
+
+
+def merge_hiring_data(existing_data: Dict, parsed: Dict) -> Dict:
+    """Merge parsed fields into existing hiring data (new data takes precedence)."""
     updated = existing_data.copy()
-    
+    if not isinstance(parsed, dict):
+        return updated
+
     for key, value in parsed.items():
         if value is not None:  # Only update if new value exists
-            if key == "roles" and value:
-                # Append new roles to existing
-                existing_roles = set(updated.get("roles", []))
-                existing_roles.update(value)
-                updated["roles"] = list(existing_roles)
-            elif key == "skills" and value:
-                # Append new skills to existing
-                existing_skills = set(updated.get("skills", []))
-                existing_skills.update(value)
-                updated["skills"] = list(existing_skills)
+            if key in ("roles", "skills"):
+                # Append new roles/skills to existing; an empty list means none were mentioned
+                if value:
+                    existing_items = set(updated.get(key, []))
+                    existing_items.update(value)
+                    updated[key] = list(existing_items)
             else:
                 # Replace with new value
                 updated[key] = value
-    
+
     return updated
 
-# Optimize with only one prompt calling
\ No newline at end of file
+
+def update_hiring_data(existing_data: Dict, new_input: str, history: str = "(none)") -> Dict:
+    """
+    Update existing hiring data with new information from user
+    """
+    parsed = parse_hiring_request(new_input, history)
+    return merge_hiring_data(existing_data, parsed)
+
+
+def parse_and_draft_jd(existing_data: Dict, new_input: str, history: str = "(none)", references: str = "(none)") -> Tuple[Dict, Optional[str]]:
+    """
+    One LLM call: extract hiring fields and, if the merged request is complete, draft the JD.
+
+    Returns (updated_data, jd_markdown or None). Falls back to the plain parse
+    call if the combined call fails, in which case no JD is returned.
+    """
+    try:
+        result = combined_chain.invoke({
+            "input": new_input,
+            "history": history,
+            "known_context": json.dumps(existing_data or {}, default=str),
+            "jd_sections": JD_SECTIONS,
+            "references": references,
+            "format_instructions": combined_parser.get_format_instructions(),
+        })
+    except AdmissionRejected:
+        raise
+    except Exception as e:
+        log.info(f"Combined parse failed, falling back to plain parse: {e}")
+        return update_hiring_data(existing_data, new_input, history), None
+
+    if not isinstance(result, dict):
+        return update_hiring_data(existing_data, new_input, history), None
+
+    log.info(f"Parsed hiring request (combined): { {k: v for k, v in result.items() if k != 'job_description'} }")
+    jd_md = result.pop("job_description", None)
+    return merge_hiring_data(existing_data, result), jd_md
@@ -0,0 +1,320 @@
+"""
+Hiring-plan engine.
+
+Plans are built from precompiled phase templates (per role family and
+seniority) scheduled proportionally over the parsed timeline. No LLM call.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_TIMELINE_DAYS = 35
+DEFAULT_TIMELINE = "5 weeks"
+
+_UNIT_DAYS = {"day": 1, "week": 7, "month": 30, "quarter": 90}
+_TIMELINE_RE = re.compile(
+    r"(\d+(?:\.\d+)?)(?:\s*(?:-|to|–)\s*(\d+(?:\.\d+)?))?\s*(day|week|month|quarter)s?",
+    re.I,
+)
+_WORD_NUMBERS = {"a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "eight": 8, "ten": 10, "twelve": 12}
+_WORD_TIMELINE_RE = re.compile(r"\b(" + "|".join(_WORD_NUMBERS) + r")\s+(day|week|month|quarter)s?\b", re.I)
+_URGENT_RE = re.compile(r"\b(asap|urgent|immediately|right away)\b", re.I)
+
+
+@dataclass(frozen=True)
+class Phase:
+    name: str
+    weight: float
+    tasks: Tuple[str, ...]
+
+
+@dataclass
+class HiringPlan:
+    title: str
+    markdown: str
+    checklist: List[str] = field(default_factory=list)
+    timeline_days: int = DEFAULT_TIMELINE_DAYS
+    family: str = "general"
+    seniority: str = "mid"
+
+
+def parse_timeline_days(timeline: Optional[str]) -> int:
+    """
+    Parse a free-form timeline ("2 weeks", "4-6 weeks", "1 month", "ASAP") into days.
+
+    Ranges use the upper bound since that is the hiring deadline.
+    """
+    if not timeline:
+        return DEFAULT_TIMELINE_DAYS
+    m = _TIMELINE_RE.search(timeline)
+    if m:
+        amount = float(m.group(2) or m.group(1))
+        return max(1, round(amount * _UNIT_DAYS[m.group(3).lower()]))
+    m = _WORD_TIMELINE_RE.search(timeline)
+    if m:
+        return _WORD_NUMBERS[m.group(1).lower()] * _UNIT_DAYS[m.group(2).lower()]
+    if _URGENT_RE.search(timeline):
+        return 14
+    return DEFAULT_TIMELINE_DAYS
+
+
+# ---------------------------------------------------------------------------
+# Templates
+# ---------------------------------------------------------------------------
+
+_FAMILY_KEYWORDS: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    ("data", ("data", "ml", "machine learning", "ai", "genai", "scientist", "analyst", "research")),
+    ("engineering", ("engineer", "engineering", "developer", "devops", "sre", "architect", "programmer", "cto")),
+    ("design", ("design", "designer", "ux", "ui")),
+    ("product", ("product", "program manager", "pm")),
+    ("sales", ("sales", "account", "business development", "bdr", "sdr", "marketing", "growth")),
+)
+
+_SENIORITY_KEYWORDS: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    ("intern", ("intern", "internship")),
+    ("lead", ("founding", "lead", "principal", "staff", "head", "director", "vp", "chief", "cto")),
+    ("senior", ("senior", "sr", "sr.")),
+    ("junior", ("junior", "jr", "jr.", "entry", "graduate", "associate")),
+)
+
+_PREPARATION = Phase("Preparation", 0.15, (
+    "Finalize job description",
+    "Define interview loop and scorecard",
+    "Post on job boards (LinkedIn, Indeed, AngelList)",
+    "Reach out to network for referrals",
+))
+_SOURCING = Phase("Sourcing & Screening", 0.3, (
+    "Review applications daily",
+    "Conduct initial phone screens",
+    "Shortlist candidates for the next round",
+))
+_CLOSING = Phase("Closing", 0.2, (
+    "Reference checks",
+    "Prepare offer",
+    "Negotiate and close",
+))
+
+_ASSESSMENT: Dict[str, Phase] = {
+    "engineering": Phase("Technical Interviews", 0.35, (
+        "Technical/coding assessment",
+        "System design interview",
+        "Team fit interview",
+    )),
+    "data": Phase("Technical Interviews", 0.35, (
+        "Take-home or live modelling exercise",
+        "ML/statistics deep dive",
+        "Team fit interview",
+    )),
+    "design": Phase("Portfolio Review & Interviews", 0.35, (
+        "Portfolio review",
+        "Design challenge walkthrough",
+        "Cross-functional interview with product and engineering",
+    )),
+    "product": Phase("Interviews", 0.35, (
+        "Product sense case interview",
+        "Execution and prioritization interview",
+        "Stakeholder interviews",
+    )),
+    "sales": Phase("Interviews", 0.35, (
+        "Mock pitch / role play",
+        "Pipeline and quota discussion",
+        "Team fit interview",
+    )),
+    "general": Phase("Interviews", 0.35, (
+        "Skills assessment",
+        "Team fit interview",
+        "Final round with leadership",
+    )),
+}
+
+# Extra tasks appended to a phase by seniority: {seniority: {phase name: tasks}}
+_SENIORITY_TASKS: Dict[str, Dict[str, Tuple[str, ...]]] = {
+    "intern": {
+        "Sourcing & Screening": ("Contact university career centers",),
+        "Closing": ("Confirm start date and mentor assignment",),
+    },
+    "junior": {
+        "Closing": ("Assign onboarding buddy",),
+    },
+    "senior": {
+        "Sourcing & Screening": ("Start targeted outbound sourcing",),
+        "_assessment": ("Final round with leadership",),
+    },
+    "lead": {
+        "Sourcing & Screening": ("Start targeted outbound sourcing", "Brief an executive recruiter if pipeline is thin"),
+        "_assessment": ("Leadership and vision interview with founders", "Back-channel references"),
+        "Closing": ("Align on equity and title",),
+    },
+}
+
+# Seniority shifts time between sourcing and interviews.
+_SENIORITY_WEIGHTS: Dict[str, Dict[str, float]] = {
+    "intern": {"Sourcing & Screening": 0.35, "_assessment": 0.25},
+    "junior": {"Sourcing & Screening": 0.3, "_assessment": 0.3},
+    "senior": {"Sourcing & Screening": 0.3, "_assessment": 0.4},
+    "lead": {"Sourcing & Screening": 0.35, "_assessment": 0.4},
+}
+
+_NEXT_STEPS = (
+    "Review and customize job descriptions",
+    "Set up tracking in ATS or spreadsheet",
+    "Activate job postings",
+    "Begin outreach to your network",
+)
+
+
+def _build_phases(family: str, seniority: str) -> Tuple[Phase, ...]:
+    assessment = _ASSESSMENT[family]
+    weights = _SENIORITY_WEIGHTS.get(seniority, {})
+    extras = _SENIORITY_TASKS.get(seniority, {})
+    phases = []
+    for phase, key in ((_PREPARATION, _PREPARATION.name), (_SOURCING, _SOURCING.name), (assessment, "_assessment"), (_CLOSING, _CLOSING.name)):
+        phases.append(Phase(phase.name, weights.get(key, phase.weight), phase.tasks + extras.get(key, ())))
+    return tuple(phases)
+
+
+_SENIORITIES = ("intern", "junior", "mid", "senior", "lead")
+_TEMPLATES: Dict[Tuple[str, str], Tuple[Phase, ...]] = {
+    (family, seniority): _build_phases(family, seniority)
+    for family in _ASSESSMENT
+    for seniority in _SENIORITIES
+}
+
+
+def _keyword_re(kw: str) -> "re.Pattern[str]":
+    # Whole words only, using the same [a-z.] word characters as _match
+    return re.compile(r"(?<![a-z.])" + re.escape(kw) + r"(?![a-z.])")
+
+
+_FAMILY_PATTERNS = tuple((name, tuple(_keyword_re(kw) for kw in keywords)) for name, keywords in _FAMILY_KEYWORDS)
+
+
+def _match(text: str, table: Tuple[Tuple[str, Tuple[str, ...]], ...], default: str) -> str:
+    words = set(re.findall(r"[a-z.]+", text.lower()))
+    lowered = text.lower()
+    for name, keywords in table:
+        for kw in keywords:
+            if (" " in kw and kw in lowered) or kw in words:
+                return name
+    return default
+
+
+def role_families(role: str) -> List[str]:
+    """
+    Families whose keywords occur in a role title, best first.
+
+    The head noun of an English title comes last ("Product Designer" is a
+    designer, "Data Engineer" an engineer), so the family of the rightmost
+    keyword wins; on ties the longer keyword is more specific.
+    """
+    lowered = (role or "").lower()
+    best: Dict[str, Tuple[int, int]] = {}
+    for name, patterns in _FAMILY_PATTERNS:
+        for pattern in patterns:
+            for m in pattern.finditer(lowered):
+                best[name] = max(best.get(name, (-1, 0)), (m.end(), m.end() - m.start()))
+    return sorted(best, key=best.__getitem__, reverse=True)
+
+
+_YEARS_RE = re.compile(r"(\d+)\s*(?:\+|(?:-|–|to)\s*\d+)?\s*(?:years?|yrs?)\b")
+
+
+def _years_seniority(text: str) -> str:
+    """Seniority from years of experience ("5+ years", "3-5 yrs"), by the lower bound; "" if none given."""
+    m = _YEARS_RE.search(text.lower())
+    if not m:
+        return ""
+    years = int(m.group(1))
+    return "junior" if years < 3 else "mid" if years < 5 else "senior" if years < 8 else "lead"
+
+
+def classify_role(role: str, experience_level: Optional[str] = None) -> Tuple[str, str]:
+    """Return (family, seniority) for a role title and optional experience level."""
+    families = role_families(role)
+    family = families[0] if families else "general"
+    seniority = _match(role or "", _SENIORITY_KEYWORDS, "")
+    if not seniority and experience_level:
+        seniority = _match(experience_level, _SENIORITY_KEYWORDS, "") or _years_seniority(experience_level)
+    return family, seniority or "mid"
+
+
+def _period_label(start: int, end: int, total_days: int) -> str:
+    if total_days <= 21:
+        return f"Day {start}" if start == end else f"Days {start}-{end}"
+    first, last = (start - 1) // 7 + 1, (end - 1) // 7 + 1
+    return f"Week {first}" if first == last else f"Week {first}-{last}"
+
+
+def schedule(phases: Tuple[Phase, ...], days: int) -> List[Tuple[Phase, int, int]]:
+    """
+    Split `days` across phases by weight; every phase gets at least one day
+    and the last one ends on the deadline. Timelines shorter than the phase
+    count are compressed: phases share days rather than run past `days`.
+    """
+    days = max(1, days)
+    if days < len(phases):
+        out = []
+        for i, phase in enumerate(phases):
+            day = i * days // len(phases) + 1
+            out.append((phase, day, day))
+        return out
+    total = sum(p.weight for p in phases)
+    out = []
+    start = 1
+    remaining = days
+    for i, phase in enumerate(phases):
+        phases_left = len(phases) - i - 1
+        if phases_left == 0:
+            length = remaining
+        else:
+            length = max(1, round(days * phase.weight / total))
+            length = min(length, remaining - phases_left)
+        end = start + length - 1
+        out.append((phase, start, end))
+        start = end + 1
+        remaining -= length
+    return out
+
+
+def generate_hiring_plan(hiring_data: Dict) -> HiringPlan:
+    """Build a tailored hiring plan (markdown + checklist) from parsed hiring data."""
+    roles = hiring_data.get("roles") or []
+    primary = roles[0] if roles else "Job Role"
+    timeline = hiring_data.get("timeline") or DEFAULT_TIMELINE
+    budget = hiring_data.get("budget") or "TBD"
+    days = parse_timeline_days(timeline)
+    family, seniority = classify_role(primary, hiring_data.get("experience_level"))
+
+    checklist: List[str] = []
+    lines = [
+        "# Hiring Plan",
+        "",
+        "## Roles",
+        *(f"- {role}" for role in (roles or [primary])),
+        "",
+        f"## Timeline: {timeline} ({days} days)",
+        "",
+        f"## Budget: {budget}",
+        "",
+        "## Hiring Checklist",
+    ]
+    for phase, start, end in schedule(_TEMPLATES[(family, seniority)], days):
+        lines.append("")
+        lines.append(f"### {_period_label(start, end, days)}: {phase.name}")
+        for task in phase.tasks:
+            lines.append(f"- [ ] {task}")
+            checklist.append(task)
+    lines.append("")
+    lines.append("## Next Steps")
+    lines.extend(f"{i}. {step}" for i, step in enumerate(_NEXT_STEPS, start=1))
+
+    return HiringPlan(
+        title=f"Hiring Plan: {primary}",
+        markdown="\n".join(lines),
+        checklist=checklist,
+        timeline_days=days,
+        family=family,
+        seniority=seniority,
+    )
@@ -0,0 +1,65 @@
+from typing import Any, Dict, List, Optional
+
+JD_SECTIONS = """Sections:
+1) Role Overview (2-3 sentences)
+2) Key Responsibilities (3-5 bullets)
+3) Required Qualifications (3-5 bullets)
+4) Nice-to-Have (2-3 bullets)
+5) What We Offer (2-3 bullets)"""
+
+# The headings JD_SECTIONS asks for, in order
+JD_SECTION_TITLES = ("Role Overview", "Key Responsibilities", "Required Qualifications", "Nice-to-Have", "What We Offer")
+
+
+def jd_fields(hiring_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Resolve the JD inputs from hiring_data, with the defaults create_jd_node has always used."""
+    role = hiring_data.get("role")
+    if not role:
+        roles = hiring_data.get("roles") or []
+        role = roles[0] if roles else "Job Role"
+    return {
+        "role": role,
+        "experience": hiring_data.get("experience_level") or "Mid-level",
+        "location": hiring_data.get("location") or "Remote",
+        "skills": hiring_data.get("skills") or [],
+        "company": hiring_data.get("company") or "Early-stage startup",
+    }
+
+
+def references_block(snippets: Optional[List[str]]) -> str:
+    if not snippets:
+        return "(none)"
+    return "\n\n".join(snippets)
+
+
+def jd_prompt(hiring_data: Dict[str, Any], snippets: Optional[List[str]] = None) -> str:
+    f = jd_fields(hiring_data)
+    references = ""
+    if snippets:
+        references = (
+            "\nExcerpts from our past job descriptions (match tone and level of detail; do not copy verbatim):\n"
+            + references_block(snippets)
+            + "\n"
+        )
+    return f"""
+Write a compelling, concise job description in **markdown** for the role: {f['role']}.
+Context:
+- Experience Level: {f['experience']}
+- Location: {f['location']}
+- Company: {f['company']}
+- Key Skills: {', '.join(f['skills']) if f['skills'] else 'to be determined'}
+
+{JD_SECTIONS}
+{references}
+Return ONLY the markdown for the JD (no preface or commentary).
+""".strip()
+
+
+def jd_refine_prompt(hiring_data: Dict[str, Any], draft_md: str, snippets: Optional[List[str]] = None) -> str:
+    """Rewrite a template-filled JD draft into a tailored one (background refinement of the fast JD path)."""
+    return (
+        jd_prompt(hiring_data, snippets)
+        + "\n\nStart from this draft; keep its structure and any specifics it states, but make it specific to this role"
+        " and company and remove generic filler:\n"
+        + draft_md
+    )
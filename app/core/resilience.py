@@ -0,0 +1,243 @@
+"""
+Tail-latency control for LLM calls.
+
+ResilientLLM wraps the primary model with:
+- a per-call timeout,
+- a hedged duplicate request fired once the call has run longer than the
+  configured latency percentile (first response wins),
+- a circuit breaker that, while open, sends calls straight to a secondary
+  provider.
+
+Admission (app.core.admission) is taken on the caller thread before a call
+is handed to the hedge pool, so calls queue in the bounded admission queue
+(and get its fast 429) rather than invisibly in the pool. The timeout and the
+breaker only see time spent with the provider, never local queueing. Hedges
+only run when a slot is free right now.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Any, Callable, Deque, List, Optional, Tuple
+
+from langchain_core.runnables import Runnable
+
+from app import config
+from app.core.admission import AdmissionController, AdmissionRejected, AdmittedLLM
+from app.core.lifecycle import TrackedExecutor
+from app.core.logger import log
+from app.core.metrics import Counter, Gauge
+from app.core.tracing import set_attribute, span
+
+llm_hedges = Counter("llm_hedged_requests_total", "Hedged duplicate LLM requests fired")
+llm_hedge_wins = Counter("llm_hedge_wins_total", "Hedged LLM requests that answered first")
+llm_timeouts = Counter("llm_timeouts_total", "LLM calls that exceeded the per-call timeout")
+llm_fallbacks = Counter("llm_fallback_calls_total", "LLM calls served by the secondary provider")
+llm_breaker_open = Gauge("llm_circuit_open", "1 while the LLM circuit breaker is open")
+
+# Every call running here holds an admission slot, so at LLM_MAX_CONCURRENCY threads admitted work never waits on the pool
+_executor = TrackedExecutor("llm-hedge", max_workers=max(16, config.LLM_MAX_CONCURRENCY), drain=False)
+
+
+class CircuitOpen(Exception):
+    """Raised when the breaker is open and no secondary provider is configured."""
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.min_samples = min_samples
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self.samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        with self._lock:
+            if len(self.samples) < self.min_samples:
+                return None
+            ordered = sorted(self.samples)
+        k = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+        return ordered[k]
+
+
+class CircuitBreaker:
+    """closed -> open after N consecutive failures; half-open probe after reset_seconds."""
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._probing:
+                self._probing = True  # let exactly one probe through
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+            llm_breaker_open.set(0)
+
+    def cancel_probe(self):
+        """Give up a half-open probe that never reached the provider."""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    log.warning(f"LLM circuit breaker opened after {self.failures} failures")
+                self.opened_at = time.monotonic()
+                self._probing = False
+                llm_breaker_open.set(1)
+
+
+class ResilientLLM(Runnable):
+    """Hedged, time-limited primary LLM with circuit-breaker failover; other attributes delegate to the primary."""
+
+    def __init__(
+        self,
+        primary: Runnable,
+        fallback: Optional[Runnable] = None,
+        *,
+        timeout: float = config.LLM_TIMEOUT_SECONDS,
+        hedge: bool = config.LLM_HEDGE_ENABLED,
+        hedge_percentile: float = config.LLM_HEDGE_PERCENTILE,
+        hedge_default_delay: float = config.LLM_HEDGE_DEFAULT_DELAY_SECONDS,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.primary = primary
+        self.fallback = fallback
+        self.timeout = timeout
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_default_delay = hedge_default_delay
+        self.latency = LatencyTracker()
+        self.breaker = breaker or CircuitBreaker(config.LLM_BREAKER_FAILURES, config.LLM_BREAKER_RESET_SECONDS)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.primary, name)
+
+    def hedge_delay(self) -> float:
+        observed = self.latency.percentile(self.hedge_percentile)
+        return self.hedge_default_delay if observed is None else observed
+
+    def _timed(self, call, input, config, kwargs):
+        t0 = time.monotonic()
+        result = call(input, config, **kwargs)
+        self.latency.record(time.monotonic() - t0)
+        return result
+
+    def _provider(self) -> Tuple[Callable, Optional[AdmissionController]]:
+        """The primary's raw invoke and its admission controller (None when the primary is not admitted)."""
+        if isinstance(self.primary, AdmittedLLM):
+            return self.primary.inner.invoke, self.primary.controller
+        return self.primary.invoke, None
+
+    def _submit(self, call: Callable, controller: Optional[AdmissionController], input, config, kwargs) -> Future:
+        """Run an admitted call on the hedge pool; its slot is released when the provider call returns."""
+        try:
+            future = _executor.submit(self._timed, call, input, config, kwargs)
+        except BaseException:
+            if controller is not None:
+                controller.release()
+            raise
+        if controller is not None:
+            future.add_done_callback(lambda _: controller.release())
+        return future
+
+    def _hedged(self, input: Any, config: Any, kwargs: dict) -> Any:
+        call, controller = self._provider()
+        if controller is not None:
+            controller.acquire()  # on the caller thread: AdmissionRejected surfaces as 429 before anything is queued
+        first = self._submit(call, controller, input, config, kwargs)
+        deadline = time.monotonic() + self.timeout
+        pending = {first}
+
+        if self.hedge:
+            done, _ = wait(pending, timeout=min(self.hedge_delay(), self.timeout))
+            if not done:
+                hedge = self._start_hedge(input, config, kwargs)
+                if hedge is not None:
+                    llm_hedges.inc()
+                    pending.add(hedge)
+
+        errors: List[BaseException] = []
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                llm_timeouts.inc()
+                raise TimeoutError(f"LLM call exceeded {self.timeout:.1f}s")
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for f in done:
+                if f.exception() is None:
+                    if f is not first:
+                        llm_hedge_wins.inc()
+                    return f.result()
+                errors.append(f.exception())
+        raise errors[0]
+
+    def _start_hedge(self, input, config, kwargs) -> Optional[Future]:
+        call, controller = self._provider()
+        if controller is not None and not controller.try_acquire():
+            return None
+        return self._submit(call, controller, input, config, kwargs)
+
+    def invoke(self, input: Any, config: Any = None, **kwargs: Any) -> Any:
+        with span("llm.invoke", prompt_chars=len(input) if isinstance(input, str) else None) as s:
+            result = self._invoke(input, config, kwargs)
+            usage = getattr(result, "usage_metadata", None)
+            if s is not None and usage:
+                s.set_attribute("input_tokens", usage.get("input_tokens"))
+                s.set_attribute("output_tokens", usage.get("output_tokens"))
+            return result
+
+    def _invoke(self, input: Any, config: Any, kwargs: dict) -> Any:
+        if self.breaker.allow():
+            try:
+                result = self._hedged(input, config, kwargs)
+            except AdmissionRejected:
+                self.breaker.cancel_probe()
+                raise
+            except Exception as e:
+                self.breaker.record_failure()
+                if self.fallback is None:
+                    raise
+                log.warning(f"Primary LLM failed ({type(e).__name__}: {e}); using fallback provider")
+            else:
+                self.breaker.record_success()
+                set_attribute("provider", "primary")
+                return result
+        elif self.fallback is None:
+            raise CircuitOpen("LLM circuit breaker is open and no fallback provider is configured")
+
+        llm_fallbacks.inc()
+        set_attribute("provider", "fallback")
+        # get_llm wraps the fallback in AdmittedLLM too, so it waits in the same bounded queue on this thread
+        return self.fallback.invoke(input, config, **kwargs)
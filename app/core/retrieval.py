@@ -0,0 +1,477 @@
+"""
+Offline BM25 retrieval over our own past JDs and job postings.
+
+On disk the index is a set of immutable segments plus an append-only delta
+log:
+
+    <dir>/CURRENT                   name of the live segment
+    <dir>/segment-<n>/meta.json     N, avgdl, term -> (offset, count, df)
+    <dir>/segment-<n>/postings.bin  int32 (doc, tf) pairs per term, sorted by
+                                    BM25 impact, highest first
+    <dir>/segment-<n>/doclens.bin   uint32 length per doc
+    <dir>/segment-<n>/docs.bin      utf-8 "key\\x1ftitle\\x1ftext" records
+    <dir>/segment-<n>/docs.idx      uint64 record offsets (N + 1)
+    <dir>/segment-<n>/keys.txt      the segment's doc keys, one per line
+    <dir>/segment-<n>/delta.jsonl   docs added since the segment was written
+    <dir>/LOCK, <dir>/COMPACT.lock  flock files (see below)
+
+Binary files are memory-mapped, so opening an index only parses meta.json
+and replays the (small) delta. Queries read just the first `depth` postings
+of each term from the segment, which bounds lookup cost regardless of
+corpus size, and score the in-memory delta exactly. compact() folds the
+delta into a new segment; index_artifacts schedules it in the background.
+
+Several worker processes can share one directory. Appends to delta.jsonl and
+CURRENT switches happen under an exclusive flock on LOCK, and each process
+replays lines other processes appended (and follows CURRENT) before it reads
+or writes, so doc numbering is the file order everywhere. Only one process
+compacts at a time (COMPACT.lock).
+"""
+from __future__ import annotations
+
+import fcntl
+import heapq
+import json
+import math
+import mmap
+import os
+import re
+import shutil
+import threading
+from array import array
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.core.lifecycle import TrackedExecutor
+from app.core.logger import log
+from app.core.workers import after_fork
+
+K1 = 1.2
+B = 0.75
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9]+)*")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or our that the this to we will with you your".split()
+)
+_SEP = "\x1f"
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall((text or "").lower()) if t not in _STOPWORDS]
+
+
+@dataclass
+class Hit:
+    key: str
+    title: str
+    score: float
+    snippet: str
+
+
+def best_snippet(text: str, terms: Iterable[str], max_chars: int) -> str:
+    """Highest-overlap lines of `text`, kept in document order, up to max_chars."""
+    wanted = set(terms)
+    lines = [ln.strip() for ln in text.splitlines() if ln.strip()]
+    scored = sorted(range(len(lines)), key=lambda i: -len(wanted.intersection(tokenize(lines[i]))))
+    chosen, used = [], 0
+    for i in scored:
+        if used + len(lines[i]) > max_chars and chosen:
+            break
+        chosen.append(i)
+        used += len(lines[i]) + 1
+    return "\n".join(lines[i] for i in sorted(chosen))[:max_chars]
+
+
+def _impact(tf: int, dl: int, avgdl: float) -> float:
+    return tf * (K1 + 1) / (tf + K1 * (1 - B + B * dl / (avgdl or 1.0)))
+
+
+def _mmap(path: Path) -> Optional[mmap.mmap]:
+    if not path.exists() or path.stat().st_size == 0:
+        return None
+    with path.open("rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class _Segment:
+    """Read-only, memory-mapped segment."""
+
+    def __init__(self, path: Optional[Path]):
+        self.path = path
+        self.n_docs = 0
+        self.avgdl = 0.0
+        self.terms: Dict[str, List[int]] = {}
+        self._postings = self._doclens = self._docs = self._docs_idx = None
+        self._postings_view = self._doclens_view = self._docs_idx_view = None
+        if path is None:
+            return
+        meta = json.loads((path / "meta.json").read_text(encoding="utf-8"))
+        self.n_docs, self.avgdl, self.terms = meta["n_docs"], meta["avgdl"], meta["terms"]
+        self._postings = _mmap(path / "postings.bin")
+        self._doclens = _mmap(path / "doclens.bin")
+        self._docs = _mmap(path / "docs.bin")
+        self._docs_idx = _mmap(path / "docs.idx")
+        self._postings_view = memoryview(self._postings).cast("i") if self._postings else None
+        self._doclens_view = memoryview(self._doclens).cast("I") if self._doclens else None
+        self._docs_idx_view = memoryview(self._docs_idx).cast("Q") if self._docs_idx else None
+
+    def postings(self, term: str, depth: Optional[int] = None) -> List[int]:
+        """Flat [doc, tf, doc, tf, ...] for the first `depth` postings of term."""
+        entry = self.terms.get(term)
+        if entry is None or self._postings_view is None:
+            return []
+        offset, count, _df = entry
+        if depth is not None:
+            count = min(count, depth)
+        return self._postings_view[offset * 2:(offset + count) * 2].tolist()
+
+    def df(self, term: str) -> int:
+        entry = self.terms.get(term)
+        return entry[2] if entry else 0
+
+    def doc_len(self, doc: int) -> int:
+        return self._doclens_view[doc]
+
+    def doc(self, doc: int) -> Tuple[str, str, str]:
+        start, end = self._docs_idx_view[doc], self._docs_idx_view[doc + 1]
+        key, title, text = self._docs[start:end].decode("utf-8").split(_SEP, 2)
+        return key, title, text
+
+    def close(self):
+        for view in (self._postings_view, self._doclens_view, self._docs_idx_view):
+            if view is not None:
+                view.release()
+        for m in (self._postings, self._doclens, self._docs, self._docs_idx):
+            if m is not None:
+                m.close()
+
+
+class BM25Index:
+    def __init__(self, directory: Optional[Path] = None, depth: int = 128, max_text_chars: int = 4000):
+        self.directory = Path(directory) if directory else None
+        self.depth = depth
+        self.max_text_chars = max_text_chars
+        self._lock = threading.RLock()
+        self._keys: Optional[set] = None
+        self._segment = _Segment(None)
+        # Delta segment: docs numbered after the segment's docs, in delta.jsonl order
+        self._delta_docs: List[Tuple[str, str, str]] = []
+        self._delta_lens: List[int] = []
+        self._delta_postings: Dict[str, List[Tuple[int, int]]] = {}
+        self._delta_offset = 0  # bytes of delta.jsonl replayed so far
+        self._current_stat: Optional[Tuple[int, int]] = None
+        self._lock_fd: Optional[int] = None
+        if self.directory:
+            self._open()
+
+    # ---------- lifecycle ----------
+
+    def _open(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock_fd = os.open(self.directory / "LOCK", os.O_RDWR | os.O_CREAT, 0o644)
+        with self._file_lock(fcntl.LOCK_EX):
+            if not (self.directory / "CURRENT").exists():
+                self._write_segment(self.directory / "segment-0", {}, [], [])
+                (self.directory / "CURRENT").write_text("segment-0")
+            self._sync()
+
+    @contextmanager
+    def _file_lock(self, mode: int):
+        """Cross-process lock on <dir>/LOCK: writers (appends, CURRENT switches) hold it exclusively."""
+        if self._lock_fd is None:
+            yield
+            return
+        fcntl.flock(self._lock_fd, mode)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def _sync(self):
+        """
+        Catch up with other processes sharing the directory: switch to a new
+        segment if CURRENT moved, then replay delta.jsonl lines appended since
+        the last sync. Cheap (two stats) when nothing changed.
+        """
+        current = self.directory / "CURRENT"
+        st = current.stat()
+        if (st.st_ino, st.st_mtime_ns) != self._current_stat:
+            name = current.read_text().strip()
+            if self._segment.path is None or self._segment.path.name != name:
+                self._segment.close()
+                self._segment = _Segment(self.directory / name)
+                self._reset_delta()
+            self._current_stat = (st.st_ino, st.st_mtime_ns)
+        delta = self._segment.path / "delta.jsonl"
+        if delta.stat().st_size <= self._delta_offset:
+            return
+        with delta.open("rb") as f:
+            f.seek(self._delta_offset)
+            chunk = f.read()
+        # A writer may be mid-append; only complete lines are replayed
+        chunk = chunk[: chunk.rfind(b"\n") + 1]
+        for line in chunk.splitlines():
+            if line.strip():
+                d = json.loads(line)
+                self._add_to_delta(d["key"], d["title"], d["text"])
+        self._delta_offset += len(chunk)
+
+    def _reset_delta(self):
+        self._delta_docs, self._delta_lens, self._delta_postings = [], [], {}
+        self._delta_offset = 0
+        self._keys = None
+
+    def close(self):
+        with self._lock:
+            self._segment.close()
+            if self._lock_fd is not None:
+                os.close(self._lock_fd)
+                self._lock_fd = None
+
+    # ---------- writes ----------
+
+    @property
+    def n_docs(self) -> int:
+        with self._lock:
+            if self._lock_fd is not None:
+                self._sync()
+            return self._count()
+
+    def _count(self) -> int:
+        return self._segment.n_docs + len(self._delta_docs)
+
+    def _known_keys(self) -> set:
+        if self._keys is None:
+            keys_file = self._segment.path / "keys.txt" if self._segment.path else None
+            if keys_file is not None and keys_file.exists():
+                keys = set(keys_file.read_text(encoding="utf-8").splitlines())
+            else:
+                # Segments written before keys.txt existed
+                keys = {self._segment.doc(i)[0] for i in range(self._segment.n_docs)}
+            keys.update(d[0] for d in self._delta_docs)
+            self._keys = keys
+        return self._keys
+
+    def _add_to_delta(self, key: str, title: str, text: str):
+        doc = self._count()
+        tokens = tokenize(f"{title}\n{text}")
+        counts: Dict[str, int] = {}
+        for t in tokens:
+            counts[t] = counts.get(t, 0) + 1
+        for term, tf in counts.items():
+            self._delta_postings.setdefault(term, []).append((doc, tf))
+        self._delta_docs.append((key, title, text))
+        self._delta_lens.append(len(tokens))
+        if self._keys is not None:
+            self._keys.add(key)
+
+    def add(self, key: str, title: str, text: str) -> bool:
+        """Index one document; returns False if `key` is already indexed."""
+        text = (text or "")[: self.max_text_chars].replace(_SEP, " ")
+        title = (title or "").replace(_SEP, " ")
+        with self._lock, self._file_lock(fcntl.LOCK_EX):
+            if self.directory:
+                self._sync()
+            if key in self._known_keys():
+                return False
+            if self.directory:
+                line = (json.dumps({"key": key, "title": title, "text": text}) + "\n").encode("utf-8")
+                with (self._segment.path / "delta.jsonl").open("ab") as f:
+                    f.write(line)
+                self._delta_offset += len(line)
+            self._add_to_delta(key, title, text)
+            return True
+
+    # ---------- reads ----------
+
+    def search(self, query: str, k: int = 3, snippet_chars: int = 400) -> List[Hit]:
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        with self._lock:
+            if self.directory:
+                self._sync()
+            seg = self._segment
+            n = self._count()
+            if n == 0:
+                return []
+            total_len = seg.avgdl * seg.n_docs + sum(self._delta_lens)
+            avgdl = total_len / n
+            scores: Dict[int, float] = {}
+            for term in terms:
+                delta = self._delta_postings.get(term, ())
+                df = seg.df(term) + len(delta)
+                if df == 0:
+                    continue
+                idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+                flat = seg.postings(term, self.depth)
+                lens = seg._doclens_view
+                norm = K1 * (1 - B)
+                per_len = K1 * B / (avgdl or 1.0)
+                weight = idf * (K1 + 1)
+                get = scores.get
+                for doc, tf in zip(flat[0::2], flat[1::2]):
+                    scores[doc] = get(doc, 0.0) + weight * tf / (tf + norm + per_len * lens[doc])
+                base = seg.n_docs
+                for doc, tf in delta:
+                    scores[doc] = scores.get(doc, 0.0) + idf * _impact(tf, self._delta_lens[doc - base], avgdl)
+
+            hits = []
+            for doc, score in heapq.nlargest(k, scores.items(), key=lambda kv: kv[1]):
+                key, title, text = seg.doc(doc) if doc < seg.n_docs else self._delta_docs[doc - seg.n_docs]
+                hits.append(Hit(key=key, title=title, score=score, snippet=best_snippet(text, terms, snippet_chars)))
+            return hits
+
+    # ---------- compaction ----------
+
+    def _write_segment(self, path: Path, postings: Dict[str, List[Tuple[int, int]]], lens: List[int],
+                       docs: List[Tuple[str, str, str]], delta_lines: bytes = b""):
+        path.mkdir(parents=True, exist_ok=True)
+        avgdl = (sum(lens) / len(lens)) if lens else 0.0
+        terms: Dict[str, List[int]] = {}
+        flat = array("i")
+        for term in sorted(postings):
+            plist = sorted(postings[term], key=lambda p: -_impact(p[1], lens[p[0]], avgdl))
+            terms[term] = [len(flat) // 2, len(plist), len(plist)]
+            for doc, tf in plist:
+                flat.append(doc)
+                flat.append(tf)
+        offsets = array("Q", [0])
+        with (path / "docs.bin").open("wb") as f:
+            for key, title, text in docs:
+                f.write(_SEP.join((key, title, text)).encode("utf-8"))
+                offsets.append(f.tell())
+        (path / "postings.bin").write_bytes(flat.tobytes())
+        (path / "doclens.bin").write_bytes(array("I", lens).tobytes())
+        (path / "docs.idx").write_bytes(offsets.tobytes())
+        (path / "keys.txt").write_text("".join(key + "\n" for key, _, _ in docs), encoding="utf-8")
+        (path / "delta.jsonl").write_bytes(delta_lines)
+        (path / "meta.json").write_text(json.dumps({"n_docs": len(docs), "avgdl": avgdl, "terms": terms}), encoding="utf-8")
+
+    def compact(self) -> bool:
+        """
+        Fold the delta into a new segment and switch CURRENT to it atomically;
+        returns False if another process is already compacting.
+
+        The rebuild runs without the write lock, so adds (here and in other
+        workers) keep going; lines appended meanwhile are carried over into
+        the new segment's delta at the switch. The retired segment is left on
+        disk for workers that still have it mapped and removed by the next
+        compaction (they switch on their next read or write).
+        """
+        if not self.directory:
+            return False
+        compact_fd = os.open(self.directory / "COMPACT.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            try:
+                fcntl.flock(compact_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False
+            with self._lock, self._file_lock(fcntl.LOCK_EX):
+                self._sync()
+                seg = self._segment
+                folded = len(self._delta_docs)
+                folded_offset = self._delta_offset
+                delta_docs, delta_lens = list(self._delta_docs), list(self._delta_lens)
+                delta_postings = {t: list(p) for t, p in self._delta_postings.items()}
+
+            # CURRENT cannot move while we hold COMPACT.lock, so `seg` stays open
+            postings: Dict[str, List[Tuple[int, int]]] = {}
+            for term in seg.terms:
+                flat = seg.postings(term)
+                postings[term] = [(flat[i], flat[i + 1]) for i in range(0, len(flat), 2)]
+            for term, plist in delta_postings.items():
+                postings.setdefault(term, []).extend(plist)
+            lens = [seg.doc_len(i) for i in range(seg.n_docs)] + delta_lens
+            docs = [seg.doc(i) for i in range(seg.n_docs)] + delta_docs
+            number = int(seg.path.name.split("-")[1])
+            name = f"segment-{number + 1}"
+
+            with self._lock, self._file_lock(fcntl.LOCK_EX):
+                with (seg.path / "delta.jsonl").open("rb") as f:
+                    f.seek(folded_offset)
+                    tail = f.read()
+                self._write_segment(self.directory / name, postings, lens, docs, tail)
+                tmp = self.directory / "CURRENT.tmp"
+                tmp.write_text(name)
+                os.replace(tmp, self.directory / "CURRENT")
+                self._sync()
+            for old in self.directory.glob("segment-*"):
+                if int(old.name.split("-")[1]) < number:
+                    shutil.rmtree(old, ignore_errors=True)
+            log.info(f"Compacted research index into {name} ({len(docs)} docs, {folded} from the delta)")
+            return True
+        finally:
+            os.close(compact_fd)
+
+    def needs_compaction(self, threshold: int) -> bool:
+        return len(self._delta_docs) >= threshold
+
+    def maybe_compact(self, threshold: int) -> bool:
+        return self.needs_compaction(threshold) and self.compact()
+
+
+# Compaction rebuilds the whole segment, so it runs off the request path; an
+# unfinished one just leaves the old segment live
+_compaction_executor = TrackedExecutor("research-compaction", max_workers=1, drain=False)
+
+
+def schedule_compaction(index: "BM25Index", threshold: int) -> None:
+    """Compact `index` in the background once its delta reaches `threshold` docs (one compaction at a time)."""
+    if index.needs_compaction(threshold) and not _compaction_executor.unfinished():
+        _compaction_executor.submit(index.maybe_compact, threshold)
+
+
+_research_index: Optional[BM25Index] = None
+_research_index_lock = threading.Lock()
+
+
+@after_fork
+def _reset_research_index():
+    global _research_index, _research_index_lock
+    _research_index, _research_index_lock = None, threading.Lock()
+
+
+def get_research_index() -> BM25Index:
+    """Process-wide index over RESEARCH_INDEX_DIR, opened on first use."""
+    global _research_index
+    if _research_index is None:
+        from app import config
+
+        with _research_index_lock:
+            if _research_index is None:
+                _research_index = BM25Index(Path(config.RESEARCH_INDEX_DIR))
+    return _research_index
+
+
+def research_query(hiring_data: Dict, extra_text: str = "") -> str:
+    roles = hiring_data.get("roles") or []
+    parts = [*roles, hiring_data.get("experience_level") or "", *(hiring_data.get("skills") or []), extra_text]
+    return " ".join(p for p in parts if p)
+
+
+def research_snippets(query: str) -> List[str]:
+    """Top-k snippets from past JDs/postings for `query`, formatted for a prompt."""
+    from app import config
+
+    hits = get_research_index().search(query, k=config.RESEARCH_TOP_K, snippet_chars=config.RESEARCH_SNIPPET_CHARS)
+    return [f"[{h.title}]\n{h.snippet}" for h in hits]
+
+
+def index_artifacts(artifacts: List[Dict]) -> None:
+    """Add freshly persisted JD artifacts to the research index; failures are logged, never raised."""
+    from app import config
+    from app.schemas.enums import ArtifactType
+
+    if not config.RESEARCH_ENABLED or config.DRY_RUN:
+        return
+    try:
+        index = get_research_index()
+        for artifact in artifacts:
+            if artifact.get("type") == ArtifactType.job_description.value and artifact.get("id"):
+                index.add(str(artifact["id"]), artifact.get("title") or "", artifact.get("content_md") or "")
+        schedule_compaction(index, config.RESEARCH_COMPACT_THRESHOLD)
+    except Exception as e:
+        log.error(f"Failed to index artifacts for research: {e}")
@@ -0,0 +1,313 @@
+"""
+Semantic near-duplicate cache for generated JDs.
+
+Role + skills are embedded offline with a signed hashing vectorizer
+(word unigrams plus character trigrams after abbreviation expansion), so
+"Sr. Backend Engineer (Python, AWS)" and "Senior Backend Engineer -
+Python/AWS" land close together. Vectors live in a fixed-capacity float32
+matrix backed by a memory-mapped .npy file; lookups are one matrix-vector
+(or matrix-matrix, for batches) product. When full, the least recently used
+slot is overwritten.
+
+Entries also carry a `scope` that must match exactly: location and company,
+since those are written into the JD verbatim, and the seniority bucket, since
+"Junior" and "Senior" titles differ by a single word and embed too close for
+any threshold to keep their JDs apart.
+
+Worker processes can share one directory: writers hold an exclusive flock on
+<dir>/LOCK while they pick slots, write vectors and append to payloads.jsonl;
+readers hold it shared and first replay payload lines other processes
+appended, so a slot's vector and payload are always read together. A hit's
+recency stamp is a write too, taken under the exclusive lock after the read.
+"""
+from __future__ import annotations
+
+import fcntl
+import json
+import os
+import re
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from app.core.logger import log
+from app.core.plan import classify_role
+from app.core.prompts import jd_fields
+from app.core.workers import after_fork
+
+_WORD_RE = re.compile(r"[a-z0-9][a-z0-9+#]*")
+_ABBREVIATIONS = {
+    "sr": "senior", "snr": "senior", "jr": "junior", "jnr": "junior",
+    "eng": "engineer", "engr": "engineer", "engineering": "engineer", "swe": "software engineer", "sde": "software engineer",
+    "dev": "developer", "mgr": "manager", "pm": "product manager", "ds": "data scientist",
+    "ml": "machine learning", "ai": "artificial intelligence", "genai": "generative ai",
+    "k8s": "kubernetes", "js": "javascript", "ts": "typescript", "py": "python",
+    "mid": "midlevel", "level": "",
+}
+_STOPWORDS = frozenset("a an and the of for with in at to or".split())
+# Seniority modifiers in titles; seniority is matched exactly through the scope instead
+_SENIORITY_MODIFIERS = frozenset(
+    "senior junior midlevel intern internship lead principal staff founding entry graduate associate".split()
+)
+
+
+def normalize(text: str) -> List[str]:
+    words: List[str] = []
+    for w in _WORD_RE.findall((text or "").lower()):
+        expanded = _ABBREVIATIONS.get(w, w)
+        words.extend(t for t in expanded.split() if t not in _STOPWORDS)
+    return words
+
+
+def _features(text: str) -> List[Tuple[str, float]]:
+    words = normalize(text)
+    feats = [(f"w:{w}", 1.0) for w in words]
+    for w in words:
+        padded = f"<{w}>"
+        feats.extend((f"c:{padded[i:i + 3]}", 0.35) for i in range(len(padded) - 2))
+    return feats
+
+
+def embed(text: str, dims: int) -> np.ndarray:
+    """L2-normalized signed hashing vector."""
+    vec = np.zeros(dims, dtype=np.float32)
+    for feat, weight in _features(text):
+        h = zlib.crc32(feat.encode("utf-8"))
+        vec[h % dims] += weight if (h >> 31) & 1 else -weight
+    norm = float(np.linalg.norm(vec))
+    return vec / norm if norm else vec
+
+
+def embed_batch(texts: Sequence[str], dims: int) -> np.ndarray:
+    return np.stack([embed(t, dims) for t in texts]) if texts else np.zeros((0, dims), dtype=np.float32)
+
+
+def cache_text(hiring_data: Dict[str, Any]) -> str:
+    """The fuzzy-matched JD inputs: role (without seniority modifiers) and skills."""
+    f = jd_fields(hiring_data)
+    role = " ".join(w for w in normalize(f["role"]) if w not in _SENIORITY_MODIFIERS)
+    skills = " ".join(sorted(s.lower() for s in f["skills"]))
+    return f"{role} {skills}"
+
+
+def cache_scope(hiring_data: Dict[str, Any]) -> str:
+    """The exactly-matched JD inputs: location, company and seniority bucket (from the title or experience level)."""
+    f = jd_fields(hiring_data)
+    _, seniority = classify_role(f["role"], hiring_data.get("experience_level"))
+    return f"{f['location'].strip().lower()}|{f['company'].strip().lower()}|{seniority}"
+
+
+class SemanticCache:
+    def __init__(self, directory: Optional[Path] = None, dims: int = 512, capacity: int = 100_000, threshold: float = 0.9):
+        self.directory = Path(directory) if directory else None
+        self.dims = dims
+        self.capacity = capacity
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self.size = 0
+        self._payloads: Dict[int, Dict[str, Any]] = {}
+        self._lock_fd: Optional[int] = None
+        self._log_id: Optional[int] = None  # inode of payloads.jsonl as last replayed
+        self._log_offset = 0
+        self._log_lines = 0
+
+        if self.directory:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._lock_fd = os.open(self.directory / "LOCK", os.O_RDWR | os.O_CREAT, 0o644)
+            with self._file_lock(fcntl.LOCK_EX):
+                vectors_path = self.directory / "vectors.npy"
+                mode = "r+" if vectors_path.exists() else "w+"
+                self._vectors = open_memmap(vectors_path, mode=mode, dtype=np.float32, shape=None if mode == "r+" else (capacity, dims))
+                self._last_used = open_memmap(self.directory / "last_used.npy", mode=mode, dtype=np.float64, shape=None if mode == "r+" else (capacity,))
+                self.capacity, self.dims = self._vectors.shape
+                self._sync()
+                self._rewrite_log()
+        else:
+            self._vectors = np.zeros((capacity, dims), dtype=np.float32)
+            self._last_used = np.zeros(capacity, dtype=np.float64)
+
+    @contextmanager
+    def _file_lock(self, mode: int):
+        """Cross-process lock on <dir>/LOCK (no-op in memory); callers also hold self._lock."""
+        if self._lock_fd is None:
+            yield
+            return
+        fcntl.flock(self._lock_fd, mode)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def _sync(self):
+        """Replay payloads.jsonl lines appended since the last sync (by any process); starts over if it was rewritten."""
+        path = self.directory / "payloads.jsonl"
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return
+        if st.st_ino != self._log_id or st.st_size < self._log_offset:
+            self._payloads, self._log_id, self._log_offset, self._log_lines = {}, st.st_ino, 0, 0
+        if st.st_size == self._log_offset:
+            return
+        with path.open("rb") as f:
+            f.seek(self._log_offset)
+            chunk = f.read(st.st_size - self._log_offset)
+        for line in chunk.splitlines():
+            if line.strip():
+                entry = json.loads(line)
+                self._payloads[entry["slot"]] = entry
+                self._log_lines += 1
+        self._log_offset += len(chunk)
+        self.size = max(self._payloads, default=-1) + 1
+
+    def _rewrite_log(self):
+        # Evictions leave superseded entries behind; rewrite with live ones only (under the exclusive lock)
+        path = self.directory / "payloads.jsonl"
+        if self._log_lines <= 2 * len(self._payloads):
+            return
+        tmp = path.with_suffix(".tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            for slot in sorted(self._payloads):
+                f.write(json.dumps(self._payloads[slot]) + "\n")
+        tmp.replace(path)
+        self._sync()
+
+    # ---------- reads ----------
+
+    def _best(self, sims: np.ndarray, scope: str) -> Optional[Tuple[int, float]]:
+        # Every slot above the threshold is a candidate: the same role in other
+        # locations/companies scores just as high, so no fixed top-k is enough
+        above = np.flatnonzero(sims >= self.threshold)
+        for slot in above[np.argsort(-sims[above], kind="stable")]:
+            payload = self._payloads.get(int(slot))
+            if payload is not None and payload.get("scope") == scope:
+                return int(slot), float(sims[slot])
+        return None
+
+    def _touch(self, slots: List[int]):
+        """Mark hits as recently used (caller holds self._lock, not the file lock)."""
+        if slots:
+            with self._file_lock(fcntl.LOCK_EX):
+                self._last_used[slots] = time.time()
+
+    def lookup(self, text: str, scope: str = "") -> Optional[Tuple[Dict[str, Any], float]]:
+        """Return (payload, similarity) of the closest in-scope entry above the threshold."""
+        q = embed(text, self.dims)
+        with self._lock:
+            with self._file_lock(fcntl.LOCK_SH):
+                if self.directory:
+                    self._sync()
+                best = self._best(self._vectors[: self.size] @ q, scope)
+                if best is None:
+                    return None
+                slot, sim = best
+                payload = self._payloads[slot]
+            self._touch([slot])
+            return payload, sim
+
+    def lookup_batch(self, texts: Sequence[str], scopes: Optional[Sequence[str]] = None) -> List[Optional[Tuple[Dict[str, Any], float]]]:
+        """Vectorized lookup for many queries with one matrix product."""
+        scopes = scopes or [""] * len(texts)
+        q = embed_batch(texts, self.dims)
+        with self._lock:
+            with self._file_lock(fcntl.LOCK_SH):
+                if self.directory:
+                    self._sync()
+                sims = q @ self._vectors[: self.size].T
+                out, hits = [], []
+                for row, scope in zip(sims, scopes):
+                    best = self._best(row, scope)
+                    if best is None:
+                        out.append(None)
+                        continue
+                    hits.append(best[0])
+                    out.append((self._payloads[best[0]], best[1]))
+            self._touch(hits)
+            return out
+
+    # ---------- writes ----------
+
+    def add(self, text: str, scope: str, payload: Dict[str, Any]) -> int:
+        """Insert an entry, evicting the least recently used one when full; returns its slot."""
+        vec = embed(text, self.dims)
+        return self.add_vectors(vec[None, :], [text], [scope], [payload])[0]
+
+    def add_vectors(self, vectors: np.ndarray, texts: Sequence[str], scopes: Sequence[str], payloads: Sequence[Dict[str, Any]]) -> List[int]:
+        """Bulk insert pre-embedded entries."""
+        with self._lock, self._file_lock(fcntl.LOCK_EX):
+            if self.directory:
+                self._sync()  # slots are picked from the size every process agrees on
+            n = len(vectors)
+            if n > self.capacity:
+                raise ValueError(f"Cannot insert {n} entries into a cache of capacity {self.capacity}")
+            start = self.size
+            fresh = min(n, self.capacity - start)
+            slots = list(range(start, start + fresh))
+            self.size += fresh
+            if n > fresh:
+                # Full: overwrite the least recently used of the existing slots
+                lru = np.argpartition(self._last_used[:start], n - fresh - 1)[: n - fresh]
+                slots.extend(int(i) for i in lru)
+            self._vectors[slots] = vectors
+            self._last_used[slots] = time.time()
+            entries = [
+                {"slot": slot, "text": text, "scope": scope, **payload}
+                for slot, text, scope, payload in zip(slots, texts, scopes, payloads)
+            ]
+            for entry in entries:
+                self._payloads[entry["slot"]] = entry
+            if self.directory:
+                lines = "".join(json.dumps(e) + "\n" for e in entries).encode("utf-8")
+                with (self.directory / "payloads.jsonl").open("ab") as f:
+                    f.write(lines)
+                self._log_id = self._log_id or (self.directory / "payloads.jsonl").stat().st_ino
+                self._log_offset += len(lines)
+                self._log_lines += len(entries)
+            return slots
+
+    def flush(self):
+        with self._lock:
+            if isinstance(self._vectors, np.memmap):
+                self._vectors.flush()
+                self._last_used.flush()
+
+    def close(self):
+        self.flush()
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+
+_jd_cache: Optional[SemanticCache] = None
+_jd_cache_lock = threading.Lock()
+
+
+@after_fork
+def _reset_jd_cache():
+    # Reopen in the child rather than share the parent's memmaps and log handle
+    global _jd_cache, _jd_cache_lock
+    _jd_cache, _jd_cache_lock = None, threading.Lock()
+
+
+def get_jd_cache() -> SemanticCache:
+    """Process-wide JD cache over SEMANTIC_CACHE_DIR, opened on first use."""
+    global _jd_cache
+    if _jd_cache is None:
+        from app import config
+
+        with _jd_cache_lock:
+            if _jd_cache is None:
+                _jd_cache = SemanticCache(
+                    Path(config.SEMANTIC_CACHE_DIR),
+                    dims=config.SEMANTIC_CACHE_DIMS,
+                    capacity=config.SEMANTIC_CACHE_CAPACITY,
+                    threshold=config.SEMANTIC_CACHE_THRESHOLD,
+                )
+                log.info(f"Opened semantic JD cache with {_jd_cache.size} entries")
+    return _jd_cache
@@ -0,0 +1,54 @@
+"""
+In-process push channel for events that happen after a turn returned
+(e.g. a refined JD version). Open chat WebSockets subscribe to their session;
+publishing to a session nobody is connected to is a no-op, and clients
+that are not connected pick the result up on their next read.
+"""
+from __future__ import annotations
+
+import threading
+from typing import Any, Callable, Dict, List
+from uuid import UUID
+
+from app.core.logger import log
+from app.core.workers import after_fork
+
+Listener = Callable[[Dict[str, Any]], None]
+
+_listeners: Dict[UUID, List[Listener]] = {}
+_lock = threading.Lock()
+
+
+def subscribe(session_id: UUID, listener: Listener) -> Callable[[], None]:
+    """Register `listener` for the session's events; returns the unsubscribe function."""
+    with _lock:
+        _listeners.setdefault(session_id, []).append(listener)
+
+    def unsubscribe():
+        with _lock:
+            listeners = _listeners.get(session_id, [])
+            if listener in listeners:
+                listeners.remove(listener)
+            if not listeners:
+                _listeners.pop(session_id, None)
+
+    return unsubscribe
+
+
+def publish(session_id: UUID, event: Dict[str, Any]) -> int:
+    """Deliver `event` to the session's listeners (called from worker threads); returns how many got it."""
+    with _lock:
+        listeners = list(_listeners.get(session_id, ()))
+    for listener in listeners:
+        try:
+            listener(event)
+        except Exception:
+            log.error(f"Session event listener failed for session {session_id}", exc_info=True)
+    return len(listeners)
+
+
+@after_fork
+def _reset_listeners():
+    global _lock
+    _listeners.clear()
+    _lock = threading.Lock()
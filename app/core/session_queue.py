@@ -0,0 +1,115 @@
+"""
+Per-session serialization and coalescing of concurrent chat turns.
+
+Only one turn per session runs at a time in this process. Messages that
+arrive for a busy session are queued; when the running turn finishes, the
+queue is merged into one follow-up turn, run by the first queued caller,
+and every caller merged into it gets that turn's response. A burst of N
+messages therefore costs two agent runs, not N. Only consecutive messages
+with the same coalescing key (for /chat, the jd_mode) are merged; the rest
+run as later turns, in arrival order.
+
+Across worker processes, turns are serialized by the Postgres advisory lock
+taken in app.database.turns.lock_session; coalescing is per process.
+"""
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Hashable, List, Optional, TypeVar
+from uuid import UUID
+
+from app.core.logger import log
+
+T = TypeVar("T")
+
+COALESCE_SEPARATOR = "\n\n"
+
+
+@dataclass
+class _Waiter:
+    message: str
+    key: Hashable = None
+    done: threading.Event = field(default_factory=threading.Event)
+    result: object = None
+    error: Optional[BaseException] = None
+    # Set when this waiter is promoted to run the merged follow-up turn for `batch`
+    batch: Optional[List["_Waiter"]] = None
+
+    def resolve(self, result=None, error: Optional[BaseException] = None):
+        self.result, self.error = result, error
+        self.done.set()
+
+
+@dataclass
+class _SessionQueue:
+    running: bool = False
+    pending: List[_Waiter] = field(default_factory=list)
+
+
+_queues: Dict[UUID, _SessionQueue] = {}
+_lock = threading.Lock()
+
+
+def _handoff(session_id: UUID, queue: _SessionQueue) -> None:
+    """
+    Wake the first queued waiter to run the merged batch (the queued waiters up
+    to the first one with a different key), or mark the session idle.
+    """
+    with _lock:
+        if not queue.pending:
+            queue.running = False
+            _queues.pop(session_id, None)
+            return
+        key = queue.pending[0].key
+        size = next((i for i, w in enumerate(queue.pending) if w.key != key), len(queue.pending))
+        batch, queue.pending = queue.pending[:size], queue.pending[size:]
+    batch[0].batch = batch
+    batch[0].done.set()
+
+
+def submit(session_id: Optional[UUID], message: str, run: Callable[[str], T], key: Hashable = None) -> T:
+    """
+    Run `run(message)` serialized per session, coalescing messages that queue up meanwhile.
+
+    `run` receives the (possibly merged) user message and must execute a full
+    turn; a merged turn is run with its first message's `run`, so messages are
+    only merged with others of the same `key` (whatever else shapes the turn).
+    Without a session_id the turn starts a new session that no other request
+    can name yet, so there is nothing to serialize it against.
+    """
+    if session_id is None:
+        return run(message)
+
+    with _lock:
+        queue = _queues.setdefault(session_id, _SessionQueue())
+        if queue.running:
+            waiter = _Waiter(message, key)
+            queue.pending.append(waiter)
+        else:
+            queue.running = True
+            waiter = None
+
+    if waiter is None:
+        try:
+            return run(message)
+        finally:
+            _handoff(session_id, queue)
+
+    waiter.done.wait()
+    if waiter.batch is not None:
+        batch, waiter.batch = waiter.batch, None
+        merged = COALESCE_SEPARATOR.join(w.message for w in batch)
+        log.info("Running coalesced turn", extra={"session_id": str(session_id), "coalesced": len(batch)})
+        try:
+            result, error = run(merged), None
+        except BaseException as e:
+            result, error = None, e
+        finally:
+            _handoff(session_id, queue)
+        for w in batch:
+            w.resolve(result, error)
+
+    if waiter.error is not None:
+        raise waiter.error
+    return waiter.result
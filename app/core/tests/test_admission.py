@@ -0,0 +1,54 @@
+"""AdmissionController: concurrency slots, the bounded queue and the rate bucket."""
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+from app.core.admission import AdmissionController, AdmissionRejected
+
+
+def test_queue_full_rejects_immediately_with_retry_after():
+    gate = AdmissionController(max_concurrency=1, rpm=60, max_queue=0, max_wait=5)
+    gate.acquire()
+    t0 = time.monotonic()
+    with pytest.raises(AdmissionRejected) as exc:
+        gate.acquire()
+    assert time.monotonic() - t0 < 0.1
+    assert exc.value.reason == "queue full"
+    assert exc.value.retry_after >= 1
+
+
+def test_waiter_is_admitted_when_a_slot_frees():
+    gate = AdmissionController(max_concurrency=1, rpm=6000, max_queue=1, max_wait=2)
+    gate.acquire()
+    threading.Timer(0.1, gate.release).start()
+    gate.acquire()
+    gate.release()
+
+
+def test_wait_deadline():
+    gate = AdmissionController(max_concurrency=1, rpm=6000, max_queue=1, max_wait=0.05)
+    gate.acquire()
+    with pytest.raises(AdmissionRejected) as exc:
+        gate.acquire()
+    assert exc.value.reason == "wait deadline exceeded"
+
+
+def test_rate_bucket_limits_bursts():
+    gate = AdmissionController(max_concurrency=10, rpm=2, max_queue=0, max_wait=1)
+    gate.acquire()
+    gate.acquire()  # burst is min(rpm, concurrency) = 2
+    with pytest.raises(AdmissionRejected):
+        gate.acquire()
+
+
+def test_try_acquire_needs_a_free_slot():
+    gate = AdmissionController(max_concurrency=1, rpm=6000, max_queue=1, max_wait=2)
+    gate.acquire()
+    assert not gate.try_acquire()
+    gate.release()
+    time.sleep(0.05)  # let the bucket refill its one token
+    assert gate.try_acquire()
+    gate.release()
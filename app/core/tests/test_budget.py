@@ -0,0 +1,63 @@
+"""Budget parsing: ranges, multipliers, currencies, periods and per-role attribution."""
+from __future__ import annotations
+
+import pytest
+
+from app.core.budget import BudgetRange, normalize_budget, parse_budget
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("100-150k", [BudgetRange(None, 100_000, 150_000, "USD")]),
+    ("from 90k to 110k", [BudgetRange(None, 90_000, 110_000, "USD")]),
+    ("between $100k and $130k", [BudgetRange(None, 100_000, 130_000, "USD")]),
+    ("between 100 and 130k", [BudgetRange(None, 100_000, 130_000, "USD")]),
+    ("€80,000/yr", [BudgetRange(None, 80_000, 80_000, "EUR")]),
+    ("25 LPA", [BudgetRange(None, 2_500_000, 2_500_000, "INR")]),
+    ("$40 per hour", [BudgetRange(None, 83_200, 83_200, "USD")]),
+    ("£5k a month", [BudgetRange(None, 60_000, 60_000, "GBP")]),
+    ("120k to 140k per year", [BudgetRange(None, 120_000, 140_000, "USD")]),
+    ("$150k per annum", [BudgetRange(None, 150_000, 150_000, "USD")]),
+])
+def test_single_ranges(text, expected):
+    assert parse_budget(text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("$150k for engineer, $50k for intern", [
+        BudgetRange("engineer", 150_000, 150_000, "USD"),
+        BudgetRange("intern", 50_000, 50_000, "USD"),
+    ]),
+    ("$150k for engineer and $50k for intern", [
+        BudgetRange("engineer", 150_000, 150_000, "USD"),
+        BudgetRange("intern", 50_000, 50_000, "USD"),
+    ]),
+    ("between $100k and $130k for engineers and $50k for interns", [
+        BudgetRange("engineers", 100_000, 130_000, "USD"),
+        BudgetRange("interns", 50_000, 50_000, "USD"),
+    ]),
+    ("120k per year for senior engineers", [BudgetRange("senior engineers", 120_000, 120_000, "USD")]),
+    ("$150k for the backend engineer per year", [BudgetRange("backend engineer", 150_000, 150_000, "USD")]),
+    ("engineer: $120k a year; designer: 90k", [
+        BudgetRange("engineer", 120_000, 120_000, "USD"),
+        BudgetRange("designer", 90_000, 90_000, "USD"),
+    ]),
+])
+def test_per_role_ranges(text, expected):
+    assert parse_budget(text) == expected
+
+
+@pytest.mark.parametrize("text", [None, "", "TBD", "within 6 weeks", "2 engineers"])
+def test_no_budget(text):
+    assert parse_budget(text) == []
+
+
+def test_normalize_picks_the_primary_roles_range():
+    values = normalize_budget("$150k for backend engineer, $50k for intern", role="Senior Backend Engineer")
+    assert (values["budget_min"], values["budget_max"], values["budget_currency"]) == (150_000, 150_000, "USD")
+    assert len(values["budget_ranges_json"]) == 2
+
+
+def test_normalize_period_is_not_a_role():
+    values = normalize_budget("120k to 140k per year", role="Data Scientist")
+    assert (values["budget_min"], values["budget_max"]) == (120_000, 140_000)
+    assert values["budget_ranges_json"][0]["role"] is None
@@ -0,0 +1,56 @@
+"""Idempotency-Key claims: in-flight wait timeouts and the pending-claim lease."""
+from __future__ import annotations
+
+import uuid
+from concurrent.futures import Future
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import update
+
+from app import config
+from app.core import idempotency
+from app.models.idempotency import IdempotencyKey
+
+
+def test_inflight_wait_timeout_is_409(monkeypatch):
+    monkeypatch.setattr(config, "IDEMPOTENCY_WAIT_SECONDS", 0.01)
+    key = f"test-{uuid.uuid4()}"
+    monkeypatch.setitem(idempotency._inflight, key, ("fp", Future()))
+
+    with pytest.raises(HTTPException) as exc:
+        idempotency.run_idempotent(None, key, "fp", lambda: {"never": "run"})
+    assert exc.value.status_code == 409
+    assert exc.value.headers["Retry-After"] == str(idempotency._RETRY_AFTER_SECONDS)
+
+
+def test_abandoned_pending_claim_is_reclaimed(pg_session):
+    key = f"test-{uuid.uuid4()}"
+    first = idempotency._claim(pg_session, key, "fp")
+    assert first is not None
+    # A live claim blocks other requests
+    assert idempotency._claim(pg_session, key, "fp") is None
+
+    stale = first - timedelta(seconds=config.IDEMPOTENCY_PENDING_TIMEOUT_SECONDS + 1)
+    pg_session.execute(update(IdempotencyKey).where(IdempotencyKey.key == key).values(claimed_at=stale))
+    pg_session.commit()
+    assert idempotency._claim(pg_session, key, "fp") is not None
+
+
+def test_stale_owner_does_not_overwrite_new_claim(pg_session, monkeypatch):
+    key = f"test-{uuid.uuid4()}"
+    original_claim = idempotency._claim
+
+    def claim_then_lose_lease(db, k, fp):
+        claimed_at = original_claim(db, k, fp)
+        # Another request reclaims the key while this owner is still running its turn
+        db.execute(update(IdempotencyKey).where(IdempotencyKey.key == k).values(claimed_at=claimed_at + timedelta(seconds=1)))
+        db.commit()
+        return claimed_at
+
+    monkeypatch.setattr(idempotency, "_claim", claim_then_lose_lease)
+    payload, replayed = idempotency.run_idempotent(pg_session, key, "fp", lambda: {"reply": "late"})
+    assert (payload, replayed) == ({"reply": "late"}, False)
+    row = pg_session.get(IdempotencyKey, key)
+    assert row.status == "pending" and row.response_json is None
@@ -0,0 +1,64 @@
+"""Template JDs: every (family, seniority) renders, and ambiguous or unknown roles go to the LLM."""
+from __future__ import annotations
+
+import re
+
+import pytest
+
+from app.core.jd_templates import _SENIORITY_LABELS, _TEMPLATES, template_jd
+
+# An unambiguous title per family, and an experience level per seniority
+ROLES = {
+    "engineering": "Backend Engineer",
+    "data": "Data Scientist",
+    "design": "UX Designer",
+    "product": "Product Manager",
+    "sales": "Account Executive",
+}
+LEVELS = {
+    "intern": "Internship",
+    "junior": "1-2 years",
+    "mid": "3-5 years",
+    "senior": "5+ years",
+    "lead": "8+ years",
+}
+SECTIONS = ["Role Overview", "Key Responsibilities", "Required Qualifications", "Nice-to-Have", "What We Offer"]
+
+
+@pytest.mark.parametrize("family, seniority", sorted(_TEMPLATES))
+def test_every_template_renders(family, seniority):
+    jd = template_jd({
+        "roles": [ROLES[family]],
+        "experience_level": LEVELS[seniority],
+        "location": "Berlin",
+        "skills": ["Python", "SQL"],
+    })
+    assert jd is not None and "$" not in jd
+    assert re.findall(r"^### (.+)$", jd, re.M) == SECTIONS
+    assert f"({_SENIORITY_LABELS[seniority]}, Berlin)" in jd
+    assert "- Hands-on experience with Python" in jd
+    assert "A great workspace in Berlin with flexible hours" in jd
+
+
+@pytest.mark.parametrize("role", ["Data Engineer", "Product Designer", "ML Engineer", "Office Manager"])
+def test_ambiguous_or_unknown_roles_have_no_template(role):
+    assert template_jd({"roles": [role]}) is None
+
+
+def test_intro_names_the_company():
+    jd = template_jd({"roles": ["Backend Engineer"], "company": "Acme"})
+    assert jd.startswith("### Role Overview\nJoin Acme as our Backend Engineer (Mid-level, Remote).")
+
+
+@pytest.mark.parametrize("role, intro", [
+    ("Backend Engineer", "Join our early-stage startup as a Backend Engineer"),
+    ("Account Executive", "Join our early-stage startup as an Account Executive"),
+])
+def test_intro_without_a_company(role, intro):
+    assert intro + " (" in template_jd({"roles": [role]})
+
+
+def test_experience_label_follows_the_title_over_the_level():
+    jd = template_jd({"roles": ["Senior Backend Engineer"], "experience_level": "2 years", "location": "Remote"})
+    assert "(Senior level, Remote)" in jd
+    assert "Fully remote with flexible hours" in jd
@@ -0,0 +1,39 @@
+"""Graceful shutdown: SIGTERM stops new turns before the server's own shutdown runs."""
+from __future__ import annotations
+
+import signal
+
+import pytest
+
+from app.core import lifecycle
+
+
+@pytest.fixture
+def handlers():
+    saved = {sig: signal.getsignal(sig) for sig in (signal.SIGTERM, signal.SIGINT)}
+    yield
+    for sig, handler in saved.items():
+        signal.signal(sig, handler)
+    lifecycle._draining.clear()
+
+
+def test_sigterm_refuses_new_turns_and_reaches_the_server_handler(handlers):
+    received = []
+    signal.signal(signal.SIGTERM, lambda signum, frame: received.append(signum))  # stands in for uvicorn's
+    lifecycle.install_signal_handlers()
+
+    with lifecycle.turn():  # admitted before the signal
+        signal.raise_signal(signal.SIGTERM)
+        assert lifecycle.is_draining()
+    assert received == [signal.SIGTERM]
+
+    with pytest.raises(lifecycle.ShuttingDown):
+        with lifecycle.turn():
+            pass
+
+
+def test_ignored_signal_stays_ignored(handlers):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    lifecycle.install_signal_handlers()
+    signal.raise_signal(signal.SIGINT)
+    assert lifecycle.is_draining()
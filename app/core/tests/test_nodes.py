@@ -0,0 +1,115 @@
+"""Graph nodes: model-written JDs must carry every JD_SECTIONS heading, and a speculative JD never outlives its parse."""
+from __future__ import annotations
+
+from concurrent.futures import Future
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+from app import config
+from app.core import nodes
+from app.core.admission import AdmissionRejected
+from app.core.jd_templates import template_jd
+from app.core.nodes import _is_valid_jd
+from app.core.prompts import JD_SECTION_TITLES
+
+BODY = "- Build and run Python APIs on PostgreSQL\n- Review code and mentor other engineers\n"
+
+
+def jd(headings, style="## {}"):
+    return "\n".join(f"{style.format(h)}\n{BODY}" for h in headings)
+
+
+@pytest.mark.parametrize("style", ["## {}", "### {}", "**{}**", "**{}:**", "1) {}", "### 2. {}", "{}"])
+def test_every_section_heading_in_any_markdown_style_is_valid(style):
+    assert _is_valid_jd(jd(JD_SECTION_TITLES, style))
+
+
+def test_heading_matching_ignores_case_and_hyphens():
+    assert _is_valid_jd(jd([t.upper().replace("-", " ") for t in JD_SECTION_TITLES]))
+
+
+@pytest.mark.parametrize("missing", JD_SECTION_TITLES)
+def test_a_missing_section_is_invalid(missing):
+    assert not _is_valid_jd(jd([t for t in JD_SECTION_TITLES if t != missing]))
+
+
+def test_section_names_inside_sentences_do_not_count():
+    text = "Thanks! " + " ".join(f"The {t} part is below." for t in JD_SECTION_TITLES) + "\n" + BODY * 5
+    assert not _is_valid_jd(text)
+
+
+@pytest.mark.parametrize("text", [None, {"job_description": "x"}, "", jd(JD_SECTION_TITLES)[:150]])
+def test_missing_or_short_drafts_are_invalid(text):
+    assert not _is_valid_jd(text)
+
+
+def test_template_jds_pass():
+    assert _is_valid_jd(template_jd({"roles": ["Backend Engineer"], "skills": ["Python"]}))
+
+
+# ---------- Speculative JD ----------
+
+COMPLETE = {"roles": ["Backend Engineer"], "budget": "$120k", "timeline": "6 weeks", "location": "Remote"}
+
+
+class _Executor:
+    """Hands back a Future the test settles; it is never run, so cancel() works until it is settled."""
+
+    def __init__(self):
+        self.futures = []
+
+    def submit(self, fn, *args):
+        self.futures.append(Future())
+        return self.futures[-1]
+
+
+@pytest.fixture
+def speculation(monkeypatch):
+    executor = _Executor()
+    monkeypatch.setattr(config, "SPECULATIVE_JD", True)
+    monkeypatch.setattr(config, "RESEARCH_ENABLED", False)
+    monkeypatch.setattr(nodes, "_speculation_executor", executor)
+    monkeypatch.setattr(nodes, "_cached_jd", lambda data: None)
+    return executor
+
+
+def parse(monkeypatch, executor, parsed, settle=None):
+    def update_hiring_data(existing, text, history):
+        if settle:
+            settle(executor.futures[0])
+        if isinstance(parsed, Exception):
+            raise parsed
+        return {**existing, **parsed}
+
+    monkeypatch.setattr(nodes, "update_hiring_data", update_hiring_data)
+    return nodes.parse_input_node({"messages": [HumanMessage(content="go ahead")], "hiring_data": COMPLETE})
+
+
+def test_speculation_is_kept_when_the_jd_inputs_are_unchanged(monkeypatch, speculation):
+    out = parse(monkeypatch, speculation, {"count": 2}, settle=lambda f: f.set_result("## speculative JD"))
+    assert out["draft_jd"] == "## speculative JD"
+    assert out["current_step"] == "create_jd"
+
+
+def test_speculation_is_cancelled_when_the_jd_inputs_change(monkeypatch, speculation):
+    out = parse(monkeypatch, speculation, {"location": "Berlin"})
+    assert out["draft_jd"] is None
+    assert speculation.futures[0].cancelled()
+
+
+def test_failed_speculation_leaves_the_jd_to_create_jd(monkeypatch, speculation):
+    out = parse(monkeypatch, speculation, {}, settle=lambda f: f.set_exception(RuntimeError("provider down")))
+    assert out["draft_jd"] is None
+    assert out["current_step"] == "create_jd"
+
+
+def test_rejected_speculation_rejects_the_turn(monkeypatch, speculation):
+    with pytest.raises(AdmissionRejected):
+        parse(monkeypatch, speculation, {}, settle=lambda f: f.set_exception(AdmissionRejected("full", retry_after=1)))
+
+
+def test_speculation_is_cancelled_when_the_parse_fails(monkeypatch, speculation):
+    with pytest.raises(AdmissionRejected):
+        parse(monkeypatch, speculation, AdmissionRejected("full", retry_after=1))
+    assert speculation.futures[0].cancelled()
@@ -0,0 +1,66 @@
+"""Parsing: merged fields keep what the user said before, and the combined call falls back to the plain parse."""
+from __future__ import annotations
+
+import pytest
+
+from app.core import parser
+from app.core.admission import AdmissionRejected
+from app.core.parser import merge_hiring_data, parse_and_draft_jd
+
+KNOWN = {"roles": ["Backend Engineer"], "skills": ["Python"], "budget": "$120k", "location": "Remote"}
+
+
+class _Chain:
+    def __init__(self, result):
+        self.result, self.inputs = result, []
+
+    def invoke(self, inputs):
+        self.inputs.append(inputs)
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+def test_merge_unions_roles_and_skills_and_replaces_the_rest():
+    merged = merge_hiring_data(KNOWN, {"roles": ["Data Scientist", "Backend Engineer"], "skills": ["SQL"],
+                                       "budget": "$150k", "timeline": "6 weeks"})
+    assert sorted(merged["roles"]) == ["Backend Engineer", "Data Scientist"]
+    assert sorted(merged["skills"]) == ["Python", "SQL"]
+    assert (merged["budget"], merged["timeline"], merged["location"]) == ("$150k", "6 weeks", "Remote")
+
+
+def test_merge_ignores_nulls_and_empty_lists_and_does_not_mutate():
+    before = {k: list(v) if isinstance(v, list) else v for k, v in KNOWN.items()}
+    merged = merge_hiring_data(KNOWN, {"roles": [], "skills": [], "budget": None, "count": 2})
+    assert merged == {**before, "count": 2}
+    assert KNOWN == before
+
+
+def test_merge_of_a_non_dict_parse_keeps_the_existing_data():
+    assert merge_hiring_data(KNOWN, "not json") == KNOWN
+
+
+def test_combined_call_returns_the_merged_data_and_the_draft(monkeypatch):
+    chain = _Chain({"roles": ["Backend Engineer"], "timeline": "1 month", "job_description": "## JD"})
+    monkeypatch.setattr(parser, "combined_chain", chain)
+    data, jd = parse_and_draft_jd(KNOWN, "within a month", "user: hi", "excerpt")
+    assert jd == "## JD"
+    assert data == {**KNOWN, "timeline": "1 month"}
+    assert "job_description" not in data
+    (inputs,) = chain.inputs
+    assert (inputs["input"], inputs["history"], inputs["references"]) == ("within a month", "user: hi", "excerpt")
+    assert '"budget": "$120k"' in inputs["known_context"]
+
+
+@pytest.mark.parametrize("result", [RuntimeError("bad JSON"), ["not", "a", "dict"]])
+def test_combined_call_falls_back_to_the_plain_parse_without_a_draft(monkeypatch, result):
+    monkeypatch.setattr(parser, "combined_chain", _Chain(result))
+    monkeypatch.setattr(parser, "parse_hiring_request", lambda text, history: {"timeline": "1 month"})
+    assert parse_and_draft_jd(KNOWN, "within a month") == ({**KNOWN, "timeline": "1 month"}, None)
+
+
+def test_admission_rejection_is_not_swallowed(monkeypatch):
+    monkeypatch.setattr(parser, "combined_chain", _Chain(AdmissionRejected("full", retry_after=1)))
+    monkeypatch.setattr(parser, "parse_hiring_request", lambda *args: pytest.fail("must not fall back"))
+    with pytest.raises(AdmissionRejected):
+        parse_and_draft_jd(KNOWN, "within a month")
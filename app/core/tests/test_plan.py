@@ -0,0 +1,87 @@
+"""Hiring-plan engine: timeline parsing, role classification and phase scheduling."""
+from __future__ import annotations
+
+import pytest
+
+from app.core.plan import (
+    DEFAULT_TIMELINE,
+    DEFAULT_TIMELINE_DAYS,
+    _TEMPLATES,
+    classify_role,
+    generate_hiring_plan,
+    parse_timeline_days,
+    schedule,
+)
+
+
+@pytest.mark.parametrize("timeline, days", [
+    (None, DEFAULT_TIMELINE_DAYS),
+    (DEFAULT_TIMELINE, DEFAULT_TIMELINE_DAYS),
+    ("2 weeks", 14),
+    ("4-6 weeks", 42),
+    ("1 month", 30),
+    ("two weeks", 14),
+    ("ASAP", 14),
+    ("1 day", 1),
+    ("whenever", DEFAULT_TIMELINE_DAYS),
+])
+def test_parse_timeline_days(timeline, days):
+    assert parse_timeline_days(timeline) == days
+
+
+@pytest.mark.parametrize("role, family", [
+    ("Product Designer", "design"),
+    ("UX Designer", "design"),
+    ("Data Engineer", "engineering"),
+    ("Senior Backend Engineer", "engineering"),
+    ("Engineering Manager", "engineering"),
+    ("Data Scientist", "data"),
+    ("Product Manager", "product"),
+    ("Head of Product", "product"),
+    ("Account Executive", "sales"),
+    ("Office Manager", "general"),
+])
+def test_classify_role_prefers_head_noun(role, family):
+    assert classify_role(role)[0] == family
+
+
+@pytest.mark.parametrize("role, level, seniority", [
+    ("Backend Engineer", "5+ years", "senior"),
+    ("Backend Engineer", "3-5 years", "mid"),
+    ("Backend Engineer", "2 yrs", "junior"),
+    ("Backend Engineer", "8 to 10 years", "lead"),
+    ("Backend Engineer", "Senior, 2 years", "senior"),
+    ("Backend Engineer", "Mid-level", "mid"),
+    ("Backend Engineer", None, "mid"),
+    ("Staff Engineer", "3 years", "lead"),
+])
+def test_classify_role_seniority(role, level, seniority):
+    assert classify_role(role, level)[1] == seniority
+
+
+@pytest.mark.parametrize("days", [1, 2, 3, 4, 5, 14, 35, 90])
+@pytest.mark.parametrize("key", sorted(_TEMPLATES))
+def test_schedule_fits_timeline(key, days):
+    phases = _TEMPLATES[key]
+    slots = schedule(phases, days)
+    assert [p for p, _, _ in slots] == list(phases)
+    assert slots[0][1] == 1
+    assert slots[-1][2] == days
+    for (_, start, end), (_, next_start, _) in zip(slots, slots[1:]):
+        assert start <= end <= next_start
+    if days >= len(phases):
+        # Phases never share a day once there are enough of them
+        assert all(end < next_start for (_, _, end), (_, next_start, _) in zip(slots, slots[1:]))
+
+
+def test_default_timeline_matches_days():
+    plan = generate_hiring_plan({"roles": ["Backend Engineer"]})
+    assert plan.timeline_days == DEFAULT_TIMELINE_DAYS
+    assert f"## Timeline: {DEFAULT_TIMELINE} ({DEFAULT_TIMELINE_DAYS} days)" in plan.markdown
+
+
+def test_one_day_plan_stays_on_day_one():
+    plan = generate_hiring_plan({"roles": ["Backend Engineer"], "timeline": "1 day"})
+    headings = [line for line in plan.markdown.splitlines() if line.startswith("### ")]
+    assert len(headings) == 4
+    assert all(h.startswith("### Day 1:") for h in headings)
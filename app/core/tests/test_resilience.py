@@ -0,0 +1,173 @@
+"""ResilientLLM against a fake provider: hedging, timeouts, the circuit breaker, fallback and admission."""
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from app.core import resilience
+from app.core.admission import AdmissionController, AdmissionRejected, AdmittedLLM
+from app.core.resilience import CircuitBreaker, CircuitOpen, ResilientLLM
+
+
+class FakeLLM:
+    """Provider stand-in: per-call delays (the last one repeats) and optional failures; records calls."""
+
+    def __init__(self, *delays: float, fail: bool = False, reply: str = "ok"):
+        self.delays = list(delays) or [0.0]
+        self.fail = fail
+        self.reply = reply
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, _input):
+        with self._lock:
+            delay = self.delays[min(self.calls, len(self.delays) - 1)]
+            self.calls += 1
+        time.sleep(delay)
+        if self.fail:
+            raise RuntimeError("injected provider error")
+        return self.reply
+
+    def runnable(self) -> RunnableLambda:
+        return RunnableLambda(self)
+
+
+def make_llm(primary: FakeLLM, fallback: FakeLLM = None, **kwargs) -> ResilientLLM:
+    kwargs = {"timeout": 2.0, "hedge": False, "breaker": CircuitBreaker(3, 60), **kwargs}
+    return ResilientLLM(primary.runnable(), fallback.runnable() if fallback else None, **kwargs)
+
+
+def controller(max_concurrency: int = 1, max_queue: int = 4, max_wait: float = 2.0) -> AdmissionController:
+    return AdmissionController(max_concurrency=max_concurrency, rpm=6000, max_queue=max_queue, max_wait=max_wait)
+
+
+def test_hedge_wins_over_slow_primary():
+    primary = FakeLLM(1.0, 0.01, reply="fast")
+    llm = make_llm(primary, hedge=True, hedge_default_delay=0.05)
+    wins = resilience.llm_hedge_wins.value
+
+    t0 = time.monotonic()
+    assert llm.invoke("ping") == "fast"
+    assert time.monotonic() - t0 < 0.5
+    assert primary.calls == 2
+    assert resilience.llm_hedge_wins.value == wins + 1
+
+
+def test_fast_call_is_not_hedged():
+    primary = FakeLLM(0.01)
+    llm = make_llm(primary, hedge=True, hedge_default_delay=0.5)
+    assert llm.invoke("ping") == "ok"
+    assert primary.calls == 1
+
+
+def test_timeout_counts_as_breaker_failure():
+    llm = make_llm(FakeLLM(0.5), timeout=0.05)
+    with pytest.raises(TimeoutError):
+        llm.invoke("ping")
+    assert llm.breaker.failures == 1
+
+
+def test_failure_uses_fallback():
+    primary, fallback = FakeLLM(fail=True), FakeLLM(reply="fallback")
+    llm = make_llm(primary, fallback)
+    assert llm.invoke("ping") == "fallback"
+    assert (primary.calls, fallback.calls) == (1, 1)
+
+
+def test_open_breaker_skips_primary_then_half_open_probe_closes_it():
+    primary, fallback = FakeLLM(fail=True), FakeLLM(reply="fallback")
+    llm = make_llm(primary, fallback, breaker=CircuitBreaker(2, reset_seconds=0.1))
+
+    for _ in range(2):
+        llm.invoke("ping")
+    assert llm.breaker.state == "open"
+    llm.invoke("ping")
+    assert primary.calls == 2  # open: straight to the fallback
+
+    time.sleep(0.15)
+    assert llm.breaker.state == "half_open"
+    primary.fail = False
+    assert llm.invoke("ping") == "ok"
+    assert llm.breaker.state == "closed"
+
+
+def test_failed_half_open_probe_reopens():
+    llm = make_llm(FakeLLM(fail=True), FakeLLM(reply="fallback"), breaker=CircuitBreaker(1, reset_seconds=0.05))
+    llm.invoke("ping")
+    time.sleep(0.1)
+    assert llm.breaker.state == "half_open"
+    llm.invoke("ping")
+    assert llm.breaker.state == "open"
+
+
+def test_open_breaker_without_fallback_raises():
+    llm = make_llm(FakeLLM(fail=True), breaker=CircuitBreaker(1, 60))
+    with pytest.raises(RuntimeError):
+        llm.invoke("ping")
+    with pytest.raises(CircuitOpen):
+        llm.invoke("ping")
+
+
+def test_admission_wait_is_not_part_of_the_timeout():
+    gate = controller()
+    llm = ResilientLLM(AdmittedLLM(FakeLLM(0.01).runnable(), gate), timeout=0.1, hedge=False,
+                       breaker=CircuitBreaker(1, 60))
+    gate.acquire()
+    threading.Timer(0.3, gate.release).start()
+
+    assert llm.invoke("ping") == "ok"
+    assert llm.breaker.state == "closed"
+
+
+def test_admission_rejection_is_raised_on_caller_and_spares_the_breaker():
+    gate = controller(max_queue=0)
+    primary = FakeLLM()
+    llm = ResilientLLM(AdmittedLLM(primary.runnable(), gate), timeout=1, hedge=False, breaker=CircuitBreaker(1, 60))
+    gate.acquire()
+    try:
+        with pytest.raises(AdmissionRejected):
+            llm.invoke("ping")
+    finally:
+        gate.release()
+    assert primary.calls == 0
+    assert llm.breaker.failures == 0
+
+
+def test_slot_is_held_until_a_timed_out_call_returns():
+    gate = controller(max_concurrency=1, max_queue=0)
+    llm = ResilientLLM(AdmittedLLM(FakeLLM(0.3).runnable(), gate), timeout=0.05, hedge=False,
+                       breaker=CircuitBreaker(5, 60))
+    with pytest.raises(TimeoutError):
+        llm.invoke("ping")
+    assert not gate.try_acquire()  # the provider call is still running
+    time.sleep(0.4)
+    assert gate.try_acquire()
+    gate.release()
+
+
+def test_hedge_is_skipped_without_a_free_slot():
+    gate = controller(max_concurrency=1)
+    primary = FakeLLM(0.2)
+    llm = ResilientLLM(AdmittedLLM(primary.runnable(), gate), timeout=1, hedge=True, hedge_default_delay=0.02,
+                       breaker=CircuitBreaker(5, 60))
+    assert llm.invoke("ping") == "ok"
+    assert primary.calls == 1
+
+
+def test_fallback_goes_through_admission():
+    gate = controller(max_queue=0)
+    fallback = FakeLLM(reply="fallback")
+    llm = ResilientLLM(FakeLLM(fail=True).runnable(), AdmittedLLM(fallback.runnable(), gate), timeout=1,
+                       hedge=False, breaker=CircuitBreaker(5, 60))
+    gate.acquire()
+    try:
+        with pytest.raises(AdmissionRejected):
+            llm.invoke("ping")
+    finally:
+        gate.release()
+    assert fallback.calls == 0
+    time.sleep(0.05)  # let the bucket refill its one token
+    assert llm.invoke("ping") == "fallback"
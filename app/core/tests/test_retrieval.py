@@ -0,0 +1,144 @@
+"""BM25 research index: delta and segments, persisted keys, and several processes sharing one directory."""
+from __future__ import annotations
+
+import fcntl
+import os
+import time
+
+import pytest
+
+from app.core import retrieval
+from app.core.retrieval import BM25Index
+
+DOCS = [
+    ("jd-1", "Backend Engineer", "Build Python APIs on PostgreSQL and Kubernetes"),
+    ("jd-2", "Data Scientist", "Train PyTorch models and run SQL analyses"),
+    ("jd-3", "Product Designer", "Own Figma prototypes and user research"),
+]
+
+
+def keys(index: BM25Index, query: str, k: int = 3):
+    return [h.key for h in index.search(query, k=k)]
+
+
+def test_add_search_and_duplicates(tmp_path):
+    index = BM25Index(tmp_path)
+    for doc in DOCS:
+        assert index.add(*doc)
+    assert not index.add(*DOCS[0])
+    assert keys(index, "pytorch models", k=1) == ["jd-2"]
+    index.close()
+
+
+def test_compact_preserves_results_and_reopens(tmp_path):
+    index = BM25Index(tmp_path)
+    for doc in DOCS:
+        index.add(*doc)
+    before = keys(index, "python figma sql")
+    assert index.compact()
+    assert keys(index, "python figma sql") == before
+    index.close()
+
+    reopened = BM25Index(tmp_path)
+    assert reopened.n_docs == len(DOCS)
+    assert keys(reopened, "python figma sql") == before
+    reopened.close()
+
+
+def test_known_keys_come_from_keys_file(tmp_path, monkeypatch):
+    index = BM25Index(tmp_path)
+    for doc in DOCS:
+        index.add(*doc)
+    index.compact()
+    index.close()
+
+    reopened = BM25Index(tmp_path)
+
+    def no_scan(self, doc):
+        raise AssertionError("known keys must not decode segment docs")
+
+    monkeypatch.setattr(retrieval._Segment, "doc", no_scan)
+    assert not reopened.add(*DOCS[1])
+    assert reopened.add("jd-4", "SRE", "On-call for Kubernetes")
+    reopened.close()
+
+
+def test_processes_sharing_a_directory_see_each_others_docs(tmp_path):
+    a, b = BM25Index(tmp_path), BM25Index(tmp_path)
+    assert a.add(*DOCS[0])
+    assert b.add(*DOCS[1])
+    assert not b.add(*DOCS[0])  # b replays a's append before checking the key
+    assert a.add(*DOCS[2])
+    for index in (a, b):
+        assert index.n_docs == 3
+        assert keys(index, "figma", k=1) == ["jd-3"]
+        assert [d[0] for d in index._delta_docs] == ["jd-1", "jd-2", "jd-3"]
+    a.close()
+    b.close()
+
+
+def test_compaction_in_one_process_is_followed_by_the_other(tmp_path):
+    a, b = BM25Index(tmp_path), BM25Index(tmp_path)
+    a.add(*DOCS[0])
+    b.add(*DOCS[1])
+    assert a.compact()
+    # b still has segment-0 mapped; its next write lands in segment-1's delta
+    assert (tmp_path / "segment-0").exists()
+    assert b.add(*DOCS[2])
+    assert b._segment.path.name == "segment-1"
+    assert keys(a, "figma", k=1) == ["jd-3"]
+
+    a.add("jd-4", "SRE", "On-call for Kubernetes")
+    assert a.compact()
+    assert not (tmp_path / "segment-0").exists()
+    assert sorted(p.name for p in tmp_path.glob("segment-*")) == ["segment-1", "segment-2"]
+    a.close()
+    b.close()
+
+    reopened = BM25Index(tmp_path)
+    assert reopened.n_docs == 4
+    reopened.close()
+
+
+def test_compact_is_skipped_while_another_process_compacts(tmp_path):
+    index = BM25Index(tmp_path)
+    index.add(*DOCS[0])
+    fd = os.open(tmp_path / "COMPACT.lock", os.O_RDWR | os.O_CREAT)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        assert not index.compact()
+    finally:
+        os.close(fd)
+    assert index.compact()
+    index.close()
+
+
+def test_schedule_compaction_runs_in_background(tmp_path):
+    index = BM25Index(tmp_path)
+    for doc in DOCS:
+        index.add(*doc)
+    retrieval.schedule_compaction(index, threshold=10)
+    assert not retrieval._compaction_executor.unfinished()
+
+    retrieval.schedule_compaction(index, threshold=2)
+    deadline = time.monotonic() + 5
+    while index._segment.path.name == "segment-0" and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert index._segment.path.name == "segment-1"
+    assert index.n_docs == len(DOCS) and not index._delta_docs
+    index.close()
+
+
+def test_in_memory_index_needs_no_directory():
+    index = BM25Index()
+    index.add(*DOCS[0])
+    assert keys(index, "python") == ["jd-1"]
+    assert not index.compact()
+
+
+@pytest.mark.parametrize("text", ["", "the and of"])
+def test_empty_documents_are_indexed_but_never_match(tmp_path, text):
+    index = BM25Index(tmp_path)
+    assert index.add("empty", "", text)
+    assert keys(index, "python") == []
+    index.close()
@@ -0,0 +1,135 @@
+"""Semantic JD cache: match thresholds, seniority scoping and several processes sharing one directory."""
+from __future__ import annotations
+
+import pytest
+
+from app.core.semantic_cache import SemanticCache, cache_scope, cache_text, embed
+
+SKILLS = ["Python", "AWS", "PostgreSQL"]
+
+
+def entry(role: str, level=None, skills=SKILLS):
+    data = {"roles": [role], "experience_level": level, "skills": skills}
+    return cache_text(data), cache_scope(data)
+
+
+def similarity(a: str, b: str) -> float:
+    return float(embed(a, 512) @ embed(b, 512))
+
+
+@pytest.mark.parametrize("a, b", [
+    (("Sr. Backend Engineer",), ("Senior Backend Engineer",)),
+    (("Backend Engineer", "Senior"), ("Senior Backend Engineer",)),
+    (("ML Engineer", "Mid-level"), ("Machine Learning Engineer",)),
+    (("Jr Frontend Dev",), ("Junior Frontend Developer",)),
+])
+def test_paraphrases_share_scope_and_clear_threshold(a, b):
+    (ta, sa), (tb, sb) = entry(*a), entry(*b)
+    assert sa == sb
+    assert similarity(ta, tb) >= 0.9
+
+
+@pytest.mark.parametrize("a, b", [
+    (("Backend Engineer", "Junior"), ("Backend Engineer", "Senior")),
+    (("Junior Backend Engineer",), ("Senior Backend Engineer",)),
+    (("Senior Backend Engineer",), ("Staff Backend Engineer",)),
+    (("Backend Engineer", "Intern"), ("Backend Engineer", "Mid-level")),
+])
+def test_other_seniority_is_another_scope(a, b):
+    assert entry(*a)[1] != entry(*b)[1]
+
+
+@pytest.mark.parametrize("a, b", [
+    ("Backend Engineer", "Frontend Engineer"),
+    ("Data Scientist", "Data Analyst"),
+    ("Product Manager", "Product Designer"),
+    ("ML Engineer", "Data Engineer"),
+])
+def test_sibling_roles_stay_below_threshold(a, b):
+    (ta, sa), (tb, sb) = entry(a), entry(b)
+    assert sa == sb
+    assert similarity(ta, tb) < 0.87
+
+
+def test_junior_request_is_not_served_the_senior_jd():
+    cache = SemanticCache(dims=512, capacity=16)
+    cache.add(*entry("Senior Backend Engineer"), {"jd": "senior"})
+    assert cache.lookup(*entry("Backend Engineer", "Junior")) is None
+    hit = cache.lookup(*entry("Sr Backend Engineer"))
+    assert hit is not None and hit[0]["jd"] == "senior"
+
+
+def test_in_scope_entry_is_found_behind_many_other_scopes():
+    def located(location):
+        data = {"roles": ["Backend Engineer"], "skills": SKILLS, "location": location}
+        return cache_text(data), cache_scope(data)
+
+    cache = SemanticCache(dims=512, capacity=32)
+    cache.add(*located("Berlin"), {"jd": "berlin"})
+    for i in range(10):  # the same role elsewhere scores exactly as high
+        cache.add(*located(f"City {i}"), {"jd": f"city {i}"})
+    assert cache.lookup(*located("Berlin"))[0]["jd"] == "berlin"
+    hits = cache.lookup_batch(*zip(located("City 9"), located("Berlin"), located("Paris")))
+    assert [h and h[0]["jd"] for h in hits] == ["city 9", "berlin", None]
+
+
+def test_hits_are_kept_over_unused_entries_when_full():
+    cache = SemanticCache(dims=512, capacity=2)
+    cache.add(*entry("Backend Engineer"), {"jd": "backend"})
+    cache.add(*entry("Data Scientist"), {"jd": "data"})
+    assert cache.lookup_batch(*zip(entry("Backend Engineer")))[0] is not None
+    cache.add(*entry("Product Designer"), {"jd": "design"})
+    assert cache.lookup(*entry("Backend Engineer"))[0]["jd"] == "backend"
+    assert cache.lookup(*entry("Data Scientist")) is None
+
+
+def test_persisted_entries_survive_reopen(tmp_path):
+    cache = SemanticCache(tmp_path, dims=64, capacity=8)
+    cache.add(*entry("Backend Engineer"), {"jd": "backend"})
+    cache.close()
+
+    reopened = SemanticCache(tmp_path, dims=64, capacity=8)
+    assert reopened.size == 1
+    assert reopened.lookup(*entry("Backend Engineer"))[0]["jd"] == "backend"
+    reopened.close()
+
+
+def test_processes_sharing_a_directory_get_distinct_slots(tmp_path):
+    a = SemanticCache(tmp_path, dims=64, capacity=8)
+    b = SemanticCache(tmp_path, dims=64, capacity=8)
+    slot_a = a.add(*entry("Backend Engineer"), {"jd": "backend"})
+    slot_b = b.add(*entry("Product Designer"), {"jd": "design"})
+    assert slot_a != slot_b
+
+    for cache in (a, b):
+        assert cache.lookup(*entry("Backend Engineer"))[0]["jd"] == "backend"
+        assert cache.lookup(*entry("Product Designer"))[0]["jd"] == "design"
+    a.close()
+    b.close()
+
+
+def test_eviction_in_one_process_is_seen_by_the_other(tmp_path):
+    a = SemanticCache(tmp_path, dims=64, capacity=2)
+    b = SemanticCache(tmp_path, dims=64, capacity=2)
+    a.add(*entry("Backend Engineer"), {"jd": "backend"})
+    a.add(*entry("Data Scientist"), {"jd": "data"})
+    assert b.lookup(*entry("Data Scientist"))[0]["jd"] == "data"  # now more recently used than backend
+
+    b.add(*entry("Product Designer"), {"jd": "design"})
+    assert a.lookup(*entry("Backend Engineer")) is None
+    assert a.lookup(*entry("Product Designer"))[0]["jd"] == "design"
+    a.close()
+    b.close()
+
+
+def test_superseded_payloads_are_rewritten_on_open(tmp_path):
+    cache = SemanticCache(tmp_path, dims=64, capacity=1)
+    for role in ("Backend Engineer", "Data Scientist", "Product Designer", "Account Executive"):
+        cache.add(*entry(role), {"jd": role})
+    cache.close()
+    assert len((tmp_path / "payloads.jsonl").read_text().splitlines()) == 4
+
+    reopened = SemanticCache(tmp_path, dims=64, capacity=1)
+    assert len((tmp_path / "payloads.jsonl").read_text().splitlines()) == 1
+    assert reopened.lookup(*entry("Account Executive"))[0]["jd"] == "Account Executive"
+    reopened.close()
@@ -0,0 +1,113 @@
+"""Per-session queue: turns run one at a time in order, queued messages coalesce by key, failures reach every waiter."""
+from __future__ import annotations
+
+import threading
+import time
+from uuid import uuid4
+
+import pytest
+
+from app.core import session_queue
+from app.core.session_queue import COALESCE_SEPARATOR, submit
+
+
+class Turns:
+    """A `run` that records each turn and holds the first one until released."""
+
+    def __init__(self, fail=()):
+        self.ran, self.fail = [], set(fail)
+        self.started, self.release = threading.Event(), threading.Event()
+        self.active = 0
+
+    def __call__(self, message):
+        self.active += 1
+        assert self.active == 1, "two turns of one session ran at once"
+        self.ran.append(message)
+        self.started.set()
+        self.release.wait(5)
+        self.active -= 1
+        if message in self.fail:
+            raise RuntimeError(f"turn failed: {message}")
+        return f"reply to {message}"
+
+
+def start(results, sid, message, run, key=None):
+    def target():
+        try:
+            results[message] = submit(sid, message, run, key=key)
+        except RuntimeError as e:
+            results[message] = e
+
+    thread = threading.Thread(target=target)
+    thread.start()
+    return thread
+
+
+def wait_queued(sid, n):
+    deadline = time.monotonic() + 5
+    while len(session_queue._queues[sid].pending) < n:
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def run_burst(turns, first, queued, sid=None):
+    """Start `first`, queue `queued` ((message, key) pairs, in order) behind it, then let everything run."""
+    sid, results = sid or uuid4(), {}
+    threads = [start(results, sid, first, turns)]
+    assert turns.started.wait(5)
+    for i, (message, key) in enumerate(queued, 1):
+        threads.append(start(results, sid, message, turns, key))
+        wait_queued(sid, i)
+    turns.release.set()
+    for thread in threads:
+        thread.join(5)
+    assert sid not in session_queue._queues  # the session went idle
+    return results
+
+
+def test_queued_messages_run_as_one_follow_up_turn():
+    turns = Turns()
+    results = run_burst(turns, "first", [("second", None), ("third", None), ("fourth", None)])
+    merged = COALESCE_SEPARATOR.join(["second", "third", "fourth"])
+    assert turns.ran == ["first", merged]
+    assert results == {"first": "reply to first", **{m: f"reply to {merged}" for m in ("second", "third", "fourth")}}
+
+
+def test_only_consecutive_messages_with_the_same_key_coalesce():
+    turns = Turns()
+    results = run_burst(turns, "first", [("a", "llm"), ("b", "llm"), ("c", "template"), ("d", "llm"), ("e", "llm")])
+    assert turns.ran == ["first", "a\n\nb", "c", "d\n\ne"]
+    assert results["b"] == "reply to a\n\nb" and results["c"] == "reply to c" and results["e"] == "reply to d\n\ne"
+
+
+def test_a_failed_merged_turn_fails_every_merged_waiter_and_the_queue_moves_on():
+    turns = Turns(fail={"a\n\nb"})
+    results = run_burst(turns, "first", [("a", None), ("b", None), ("c", "template")])
+    assert turns.ran == ["first", "a\n\nb", "c"]
+    assert isinstance(results["a"], RuntimeError) and results["a"] is results["b"]
+    assert results["c"] == "reply to c"
+
+
+def test_a_failed_first_turn_still_hands_off():
+    turns = Turns(fail={"first"})
+    results = run_burst(turns, "first", [("second", None)])
+    assert isinstance(results["first"], RuntimeError)
+    assert results["second"] == "reply to second"
+
+
+def test_sessions_do_not_wait_for_each_other():
+    turns, other = Turns(), []
+    sid, results = uuid4(), {}
+    thread = start(results, sid, "first", turns)
+    assert turns.started.wait(5)
+    assert submit(uuid4(), "elsewhere", lambda m: other.append(m) or "ok") == "ok"
+    assert submit(None, "new session", lambda m: other.append(m) or "ok") == "ok"
+    turns.release.set()
+    thread.join(5)
+    assert other == ["elsewhere", "new session"]
+
+
+@pytest.fixture(autouse=True)
+def no_leftover_queues():
+    yield
+    assert not session_queue._queues
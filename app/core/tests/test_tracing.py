@@ -0,0 +1,151 @@
+"""Tracing: spans nest under the current one, trace attributes reach executor jobs, sampling and a full queue drop spans."""
+from __future__ import annotations
+
+import json
+import queue
+from types import SimpleNamespace
+
+import pytest
+
+from app import config
+from app.core import lifecycle, tracing
+
+
+@pytest.fixture
+def exported(monkeypatch, tmp_path):
+    """JSON exporter into tmp_path with no flusher thread; returns a reader that flushes and loads the spans."""
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(config, "TRACING_EXPORTER", "json")
+    monkeypatch.setattr(config, "TRACING_JSON_PATH", str(path))
+    monkeypatch.setattr(config, "TRACING_SAMPLE_RATE", 1.0)
+    monkeypatch.setattr(tracing, "_ensure_flusher", lambda: None)
+    monkeypatch.setattr(tracing, "_queue", queue.Queue(maxsize=100))
+
+    def read():
+        tracing.flush()
+        if not path.exists():
+            return []
+        return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+    return read
+
+
+def test_spans_nest_under_the_current_span(exported):
+    with tracing.span("chat", root=True, route="/chat") as root:
+        with tracing.span("node.parse_input") as node:
+            sql = tracing.start_span("sql", statement="SELECT 1")
+            sql.end()
+        assert tracing.current_span() is root
+    assert tracing.current_span() is None
+
+    spans = {s["name"]: s for s in exported()}
+    assert list(spans) == ["sql", "node.parse_input", "chat"]  # in the order they ended
+    assert {s["traceId"] for s in spans.values()} == {root.trace_id}
+    assert spans["chat"]["parentSpanId"] is None
+    assert spans["node.parse_input"]["parentSpanId"] == root.span_id
+    assert spans["sql"]["parentSpanId"] == node.span_id
+    assert spans["chat"]["attributes"] == {"route": "/chat"}
+    assert spans["sql"]["attributes"] == {"statement": "SELECT 1"}
+
+
+def test_error_is_recorded_and_the_span_ends_once(exported):
+    with pytest.raises(ValueError):
+        with tracing.span("chat", root=True):
+            raise ValueError("bad input")
+    (record,) = exported()
+    assert (record["status"], record["error"]) == ("error", "ValueError: bad input")
+    assert record["endTimeUnixNano"] >= record["startTimeUnixNano"]
+
+
+def test_no_span_outside_a_trace_or_without_an_exporter(exported, monkeypatch):
+    with tracing.span("node.parse_input") as s:
+        assert s is None
+    monkeypatch.setattr(config, "TRACING_EXPORTER", "")
+    with tracing.span("chat", root=True) as s:
+        assert s is None
+    assert exported() == []
+
+
+def test_session_id_reaches_executor_jobs(exported):
+    executor = lifecycle.TrackedExecutor("test-tracing", max_workers=1)
+    try:
+        with tracing.span("chat", root=True) as root:
+            early = executor.submit(lambda: tracing.set_attribute("step", "upload"))
+            early.result(5)
+            # Learned after the first job ran, still copied onto it when exported
+            tracing.set_trace_attribute("session_id", "s-1")
+            executor.submit(lambda: tracing.current_span().span_id).result(5)
+    finally:
+        executor.shutdown(wait=True)
+        lifecycle._executors.pop("test-tracing", None)
+
+    jobs = [s for s in exported() if s["name"] == "job.test-tracing"]
+    assert len(jobs) == 2
+    for job in jobs:
+        assert (job["traceId"], job["parentSpanId"]) == (root.trace_id, root.span_id)
+        assert job["attributes"]["session_id"] == "s-1"
+    assert jobs[0]["attributes"]["step"] == "upload"
+
+
+def test_job_submitted_outside_a_trace_is_untraced(exported):
+    executor = lifecycle.TrackedExecutor("test-tracing", max_workers=1)
+    try:
+        assert executor.submit(tracing.current_span).result(5) is None
+    finally:
+        executor.shutdown(wait=True)
+        lifecycle._executors.pop("test-tracing", None)
+    assert exported() == []
+
+
+@pytest.mark.parametrize("rate, draw, sampled", [(0.25, 0.5, False), (0.75, 0.5, True), (0.0, 0.0, False)])
+def test_roots_are_sampled_and_their_children_follow(exported, monkeypatch, rate, draw, sampled):
+    monkeypatch.setattr(config, "TRACING_SAMPLE_RATE", rate)
+    monkeypatch.setattr(tracing, "random", SimpleNamespace(random=lambda: draw))
+    with tracing.span("chat", root=True) as root:
+        with tracing.span("node.parse_input") as child:
+            pass
+    assert (root is not None, child is not None) == (sampled, sampled)
+    assert len(exported()) == (2 if sampled else 0)
+
+
+def test_full_queue_drops_spans_without_blocking(exported, monkeypatch):
+    monkeypatch.setattr(tracing, "_queue", queue.Queue(maxsize=2))
+    dropped = tracing.spans_dropped.value
+    for i in range(5):
+        with tracing.span(f"chat-{i}", root=True):
+            pass
+    assert tracing.spans_dropped.value - dropped == 3
+    assert [s["name"] for s in exported()] == ["chat-0", "chat-1"]
+
+
+def test_failed_export_counts_the_batch_as_dropped(exported, monkeypatch, tmp_path):
+    blocked = tmp_path / "file"
+    blocked.write_text("")
+    monkeypatch.setattr(config, "TRACING_JSON_PATH", str(blocked / "traces.jsonl"))  # its parent is a file
+    exported_before, dropped = tracing.spans_exported.value, tracing.spans_dropped.value
+    with tracing.span("chat", root=True):
+        pass
+    tracing.flush()
+    assert tracing.spans_dropped.value - dropped == 1
+    assert tracing.spans_exported.value == exported_before
+
+
+def test_collector_receives_batches(exported, monkeypatch):
+    pytest.importorskip("httpx")
+    posted = []
+
+    class _Client:
+        def post(self, url, json):
+            posted.append((url, json))
+            return SimpleNamespace(raise_for_status=lambda: None)
+
+    monkeypatch.setattr(config, "TRACING_EXPORTER", "collector")
+    monkeypatch.setattr(config, "TRACING_BATCH_SIZE", 2)
+    for i in range(3):
+        with tracing.span(f"chat-{i}", root=True):
+            pass
+    client = _Client()
+    while batch := tracing._drain_queue(config.TRACING_BATCH_SIZE):
+        assert tracing._write(batch, client) is client
+    assert [[s["name"] for s in body["spans"]] for _, body in posted] == [["chat-0", "chat-1"], ["chat-2"]]
+    assert {url for url, _ in posted} == {config.TRACING_COLLECTOR_URL}
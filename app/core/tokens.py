@@ -0,0 +1,119 @@
+"""
+Token budgeting for prompts and agent history.
+
+Counts are a local estimate (no provider round-trip) and are cached on each
+message's response_metadata, and persisted in messages.meta_json, so a
+message is only measured once.
+"""
+from __future__ import annotations
+
+import math
+import re
+from typing import List, Optional, Sequence
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+
+TOKEN_COUNT_KEY = "token_count"
+
+_JD_REPLY_RE = re.compile(r"^(Here is your job description:)\s.*?(\n\nShould I create a hiring plan now\?)?$", re.S)
+_PLAN_REPLY_RE = re.compile(r"^# Hiring Plan\b.*?(\n\nWould you like me to post[^\n]*)?$", re.S)
+_WORD_RE = re.compile(r"\w+|[^\w\s]")
+# Stored chat messages point at artifact bodies instead of repeating them (see persist_turn)
+_ARTIFACT_REF_RE = re.compile(r"\[\[artifact:([a-z_]+):([0-9a-f-]{36})\]\]")
+
+
+def artifact_ref(artifact_type: str, artifact_id) -> str:
+    return f"[[artifact:{artifact_type}:{artifact_id}]]"
+
+
+def count_tokens(text: Optional[str]) -> int:
+    """Estimate tokens: the larger of chars/4 and word-ish pieces * 0.75, which tracks BPE counts closely enough for budgeting."""
+    if not text:
+        return 0
+    return max(math.ceil(len(text) / 4), math.ceil(len(_WORD_RE.findall(text)) * 0.75))
+
+
+def message_tokens(message: BaseMessage) -> int:
+    """Token count for a message, cached in response_metadata."""
+    cached = message.response_metadata.get(TOKEN_COUNT_KEY)
+    if isinstance(cached, int):
+        return cached
+    n = count_tokens(message.content if isinstance(message.content, str) else str(message.content))
+    message.response_metadata[TOKEN_COUNT_KEY] = n
+    return n
+
+
+def strip_artifact_bodies(message: BaseMessage) -> BaseMessage:
+    """Replace an earlier JD or hiring-plan body with a short placeholder."""
+    if not isinstance(message, AIMessage) or not isinstance(message.content, str):
+        return message
+    if _JD_REPLY_RE.match(message.content):
+        title = next((line[3:] for line in message.content.splitlines() if line.startswith("## ")), "role")
+        content = f"[Earlier job description for {title} omitted]"
+    elif _PLAN_REPLY_RE.match(message.content):
+        content = "[Earlier hiring plan omitted]"
+    elif _ARTIFACT_REF_RE.search(message.content):
+        content = _ARTIFACT_REF_RE.sub(lambda m: f"[Earlier {m.group(1).replace('_', ' ')} omitted]", message.content)
+    else:
+        return message
+    return AIMessage(content=content, response_metadata={TOKEN_COUNT_KEY: count_tokens(content)})
+
+
+def clip_text(text: str, budget: int) -> str:
+    """Clip text to roughly `budget` tokens, keeping the head."""
+    if count_tokens(text) <= budget:
+        return text
+    return text[: max(0, budget * 4 - 3)] + "..."
+
+
+def _summary(dropped: Sequence[BaseMessage], budget: int) -> SystemMessage:
+    asks = [m.content.splitlines()[0] for m in dropped if isinstance(m, HumanMessage) and isinstance(m.content, str) and m.content]
+    text = f"Earlier conversation ({len(dropped)} messages) omitted."
+    if asks:
+        text += " Earlier user requests: " + " | ".join(asks)
+    text = clip_text(text, budget)
+    return SystemMessage(content=text, response_metadata={TOKEN_COUNT_KEY: count_tokens(text)})
+
+
+def fit_messages(messages: Sequence[BaseMessage], budget: int, summary_budget: int = 128) -> List[BaseMessage]:
+    """
+    Keep the newest messages that fit in `budget` tokens.
+
+    Earlier JD/plan bodies are stripped first; the newest message is always
+    kept (clipped if needed). Dropped turns collapse into one short summary
+    message when there is room for it.
+    """
+    if not messages:
+        return []
+    *earlier, last = messages
+    kept: List[BaseMessage] = [last]
+    used = message_tokens(last)
+    if used > budget:
+        clipped = clip_text(last.content, budget)
+        kept = [last.__class__(content=clipped, response_metadata={TOKEN_COUNT_KEY: count_tokens(clipped)})]
+        used = budget
+
+    remaining = budget - min(summary_budget, budget // 4)
+    cut = 0
+    for i in range(len(earlier) - 1, -1, -1):
+        msg = strip_artifact_bodies(earlier[i])
+        n = message_tokens(msg)
+        if used + n > remaining:
+            cut = i + 1
+            break
+        kept.append(msg)
+        used += n
+
+    kept.reverse()
+    if cut and budget - used > 8:
+        kept.insert(0, _summary(earlier[:cut], min(summary_budget, budget - used)))
+    return kept
+
+
+def render_history(messages: Sequence[BaseMessage]) -> str:
+    """Plain-text transcript for embedding in a prompt."""
+    lines = []
+    for m in messages:
+        who = "User" if isinstance(m, HumanMessage) else "Note" if isinstance(m, SystemMessage) else "Assistant"
+        lines.append(f"{who}: {m.content}")
+    return "\n".join(lines) or "(none)"
@@ -0,0 +1,257 @@
+"""
+Minimal request-scoped tracing.
+
+A trace starts at a root span (one per /chat request or WebSocket turn);
+spans opened while it is current become its children: graph nodes, SQL
+statements, LLM calls, Notion HTTP requests. The current span lives in a
+ContextVar, and TrackedExecutor carries it into background jobs, so a
+Notion upload shows up in the turn that queued it. Attributes set with
+set_trace_attribute (e.g. session_id) are copied onto every span of the trace.
+
+Finished spans are queued and written by one flusher thread, either as
+NDJSON (TRACING_EXPORTER=json, to TRACING_JSON_PATH) or POSTed in batches to
+a collector (TRACING_EXPORTER=collector, e.g. scripts/trace_collector.py).
+With no exporter configured, span() is a no-op. A full queue drops spans
+rather than block requests.
+"""
+from __future__ import annotations
+
+import json
+import os
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from app import config
+from app.core.logger import log
+from app.core.metrics import Counter
+from app.core.workers import after_fork
+
+spans_exported = Counter("tracing_spans_exported_total", "Spans written by the trace exporter")
+spans_dropped = Counter("tracing_spans_dropped_total", "Spans dropped because the export queue was full or export failed")
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "attributes", "trace_attributes",
+                 "start_ns", "end_ns", "status", "error")
+
+    def __init__(self, name: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.name = name
+        self.attributes = attributes
+        # Shared by every span of the trace, so attributes learned late still reach all of them
+        self.trace_attributes: Dict[str, Any] = parent.trace_attributes if parent else {}
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.status = "ok"
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def end(self, error: Optional[BaseException] = None):
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        if error is not None:
+            self.status, self.error = "error", f"{type(error).__name__}: {error}"
+        _export(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id,
+            "name": self.name,
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "durationMs": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "attributes": {**self.trace_attributes, **self.attributes},
+            "status": self.status,
+            "error": self.error,
+        }
+
+
+_current: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def enabled() -> bool:
+    return config.TRACING_EXPORTER in ("json", "collector")
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def start_span(name: str, *, root: bool = False, **attributes: Any) -> Optional[Span]:
+    """
+    Start a span under the current one without making it current (for
+    callback-style hooks such as SQLAlchemy events); end it with span.end().
+    Returns None when tracing is off, when there is no current trace and
+    root is False, or when a new root is not sampled.
+    """
+    if not enabled():
+        return None
+    parent = _current.get()
+    if parent is None and (not root or random.random() >= config.TRACING_SAMPLE_RATE):
+        return None
+    return Span(name, parent, attributes)
+
+
+@contextmanager
+def span(name: str, *, root: bool = False, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Run the block in a span that is current for its duration; see start_span for when it is None."""
+    s = start_span(name, root=root, **attributes)
+    if s is None:
+        yield None
+        return
+    token = _current.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.end(e)
+        raise
+    finally:
+        _current.reset(token)
+        s.end()
+
+
+def traced(name: str) -> Callable[[Callable], Callable]:
+    """Decorator: run the function in a child span called `name` (only inside a trace)."""
+    def wrap(fn):
+        def run(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        run.__name__ = getattr(fn, "__name__", name)
+        run.__doc__ = fn.__doc__
+        return run
+    return wrap
+
+
+def set_attribute(key: str, value: Any):
+    s = _current.get()
+    if s is not None:
+        s.set_attribute(key, value)
+
+
+def set_trace_attribute(key: str, value: Any):
+    s = _current.get()
+    if s is not None:
+        s.trace_attributes[key] = value
+
+
+def bind(fn: Callable, name: str) -> Callable:
+    """Wrap `fn` to run in a child span of the current span, wherever it is called (e.g. an executor thread)."""
+    parent = _current.get()
+    if parent is None:
+        return fn
+
+    def run(*args, **kwargs):
+        token = _current.set(parent)
+        try:
+            with span(name):
+                return fn(*args, **kwargs)
+        finally:
+            _current.reset(token)
+
+    return run
+
+
+# ---------- Export ----------
+
+_queue: "queue.Queue[Span]" = queue.Queue(maxsize=config.TRACING_QUEUE_SIZE)
+_flusher: Optional[threading.Thread] = None
+_flusher_lock = threading.Lock()
+_write_lock = threading.Lock()
+_stop = threading.Event()
+
+
+def _export(s: Span):
+    _ensure_flusher()
+    try:
+        _queue.put_nowait(s)
+    except queue.Full:
+        spans_dropped.inc()
+
+
+def _ensure_flusher():
+    global _flusher
+    if _flusher is not None:
+        return
+    with _flusher_lock:
+        if _flusher is None:
+            _flusher = threading.Thread(target=_flush_loop, name="trace-exporter", daemon=True)
+            _flusher.start()
+
+
+def _drain_queue(limit: int) -> List[Span]:
+    batch: List[Span] = []
+    while len(batch) < limit:
+        try:
+            batch.append(_queue.get_nowait())
+        except queue.Empty:
+            break
+    return batch
+
+
+def _flush_loop():
+    client = None
+    while not _stop.is_set():
+        _stop.wait(config.TRACING_FLUSH_SECONDS)
+        while True:
+            batch = _drain_queue(config.TRACING_BATCH_SIZE)
+            if not batch:
+                break
+            client = _write(batch, client)
+
+
+def _write(batch: List[Span], client=None):
+    """Write one batch to the configured exporter; returns the HTTP client to reuse."""
+    records = [s.to_dict() for s in batch]
+    with _write_lock:
+        try:
+            if config.TRACING_EXPORTER == "collector":
+                import httpx
+
+                client = client or httpx.Client(timeout=5.0)
+                client.post(config.TRACING_COLLECTOR_URL, json={"spans": records}).raise_for_status()
+            else:
+                path = Path(config.TRACING_JSON_PATH)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                with path.open("a", encoding="utf-8") as f:
+                    f.writelines(json.dumps(r, default=str) + "\n" for r in records)
+            spans_exported.inc(len(records))
+        except Exception as e:
+            spans_dropped.inc(len(records))
+            log.warning(f"Trace export failed; dropped {len(records)} span(s): {e}")
+    return client
+
+
+def flush():
+    """Write out everything queued so far from the calling thread (e.g. at the end of a script)."""
+    while True:
+        batch = _drain_queue(config.TRACING_BATCH_SIZE)
+        if not batch:
+            return
+        _write(batch)
+
+
+def shutdown():
+    """Stop the flusher and write out what is left; called after the shutdown drain."""
+    _stop.set()
+    flush()
+
+
+@after_fork
+def _reset_exporter():
+    # The parent's flusher thread does not exist in the child; its queued spans belong to the parent
+    global _queue, _flusher, _flusher_lock, _write_lock, _stop
+    _queue = queue.Queue(maxsize=config.TRACING_QUEUE_SIZE)
+    _flusher, _flusher_lock, _write_lock, _stop = None, threading.Lock(), threading.Lock(), threading.Event()
@@ -0,0 +1,58 @@
+"""
+Multi-process serving (gunicorn --preload with uvicorn workers; see gunicorn.conf.py).
+
+The master imports the app once, so the compiled agent graph, prompt
+templates and parsers are built before fork and shared copy-on-write by
+every worker. preload() also creates the schema once (instead of every
+worker racing through create_all) and freezes the GC so collections in
+the workers don't dirty those shared pages.
+
+What is not fork-safe (DB connections, HTTP/gRPC clients, thread pools,
+locks, memory-mapped caches) registers an @after_fork hook that re-creates
+it in the child. The hooks run through os.register_at_fork, so they also
+cover other forks such as ProcessPoolExecutor workers in scripts/run_batch.py.
+"""
+from __future__ import annotations
+
+import gc
+import os
+from typing import Callable, List
+
+from app.core.logger import log
+
+_after_fork_hooks: List[Callable[[], None]] = []
+_preloaded = False
+
+
+def after_fork(fn: Callable[[], None]) -> Callable[[], None]:
+    """Register `fn` to run in every forked child, in registration order."""
+    _after_fork_hooks.append(fn)
+    return fn
+
+
+def _run_after_fork_hooks():
+    for fn in _after_fork_hooks:
+        try:
+            fn()
+        except Exception:
+            log.error(f"after_fork hook {fn.__module__}.{fn.__qualname__} failed", exc_info=True)
+
+
+os.register_at_fork(after_in_child=_run_after_fork_hooks)
+
+
+def preloaded() -> bool:
+    return _preloaded
+
+
+def preload():
+    """Run in the master before forking workers; the app module must already be imported."""
+    global _preloaded
+    from app.database.database import engine, init_db
+
+    init_db()
+    engine.dispose()  # no connections may cross the fork
+    gc.collect()
+    gc.freeze()
+    _preloaded = True
+    log.info(f"Preloaded app in master (pid {os.getpid()}); {len(_after_fork_hooks)} after-fork hooks registered")
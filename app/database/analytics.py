@@ -0,0 +1,98 @@
+"""Analytics schema and views that create_all cannot manage.
+
+create_all only creates missing tables, so columns added to existing tables
+and the materialized views are created here with idempotent DDL.
+
+budget_stats_mv aggregates normalized budgets by role, experience level and
+currency. Postgres cannot refresh a materialized view incrementally, so
+refresh_budget_view only rebuilds it when hiring_contexts has changed since
+the last refresh (cheap max(updated_at) index probe) and uses REFRESH ...
+CONCURRENTLY so readers are never blocked.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.logger import log
+
+BUDGET_VIEW = "budget_stats_mv"
+
+_SCHEMA_DDL = [
+    "ALTER TABLE hiring_contexts ADD COLUMN IF NOT EXISTS budget_min BIGINT",
+    "ALTER TABLE hiring_contexts ADD COLUMN IF NOT EXISTS budget_max BIGINT",
+    "ALTER TABLE hiring_contexts ADD COLUMN IF NOT EXISTS budget_currency VARCHAR(3)",
+    "ALTER TABLE hiring_contexts ADD COLUMN IF NOT EXISTS budget_ranges_json JSONB NOT NULL DEFAULT '[]'",
+    "CREATE INDEX IF NOT EXISTS ix_hiring_contexts_role_level ON hiring_contexts (primary_role, experience_level)",
+    "CREATE INDEX IF NOT EXISTS ix_hiring_contexts_budget ON hiring_contexts (budget_currency, budget_min, budget_max)",
+    "CREATE INDEX IF NOT EXISTS ix_hiring_contexts_updated_at ON hiring_contexts (updated_at)",
+    # Delta-compressed artifact versions (app.database.artifact_store)
+    "ALTER TABLE artifacts ADD COLUMN IF NOT EXISTS storage VARCHAR NOT NULL DEFAULT 'full'",
+    "ALTER TABLE artifacts ADD COLUMN IF NOT EXISTS content_delta BYTEA",
+    # Lease on pending Idempotency-Key claims (app.core.idempotency)
+    "ALTER TABLE idempotency_keys ADD COLUMN IF NOT EXISTS claimed_at TIMESTAMPTZ NOT NULL DEFAULT now()",
+    f"""
+    CREATE MATERIALIZED VIEW IF NOT EXISTS {BUDGET_VIEW} AS
+    SELECT
+        coalesce(lower(primary_role), '') AS role,
+        coalesce(lower(experience_level), '') AS experience_level,
+        budget_currency AS currency,
+        count(*) AS contexts,
+        min(budget_min) AS min,
+        max(budget_max) AS max,
+        avg((budget_min + budget_max) / 2.0) AS mean,
+        percentile_cont(0.25) WITHIN GROUP (ORDER BY (budget_min + budget_max) / 2.0) AS p25,
+        percentile_cont(0.5) WITHIN GROUP (ORDER BY (budget_min + budget_max) / 2.0) AS median,
+        percentile_cont(0.75) WITHIN GROUP (ORDER BY (budget_min + budget_max) / 2.0) AS p75,
+        max(updated_at) AS source_updated_at
+    FROM hiring_contexts
+    WHERE budget_min IS NOT NULL
+    GROUP BY 1, 2, 3
+    """,
+    # REFRESH ... CONCURRENTLY requires a unique index
+    f"CREATE UNIQUE INDEX IF NOT EXISTS ux_{BUDGET_VIEW} ON {BUDGET_VIEW} (role, experience_level, currency)",
+]
+
+
+def ensure_analytics_schema(engine: Engine) -> None:
+    if engine.dialect.name != "postgresql":
+        return
+    with engine.begin() as conn:
+        for ddl in _SCHEMA_DDL:
+            conn.execute(text(ddl))
+
+
+_refresh_lock = threading.Lock()
+_refreshed_at: Optional[float] = None
+_refreshed_watermark: Optional[datetime] = None
+
+
+def refresh_budget_view(db: Session, force: bool = False) -> bool:
+    """Rebuild budget_stats_mv if hiring_contexts changed since the last refresh; returns whether it ran."""
+    global _refreshed_at, _refreshed_watermark
+    if not _refresh_lock.acquire(blocking=False):
+        return False  # another refresh is already running
+    try:
+        watermark = db.execute(text("SELECT max(updated_at) FROM hiring_contexts")).scalar()
+        if not force and watermark == _refreshed_watermark:
+            _refreshed_at = time.monotonic()
+            return False
+        t0 = time.perf_counter()
+        db.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {BUDGET_VIEW}"))
+        db.commit()
+        _refreshed_at, _refreshed_watermark = time.monotonic(), watermark
+        log.info(f"Refreshed {BUDGET_VIEW} in {(time.perf_counter() - t0) * 1000:.0f}ms")
+        return True
+    finally:
+        _refresh_lock.release()
+
+
+def budget_view_age() -> Optional[float]:
+    """Seconds since the view was last checked/refreshed by this process, or None if never."""
+    return None if _refreshed_at is None else time.monotonic() - _refreshed_at
@@ -0,0 +1,226 @@
+"""
+Delta-compressed artifact versions.
+
+Each turn inserts its artifacts in full (storage "full"), keeping the turn's
+single INSERT. After commit, compact_session rewrites the versions a new one
+has superseded, RCS-style: version v becomes a zlib-compressed reverse line
+delta against version v + 1 ("delta"), except every ARTIFACT_SNAPSHOT_EVERY-th
+version, or one whose delta would not save at least half, which stays in full
+("snapshot"). The newest version is always full, so reading it costs nothing,
+and any older one is at most ARTIFACT_SNAPSHOT_EVERY - 1 deltas away.
+
+Versions never change content once written, so materialized text is cached
+by artifact id in an LRU.
+"""
+from __future__ import annotations
+
+import threading
+import zlib
+from collections import OrderedDict
+from difflib import SequenceMatcher
+from typing import Any, Dict, Iterable, List, Optional
+from uuid import UUID
+
+import orjson
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from app import config
+from app.core.lifecycle import TrackedExecutor, register_durable
+from app.core.logger import log
+from app.core.workers import after_fork
+from app.models.artifact import Artifact as DBArtifact
+
+FULL, SNAPSHOT, DELTA = "full", "snapshot", "delta"
+
+
+# ---------- Deltas ----------
+
+def encode_delta(older: str, newer: str) -> bytes:
+    """Ops that rebuild `older` from `newer`: [i1, i2] copies newer's lines, a string is inserted as is."""
+    src, dst = newer.splitlines(keepends=True), older.splitlines(keepends=True)
+    ops: List[Any] = []
+    for tag, i1, i2, j1, j2 in SequenceMatcher(a=src, b=dst, autojunk=False).get_opcodes():
+        if tag == "equal":
+            ops.append([i1, i2])
+        elif tag in ("replace", "insert"):
+            ops.append("".join(dst[j1:j2]))
+    return zlib.compress(orjson.dumps(ops), 9)
+
+
+def apply_delta(newer: str, delta: bytes) -> str:
+    src = newer.splitlines(keepends=True)
+    return "".join(op if isinstance(op, str) else "".join(src[op[0]:op[1]]) for op in orjson.loads(zlib.decompress(delta)))
+
+
+# ---------- Materialized versions ----------
+
+class _LRU:
+    def __init__(self, size: int):
+        self.size = size
+        self._items: "OrderedDict[UUID, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: UUID) -> Optional[str]:
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def put(self, key: UUID, value: str):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+
+_materialized = _LRU(config.ARTIFACT_CACHE_SIZE)
+
+
+@after_fork
+def _reset_materialized():
+    global _materialized
+    _materialized = _LRU(config.ARTIFACT_CACHE_SIZE)
+
+
+def _walk_down(rows: List[Any]) -> Dict[int, str]:
+    """Content by version for rows of one (session, type), newest first, starting at a stored-in-full row."""
+    contents: Dict[int, str] = {}
+    current: Optional[str] = None
+    for r in rows:
+        if r.storage != DELTA:
+            current = r.content_md
+        elif current is None or r.version + 1 not in contents:
+            raise ValueError(f"Artifact {r.id} v{r.version} has no base version to rebuild from")
+        else:
+            current = apply_delta(current, r.content_delta)
+        contents[r.version] = current
+    return contents
+
+
+def artifact_content(db: Session, artifact_id: UUID) -> Optional[str]:
+    """Markdown of one artifact version, rebuilt from its delta chain if needed; None if it does not exist."""
+    cached = _materialized.get(artifact_id)
+    if cached is not None:
+        return cached
+    row = db.execute(
+        select(DBArtifact.session_id, DBArtifact.type, DBArtifact.version, DBArtifact.storage, DBArtifact.content_md)
+        .where(DBArtifact.id == artifact_id)
+    ).one_or_none()
+    if row is None:
+        return None
+    if row.storage != DELTA:
+        _materialized.put(artifact_id, row.content_md)
+        return row.content_md
+
+    # The chain ends at the first full version above, at most ARTIFACT_SNAPSHOT_EVERY away
+    chain = db.execute(
+        select(DBArtifact.id, DBArtifact.version, DBArtifact.storage, DBArtifact.content_md, DBArtifact.content_delta)
+        .where(
+            DBArtifact.session_id == row.session_id,
+            DBArtifact.type == row.type,
+            DBArtifact.version.between(row.version, row.version + config.ARTIFACT_SNAPSHOT_EVERY),
+        )
+        .order_by(DBArtifact.version.desc())
+    ).all()
+    start = max(i for i, r in enumerate(chain) if r.storage != DELTA)
+    contents = _walk_down(chain[start:])
+    for r in chain[start:]:
+        _materialized.put(r.id, contents[r.version])
+    return contents[row.version]
+
+
+def materialize(rows: List[Dict[str, Any]]) -> None:
+    """
+    Fill content_md in place for artifact dicts that hold every version of
+    their (session, type), e.g. an export batch; drops the storage columns.
+    """
+    groups: Dict[tuple, List[Dict[str, Any]]] = {}
+    for r in rows:
+        groups.setdefault((r["session_id"], r["type"]), []).append(r)
+    for group in groups.values():
+        if any(r.get("storage") == DELTA for r in group):
+            group.sort(key=lambda r: r["version"], reverse=True)
+            contents = _walk_down([_Row(r) for r in group])
+            for r in group:
+                r["content_md"] = contents[r["version"]]
+    for r in rows:
+        r.pop("storage", None)
+        r.pop("content_delta", None)
+
+
+class _Row:
+    __slots__ = ("id", "version", "storage", "content_md", "content_delta")
+
+    def __init__(self, r: Dict[str, Any]):
+        for name in self.__slots__:
+            setattr(self, name, r.get(name))
+
+
+# ---------- Compaction ----------
+
+def compact(db: Session, session_id: UUID, artifact_type: str) -> int:
+    """Turn superseded full versions of one (session, type) into deltas or snapshots; returns rows rewritten."""
+    lowest = db.execute(
+        select(func.min(DBArtifact.version))
+        .where(DBArtifact.session_id == session_id, DBArtifact.type == artifact_type, DBArtifact.storage == FULL)
+        .where(DBArtifact.version < select(func.max(DBArtifact.version))
+               .where(DBArtifact.session_id == session_id, DBArtifact.type == artifact_type)
+               .scalar_subquery())
+    ).scalar()
+    if lowest is None:
+        return 0
+
+    rows = db.execute(
+        select(DBArtifact.id, DBArtifact.version, DBArtifact.storage, DBArtifact.content_md, DBArtifact.content_delta)
+        .where(DBArtifact.session_id == session_id, DBArtifact.type == artifact_type, DBArtifact.version >= lowest)
+        .order_by(DBArtifact.version.desc())
+    ).all()
+    contents = _walk_down(rows)
+
+    changes = []
+    for r in rows[1:]:  # rows[0] is the newest version and stays full
+        if r.storage != FULL:
+            continue
+        older = contents[r.version]
+        delta = None if r.version % config.ARTIFACT_SNAPSHOT_EVERY == 0 else encode_delta(older, contents[r.version + 1])
+        if delta is not None and len(delta) * 2 <= len(older.encode("utf-8")):
+            changes.append({"id": r.id, "storage": DELTA, "content_md": "", "content_delta": delta})
+        else:
+            changes.append({"id": r.id, "storage": SNAPSHOT, "content_delta": None})
+    if changes:
+        db.execute(update(DBArtifact), changes)
+    return len(changes)
+
+
+def compact_session(session_id: str, artifact_types: List[str]) -> int:
+    """Compact the given artifact types of a session in its own transaction, serialized with its turns."""
+    from app.database.database import SessionLocal
+    from app.database.turns import lock_session
+
+    sid = UUID(str(session_id))
+    with SessionLocal() as db:
+        try:
+            lock_session(db, sid)
+            rewritten = sum(compact(db, sid, t) for t in artifact_types)
+            db.commit()
+        except Exception:
+            db.rollback()
+            log.error(f"Artifact compaction failed for session {sid}", exc_info=True)
+            return 0
+    if rewritten:
+        log.info(f"Compacted {rewritten} artifact version(s) for session {sid}")
+    return rewritten
+
+
+_compaction_executor = TrackedExecutor("artifact-compaction", max_workers=2)
+register_durable("artifacts.compact_session", compact_session)
+
+
+def schedule_compaction(session_id: UUID, artifacts: Iterable[Dict[str, Any]]) -> None:
+    """After a turn commits: compact the artifact types it wrote a new version of, off the request path."""
+    types = sorted({a["type"] for a in artifacts if a.get("type")})
+    if types:
+        _compaction_executor.submit(compact_session, str(session_id), types)
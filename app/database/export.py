@@ -0,0 +1,269 @@
+"""Streaming bulk export of sessions with their hiring context, messages and artifacts.
+
+Sessions are read through a server-side cursor (yield_per) in batches; each
+batch pulls its messages and artifacts with one keyed query per table, so
+memory is bounded by the batch size rather than the export size.
+
+Two encodings:
+- NDJSON: one nested JSON object per session, emitted batch by batch.
+- Parquet (requires pyarrow): one file per entity (sessions, messages,
+  artifacts), one row group per batch.
+"""
+from __future__ import annotations
+
+import io
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import orjson
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.database.artifact_store import materialize
+from app.models.artifact import Artifact as DBArtifact
+from app.models.hiring import HiringContext as DBHiringContext
+from app.models.message import Message as DBMessage
+from app.models.sessions import Session as DBSession
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+EXPORT_ENTITIES = ("sessions", "messages", "artifacts")
+DEFAULT_BATCH = 500
+
+
+@dataclass
+class ExportFilter:
+    since: Optional[datetime] = None  # sessions.created_at >= since
+    until: Optional[datetime] = None  # sessions.created_at < until
+    status: Optional[str] = None
+
+
+@dataclass
+class ExportStats:
+    rows: Dict[str, int] = field(default_factory=lambda: dict.fromkeys(EXPORT_ENTITIES, 0))
+    bytes: int = 0
+    started: float = field(default_factory=time.perf_counter)
+
+    @property
+    def seconds(self) -> float:
+        return time.perf_counter() - self.started
+
+    def summary(self) -> str:
+        s = max(self.seconds, 1e-9)
+        counts = ", ".join(f"{n:,} {k}" for k, n in self.rows.items())
+        return f"{counts} in {s:.1f}s ({self.rows['sessions'] / s:,.0f} sessions/s, {self.bytes / s / 2**20:.1f} MiB/s)"
+
+
+# ---------- Reading ----------
+
+_SESSION_COLUMNS = (
+    DBSession.id,
+    DBSession.status,
+    DBSession.current_step,
+    DBSession.created_at,
+    DBSession.updated_at,
+    DBHiringContext.primary_role,
+    DBHiringContext.budget,
+    DBHiringContext.budget_min,
+    DBHiringContext.budget_max,
+    DBHiringContext.budget_currency,
+    DBHiringContext.timeline,
+    DBHiringContext.location,
+    DBHiringContext.experience_level,
+    DBHiringContext.skills_json,
+    DBHiringContext.extras_json,
+)
+_MESSAGE_COLUMNS = (
+    DBMessage.id, DBMessage.session_id, DBMessage.sender, DBMessage.role,
+    DBMessage.content, DBMessage.meta_json, DBMessage.created_at,
+)
+_ARTIFACT_COLUMNS = (
+    DBArtifact.id, DBArtifact.session_id, DBArtifact.type, DBArtifact.version, DBArtifact.title,
+    DBArtifact.content_md, DBArtifact.meta_json, DBArtifact.created_at, DBArtifact.updated_at,
+    DBArtifact.storage, DBArtifact.content_delta,
+)
+
+
+def _sessions_query(f: ExportFilter):
+    q = (
+        select(*_SESSION_COLUMNS)
+        .outerjoin(DBHiringContext, DBHiringContext.session_id == DBSession.id)
+        .order_by(DBSession.created_at, DBSession.id)
+    )
+    if f.since is not None:
+        q = q.where(DBSession.created_at >= f.since)
+    if f.until is not None:
+        q = q.where(DBSession.created_at < f.until)
+    if f.status:
+        q = q.where(DBSession.status == f.status)
+    return q
+
+
+def iter_batches(db: Session, f: ExportFilter, batch: int = DEFAULT_BATCH) -> Iterator[Dict[str, List[Dict[str, Any]]]]:
+    """Yield {"sessions": [...], "messages": [...], "artifacts": [...]} per batch of sessions."""
+    result = db.execute(_sessions_query(f).execution_options(yield_per=batch))
+    for part in result.partitions():
+        sessions = [dict(r._mapping) for r in part]
+        ids = [s["id"] for s in sessions]
+        messages = db.execute(
+            select(*_MESSAGE_COLUMNS)
+            .where(DBMessage.session_id.in_(ids))
+            .order_by(DBMessage.session_id, DBMessage.created_at)
+        ).mappings().all()
+        artifacts = db.execute(
+            select(*_ARTIFACT_COLUMNS)
+            .where(DBArtifact.session_id.in_(ids))
+            .order_by(DBArtifact.session_id, DBArtifact.type, DBArtifact.version)
+        ).mappings().all()
+        artifacts = [dict(a) for a in artifacts]
+        materialize(artifacts)  # every version of a session's artifacts is in the batch
+        yield {"sessions": sessions, "messages": [dict(m) for m in messages], "artifacts": artifacts}
+
+
+# ---------- NDJSON ----------
+
+def iter_ndjson(db: Session, f: ExportFilter, batch: int = DEFAULT_BATCH, stats: Optional[ExportStats] = None) -> Iterator[bytes]:
+    """One nested JSON line per session, yielded as one chunk per batch."""
+    stats = stats or ExportStats()
+    for b in iter_batches(db, f, batch):
+        children: Dict[Any, Dict[str, list]] = {s["id"]: {"messages": [], "artifacts": []} for s in b["sessions"]}
+        for m in b["messages"]:
+            children[m["session_id"]]["messages"].append({k: v for k, v in m.items() if k != "session_id"})
+        for a in b["artifacts"]:
+            children[a["session_id"]]["artifacts"].append({k: v for k, v in a.items() if k != "session_id"})
+
+        chunk = b"".join(
+            orjson.dumps({**s, **children[s["id"]]}, default=str, option=orjson.OPT_APPEND_NEWLINE)
+            for s in b["sessions"]
+        )
+        for entity in EXPORT_ENTITIES:
+            stats.rows[entity] += len(b[entity])
+        stats.bytes += len(chunk)
+        yield chunk
+
+
+# ---------- Parquet ----------
+
+def _require_pyarrow():
+    if pa is None:
+        raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)")
+
+
+def parquet_schema(entity: str):
+    _require_pyarrow()
+    ts = pa.timestamp("us", tz="UTC")
+    return {
+        "sessions": pa.schema([
+            ("id", pa.string()), ("status", pa.string()), ("current_step", pa.string()),
+            ("created_at", ts), ("updated_at", ts),
+            ("primary_role", pa.string()), ("budget", pa.string()),
+            ("budget_min", pa.int64()), ("budget_max", pa.int64()), ("budget_currency", pa.string()),
+            ("timeline", pa.string()), ("location", pa.string()), ("experience_level", pa.string()),
+            ("skills", pa.list_(pa.string())), ("extras_json", pa.string()),
+        ]),
+        "messages": pa.schema([
+            ("id", pa.string()), ("session_id", pa.string()), ("sender", pa.string()), ("role", pa.string()),
+            ("content", pa.large_string()), ("meta_json", pa.string()), ("created_at", ts),
+        ]),
+        "artifacts": pa.schema([
+            ("id", pa.string()), ("session_id", pa.string()), ("type", pa.string()), ("version", pa.int32()),
+            ("title", pa.string()), ("content_md", pa.large_string()), ("meta_json", pa.string()),
+            ("created_at", ts), ("updated_at", ts),
+        ]),
+    }[entity]
+
+
+def _to_columns(entity: str, rows: Sequence[Dict[str, Any]]) -> Dict[str, list]:
+    schema = parquet_schema(entity)
+    cols: Dict[str, list] = {name: [] for name in schema.names}
+    for r in rows:
+        for name in schema.names:
+            if name == "skills":
+                value = r.get("skills_json")
+            else:
+                value = r.get(name)
+            if name in ("id", "session_id") and value is not None:
+                value = str(value)
+            elif name.endswith("_json") and value is not None:
+                value = orjson.dumps(value).decode("utf-8")
+            cols[name].append(value)
+    return cols
+
+
+def record_batch(entity: str, rows: Sequence[Dict[str, Any]]):
+    schema = parquet_schema(entity)
+    return pa.RecordBatch.from_pydict(_to_columns(entity, rows), schema=schema)
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only, non-seekable sink whose buffered bytes are drained between row groups."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._pos = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def drain(self) -> bytes:
+        out, self._chunks = b"".join(self._chunks), []
+        return out
+
+
+def iter_parquet(db: Session, f: ExportFilter, entity: str, batch: int = DEFAULT_BATCH,
+                 stats: Optional[ExportStats] = None) -> Iterator[bytes]:
+    """Stream one entity as a Parquet file, yielding bytes after every row group."""
+    _require_pyarrow()
+    stats = stats or ExportStats()
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, parquet_schema(entity), compression="zstd")
+    try:
+        for b in iter_batches(db, f, batch):
+            if b[entity]:
+                writer.write_batch(record_batch(entity, b[entity]))
+            for e in EXPORT_ENTITIES:
+                stats.rows[e] += len(b[e])
+            chunk = sink.drain()
+            if chunk:
+                stats.bytes += len(chunk)
+                yield chunk
+    finally:
+        writer.close()
+    chunk = sink.drain()
+    stats.bytes += len(chunk)
+    yield chunk
+
+
+def write_parquet(db: Session, f: ExportFilter, out_dir: Path, batch: int = DEFAULT_BATCH,
+                  stats: Optional[ExportStats] = None) -> ExportStats:
+    """Write sessions/messages/artifacts .parquet files in one pass, one row group per batch."""
+    _require_pyarrow()
+    stats = stats or ExportStats()
+    out_dir.mkdir(parents=True, exist_ok=True)
+    writers = {e: pq.ParquetWriter(out_dir / f"{e}.parquet", parquet_schema(e), compression="zstd") for e in EXPORT_ENTITIES}
+    try:
+        for b in iter_batches(db, f, batch):
+            for e, writer in writers.items():
+                if b[e]:
+                    writer.write_batch(record_batch(e, b[e]))
+                stats.rows[e] += len(b[e])
+    finally:
+        for writer in writers.values():
+            writer.close()
+    stats.bytes = sum((out_dir / f"{e}.parquet").stat().st_size for e in EXPORT_ENTITIES)
+    return stats
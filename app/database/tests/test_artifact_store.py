@@ -0,0 +1,93 @@
+"""Artifact deltas: encode/apply round trips and rebuilding versions across snapshot boundaries."""
+from __future__ import annotations
+
+import random
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+from app.database.artifact_store import DELTA, FULL, SNAPSHOT, _walk_down, apply_delta, encode_delta, materialize
+
+JD = "## Backend Engineer\n\nBuild APIs.\n\n- Python\n- PostgreSQL\n- AWS\n\n## What We Offer\n- Equity\n"
+
+
+@pytest.mark.parametrize("older, newer", [
+    (JD, JD),
+    (JD, JD.replace("Python", "Go")),
+    (JD, "## Intro\n" + JD + "- Remote\n"),
+    (JD, JD.replace("- AWS\n", "")),
+    (JD, JD.rstrip("\n")),  # the newer version lost its trailing newline
+    (JD.rstrip("\n"), JD),
+    (JD, ""),
+    ("", JD),
+    (JD, "Completely different\ntext\n"),
+    ("- a\n- a\n- a\n", "- a\n- b\n- a\n- a\n"),  # repeated lines
+    ("Rôle : ingénieur\n€120k\n", "Rôle : ingénieure\n€130k\n"),
+])
+def test_delta_round_trip(older, newer):
+    assert apply_delta(newer, encode_delta(older, newer)) == older
+
+
+def test_delta_round_trip_random_edits():
+    rng = random.Random(7)
+    lines = [f"- line {i}\n" for i in range(40)]
+    for _ in range(200):
+        older = rng.sample(lines, rng.randint(0, 30))
+        newer = list(older)
+        for _ in range(rng.randint(0, 6)):
+            op = rng.choice(("insert", "delete", "replace"))
+            pos = rng.randint(0, len(newer))
+            if op == "insert" or not newer:
+                newer.insert(pos, rng.choice(lines))
+            elif op == "delete":
+                del newer[min(pos, len(newer) - 1)]
+            else:
+                newer[min(pos, len(newer) - 1)] = f"- edited {rng.random()}\n"
+        assert apply_delta("".join(newer), encode_delta("".join(older), "".join(newer))) == "".join(older)
+
+
+def stored_versions(contents, snapshot_every):
+    """Rows as compaction leaves them, newest first: newest full, every snapshot_every-th a snapshot, the rest deltas."""
+    rows, n = [], len(contents)
+    for v in range(n, 0, -1):
+        text = contents[v - 1]
+        if v == n:
+            row = dict(storage=FULL, content_md=text, content_delta=None)
+        elif v % snapshot_every == 0:
+            row = dict(storage=SNAPSHOT, content_md=text, content_delta=None)
+        else:
+            row = dict(storage=DELTA, content_md="", content_delta=encode_delta(text, contents[v]))
+        rows.append(SimpleNamespace(id=uuid4(), version=v, **row))
+    return rows
+
+
+CONTENTS = [JD.replace("Build APIs.", f"Build APIs, revision {v}.") + "- Perk\n" * (v % 3) for v in range(1, 12)]
+
+
+def test_walk_down_from_the_newest_version_crosses_snapshots():
+    rows = stored_versions(CONTENTS, snapshot_every=4)
+    assert [r.storage for r in rows].count(SNAPSHOT) == 2  # versions 8 and 4
+    assert _walk_down(rows) == {v: CONTENTS[v - 1] for v in range(1, 12)}
+
+
+@pytest.mark.parametrize("start_version", [8, 4])
+def test_walk_down_from_a_snapshot(start_version):
+    rows = stored_versions(CONTENTS, snapshot_every=4)
+    chain = [r for r in rows if r.version <= start_version]
+    assert _walk_down(chain) == {v: CONTENTS[v - 1] for v in range(1, start_version + 1)}
+
+
+def test_walk_down_needs_a_base():
+    rows = stored_versions(CONTENTS, snapshot_every=4)
+    with pytest.raises(ValueError):
+        _walk_down([r for r in rows if r.version <= 7])  # starts at a delta
+
+
+def test_materialize_fills_delta_rows_and_drops_storage_columns():
+    sid = uuid4()
+    rows = [dict(vars(r), session_id=sid, type="job_description") for r in stored_versions(CONTENTS, snapshot_every=4)]
+    rows.reverse()  # as exported: oldest first
+    materialize(rows)
+    assert [r["content_md"] for r in rows] == CONTENTS
+    assert not any("storage" in r or "content_delta" in r for r in rows)
@@ -0,0 +1,109 @@
+"""Bulk export: one keyed child query per batch, delta-stored artifacts rebuilt, NDJSON and Parquet encodings."""
+from __future__ import annotations
+
+import io
+from datetime import UTC, datetime, timedelta
+from types import SimpleNamespace
+from uuid import uuid4
+
+import orjson
+import pytest
+
+from app.database.artifact_store import DELTA, FULL, encode_delta
+from app.database.export import EXPORT_ENTITIES, ExportFilter, ExportStats, iter_batches, iter_ndjson
+
+T0 = datetime(2026, 3, 2, 9, 0, tzinfo=UTC)
+JD_V1 = "## Backend Engineer\n\n- Python\n"
+JD_V2 = "## Backend Engineer\n\n- Python\n- PostgreSQL\n"
+
+
+class _ExportDb:
+    """Serves the session cursor in yield_per partitions and answers child queries by their session_id IN list."""
+
+    def __init__(self, n_sessions=5):
+        self.sessions = [
+            {"id": uuid4(), "status": "active", "current_step": "create_jd", "created_at": T0 + timedelta(minutes=i),
+             "updated_at": T0 + timedelta(minutes=i), "primary_role": "Backend Engineer", "budget": "$120k",
+             "budget_min": 120_000, "budget_max": 120_000, "budget_currency": "USD", "timeline": "6 weeks",
+             "location": "Remote", "experience_level": "Senior", "skills_json": ["Python"], "extras_json": {"count": 1}}
+            for i in range(n_sessions)
+        ]
+        self.messages, self.artifacts = [], []
+        for s in self.sessions:
+            for j, sender in enumerate(("user", "agent")):
+                self.messages.append({"id": uuid4(), "session_id": s["id"], "sender": sender, "role": sender,
+                                      "content": f"{sender} says hi", "meta_json": None,
+                                      "created_at": s["created_at"] + timedelta(seconds=j)})
+            for version, storage, content_md, delta in ((1, DELTA, "", encode_delta(JD_V1, JD_V2)),
+                                                        (2, FULL, JD_V2, None)):
+                self.artifacts.append({"id": uuid4(), "session_id": s["id"], "type": "job_description",
+                                       "version": version, "title": "Backend Engineer", "content_md": content_md,
+                                       "meta_json": {}, "created_at": s["created_at"], "updated_at": s["created_at"],
+                                       "storage": storage, "content_delta": delta})
+        self.queries = []
+
+    def execute(self, stmt):
+        table = stmt.selected_columns[0].table.name
+        if table == "sessions":
+            per = stmt.get_execution_options()["yield_per"]
+            self.queries.append(("sessions", per))
+            rows = [SimpleNamespace(_mapping=s) for s in self.sessions]
+            return SimpleNamespace(partitions=lambda: (rows[i:i + per] for i in range(0, len(rows), per)))
+        ids = next(v for v in stmt.compile().params.values() if isinstance(v, list))
+        self.queries.append((table, len(ids)))
+        rows = [dict(r) for r in getattr(self, table) if r["session_id"] in ids]
+        return SimpleNamespace(mappings=lambda: SimpleNamespace(all=lambda: rows))
+
+
+def test_batches_bound_the_child_queries_and_keep_children_with_their_sessions():
+    db = _ExportDb(5)
+    batches = list(iter_batches(db, ExportFilter(), batch=2))
+    assert [len(b["sessions"]) for b in batches] == [2, 2, 1]
+    assert db.queries == [("sessions", 2), ("messages", 2), ("artifacts", 2), ("messages", 2), ("artifacts", 2),
+                          ("messages", 1), ("artifacts", 1)]
+    for b in batches:
+        ids = {s["id"] for s in b["sessions"]}
+        assert {m["session_id"] for m in b["messages"]} == ids and len(b["messages"]) == 2 * len(ids)
+        assert {a["session_id"] for a in b["artifacts"]} == ids
+
+
+def test_delta_stored_versions_are_exported_in_full():
+    artifacts = [a for b in iter_batches(_ExportDb(2), ExportFilter(), batch=1) for a in b["artifacts"]]
+    assert {(a["version"], a["content_md"]) for a in artifacts} == {(1, JD_V1), (2, JD_V2)}
+    assert not any("storage" in a or "content_delta" in a for a in artifacts)
+
+
+def test_ndjson_nests_children_under_their_session_one_chunk_per_batch():
+    db, stats = _ExportDb(3), ExportStats()
+    chunks = list(iter_ndjson(db, ExportFilter(), batch=2, stats=stats))
+    assert len(chunks) == 2 and all(c.endswith(b"\n") for c in chunks)
+    lines = [orjson.loads(line) for line in b"".join(chunks).splitlines()]
+    assert [line["id"] for line in lines] == [str(s["id"]) for s in db.sessions]
+    first = lines[0]
+    assert first["created_at"] == "2026-03-02T09:00:00+00:00"
+    assert first["skills_json"] == ["Python"] and first["extras_json"] == {"count": 1}
+    assert [m["sender"] for m in first["messages"]] == ["user", "agent"]
+    assert {a["version"]: a["content_md"] for a in first["artifacts"]} == {1: JD_V1, 2: JD_V2}
+    assert not any("session_id" in child for child in first["messages"] + first["artifacts"])
+    assert stats.rows == {"sessions": 3, "messages": 6, "artifacts": 6}
+    assert stats.bytes == sum(map(len, chunks))
+
+
+def test_parquet_streams_one_row_group_per_batch(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    from app.database.export import iter_parquet, write_parquet
+
+    data = b"".join(iter_parquet(_ExportDb(5), ExportFilter(), "messages", batch=2))
+    streamed = pq.ParquetFile(io.BytesIO(data))
+    assert streamed.metadata.num_row_groups == 3 and streamed.metadata.num_rows == 10
+    assert streamed.read().column("sender").to_pylist()[:2] == ["user", "agent"]
+
+    db = _ExportDb(3)
+    stats = write_parquet(db, ExportFilter(), tmp_path, batch=2)
+    assert stats.rows == {"sessions": 3, "messages": 6, "artifacts": 6}
+    sessions = pq.read_table(tmp_path / "sessions.parquet").to_pylist()
+    assert [s["id"] for s in sessions] == [str(s["id"]) for s in db.sessions]
+    assert sessions[0]["skills"] == ["Python"] and orjson.loads(sessions[0]["extras_json"]) == {"count": 1}
+    artifacts = pq.read_table(tmp_path / "artifacts.parquet").to_pylist()
+    assert {(a["version"], a["content_md"]) for a in artifacts} == {(1, JD_V1), (2, JD_V2)}
+    assert set(EXPORT_ENTITIES) == {p.stem for p in tmp_path.glob("*.parquet")}
@@ -0,0 +1,152 @@
+"""A turn is three statements (lock, load, persist); the persist carries every write as a CTE, step events included."""
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+from types import SimpleNamespace
+
+from sqlalchemy.dialects import postgresql
+
+from app.database.turns import (
+    TURN_STATEMENT_BUDGET,
+    StepLog,
+    _rollup_rows,
+    load_turn_state,
+    lock_session,
+    persist_turn,
+    session_version,
+    step_transitions,
+)
+
+
+class RecordingSession:
+    """Stands in for a Postgres Session: compiles and records each statement, returns an empty load."""
+
+    def __init__(self):
+        self.statements = []
+
+    def get_bind(self):
+        return SimpleNamespace(dialect=postgresql.dialect())
+
+    def execute(self, stmt):
+        self.statements.append(str(stmt.compile(dialect=postgresql.dialect())))
+        return SimpleNamespace(first=lambda: None, one=lambda: SimpleNamespace(session_id=None))
+
+
+def run_turn(db, session_id, **persist):
+    lock_session(db, session_id)
+    step, hiring, history, step_log = load_turn_state(db, session_id)
+    persist_turn(db, session_id, current_step="create_plan", user_content="hire a backend engineer",
+                 user_at=datetime.now(UTC), ai_content="Here is your JD", hiring_data={"roles": ["Backend Engineer"]},
+                 **persist)
+    return step, hiring, history, step_log
+
+
+def test_turn_is_within_the_statement_budget(session_id):
+    db = RecordingSession()
+    now = datetime.now(UTC)
+    assert run_turn(db, session_id) == (None, {}, [], StepLog(None, frozenset()))
+    assert len(db.statements) == TURN_STATEMENT_BUDGET == 3
+
+    db = RecordingSession()
+    run_turn(
+        db, session_id,
+        artifacts=[
+            {"type": "job_description", "title": "Backend Engineer", "content_md": "JD body"},
+            {"type": "hiring_plan", "title": "Plan", "content_md": "# Plan", "checklist": ["Post the JD", "Screen"]},
+        ],
+        step_events=[{"from_step": "start", "to_step": "create_jd", "duration_ms": 5, "first_reach": True,
+                      "created_at": now - timedelta(seconds=1)},
+                     {"from_step": "create_jd", "to_step": "create_plan", "duration_ms": 1000, "first_reach": True,
+                      "created_at": now}],
+    )
+    assert len(db.statements) == TURN_STATEMENT_BUDGET
+    lock, load, persist = db.statements
+    assert "pg_advisory_xact_lock" in lock
+    assert load.lstrip().startswith("SELECT")
+    for cte in ("session_upsert", "messages_insert", "artifacts_insert", "checklist_insert",
+                "step_events_insert", "step_rollup_upsert"):
+        assert f"{cte} AS" in persist
+    assert persist.count("INSERT INTO hiring_contexts") == 1
+
+
+def test_persist_without_artifacts_or_steps_has_no_extra_ctes(session_id):
+    db = RecordingSession()
+    run_turn(db, session_id)
+    persist = db.statements[-1]
+    assert "session_upsert AS" in persist and "messages_insert AS" in persist
+    assert "artifacts_insert" not in persist and "step_events_insert" not in persist
+
+
+def test_session_version_reads_updated_at_and_the_transaction_time_in_one_statement(session_id):
+    db = RecordingSession()
+    db.execute = lambda stmt: db.statements.append(str(stmt.compile(dialect=postgresql.dialect()))) or SimpleNamespace(
+        one=lambda: (None, datetime(2026, 3, 2, tzinfo=UTC)))
+    assert session_version(db, session_id) == (None, datetime(2026, 3, 2, tzinfo=UTC))
+    (sql,) = db.statements
+    assert "SELECT sessions.updated_at" in sql and "now()" in sql
+
+
+# ---------- Step events ----------
+
+T0 = datetime(2026, 3, 2, 9, 58, tzinfo=UTC)
+
+
+def at(seconds):
+    return T0 + timedelta(seconds=seconds)
+
+
+def test_new_session_transitions_are_untimed_until_a_step_is_entered():
+    events = step_transitions(None, StepLog(None, frozenset()), [("start", at(0)), ("clarify", at(2))])
+    assert [(e["from_step"], e["to_step"], e["duration_ms"], e["first_reach"]) for e in events] == [
+        (None, "start", None, True),
+        ("start", "clarify", 2000, True),
+    ]
+
+
+def test_transitions_continue_from_the_stored_step_and_skip_repeats():
+    log = StepLog(at(-60), frozenset({"start", "clarify"}))
+    trail = [("clarify", at(1)), ("research", at(5)), ("research", at(6)), ("create_jd", at(8)), ("clarify", at(9))]
+    events = step_transitions("clarify", log, trail)
+    assert [(e["from_step"], e["to_step"], e["duration_ms"], e["first_reach"], e["created_at"]) for e in events] == [
+        ("clarify", "research", 65_000, True, at(5)),
+        ("research", "create_jd", 3000, True, at(8)),
+        ("create_jd", "clarify", 1000, False, at(9)),
+    ]
+
+
+def test_a_stored_step_without_an_entry_time_is_untimed():
+    events = step_transitions("clarify", StepLog(None, frozenset({"clarify"})), [("research", at(1))])
+    assert events[0]["duration_ms"] is None
+
+
+def test_rollup_counts_entries_reaches_and_timed_exits_per_hour_and_step():
+    events = step_transitions(
+        "clarify", StepLog(at(-30), frozenset({"start", "clarify"})),
+        [("research", at(60)), ("create_jd", at(90)), ("clarify", at(150)), ("research", at(200))],
+    )  # the last two fall into the next hour
+    nine, ten = T0.replace(minute=0), T0.replace(hour=10, minute=0)
+    zero = {"entered": 0, "reached": 0, "exited": 0, "timed_exits": 0, "duration_ms_sum": 0}
+    rows = {(r["hour"], r["step"]): {k: v for k, v in r.items() if k not in ("hour", "step")} for r in _rollup_rows(events)}
+    assert rows == {
+        (nine, "clarify"): {**zero, "exited": 1, "timed_exits": 1, "duration_ms_sum": 90_000},
+        (nine, "research"): {**zero, "entered": 1, "reached": 1, "exited": 1, "timed_exits": 1, "duration_ms_sum": 30_000},
+        (nine, "create_jd"): {**zero, "entered": 1, "reached": 1},
+        (ten, "create_jd"): {**zero, "exited": 1, "timed_exits": 1, "duration_ms_sum": 60_000},
+        (ten, "clarify"): {**zero, "entered": 1, "exited": 1, "timed_exits": 1, "duration_ms_sum": 50_000},
+        (ten, "research"): {**zero, "entered": 1},
+    }
+
+
+def test_untimed_exits_count_as_exits_only():
+    rows = _rollup_rows(step_transitions(None, StepLog(None, frozenset()), [("start", at(0))]))
+    assert rows == [{"hour": T0.replace(minute=0), "step": "start", "entered": 1, "reached": 1,
+                     "exited": 0, "timed_exits": 0, "duration_ms_sum": 0}]
+
+
+def test_rollup_upsert_adds_to_the_stored_counters(session_id):
+    db = RecordingSession()
+    run_turn(db, session_id, step_events=step_transitions(None, StepLog(None, frozenset()), [("start", at(0))]))
+    persist = db.statements[-1]
+    assert "ON CONFLICT (hour, step) DO UPDATE SET" in persist
+    for column in ("entered", "reached", "exited", "timed_exits", "duration_ms_sum"):
+        assert f"{column} = (step_rollup_hourly.{column} + excluded.{column})" in persist
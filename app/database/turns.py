@@ -0,0 +1,381 @@
+"""Per-turn persistence for the chat endpoint.
+
+A turn is read with one SELECT (session + hiring context + ordered history
++ step log) and written with one INSERT whose data-modifying CTEs upsert the
+session, insert both messages, any artifacts/checklist items and step
+events (bumping the hourly step rollup), and upsert the hiring context.
+"""
+from __future__ import annotations
+
+from datetime import datetime, UTC
+from collections import defaultdict
+from typing import Any, Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+from uuid import UUID, uuid4
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from sqlalchemy import func, literal_column, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by, insert
+from sqlalchemy.orm import Session
+
+from app.core.budget import normalize_budget
+from app.core.tokens import TOKEN_COUNT_KEY, artifact_ref, count_tokens
+from app.models.artifact import Artifact as DBArtifact
+from app.models.checklist import ChecklistItem as DBChecklistItem
+from app.models.hiring import HiringContext as DBHiringContext
+from app.models.message import Message as DBMessage
+from app.models.sessions import Session as DBSession
+from app.models.step_event import StepEvent as DBStepEvent, StepRollupHourly as DBStepRollupHourly
+from app.schemas.enums import Role, Sender, SessionStatus, StepName
+
+# Advisory lock, one SELECT to load the turn, one INSERT ... RETURNING to persist it.
+TURN_STATEMENT_BUDGET = 3
+
+_HIRING_FIELDS = {
+    "primary_role": None,
+    "budget": "budget",
+    "timeline": "timeline",
+    "location": "location",
+    "experience_level": "experience_level",
+    "skills_json": "skills",
+    "extras_json": "extras",
+}
+
+
+def context_row_to_hiring_dict(ctx: Any) -> Dict[str, Any]:
+    """Map a HiringContext row (ORM object or RETURNING row) to the agent's hiring_data shape."""
+    if ctx is None:
+        return {}
+    return {
+        "roles": [ctx.primary_role] if ctx.primary_role else [],
+        "budget": ctx.budget,
+        "timeline": ctx.timeline,
+        "location": ctx.location,
+        "experience_level": ctx.experience_level,
+        "skills": ctx.skills_json or [],
+        "extras": ctx.extras_json or {},
+    }
+
+
+def _advisory_key(session_id: UUID) -> int:
+    return int.from_bytes(session_id.bytes[:8], "big", signed=True)
+
+
+def lock_session(db: Session, session_id: UUID) -> None:
+    """
+    Serialize turns for a session across workers with a transaction-scoped
+    Postgres advisory lock, released on commit/rollback. Other dialects rely
+    on the in-process serialization in app.core.session_queue.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    db.execute(select(func.pg_advisory_xact_lock(_advisory_key(session_id))))
+
+
+def session_version(db: Session, session_id: UUID) -> Tuple[Optional[datetime], datetime]:
+    """
+    (sessions.updated_at, now()) in one statement, for callers that keep a
+    session's state in memory. now() is the transaction timestamp, which is
+    the updated_at a persist_turn later in the same transaction writes.
+    """
+    updated_at = select(DBSession.updated_at).where(DBSession.id == session_id).scalar_subquery()
+    row = db.execute(select(updated_at, func.now())).one()
+    return row[0], row[1]
+
+
+def _history_subquery():
+    pair = func.json_build_array(DBMessage.role, DBMessage.content, DBMessage.meta_json[TOKEN_COUNT_KEY])
+    return (
+        select(
+            func.coalesce(
+                func.json_agg(aggregate_order_by(pair, DBMessage.created_at.asc())),
+                literal_column("'[]'::json"),
+            )
+        )
+        .where(DBMessage.session_id == DBSession.id)
+        .correlate(DBSession)
+        .scalar_subquery()
+    )
+
+
+class StepLog(NamedTuple):
+    """When the session entered its current step, and every step it has reached so far."""
+    entered_at: Optional[datetime]
+    reached: FrozenSet[str]
+
+
+def _step_log_subqueries():
+    last_event = (
+        select(func.max(DBStepEvent.created_at))
+        .where(DBStepEvent.session_id == DBSession.id)
+        .correlate(DBSession)
+        .scalar_subquery()
+    )
+    reached = (
+        select(func.array_agg(DBStepEvent.to_step.distinct()))
+        .where(DBStepEvent.session_id == DBSession.id)
+        .correlate(DBSession)
+        .scalar_subquery()
+    )
+    return func.coalesce(last_event, DBSession.created_at).label("step_entered_at"), reached.label("steps_reached")
+
+
+def load_turn_state(db: Session, session_id: UUID) -> Tuple[Optional[str], Dict[str, Any], List[BaseMessage], StepLog]:
+    """
+    Load everything a turn needs in a single statement.
+
+    Returns (current_step, hiring_data, history, step_log). current_step is
+    None when the session does not exist yet.
+    """
+    stmt = (
+        select(
+            DBSession.current_step,
+            DBHiringContext.id.label("context_id"),
+            DBHiringContext.primary_role,
+            DBHiringContext.budget,
+            DBHiringContext.timeline,
+            DBHiringContext.location,
+            DBHiringContext.experience_level,
+            DBHiringContext.skills_json,
+            DBHiringContext.extras_json,
+            _history_subquery().label("history"),
+            *_step_log_subqueries(),
+        )
+        .outerjoin(DBHiringContext, DBHiringContext.session_id == DBSession.id)
+        .where(DBSession.id == session_id)
+    )
+    row = db.execute(stmt).first()
+    if row is None:
+        return None, {}, [], StepLog(None, frozenset())
+
+    history: List[BaseMessage] = []
+    for role, content, token_count in row.history or []:
+        cls = HumanMessage if role == Role.user.value else AIMessage
+        meta = {TOKEN_COUNT_KEY: token_count} if isinstance(token_count, int) else {}
+        history.append(cls(content=content, response_metadata=meta))
+
+    hiring = context_row_to_hiring_dict(row) if row.context_id is not None else {}
+    return row.current_step, hiring, history, StepLog(row.step_entered_at, frozenset(row.steps_reached or ()))
+
+
+def step_transitions(
+    prior_step: Optional[str],
+    step_log: StepLog,
+    trail: List[Tuple[str, datetime]],
+) -> List[Dict[str, Any]]:
+    """
+    Turn the (step, entered_at) trail a run produced into step events.
+
+    prior_step is None for a brand-new session. Repeats of the current step
+    are not transitions and are dropped.
+    """
+    events = []
+    step, since, reached = prior_step, step_log.entered_at, set(step_log.reached)
+    for to_step, at in trail:
+        if to_step == step:
+            continue
+        events.append({
+            "from_step": step,
+            "to_step": to_step,
+            "duration_ms": int((at - since).total_seconds() * 1000) if since and step else None,
+            "first_reach": to_step not in reached,
+            "created_at": at,
+        })
+        reached.add(to_step)
+        step, since = to_step, at
+    return events
+
+
+def _rollup_rows(events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """step_rollup_hourly increments for a turn's step events, one row per (hour, step)."""
+    counters: Dict[tuple, Dict[str, int]] = defaultdict(
+        lambda: {"entered": 0, "reached": 0, "exited": 0, "timed_exits": 0, "duration_ms_sum": 0}
+    )
+    for e in events:
+        hour = e["created_at"].replace(minute=0, second=0, microsecond=0)
+        entered = counters[(hour, e["to_step"])]
+        entered["entered"] += 1
+        entered["reached"] += int(e["first_reach"])
+        if e["from_step"] is not None:
+            exited = counters[(hour, e["from_step"])]
+            exited["exited"] += 1
+            if e["duration_ms"] is not None:
+                exited["timed_exits"] += 1
+                exited["duration_ms_sum"] += e["duration_ms"]
+    return [{"hour": hour, "step": step, **c} for (hour, step), c in counters.items()]
+
+
+def _step_ctes(session_id: UUID, events: List[Dict[str, Any]]) -> list:
+    """Insert the step events and fold them into step_rollup_hourly, pre-aggregated per (hour, step)."""
+    if not events:
+        return []
+    rollup_stmt = insert(DBStepRollupHourly).values(_rollup_rows(events))
+    rollup_cols = ("entered", "reached", "exited", "timed_exits", "duration_ms_sum")
+    return [
+        insert(DBStepEvent).values([{"session_id": session_id, **e} for e in events]).cte("step_events_insert"),
+        rollup_stmt.on_conflict_do_update(
+            index_elements=[DBStepRollupHourly.hour, DBStepRollupHourly.step],
+            set_={c: getattr(DBStepRollupHourly, c) + getattr(rollup_stmt.excluded, c) for c in rollup_cols},
+        ).cte("step_rollup_upsert"),
+    ]
+
+
+def _hiring_patch(incoming: Dict[str, Any]) -> Dict[str, Any]:
+    roles = (incoming or {}).get("roles") or []
+    patch = {"primary_role": roles[0] if roles else None}
+    for column, key in _HIRING_FIELDS.items():
+        if key is not None:
+            patch[column] = (incoming or {}).get(key)
+    if patch["budget"]:
+        patch.update(normalize_budget(patch["budget"], patch["primary_role"]))
+    return patch
+
+
+def _artifact_row(session_id: UUID, artifact: Dict[str, Any], offset: int = 1) -> Dict[str, Any]:
+    """Insert values for one artifact; its version is max(version) + offset per (session, type), in SQL."""
+    # Callers read the id back (e.g. to index the artifact after commit)
+    artifact_id = artifact.setdefault("id", uuid4())
+    next_version = (
+        select(func.coalesce(func.max(DBArtifact.version), 0) + offset)
+        .where(DBArtifact.session_id == session_id, DBArtifact.type == artifact["type"])
+        .scalar_subquery()
+    )
+    return {
+        "id": artifact_id,
+        "session_id": session_id,
+        "type": artifact["type"],
+        "version": next_version,
+        "title": artifact.get("title") or "",
+        "content_md": artifact.get("content_md") or "",
+        "meta_json": artifact.get("meta") or {},
+    }
+
+
+def _artifact_ctes(session_id: UUID, artifacts: List[Dict[str, Any]]) -> list:
+    """
+    Build insert CTEs for the artifacts a node produced this turn, plus one
+    multi-row insert for all their checklist items. Versions are assigned in
+    SQL as max(version) + 1 per (session, type).
+    """
+    artifact_rows = []
+    checklist_rows = []
+    seen_types: Dict[str, int] = {}
+    for artifact in artifacts:
+        offset = seen_types.get(artifact["type"], 0) + 1
+        seen_types[artifact["type"]] = offset
+        artifact_rows.append(_artifact_row(session_id, artifact, offset))
+        artifact_id = artifact["id"]
+        for position, text in enumerate(artifact.get("checklist") or []):
+            checklist_rows.append({"id": uuid4(), "artifact_id": artifact_id, "text": text, "position": position, "is_done": False})
+
+    ctes = []
+    if artifact_rows:
+        ctes.append(insert(DBArtifact).values(artifact_rows).cte("artifacts_insert"))
+    if checklist_rows:
+        ctes.append(insert(DBChecklistItem).values(checklist_rows).cte("checklist_insert"))
+    return ctes
+
+
+def persist_artifact(db: Session, session_id: UUID, artifact: Dict[str, Any]) -> int:
+    """
+    Insert one artifact version outside a turn (e.g. a background JD
+    refinement) and return its version. Callers hold lock_session so the
+    version does not race a turn's.
+    """
+    return db.execute(insert(DBArtifact).values(_artifact_row(session_id, artifact)).returning(DBArtifact.version)).scalar_one()
+
+
+def _reference_artifacts(content: str, artifacts: List[Dict[str, Any]]) -> Tuple[str, List[str]]:
+    """Swap each artifact body quoted in a message for its [[artifact:type:id]] reference; ids must be assigned."""
+    refs = []
+    for artifact in artifacts:
+        body = artifact.get("content_md")
+        if body and body in content:
+            content = content.replace(body, artifact_ref(artifact["type"], artifact["id"]))
+            refs.append(str(artifact["id"]))
+    return content, refs
+
+
+def persist_turn(
+    db: Session,
+    session_id: UUID,
+    *,
+    current_step: str,
+    user_content: str,
+    user_at: datetime,
+    ai_content: str,
+    hiring_data: Dict[str, Any],
+    user_meta: Optional[Dict[str, Any]] = None,
+    ai_meta: Optional[Dict[str, Any]] = None,
+    artifacts: Optional[List[Dict[str, Any]]] = None,
+    step_events: Optional[List[Dict[str, Any]]] = None,
+):
+    """
+    Write a whole turn in one statement and return the resulting HiringContext row.
+
+    The session upsert, the two-row message insert, any artifacts (with
+    their checklist items) and step events (with their rollup upsert) ride
+    along as CTEs of the hiring-context upsert.
+    Only non-null hiring fields overwrite stored values, matching the previous
+    read-modify-write semantics. Artifact bodies quoted in ai_content are
+    stored as references to the artifact rather than a second copy.
+    """
+    now = datetime.now(UTC)
+    artifact_ctes = _artifact_ctes(session_id, artifacts or [])
+    ai_content, refs = _reference_artifacts(ai_content, artifacts or [])
+    if refs:
+        ai_meta = {**(ai_meta or {}), "artifact_refs": refs}
+
+    session_stmt = insert(DBSession).values(
+        id=session_id,
+        status=SessionStatus.active.value,
+        current_step=current_step,
+        context_json={},
+    )
+    session_cte = session_stmt.on_conflict_do_update(
+        index_elements=[DBSession.id],
+        set_={"current_step": session_stmt.excluded.current_step, "updated_at": func.now()},
+    ).cte("session_upsert")
+
+    messages_cte = insert(DBMessage).values([
+        {
+            "id": uuid4(),
+            "session_id": session_id,
+            "sender": Sender.user.value,
+            "role": Role.user.value,
+            "content": user_content,
+            "meta_json": {TOKEN_COUNT_KEY: count_tokens(user_content), **(user_meta or {})},
+            "created_at": user_at,
+        },
+        {
+            "id": uuid4(),
+            "session_id": session_id,
+            "sender": Sender.agent.value,
+            "role": Role.assistant.value,
+            "content": ai_content,
+            "meta_json": {TOKEN_COUNT_KEY: count_tokens(ai_content), **(ai_meta or {})},
+            "created_at": now,
+        },
+    ]).cte("messages_insert")
+
+    patch = _hiring_patch(hiring_data)
+    # A new budget string replaces all of its normalized columns, even ones it could not fill
+    insert_values = {k: v for k, v in patch.items() if v is not None or (patch["budget"] and k.startswith("budget_"))}
+    # Python-side column defaults (uuid4 ids) cannot be rendered inside the CTEs, so every id is passed in
+    context_stmt = insert(DBHiringContext).values(id=uuid4(), session_id=session_id, **insert_values)
+    update_values = {k: getattr(context_stmt.excluded, k) for k in insert_values}
+    update_values["updated_at"] = func.now()
+
+    stmt = (
+        context_stmt.on_conflict_do_update(
+            index_elements=[DBHiringContext.session_id],
+            set_=update_values,
+        )
+        .returning(*DBHiringContext.__table__.c)
+        .add_cte(
+            session_cte,
+            messages_cte,
+            *artifact_ctes,
+            *_step_ctes(session_id, step_events or []),
+        )
+    )
+    return db.execute(stmt).one()
@@ -1,10 +1,33 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.database.database import init_db
+from app import config
+from app.core import lifecycle, tracing, workers
+from app.core.compression import CompressionMiddleware
+from app.database.database import engine, init_db
 from app.api.v1.api import api_router
 from app.core.logger import log
-app = FastAPI()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if not workers.preloaded():  # gunicorn --preload already did it once in the master
+        init_db()
+        log.info("Database initialized")
+    lifecycle.replay_spooled()
+    # uvicorn's signal handlers are installed by now; ours runs first and stops new turns
+    lifecycle.install_signal_handlers()
+    yield
+    # uvicorn has stopped serving; let turns and background jobs finish
+    await run_in_threadpool(lifecycle.drain, config.SHUTDOWN_DRAIN_SECONDS)
+    await run_in_threadpool(tracing.shutdown)
+    engine.dispose()
+    log.info("Database pool disposed")
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -14,12 +37,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-app.include_router(api_router, prefix="/api")
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=config.COMPRESSION_MIN_SIZE,
+    gzip_level=config.COMPRESSION_GZIP_LEVEL,
+    brotli_quality=config.COMPRESSION_BROTLI_QUALITY,
+)
 
-@app.on_event("startup")
-def startup_event():
-    init_db()
-    log.info("Database initialized")
+app.include_router(api_router, prefix="/api")
 
 @app.get("/")
 def read_root():
@@ -8,5 +8,8 @@ from .artifact import Artifact
 from .job_posting import JobPosting
 from .hiring import HiringContext
 from .checklist import ChecklistItem
+from .idempotency import IdempotencyKey
+from .step_event import StepEvent, StepRollupHourly
+from .notion_document import NotionDocument
 
 Base = declarative_base()
\ No newline at end of file
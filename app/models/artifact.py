@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, Column, String, JSON, DateTime, Text, Integer
+from sqlalchemy import create_engine, Column, String, JSON, DateTime, Text, Integer, LargeBinary
 from datetime import datetime, UTC
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.sql import func
@@ -23,7 +23,11 @@ class Artifact(Base):
     type = Column(String, nullable=False, index=True)  # ArtifactType.*
     version = Column(Integer, nullable=False, default=1)  # for versioning
     title = Column(String, nullable=False, default="")
-    content_md = Column(Text, nullable=False, default="")
+    content_md = Column(Text, nullable=False, default="")  # "" when storage == "delta"
+    # app.database.artifact_store: "full" (newest, not compacted yet), "snapshot"
+    # (kept in full) or "delta" (content_delta rebuilds it from version + 1)
+    storage = Column(String, nullable=False, server_default="full")
+    content_delta = Column(LargeBinary, nullable=True)
     meta_json = Column(JSONB, nullable=False, server_default="{}")
 
     created_at = Column(
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, Column, String, JSON, DateTime, Text
+from sqlalchemy import create_engine, Column, String, JSON, DateTime, Text, BigInteger, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime, UTC
 from sqlalchemy.dialects.postgresql import UUID, JSONB
@@ -28,6 +28,12 @@ class HiringContext(Base):
     location = Column(String, nullable=True)
     experience_level = Column(String, nullable=True)
 
+    # Budget normalized from the free-form string (annual amounts, primary role); see app.core.budget
+    budget_min = Column(BigInteger, nullable=True)
+    budget_max = Column(BigInteger, nullable=True)
+    budget_currency = Column(String(3), nullable=True)
+    budget_ranges_json = Column(JSONB, nullable=False, server_default="[]")
+
     # Flexible fields
     skills_json = Column(JSONB, nullable=False, server_default="[]")
     extras_json = Column(JSONB, nullable=False, server_default="{}")
@@ -36,4 +42,10 @@ class HiringContext(Base):
     updated_at = Column(DateTime(timezone=True),nullable=False,server_default=func.now(),onupdate=func.now(),)
 
     # Relationship
-    session = relationship("Session", back_populates="hiring_context")
\ No newline at end of file
+    session = relationship("Session", back_populates="hiring_context")
+
+    __table_args__ = (
+        Index("ix_hiring_contexts_role_level", "primary_role", "experience_level"),
+        Index("ix_hiring_contexts_budget", "budget_currency", "budget_min", "budget_max"),
+        Index("ix_hiring_contexts_updated_at", "updated_at"),
+    )
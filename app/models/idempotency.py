@@ -0,0 +1,25 @@
+from sqlalchemy import Column, String, DateTime, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+
+from .base import Base
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    key = Column(String, primary_key=True)
+
+    # sha256 of the request body; a reused key with a different body is rejected
+    fingerprint = Column(String, nullable=False)
+    status = Column(String, nullable=False, default="pending")  # pending | completed
+    response_json = Column(JSONB, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    # Lease start of the current pending claim; see IDEMPOTENCY_PENDING_TIMEOUT_SECONDS
+    claimed_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index("ix_idempotency_keys_expires_at", "expires_at"),
+    )
@@ -0,0 +1,30 @@
+from sqlalchemy import Column, DateTime, String
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.sql import func
+
+from .base import Base
+
+
+class NotionDocument(Base):
+    """
+    Where an artifact lives in Notion: one document per (session, artifact type),
+    updated in place as new versions of the artifact are generated.
+    """
+
+    __tablename__ = "notion_documents"
+
+    # No FK: the sync runs in the background and can finish before the turn
+    # that created the session has been persisted.
+    session_id = Column(UUID(as_uuid=True), primary_key=True)
+    artifact_type = Column(String, primary_key=True)  # ArtifactType.*
+
+    page_id = Column(String, nullable=False)
+    artifact_id = Column(UUID(as_uuid=True), nullable=True)  # last version synced
+    blocks_json = Column(JSONB, nullable=False, server_default="[]")  # [{"id", "hash", "type"}] in page order
+
+    synced_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
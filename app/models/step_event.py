@@ -0,0 +1,45 @@
+from sqlalchemy import BigInteger, Boolean, Column, DateTime, ForeignKey, Index, String
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+
+from .base import Base
+
+
+class StepEvent(Base):
+    """One current_step transition of a session, written by the chat turn that made it."""
+
+    __tablename__ = "step_events"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+
+    session_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("sessions.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+
+    from_step = Column(String, nullable=True)  # None for the session's first event
+    to_step = Column(String, nullable=False)
+    duration_ms = Column(BigInteger, nullable=True)  # time spent in from_step
+    first_reach = Column(Boolean, nullable=False, default=False)
+
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_step_events_session_created", "session_id", "created_at"),
+    )
+
+
+class StepRollupHourly(Base):
+    """Per-hour, per-step counters maintained in the same statement that inserts the step events."""
+
+    __tablename__ = "step_rollup_hourly"
+
+    hour = Column(DateTime(timezone=True), primary_key=True)
+    step = Column(String, primary_key=True)
+
+    entered = Column(BigInteger, nullable=False, server_default="0")
+    reached = Column(BigInteger, nullable=False, server_default="0")  # sessions entering the step for the first time
+    exited = Column(BigInteger, nullable=False, server_default="0")
+    timed_exits = Column(BigInteger, nullable=False, server_default="0")
+    duration_ms_sum = Column(BigInteger, nullable=False, server_default="0")
@@ -1,14 +1,24 @@
 import os, httpx
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
+from difflib import SequenceMatcher
+import hashlib
 import re
 import json
+import random
+import time
 from app.core.logger import log
+from app.core.tracing import span
 from dotenv import load_dotenv
 load_dotenv()
 
 NOTION_API_KEY = os.getenv("NOTION_API_KEY")
 NOTION_PAGE_ID = os.getenv("NOTION_PAGE_ID")
 NOTION_VERSION = os.getenv("NOTION_VERSION", "2022-06-28")
+# Point NOTION_API_URL at scripts/notion_standin.py to run without the real API
+NOTION_API_BASE = os.getenv("NOTION_API_URL", "https://api.notion.com").rstrip("/") + "/v1"
+NOTION_MAX_RETRIES = int(os.getenv("NOTION_MAX_RETRIES", "4"))
+NOTION_MAX_CHILDREN = 100  # per append request
+NOTION_MAX_TEXT = 2000  # characters per rich_text item
 
 HEADERS = {
     "Authorization": f"Bearer {NOTION_API_KEY}" if NOTION_API_KEY else "",
@@ -51,6 +61,18 @@ def _rt_fragments(text: str):
 def _rt(text: str):
     return _rt_fragments(text)
 
+def _split_rich_text(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Split text items over Notion's 2000-character limit into consecutive items with the same annotations."""
+    out = []
+    for item in items:
+        content = item.get("text", {}).get("content", "")
+        if len(content) <= NOTION_MAX_TEXT:
+            out.append(item)
+            continue
+        for start in range(0, len(content), NOTION_MAX_TEXT):
+            out.append({**item, "text": {**item["text"], "content": content[start:start + NOTION_MAX_TEXT]}})
+    return out
+
 def _label_value(line: str):
     m = re.match(r"^\s*\*\*([^*]+):\*\*\s*(.*)$", line)
     if not m: return None
@@ -129,26 +151,19 @@ def markdown_to_notion_blocks(markdown_text: str):
         blocks.append({"object":"block","type":"paragraph","paragraph":{"rich_text":_rt(stripped)}})
         i += 1
 
+    for block in blocks:
+        body = block[block["type"]]
+        body["rich_text"] = _split_rich_text(body["rich_text"])
     return blocks
 
 def upload_to_notion(content: str | Dict[str, Any], *, page_id_or_url: str, title: str = "Job Description") -> Dict[str, Any]:
     """
-    Appends blocks to a page using PATCH /v1/blocks/{page_id}/children
-    (aligned to the official cURL you shared).
+    Appends blocks to a page using PATCH /v1/blocks/{page_id}/children,
+    100 children per request, retrying on 429.
     """
-    # page_id = _extract_notion_id(page_id_or_url)
-    endpoint = f"https://api.notion.com/v1/blocks/{NOTION_PAGE_ID}/children"
-
     # Build children just like your cURL example
     if isinstance(content, str):
-        children = [
-            {
-                "object": "block",
-                "type": "heading_2",
-                "heading_2": {"rich_text": _rt(title)}
-            },
-            *markdown_to_notion_blocks(content)
-        ]
+        children = document_blocks(content, title)
     elif isinstance(content, dict):
         children = [
             {"object":"block","type":"heading_2","heading_2":{"rich_text": _rt(title)}},
@@ -158,14 +173,185 @@ def upload_to_notion(content: str | Dict[str, Any], *, page_id_or_url: str, titl
             }},
         ]
     else:
-        children = [{"object":"block","type":"paragraph","paragraph":{"rich_text": _rt(str(content))}}]
+        children = [{"object":"block","type":"paragraph","paragraph":{"rich_text": _split_rich_text(_rt(str(content)))}}]
 
     with httpx.Client(timeout=20) as client:
-        # IMPORTANT: use PATCH (matches the doc you pasted)
-        resp = client.patch(endpoint, headers=HEADERS, json={"children": children})
-        try:
-            resp.raise_for_status()
-        except httpx.HTTPStatusError as e:
-            # Bubble up Notion’s error body to make debugging easier
-            raise RuntimeError(f"Notion error {resp.status_code}: {resp.text}") from e
+        ids = NotionClient(client).append(notion_id(page_id_or_url), children)
+    return {"object": "list", "results": [{"object": "block", "id": i} for i in ids]}
+
+# ---------- Incremental sync ----------
+#
+# A synced document is a contiguous run of blocks on the page. Its state is a
+# list of {"id", "hash", "type"} entries in page order; sync_blocks diffs the
+# new blocks against it and issues only the update/append/delete calls needed.
+
+def notion_id(page_id_or_url: str) -> str:
+    """Page id from a bare id or a Notion URL (the trailing 32 hex characters)."""
+    compact = re.sub(r"[^0-9a-fA-F]", "", page_id_or_url.rsplit("/", 1)[-1].split("?")[0])
+    return compact[-32:] if len(compact) >= 32 else page_id_or_url
+
+def block_hash(block: Dict[str, Any]) -> str:
+    return hashlib.sha1(json.dumps(block, sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()[:16]
+
+def document_blocks(markdown_text: str, title: str) -> List[Dict[str, Any]]:
+    """The blocks upload_to_notion writes for a markdown document: a heading_2 title, then the body."""
+    return [
+        {"object": "block", "type": "heading_2", "heading_2": {"rich_text": _rt(title)}},
+        *markdown_to_notion_blocks(markdown_text),
+    ]
+
+class NotionError(RuntimeError):
+    def __init__(self, status_code: int, text: str):
+        super().__init__(f"Notion error {status_code}: {text}")
+        self.status_code = status_code
+
+class SyncInterrupted(Exception):
+    """A sync failed part-way; `state` is what is known to be on the page (applied ops plus untouched old blocks)."""
+
+    def __init__(self, state: List[Dict[str, str]]):
+        super().__init__("Notion sync interrupted")
+        self.state = state
+
+class NotionClient:
+    """Thin blocks API client with retries on 429 (honouring Retry-After) and, except for appends, 5xx; counts calls made."""
+
+    def __init__(self, client: httpx.Client, max_retries: int = NOTION_MAX_RETRIES, backoff: float = 0.5):
+        self.client = client
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.calls = 0
+        self.retries = 0
+
+    def request(self, method: str, path: str, body: Optional[Dict[str, Any]] = None, retry_5xx: bool = True) -> Dict[str, Any]:
+        for attempt in range(self.max_retries + 1):
+            self.calls += 1
+            with span("notion.request", method=method, path=path, attempt=attempt) as s:
+                resp = self.client.request(method, f"{NOTION_API_BASE}{path}", headers=HEADERS, json=body)
+                if s is not None:
+                    s.set_attribute("status_code", resp.status_code)
+            retryable = resp.status_code == 429 or (retry_5xx and resp.status_code >= 500)
+            if not retryable or attempt == self.max_retries:
+                break
+            self.retries += 1
+            # Honour Retry-After but keep backing off, with jitter so concurrent clients don't retry in lockstep
+            delay = max(float(resp.headers.get("Retry-After") or 0), self.backoff * 2 ** attempt)
+            delay *= random.uniform(1, 1.5)
+            log.warning(f"Notion {method} {path} returned {resp.status_code}; retrying in {delay:.1f}s")
+            time.sleep(delay)
+        if resp.status_code >= 400:
+            raise NotionError(resp.status_code, resp.text)
         return resp.json()
+
+    def append(self, parent_id: str, children: List[Dict[str, Any]], after: Optional[str] = None) -> List[str]:
+        """Append children (in chunks of 100) after `after`, or at the end; returns the new block ids."""
+        ids: List[str] = []
+        for start in range(0, len(children), NOTION_MAX_CHILDREN):
+            body: Dict[str, Any] = {"children": children[start:start + NOTION_MAX_CHILDREN]}
+            if after:
+                body["after"] = after
+            # A 5xx append may still have landed, and a retry would add the blocks twice
+            results = self.request("PATCH", f"/blocks/{parent_id}/children", body, retry_5xx=False).get("results", [])
+            ids.extend(r["id"] for r in results)
+            after = ids[-1] if ids else after
+        return ids
+
+    def update(self, block: Dict[str, Any], block_id: str):
+        self.request("PATCH", f"/blocks/{block_id}", {block["type"]: block[block["type"]]})
+
+    def delete(self, block_id: str):
+        try:
+            self.request("DELETE", f"/blocks/{block_id}")
+        except NotionError as e:
+            # Already gone (e.g. an earlier, interrupted sync deleted it)
+            if e.status_code != 404:
+                raise
+
+def plan_sync(old: List[Dict[str, str]], hashes: List[str], types: List[str]) -> List[Tuple]:
+    """
+    Diff the synced state against new block hashes. Ops, in page order:
+    ("keep", entry), ("update", entry, j), ("delete", entry), ("insert", [j, ...]).
+    Inserts land after the preceding kept/updated block; if one would have to
+    go before the document's first block (Notion only inserts *after* a block),
+    the plan falls back to deleting and re-appending the whole document.
+    """
+    ops: List[Tuple] = []
+    matcher = SequenceMatcher(a=[o["hash"] for o in old], b=hashes, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.extend(("keep", o) for o in old[i1:i2])
+            continue
+        olds, news = old[i1:i2], list(range(j1, j2))
+        pending: List[int] = []
+        for k in range(max(len(olds), len(news))):
+            o = olds[k] if k < len(olds) else None
+            j = news[k] if k < len(news) else None
+            if o is not None and j is not None and o["type"] == types[j]:
+                if pending:
+                    ops.append(("insert", pending))
+                    pending = []
+                ops.append(("update", o, j))
+                continue
+            if o is not None:
+                ops.append(("delete", o))
+            if j is not None:
+                pending.append(j)
+        if pending:
+            ops.append(("insert", pending))
+
+    anchored = False
+    for op in ops:
+        if op[0] in ("keep", "update"):
+            anchored = True
+        elif op[0] == "insert" and not anchored and old:
+            return [("delete", o) for o in old] + [("insert", list(range(len(hashes))))]
+    return ops
+
+def sync_blocks(
+    notion: NotionClient,
+    page_id: str,
+    old: List[Dict[str, str]],
+    blocks: List[Dict[str, Any]],
+) -> List[Dict[str, str]]:
+    """
+    Bring a previously synced document (`old` state, empty for a first sync)
+    to `blocks` with the fewest calls: unchanged blocks are left alone,
+    same-type changes are updated in place and runs of new blocks are
+    appended after their predecessor. Returns the new state; if a call
+    fails, raises SyncInterrupted with the state the page was left in.
+    """
+    hashes = [block_hash(b) for b in blocks]
+    state: List[Dict[str, str]] = []
+    anchor: Optional[str] = None
+    counts = dict.fromkeys(("keep", "update", "delete", "insert"), 0)
+    ops = plan_sync(old, hashes, [b["type"] for b in blocks])
+    for n, op in enumerate(ops):
+        kind = op[0]
+        try:
+            if kind == "keep":
+                state.append(op[1])
+                anchor = op[1]["id"]
+            elif kind == "update":
+                entry, j = op[1], op[2]
+                notion.update(blocks[j], entry["id"])
+                state.append({"id": entry["id"], "hash": hashes[j], "type": entry["type"]})
+                anchor = entry["id"]
+            elif kind == "delete":
+                notion.delete(op[1]["id"])
+            else:
+                # One append per chunk so the ids of chunks that landed are kept if a later one fails
+                for start in range(0, len(op[1]), NOTION_MAX_CHILDREN):
+                    chunk = op[1][start:start + NOTION_MAX_CHILDREN]
+                    ids = notion.append(page_id, [blocks[j] for j in chunk], after=anchor)
+                    state.extend({"id": i, "hash": hashes[j], "type": blocks[j]["type"]} for i, j in zip(ids, chunk))
+                    anchor = ids[-1] if ids else anchor
+                counts[kind] += len(op[1]) - 1
+        except Exception as e:
+            # Blocks of the failed op and the ones after it are still on the page as they were
+            untouched = [o[1] for o in ops[n:] if o[0] != "insert"]
+            raise SyncInterrupted(state + untouched) from e
+        counts[kind] += 1
+    log.info(
+        f"Notion sync: {counts['keep']} kept, {counts['update']} updated, "
+        f"{counts['insert']} inserted, {counts['delete']} deleted ({notion.calls} calls)"
+    )
+    return state
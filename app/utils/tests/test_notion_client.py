@@ -0,0 +1,87 @@
+"""NotionClient and upload_to_notion against scripts/notion_standin.py: payload limits and retries."""
+from __future__ import annotations
+
+import httpx
+import pytest
+
+from app.utils import save_to_notion
+from app.utils.save_to_notion import NotionClient, NotionError, upload_to_notion
+from scripts.notion_standin import MAX_TEXT, StandInConfig, start
+
+PAGE = "0" * 32
+
+
+@pytest.fixture
+def standin(monkeypatch):
+    servers = []
+
+    def run(**cfg):
+        server = start(StandInConfig(retry_after=0, seed=7, **cfg))
+        monkeypatch.setattr(save_to_notion, "NOTION_API_BASE", f"{server.url}/v1")
+        servers.append(server)
+        return server
+
+    yield run
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def client(**kwargs) -> NotionClient:
+    return NotionClient(httpx.Client(timeout=5), backoff=0.001, **kwargs)
+
+
+def test_upload_is_chunked_to_100_children(standin):
+    server = standin()
+    markdown = "\n".join(f"Paragraph {i}" for i in range(250))
+    result = upload_to_notion(markdown, page_id_or_url=f"https://www.notion.so/Hiring-{PAGE}", title="JD")
+
+    assert len(result["results"]) == 251  # the title heading plus every paragraph
+    assert [b["id"] for b in server.store.list(PAGE)] == [r["id"] for r in result["results"]]
+    assert server.stats["requests"] == 3 and server.stats["invalid"] == 0
+
+
+def test_long_text_is_split_into_items_under_the_limit(standin):
+    server = standin()
+    upload_to_notion("x" * (2 * MAX_TEXT + 500), page_id_or_url=PAGE, title="JD")
+
+    paragraph = server.store.list(PAGE)[1]["paragraph"]
+    assert [len(item["text"]["content"]) for item in paragraph["rich_text"]] == [MAX_TEXT, MAX_TEXT, 500]
+    assert server.stats["invalid"] == 0
+
+
+def test_429s_are_retried_until_every_chunk_lands_once(standin):
+    server = standin(error_429_rate=0.4)
+    notion = client(max_retries=20)
+    ids = notion.append(PAGE, [save_to_notion.document_blocks(f"Item {i}", "T")[1] for i in range(230)])
+
+    assert notion.retries == server.stats["injected_429"] > 0
+    assert len(ids) == len(set(ids)) == 230
+    assert [b["id"] for b in server.store.list(PAGE)] == ids
+
+
+def test_5xx_append_is_not_retried(standin):
+    server = standin(error_5xx_rate=1.0)
+    notion = client(max_retries=3)
+    with pytest.raises(NotionError) as e:
+        notion.append(PAGE, save_to_notion.document_blocks("body", "T"))
+    assert e.value.status_code == 503
+    assert (notion.calls, notion.retries, server.stats["requests"]) == (1, 0, 1)
+
+
+def test_5xx_update_and_delete_are_retried(standin):
+    server = standin()
+    block_id = client().append(PAGE, save_to_notion.document_blocks("body", "T"))[1]
+    server.cfg.error_5xx_rate = 1.0
+
+    notion = client(max_retries=2)
+    for call in (lambda: notion.update(save_to_notion.document_blocks("new", "T")[1], block_id),
+                 lambda: notion.delete(block_id)):
+        with pytest.raises(NotionError):
+            call()
+    assert (notion.calls, notion.retries) == (6, 4)
+
+    server.cfg.error_5xx_rate = 0.0
+    notion.delete(block_id)
+    notion.delete(block_id)  # already gone: a 404 counts as deleted
+    assert len(server.store.list(PAGE)) == 1
@@ -0,0 +1,117 @@
+"""Incremental Notion sync: the block diff plan and the state left behind by an interrupted sync."""
+from __future__ import annotations
+
+import pytest
+
+from app.utils.save_to_notion import NotionError, SyncInterrupted, block_hash, plan_sync, sync_blocks
+
+
+def para(text: str):
+    return {"object": "block", "type": "paragraph", "paragraph": {"rich_text": [{"type": "text", "text": {"content": text}}]}}
+
+
+def bullet(text: str):
+    return {"object": "block", "type": "bulleted_list_item",
+            "bulleted_list_item": {"rich_text": [{"type": "text", "text": {"content": text}}]}}
+
+
+def synced(*blocks):
+    return [{"id": f"b{i}", "hash": block_hash(b), "type": b["type"]} for i, b in enumerate(blocks)]
+
+
+def plan(old, blocks):
+    ops = plan_sync(old, [block_hash(b) for b in blocks], [b["type"] for b in blocks])
+    return [(op[0], op[1]["id"]) if op[0] in ("keep", "delete") else
+            ("update", op[1]["id"], op[2]) if op[0] == "update" else ("insert", op[1]) for op in ops]
+
+
+A, B, C = para("a"), para("b"), para("c")
+
+
+def test_first_sync_inserts_everything():
+    assert plan([], [A, B]) == [("insert", [0, 1])]
+
+
+def test_unchanged_document_is_kept():
+    assert plan(synced(A, B, C), [A, B, C]) == [("keep", "b0"), ("keep", "b1"), ("keep", "b2")]
+
+
+def test_same_type_change_is_updated_in_place():
+    assert plan(synced(A, B, C), [A, para("b2"), C]) == [("keep", "b0"), ("update", "b1", 1), ("keep", "b2")]
+
+
+def test_type_change_is_deleted_and_reinserted_after_its_predecessor():
+    assert plan(synced(A, B, C), [A, bullet("b"), C]) == [("keep", "b0"), ("delete", "b1"), ("insert", [1]), ("keep", "b2")]
+
+
+@pytest.mark.parametrize("blocks, expected", [
+    ([A, para("new"), B, C], [("keep", "b0"), ("insert", [1]), ("keep", "b1"), ("keep", "b2")]),
+    ([A, C], [("keep", "b0"), ("delete", "b1"), ("keep", "b2")]),
+    ([A, B, C, para("d")], [("keep", "b0"), ("keep", "b1"), ("keep", "b2"), ("insert", [3])]),
+])
+def test_inserts_and_deletes(blocks, expected):
+    assert plan(synced(A, B, C), blocks) == expected
+
+
+def test_insert_before_the_first_block_rewrites_the_document():
+    assert plan(synced(A, B), [bullet("top"), A, B]) == [("delete", "b0"), ("delete", "b1"), ("insert", [0, 1, 2])]
+
+
+class FakeNotion:
+    """Records calls; the call numbered `fail_at` (1-based) raises a 503."""
+
+    def __init__(self, fail_at: int = 0):
+        self.fail_at = fail_at
+        self.calls = []
+        self._next_id = 0
+
+    def _call(self, *call):
+        self.calls.append(call)
+        if len(self.calls) == self.fail_at:
+            raise NotionError(503, "unavailable")
+
+    def append(self, parent_id, children, after=None):
+        self._call("append", len(children), after)
+        ids = [f"n{self._next_id + k}" for k in range(len(children))]
+        self._next_id += len(children)
+        return ids
+
+    def update(self, block, block_id):
+        self._call("update", block_id)
+
+    def delete(self, block_id):
+        self._call("delete", block_id)
+
+
+def test_failed_append_keeps_the_applied_update():
+    old, new = synced(A, B, C), [A, para("b2"), C, para("d")]
+    with pytest.raises(SyncInterrupted) as e:
+        sync_blocks(FakeNotion(fail_at=2), "page", old, new)
+    assert e.value.state == [old[0], {"id": "b1", "hash": block_hash(new[1]), "type": "paragraph"}, old[2]]
+
+
+def test_failed_update_keeps_the_old_entries():
+    old = synced(A, B, C)
+    with pytest.raises(SyncInterrupted) as e:
+        sync_blocks(FakeNotion(fail_at=1), "page", old, [A, para("b2"), para("c2")])
+    assert e.value.state == old
+
+
+def test_failed_chunk_keeps_the_chunks_that_landed():
+    blocks = [para(str(i)) for i in range(150)]
+    notion = FakeNotion(fail_at=2)
+    with pytest.raises(SyncInterrupted) as e:
+        sync_blocks(notion, "page", [], blocks)
+    assert [c[:2] for c in notion.calls] == [("append", 100), ("append", 50)]
+    assert [s["id"] for s in e.value.state] == [f"n{i}" for i in range(100)]
+    assert [s["hash"] for s in e.value.state] == [block_hash(b) for b in blocks[:100]]
+
+
+def test_resync_from_interrupted_state_finishes_without_duplicates():
+    old, new = synced(A, B), [A, para("b2"), para("c")]
+    with pytest.raises(SyncInterrupted) as e:
+        sync_blocks(FakeNotion(fail_at=2), "page", old, new)
+    notion = FakeNotion()
+    state = sync_blocks(notion, "page", e.value.state, new)
+    assert notion.calls == [("append", 1, "b1")]
+    assert [s["hash"] for s in state] == [block_hash(b) for b in new]
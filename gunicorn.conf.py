@@ -0,0 +1,28 @@
+# gunicorn.conf.py
+#
+# Multi-process serving with shared preloaded state:
+#   WEB_CONCURRENCY=4 gunicorn -c gunicorn.conf.py app.main:app
+#
+# The app is imported once in the master (compiled graph, prompt templates)
+# and forked into uvicorn workers; per-worker resources are re-created by the
+# after_fork hooks in app.core.workers.
+
+import multiprocessing
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY") or multiprocessing.cpu_count())
+# Read by app.config when the app is preloaded; per-process limits (LLM admission) are divided by it
+os.environ["WEB_CONCURRENCY"] = str(workers)
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+
+# Leave the lifespan drain (SHUTDOWN_DRAIN_SECONDS) time to finish before SIGKILL
+graceful_timeout = int(float(os.getenv("SHUTDOWN_DRAIN_SECONDS", "25"))) + 5
+timeout = 120
+
+
+def when_ready(server):
+    from app.core.workers import preload
+
+    preload()
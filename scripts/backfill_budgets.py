@@ -0,0 +1,87 @@
+# scripts/backfill_budgets.py
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from sqlalchemy import BigInteger, String, cast, column, select, update, values
+from sqlalchemy.dialects.postgresql import JSONB, UUID as PGUUID
+
+from app.core.budget import normalize_budgets
+from app.database.analytics import ensure_analytics_schema, refresh_budget_view
+from app.database.database import SessionLocal, engine
+from app.models.hiring import HiringContext as DBHiringContext
+
+# ---------- Main routine ----------
+
+def backfill(batch: int = 5000, everything: bool = False):
+    """
+    Parse HiringContext.budget into budget_min/max/currency/ranges in batches.
+    Each batch is read by keyset pagination and written back with a single
+    UPDATE ... FROM (VALUES ...). By default only rows not yet normalized are
+    touched; --all re-parses everything (e.g. after parser changes).
+    """
+    ensure_analytics_schema(engine)
+    updated = 0
+    last_id = None
+    t0 = time.perf_counter()
+
+    with SessionLocal() as db:
+        while True:
+            q = (
+                select(DBHiringContext.id, DBHiringContext.budget, DBHiringContext.primary_role)
+                .where(DBHiringContext.budget.is_not(None))
+                .order_by(DBHiringContext.id)
+                .limit(batch)
+            )
+            if not everything:
+                q = q.where(DBHiringContext.budget_min.is_(None))
+            if last_id is not None:
+                q = q.where(DBHiringContext.id > last_id)
+            rows = db.execute(q).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            parsed = normalize_budgets(rows)
+            v = values(
+                column("id", PGUUID(as_uuid=True)),
+                column("budget_min", BigInteger),
+                column("budget_max", BigInteger),
+                column("budget_currency", String),
+                column("budget_ranges_json", JSONB),
+                name="v",
+            ).data([(p["id"], p["budget_min"], p["budget_max"], p["budget_currency"], p["budget_ranges_json"]) for p in parsed])
+            # updated_at is left alone: normalizing is not a user edit
+            db.execute(
+                update(DBHiringContext)
+                .where(DBHiringContext.id == v.c.id)
+                .values(
+                    budget_min=cast(v.c.budget_min, BigInteger),
+                    budget_max=cast(v.c.budget_max, BigInteger),
+                    budget_currency=v.c.budget_currency,
+                    budget_ranges_json=v.c.budget_ranges_json,
+                    updated_at=DBHiringContext.updated_at,
+                )
+            )
+            db.commit()
+            updated += len(parsed)
+            print(f"  … {updated} rows")
+
+        refresh_budget_view(db, force=True)
+
+    print(f"✅ Normalized {updated} budgets in {time.perf_counter() - t0:.1f}s")
+
+# ---------- CLI ----------
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill normalized budget columns on hiring_contexts.")
+    parser.add_argument("--batch", type=int, default=5000, help="Rows per UPDATE")
+    parser.add_argument("--all", action="store_true", help="Re-parse rows that are already normalized")
+    args = parser.parse_args()
+
+    backfill(batch=args.batch, everything=args.all)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,637 @@
+# scripts/benchmark.py
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+# ---------- Helpers ----------
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    k = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[k]
+
+def report(name: str, samples: List[float], extra: Dict[str, float] | None = None):
+    line = (
+        f"{name:<28} n={len(samples):<5} "
+        f"mean={statistics.mean(samples) * 1000:9.2f}ms "
+        f"p50={percentile(samples, 50) * 1000:9.2f}ms "
+        f"p99={percentile(samples, 99) * 1000:9.2f}ms"
+    ) if samples else f"{name:<28} n=0"
+    for k, v in (extra or {}).items():
+        line += f" {k}={v:,.1f}"
+    print(line)
+
+# ---------- LLM calls: two-call vs combined parse+JD vs template JD ----------
+
+LLM_BRIEFS = [
+    "I need to hire a founding engineer with Python and LangChain, budget $150k, within 6 weeks, remote",
+    "Hiring a senior data scientist in Austin, 4 weeks, 180k budget, skills: PyTorch, SQL",
+    "We want a junior backend engineer (FastAPI, PostgreSQL), $90k, 1 month, New York",
+]
+
+def bench_llm(rounds: int):
+    from langchain_core.callbacks import get_usage_metadata_callback
+
+    from app.core.jd_templates import template_jd
+    from app.core.nodes import _is_valid_jd, llm
+    from app.core.parser import parse_and_draft_jd, update_hiring_data
+    from app.core.prompts import jd_prompt
+
+    def two_calls(brief: str):
+        data = update_hiring_data({}, brief)
+        llm.invoke(jd_prompt(data))
+
+    def combined(brief: str):
+        data, jd_md = parse_and_draft_jd({}, brief)
+        if not _is_valid_jd(jd_md):
+            llm.invoke(jd_prompt(data))
+
+    def template(brief: str):
+        # Time to the first JD on the template path; the refinement runs after the turn
+        data = update_hiring_data({}, brief)
+        if template_jd(data) is None:
+            llm.invoke(jd_prompt(data))
+
+    for name, fn in (("two_calls", two_calls), ("combined", combined), ("template", template)):
+        samples: List[float] = []
+        tokens = {"input_tokens": 0, "output_tokens": 0}
+        for _ in range(rounds):
+            for brief in LLM_BRIEFS:
+                with get_usage_metadata_callback() as cb:
+                    t0 = time.perf_counter()
+                    fn(brief)
+                    samples.append(time.perf_counter() - t0)
+                for usage in cb.usage_metadata.values():
+                    tokens["input_tokens"] += usage.get("input_tokens", 0)
+                    tokens["output_tokens"] += usage.get("output_tokens", 0)
+        n = max(1, len(samples))
+        report(name, samples, {k + "/req": v / n for k, v in tokens.items()})
+
+# ---------- LLM resilience: hedging against a fake LLM with a slow tail ----------
+
+def make_fake_llm(median: float = 0.05, tail: float = 0.6, tail_rate: float = 0.05, fail_rate: float = 0.0):
+    """Runnable that sleeps like an LLM: mostly ~median, sometimes `tail` seconds, optionally failing."""
+    import random
+
+    from langchain_core.messages import AIMessage
+    from langchain_core.runnables import RunnableLambda
+
+    def call(_input):
+        if random.random() < fail_rate:
+            raise RuntimeError("injected provider error")
+        time.sleep(tail if random.random() < tail_rate else random.uniform(0.5, 1.5) * median)
+        return AIMessage(content="ok")
+
+    return RunnableLambda(call)
+
+def bench_resilience(requests: int):
+    from app.core.resilience import CircuitBreaker, ResilientLLM
+
+    for name, hedge in (("unhedged", False), ("hedged_p95", True)):
+        llm = ResilientLLM(make_fake_llm(), timeout=5, hedge=hedge, hedge_default_delay=0.1,
+                           breaker=CircuitBreaker(failure_threshold=1000, reset_seconds=1))
+        samples: List[float] = []
+        for _ in range(requests):
+            t0 = time.perf_counter()
+            llm.invoke("ping")
+            samples.append(time.perf_counter() - t0)
+        report(name, samples)
+
+    # Breaker: failing primary fails over to the secondary after the threshold
+    llm = ResilientLLM(make_fake_llm(fail_rate=1.0), make_fake_llm(median=0.01), timeout=5, hedge=False,
+                       breaker=CircuitBreaker(failure_threshold=3, reset_seconds=60))
+    samples = []
+    for _ in range(requests // 10 or 1):
+        t0 = time.perf_counter()
+        llm.invoke("ping")
+        samples.append(time.perf_counter() - t0)
+    report(f"failover ({llm.breaker.state})", samples)
+
+# ---------- Research index: BM25 lookups over a synthetic corpus ----------
+
+RESEARCH_ROLES = ["Backend Engineer", "Data Scientist", "ML Engineer", "Product Designer", "DevOps Engineer",
+                  "Frontend Engineer", "Account Executive", "Product Manager", "Data Analyst", "SRE"]
+RESEARCH_SKILLS = ["Python", "Go", "AWS", "GCP", "Kubernetes", "PostgreSQL", "React", "TypeScript", "PyTorch",
+                   "SQL", "Figma", "Terraform", "Kafka", "Spark", "LangChain", "FastAPI", "Redis", "Docker"]
+RESEARCH_LEVELS = ["Junior", "Mid-level", "Senior", "Staff", "Founding", "Intern"]
+
+def synthetic_jd(rng) -> tuple:
+    role = f"{rng.choice(RESEARCH_LEVELS)} {rng.choice(RESEARCH_ROLES)}"
+    skills = rng.sample(RESEARCH_SKILLS, 5)
+    text = (
+        f"## Role Overview\nWe are hiring a {role} to build {rng.choice(['APIs', 'models', 'pipelines', 'products'])}.\n"
+        f"## Key Responsibilities\n" + "\n".join(f"- Own {s} systems end to end" for s in skills[:3]) + "\n"
+        f"## Required Qualifications\n" + "\n".join(f"- Experience with {s}" for s in skills) + "\n"
+    )
+    return role, text
+
+def bench_research(docs: int, queries: int):
+    import random
+    import tempfile
+
+    from app.core.retrieval import BM25Index
+
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as d:
+        index = BM25Index(d)
+        t0 = time.perf_counter()
+        for i in range(docs):
+            role, text = synthetic_jd(rng)
+            index.add(f"doc-{i}", role, text)
+        build = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        index.compact()
+        compact = time.perf_counter() - t0
+        index.close()
+
+        t0 = time.perf_counter()
+        index = BM25Index(d)
+        opened = time.perf_counter() - t0
+        print(f"indexed {docs} docs in {build:.1f}s, compacted in {compact:.1f}s, reopened in {opened * 1000:.1f}ms")
+
+        samples: List[float] = []
+        for _ in range(queries):
+            q = f"{rng.choice(RESEARCH_LEVELS)} {rng.choice(RESEARCH_ROLES)} " + " ".join(rng.sample(RESEARCH_SKILLS, 3))
+            t0 = time.perf_counter()
+            index.search(q, k=3, snippet_chars=0)
+            samples.append(time.perf_counter() - t0)
+        report("bm25_search_top3", samples)
+        index.close()
+
+# ---------- Semantic JD cache: precision and search latency ----------
+
+PARAPHRASES = [
+    ("Sr. Backend Engineer", "Senior Backend Engineer"),
+    ("Jr Frontend Dev", "Junior Frontend Developer"),
+    ("ML Engineer", "Machine Learning Engineer"),
+    ("SWE", "Software Engineer"),
+    ("Data Scientist", "DS"),
+    ("Eng Mgr", "Engineering Manager"),
+    ("DevOps Eng", "DevOps Engineer"),
+    ("Product Manager", "PM"),
+]
+
+# Roles close enough in wording that only the embedding threshold keeps their JDs apart
+SIBLINGS = [
+    ("Backend Engineer", "Frontend Engineer"),
+    ("Data Scientist", "Data Analyst"),
+    ("Product Manager", "Product Designer"),
+    ("ML Engineer", "Data Engineer"),
+    ("DevOps Engineer", "Platform Engineer"),
+    ("Account Executive", "Account Manager"),
+]
+
+def cache_pairs(rng, n: int) -> tuple:
+    """
+    (query, cached) pairs of (text, scope) that should hit, and negatives
+    that should not, by kind: the same role at another seniority, a sibling
+    role with the same level and skills, and a random role/level/skills.
+    """
+    from app.core.semantic_cache import cache_scope, cache_text
+
+    def entry(role, level, skills):
+        data = {"roles": [role], "experience_level": level, "skills": skills}
+        return cache_text(data), cache_scope(data)
+
+    positives = []
+    negatives: Dict[str, list] = {"other_level": [], "sibling_role": [], "random": []}
+    for _ in range(n):
+        a, b = rng.choice(PARAPHRASES)
+        level = rng.choice(RESEARCH_LEVELS)
+        skills = rng.sample(RESEARCH_SKILLS, 3)
+        shuffled = rng.sample(skills, 3)
+        query = entry(a, level, skills)
+        positives.append((query, entry(b, level, [s.lower() for s in shuffled])))
+
+        role, lv = rng.choice(RESEARCH_ROLES), rng.choice(RESEARCH_LEVELS)
+        other_lv = rng.choice([o for o in RESEARCH_LEVELS if entry(role, o, skills)[1] != entry(role, lv, skills)[1]])
+        # The level either comes as experience_level or is written into the title
+        cached = entry(role, other_lv, skills) if rng.random() < 0.5 else entry(f"{other_lv} {role}", None, skills)
+        negatives["other_level"].append((entry(role, lv, skills), cached))
+        x, y = rng.choice(SIBLINGS)
+        negatives["sibling_role"].append((entry(x, level, skills), entry(y, level, shuffled)))
+        other_role = rng.choice([r for r in RESEARCH_ROLES if r not in (a, b)])
+        negatives["random"].append((query, entry(other_role, rng.choice(RESEARCH_LEVELS), rng.sample(RESEARCH_SKILLS, 3))))
+    return positives, negatives
+
+def bench_semantic_cache(entries: int, queries: int, dims: int, threshold: float):
+    import random
+    import tempfile
+
+    import numpy as np
+
+    from app.core.semantic_cache import SemanticCache, embed, embed_batch
+
+    def hits(pairs) -> int:
+        # What lookup() does: the scope must match exactly and the similarity reach the threshold
+        return sum(sa == sb and float(embed(ta, dims) @ embed(tb, dims)) >= threshold for (ta, sa), (tb, sb) in pairs)
+
+    rng = random.Random(7)
+    positives, negatives = cache_pairs(rng, queries)
+    tp = hits(positives)
+    false_hits = {kind: hits(pairs) for kind, pairs in negatives.items()}
+    fp = sum(false_hits.values())
+    print(f"threshold={threshold}: recall={tp / len(positives):.3f} precision={tp / max(1, tp + fp):.3f} "
+          + " ".join(f"false_hits[{kind}]={false_hits[kind]}/{len(negatives[kind])}" for kind in negatives))
+
+    with tempfile.TemporaryDirectory() as d:
+        cache = SemanticCache(d, dims=dims, capacity=entries, threshold=threshold)
+        # Filler is random unit vectors (embedding 1M texts in Python is not what is being measured)
+        np_rng = np.random.default_rng(7)
+        t0 = time.perf_counter()
+        chunk = 100_000
+        for start in range(0, entries - len(positives), chunk):
+            n = min(chunk, entries - len(positives) - start)
+            block = np_rng.standard_normal((n, dims), dtype=np.float32)
+            block /= np.linalg.norm(block, axis=1, keepdims=True)
+            cache.add_vectors(block, [""] * n, ["filler"] * n, [{"jd": ""}] * n)
+        texts = [b[0] for _, b in positives]
+        cache.add_vectors(embed_batch(texts, dims), texts, [b[1] for _, b in positives], [{"jd": t} for t in texts])
+        cache.flush()
+        print(f"filled {cache.size:,} entries ({dims} dims) in {time.perf_counter() - t0:.1f}s")
+
+        samples: List[float] = []
+        found = 0
+        for (query, scope), (expected, _) in positives:
+            t0 = time.perf_counter()
+            hit = cache.lookup(query, scope)
+            samples.append(time.perf_counter() - t0)
+            found += bool(hit and hit[0]["jd"] == expected)
+        report("lookup", samples, {"hit_rate_pct": 100 * found / len(positives)})
+
+        batch = 64
+        samples = []
+        for start in range(0, len(positives), batch):
+            chunk_queries = [q for q, _ in positives[start:start + batch]]
+            t0 = time.perf_counter()
+            cache.lookup_batch([t for t, _ in chunk_queries], [sc for _, sc in chunk_queries])
+            samples.append((time.perf_counter() - t0) / len(chunk_queries))
+        report(f"lookup_batch{batch} (per query)", samples)
+        cache.close()
+
+# ---------- Serialization and compression of API responses ----------
+
+def sample_payloads(rng) -> Dict[str, object]:
+    """A chat turn that returns a JD plus plan, and one NDJSON-export batch of sessions."""
+    import uuid
+    from datetime import UTC, datetime
+
+    from app.core.plan import generate_hiring_plan
+
+    hiring = {"roles": ["Senior Backend Engineer"], "budget": "$150k", "timeline": "6 weeks", "location": "Remote",
+              "experience_level": "Senior", "skills": rng.sample(RESEARCH_SKILLS, 6), "extras": {}}
+    _, jd = synthetic_jd(rng)
+    jd = (jd + "\n") * 4
+    chat = {
+        "session_id": str(uuid.uuid4()),
+        "response": f"Here is your job description:\n\n{jd}\n\n{generate_hiring_plan(hiring).markdown}",
+        "current_step": "create_plan",
+        "hiring_context": hiring,
+    }
+    now = datetime.now(UTC)
+    export = [
+        {
+            "id": uuid.uuid4(), "status": "active", "current_step": "create_plan", "created_at": now, "updated_at": now,
+            **hiring,
+            "messages": [{"id": uuid.uuid4(), "role": r, "content": synthetic_jd(rng)[1], "created_at": now}
+                         for r in ("user", "assistant") * 3],
+            "artifacts": [{"id": uuid.uuid4(), "type": "job_description", "version": 1, "content_md": jd, "created_at": now}],
+        }
+        for _ in range(200)
+    ]
+    return {"chat": chat, "export_batch": export}
+
+def serialization_app(payloads: Dict[str, object]):
+    """
+    The two response shapes the API serves, behind the same CompressionMiddleware
+    as app.main: a chat turn through its response_model (FastAPI's pydantic
+    dump_json path) and an NDJSON export batch streamed like /export/sessions.
+    """
+    import orjson
+    from fastapi import FastAPI
+    from fastapi.responses import StreamingResponse
+
+    from app import config
+    from app.api.v1.chat import ChatResponse
+    from app.core.compression import CompressionMiddleware
+
+    app = FastAPI()
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=config.COMPRESSION_MIN_SIZE,
+        gzip_level=config.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=config.COMPRESSION_BROTLI_QUALITY,
+    )
+
+    # async handlers, so the timings are serialization and compression rather than threadpool hops
+    @app.get("/chat", response_model=ChatResponse)
+    async def chat():
+        return ChatResponse(**payloads["chat"])
+
+    @app.get("/export_batch")
+    async def export_batch():
+        chunk = b"".join(orjson.dumps(s, default=str, option=orjson.OPT_APPEND_NEWLINE) for s in payloads["export_batch"])
+        return StreamingResponse(iter([chunk]), media_type="application/x-ndjson")
+
+    return app
+
+async def asgi_get(app, path: str, accept_encoding: str) -> bytes:
+    """One GET straight through the ASGI app (no sockets, no HTTP client); returns the encoded body."""
+    import asyncio
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+        "headers": [(b"host", b"benchmark"), (b"accept-encoding", accept_encoding.encode())],
+        "client": ("127.0.0.1", 0), "server": ("benchmark", 80),
+    }
+    body: List[bytes] = []
+    requested, finished = False, asyncio.Event()
+
+    async def receive():
+        # The request, then (streaming responses listen for it) a disconnect once the body is sent
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start" and message["status"] != 200:
+            raise RuntimeError(f"GET {path} returned {message['status']}")
+        if message["type"] == "http.response.body":
+            body.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                finished.set()
+
+    await app(scope, receive, send)
+    return b"".join(body)
+
+def bench_serialization(rounds: int):
+    import asyncio
+    import random
+
+    from app.core.compression import brotli
+
+    payloads = sample_payloads(random.Random(7))
+    app = serialization_app(payloads)
+    encodings = ["identity", "gzip"] + (["br"] if brotli is not None else [])
+
+    async def run():
+        sizes: Dict[str, int] = {}
+        for name in payloads:
+            for encoding in encodings:
+                n = max(rounds, 1) * (100 if encoding == "identity" else 20)
+                samples: List[float] = []
+                for _ in range(n):
+                    t0 = time.perf_counter()
+                    body = await asgi_get(app, f"/{name}", encoding)
+                    samples.append(time.perf_counter() - t0)
+                sizes.setdefault(name, len(body))
+                report(f"{name}/{encoding}", samples, {"bytes": len(body), "ratio": sizes[name] / len(body)})
+
+    asyncio.run(run())
+
+# ---------- Notion uploads against the local stand-in (scripts/notion_standin.py) ----------
+
+NOTION_SCENARIOS = {
+    "clean": dict(latency_ms=20),
+    "faults_5pct": dict(latency_ms=20, error_429_rate=0.05, error_5xx_rate=0.05, retry_after=0.05),
+    "rate_limited": dict(latency_ms=20, rate_limit=30, burst=10, retry_after=0.05),
+}
+
+def long_jd(rng) -> str:
+    """A JD over Notion's limits: >100 blocks (two append requests) and one >2000-char paragraph."""
+    parts = [synthetic_jd(rng)[1] for _ in range(12)]
+    parts.append("## About Us\n" + " ".join(["We ship reliable software for hiring teams."] * 120))
+    return "\n".join(parts)
+
+def bench_notion(requests: int, concurrency: int):
+    import random
+    from concurrent.futures import ThreadPoolExecutor
+
+    import httpx
+
+    from app.utils import save_to_notion as notion
+    from scripts.notion_standin import StandInConfig, start
+
+    rng = random.Random(7)
+    jd = long_jd(rng)
+    print(f"JD: {len(notion.document_blocks(jd, 'Bench'))} blocks, {len(jd):,} chars")
+
+    # Uploads/sec and retry behaviour under each fault profile
+    for name, faults in NOTION_SCENARIOS.items():
+        server = start(StandInConfig(seed=7, **faults))
+        notion.NOTION_API_BASE = f"{server.url}/v1"
+
+        def upload(i: int):
+            t0 = time.perf_counter()
+            try:
+                notion.upload_to_notion(jd, page_id_or_url=f"page-{i % 16}", title="Bench")
+                return time.perf_counter() - t0, True
+            except Exception:
+                return time.perf_counter() - t0, False
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(upload, range(requests)))
+        elapsed = time.perf_counter() - started
+        stats = server.stats
+        server.shutdown()
+        server.server_close()
+        report(f"upload/{name}", [t for t, ok in results if ok], {
+            "uploads/s": sum(ok for _, ok in results) / elapsed,
+            "calls/upload": stats["requests"] / requests,
+            "retried": stats["requests"] - stats["ok"],
+            "failed": sum(not ok for _, ok in results),
+            "invalid": stats["invalid"],
+        })
+
+    # Incremental sync of a revised JD vs appending a fresh copy
+    server = start(StandInConfig(seed=7, latency_ms=20))
+    notion.NOTION_API_BASE = f"{server.url}/v1"
+    revised = jd.replace("Own ", "Lead ", 3).replace("## About Us", "## About Us\nRemote-first, async by default.")
+    with httpx.Client(timeout=20) as client:
+        for name, previous in (("full_append", None), ("incremental", True)):
+            samples, calls = [], 0
+            for i in range(max(requests // 10, 1)):
+                page = f"sync-{name}-{i}"
+                state = notion.sync_blocks(notion.NotionClient(client), page, [], notion.document_blocks(jd, "Bench"))
+                nc = notion.NotionClient(client)
+                t0 = time.perf_counter()
+                notion.sync_blocks(nc, page, state if previous else [], notion.document_blocks(revised, "Bench"))
+                samples.append(time.perf_counter() - t0)
+                calls += nc.calls
+            report(f"sync/{name}", samples, {"calls/sync": calls / len(samples)})
+
+    # JD -> Notion through create_jd_node and its upload executor
+    from app.core import nodes
+
+    expected = len(notion.document_blocks(jd, "Backend Engineer"))
+    samples, node_samples = [], []
+    for i in range(max(requests // 10, 1)):
+        page = f"node-{i}"
+        state = {"hiring_data": {"roles": ["Backend Engineer"], "notion_page_id": page},
+                 "draft_jd": jd, "jd_cached": True}
+        t0 = time.perf_counter()
+        nodes.create_jd_node(state)
+        node_samples.append(time.perf_counter() - t0)
+        deadline = t0 + 30
+        while len(server.store.children.get(page, [])) < expected and time.perf_counter() < deadline:
+            time.sleep(0.001)
+        samples.append(time.perf_counter() - t0)
+    server.shutdown()
+    server.server_close()
+    report("jd_to_notion/node", node_samples)
+    report("jd_to_notion/visible", samples)
+
+# ---------- Multi-process scaling: /chat turns through gunicorn with 1..N workers ----------
+#
+# Starts the real server for each worker count through scripts/gunicorn_stub.conf.py
+# (gunicorn.conf.py plus scripts/llm_stub.py), so every LLM call is a canned reply
+# after --llm-latency-ms, and with DRY_RUN so nothing reaches Notion or the shared indexes.
+# Needs DATABASE_URL to point at a Postgres the benchmark may write sessions to.
+# Use --concurrency well above the largest worker count so one worker saturates.
+
+def _free_port() -> int:
+    import socket
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _start_gunicorn(workers: int, clients: int, llm_latency_ms: float, log_path: Path):
+    import subprocess
+    import sys
+
+    import httpx
+
+    port = _free_port()
+    env = {
+        **os.environ,
+        "WEB_CONCURRENCY": str(workers),
+        "BIND": f"127.0.0.1:{port}",
+        "LLM_STUB_LATENCY_MS": str(llm_latency_ms),
+        "DRY_RUN": "1",
+        # Admission limits are divided across workers; keep them out of the way of the clients
+        "LLM_MAX_CONCURRENCY": str(max(clients, workers)),
+        "LLM_MAX_QUEUE": str(clients),
+        "LLM_RPM": "1000000",
+        "LLM_HEDGE_ENABLED": "0",
+    }
+    root = Path(__file__).resolve().parent.parent
+    log_file = log_path.open("w")
+    proc = subprocess.Popen([sys.executable, "-m", "gunicorn", "-c", "scripts/gunicorn_stub.conf.py", "app.main:app"],
+                            cwd=root, env=env, stdout=log_file, stderr=subprocess.STDOUT)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline and proc.poll() is None:
+        try:
+            if httpx.get(f"{url}/health", timeout=1).status_code == 200:
+                return proc, url
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    proc.kill()
+    proc.wait()
+    raise RuntimeError(f"gunicorn with {workers} worker(s) did not become ready; see {log_path}")
+
+def _stop_gunicorn(proc):
+    import signal
+    import subprocess
+
+    proc.send_signal(signal.SIGTERM)
+    try:
+        proc.wait(timeout=60)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+def _drive_chat(url: str, clients: int, seconds: float) -> tuple:
+    """Closed-loop clients posting complete briefs (one new session per turn) until the deadline."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    import httpx
+
+    deadline = time.perf_counter() + seconds
+
+    def client(i: int):
+        samples, errors = [], 0
+        with httpx.Client(base_url=url, timeout=60) as http:
+            n = i
+            while time.perf_counter() < deadline:
+                t0 = time.perf_counter()
+                resp = http.post("/api/chatbot/chat", json={"message": LLM_BRIEFS[n % len(LLM_BRIEFS)]})
+                if resp.status_code == 200:
+                    samples.append(time.perf_counter() - t0)
+                else:
+                    errors += 1
+                n += clients
+        return samples, errors
+
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        results = list(pool.map(client, range(clients)))
+    return [t for samples, _ in results for t in samples], sum(errors for _, errors in results)
+
+def bench_workers(max_workers: int, seconds: float, clients: int, llm_latency_ms: float):
+    import tempfile
+
+    counts = sorted({1, *(2 ** i for i in range(1, max_workers.bit_length())), max_workers})
+    log_dir = Path(tempfile.mkdtemp(prefix="bench-gunicorn-"))
+    base = None
+    for n in counts:
+        proc, url = _start_gunicorn(n, clients, llm_latency_ms, log_dir / f"workers-{n}.log")
+        try:
+            _drive_chat(url, min(clients, 2 * n), 1.0)  # warm up every worker's connections
+            samples, errors = _drive_chat(url, clients, seconds)
+        finally:
+            _stop_gunicorn(proc)
+        rate = len(samples) / seconds
+        base = base or rate
+        report(f"workers={n}", samples, {
+            "turns/s": rate,
+            "speedup": rate / base if base else 0.0,
+            "efficiency%": 100 * rate / base / n if base else 0.0,
+            "errors": errors,
+        })
+    print(f"gunicorn logs: {log_dir}")
+
+# ---------- CLI ----------
+
+BENCHMARKS: Dict[str, Callable[[argparse.Namespace], None]] = {
+    "llm": lambda args: bench_llm(args.rounds),
+    "notion": lambda args: bench_notion(args.requests, args.concurrency),
+    "resilience": lambda args: bench_resilience(args.requests),
+    "research": lambda args: bench_research(args.docs, args.requests),
+    "serialization": lambda args: bench_serialization(args.rounds),
+    "semantic_cache": lambda args: bench_semantic_cache(args.docs, args.requests, args.dims, args.threshold),
+    "workers": lambda args: bench_workers(args.workers, args.seconds, args.concurrency, args.llm_latency_ms),
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks for the HR Agent.")
+    parser.add_argument("name", choices=sorted(BENCHMARKS), help="Benchmark to run")
+    parser.add_argument("--rounds", type=int, default=3, help="Repetitions over the sample inputs")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients for the notion and workers benchmarks")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Max worker processes for the workers benchmark")
+    parser.add_argument("--seconds", type=float, default=3.0, help="Run time per worker count for the workers benchmark")
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0, help="Stub LLM latency for the workers benchmark")
+    parser.add_argument("--docs", type=int, default=100_000, help="Corpus size for index benchmarks")
+    parser.add_argument("--dims", type=int, default=256, help="Embedding dimensions for the semantic cache benchmark")
+    parser.add_argument("--threshold", type=float, default=0.9, help="Similarity threshold for the semantic cache benchmark")
+    args = parser.parse_args()
+
+    BENCHMARKS[args.name](args)
+
+if __name__ == "__main__":
+    main()
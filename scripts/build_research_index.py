@@ -0,0 +1,77 @@
+# scripts/build_research_index.py
+
+from __future__ import annotations
+
+import argparse
+import shutil
+import time
+from pathlib import Path
+
+from sqlalchemy import select
+
+from app import config
+from app.core.retrieval import BM25Index
+from app.database.artifact_store import DELTA, artifact_content
+from app.database.database import SessionLocal
+from app.models.artifact import Artifact as DBArtifact
+from app.models.job_posting import JobPosting as DBJobPosting
+from app.schemas.enums import ArtifactType
+
+# ---------- Main routine ----------
+
+def build(directory: Path, reset: bool = False, batch: int = 1000):
+    """
+    Index every JD artifact and job posting in the database, then compact.
+    Already-indexed keys are skipped, so re-running only adds new documents.
+    """
+    if reset and directory.exists():
+        print(f"⚠️  Removing existing index at {directory}")
+        shutil.rmtree(directory)
+
+    index = BM25Index(directory)
+    added = 0
+    t0 = time.perf_counter()
+
+    with SessionLocal() as db:
+        # Superseded versions stored as deltas have content_md == ""; they are rebuilt below
+        jds = db.execute(
+            select(DBArtifact.id, DBArtifact.title, DBArtifact.content_md)
+            .where(DBArtifact.type == ArtifactType.job_description.value, DBArtifact.storage != DELTA)
+            .execution_options(yield_per=batch)
+        )
+        for row in jds:
+            added += index.add(str(row.id), row.title, row.content_md)
+
+        # Newest first within each chain, so each rebuild reuses the version above it from the cache
+        deltas = db.execute(
+            select(DBArtifact.id, DBArtifact.title)
+            .where(DBArtifact.type == ArtifactType.job_description.value, DBArtifact.storage == DELTA)
+            .order_by(DBArtifact.session_id, DBArtifact.version.desc())
+        ).all()
+        for row in deltas:
+            added += index.add(str(row.id), row.title, artifact_content(db, row.id) or "")
+
+        postings = db.execute(
+            select(DBJobPosting.id, DBJobPosting.role, DBJobPosting.description)
+            .where(DBJobPosting.description.is_not(None))
+            .execution_options(yield_per=batch)
+        )
+        for row in postings:
+            added += index.add(f"posting:{row.id}", row.role or "", row.description)
+
+    index.compact()
+    index.close()
+    print(f"✅ Indexed {added} new documents in {time.perf_counter() - t0:.1f}s ({index.n_docs} total)")
+
+# ---------- CLI ----------
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the local research index from stored JDs and job postings.")
+    parser.add_argument("--dir", type=Path, default=Path(config.RESEARCH_INDEX_DIR), help="Index directory")
+    parser.add_argument("--reset", action="store_true", help="Rebuild from scratch")
+    args = parser.parse_args()
+
+    build(args.dir, reset=args.reset)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# scripts/compact_artifacts.py
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from sqlalchemy import func, select, tuple_
+
+from app.database.analytics import ensure_analytics_schema
+from app.database.artifact_store import FULL, compact
+from app.database.database import SessionLocal, engine
+from app.database.turns import lock_session
+from app.models.artifact import Artifact as DBArtifact
+
+# ---------- Main routine ----------
+
+def compact_all(batch: int = 500):
+    """
+    Delta-compress artifact versions written before compaction existed (or
+    whose post-turn compaction was lost). Walks every (session, type) with
+    more than one version stored in full, keyset-paginated, one transaction
+    per (session, type) under the session lock so it can run next to live turns.
+    """
+    ensure_analytics_schema(engine)
+    groups = rewritten = 0
+    last = None
+    t0 = time.perf_counter()
+
+    with SessionLocal() as db:
+        while True:
+            q = (
+                select(DBArtifact.session_id, DBArtifact.type)
+                .where(DBArtifact.storage == FULL)
+                .group_by(DBArtifact.session_id, DBArtifact.type)
+                .having(func.count() > 1)
+                .order_by(DBArtifact.session_id, DBArtifact.type)
+                .limit(batch)
+            )
+            if last is not None:
+                q = q.where(tuple_(DBArtifact.session_id, DBArtifact.type) > tuple_(*last))
+            pairs = db.execute(q).all()
+            if not pairs:
+                break
+            last = tuple(pairs[-1])
+
+            for session_id, artifact_type in pairs:
+                lock_session(db, session_id)
+                rewritten += compact(db, session_id, artifact_type)
+                db.commit()
+            groups += len(pairs)
+            print(f"  … {groups} artifact histories, {rewritten} versions rewritten")
+
+    print(f"✅ Compacted {rewritten} artifact versions across {groups} histories in {time.perf_counter() - t0:.1f}s")
+
+# ---------- CLI ----------
+
+def main():
+    parser = argparse.ArgumentParser(description="Delta-compress superseded artifact versions.")
+    parser.add_argument("--batch", type=int, default=500, help="(session, type) histories per page")
+    args = parser.parse_args()
+
+    compact_all(batch=args.batch)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# scripts/export_data.py
+
+from __future__ import annotations
+
+import argparse
+import resource
+import sys
+from datetime import datetime
+from pathlib import Path
+
+from app.database.database import SessionLocal
+from app.database.export import DEFAULT_BATCH, ExportFilter, ExportStats, iter_ndjson, write_parquet
+
+# ---------- Main routine ----------
+
+def export(fmt: str, out: Path, f: ExportFilter, batch: int) -> ExportStats:
+    """
+    Stream the export to `out` (a file for NDJSON, "-" for stdout; a
+    directory for Parquet) and return the row/byte counts.
+    """
+    stats = ExportStats()
+    with SessionLocal() as db:
+        if fmt == "parquet":
+            write_parquet(db, f, out, batch, stats)
+        elif str(out) == "-":
+            for chunk in iter_ndjson(db, f, batch, stats):
+                sys.stdout.buffer.write(chunk)
+        else:
+            tmp = out.with_name(out.name + ".partial")
+            with tmp.open("wb") as fh:
+                for chunk in iter_ndjson(db, f, batch, stats):
+                    fh.write(chunk)
+            tmp.replace(out)
+    return stats
+
+# ---------- CLI ----------
+
+def main():
+    parser = argparse.ArgumentParser(description="Export sessions, messages and artifacts as NDJSON or Parquet.")
+    parser.add_argument("--format", choices=["ndjson", "parquet"], default="ndjson")
+    parser.add_argument("--out", type=Path, default=None, help="NDJSON file ('-' for stdout) or Parquet directory")
+    parser.add_argument("--since", type=datetime.fromisoformat, default=None, help="Sessions created at or after (ISO 8601)")
+    parser.add_argument("--until", type=datetime.fromisoformat, default=None, help="Sessions created before (ISO 8601)")
+    parser.add_argument("--status", default=None, help="Only sessions with this status")
+    parser.add_argument("--batch", type=int, default=DEFAULT_BATCH, help="Sessions per server-side cursor fetch / row group")
+    args = parser.parse_args()
+
+    out = args.out or Path("output/export" if args.format == "parquet" else "output/export.ndjson")
+    stats = export(args.format, out, ExportFilter(args.since, args.until, args.status), args.batch)
+
+    peak_mib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"✅ Exported {stats.summary()}; peak RSS {peak_mib:.0f} MiB", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+# scripts/gunicorn_stub.conf.py
+#
+# gunicorn.conf.py with the LLM provider replaced by scripts/llm_stub.py, for
+# load tests that should measure the serving path rather than the provider:
+#   LLM_STUB_LATENCY_MS=300 gunicorn -c scripts/gunicorn_stub.conf.py app.main:app
+#
+# The stub is installed here, while gunicorn reads its config and before the
+# app is preloaded, so the clients built at import are stubs from the start.
+
+import os
+import runpy
+import sys
+
+_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, _root)
+
+globals().update(
+    (name, value) for name, value in runpy.run_path(os.path.join(_root, "gunicorn.conf.py")).items()
+    if not name.startswith("_")
+)
+
+from scripts.llm_stub import install  # noqa: E402
+
+install()
@@ -0,0 +1,71 @@
+# scripts/llm_stub.py
+
+"""
+Canned stand-in for the primary LLM provider, for load tests and benchmarks.
+
+install() swaps app.core.llm's provider client for a RunnableLambda that
+sleeps about LLM_STUB_LATENCY_MS (default 300) and then answers JSON
+(parse) prompts with a complete hiring request plus a JD, and any other
+prompt with the JD. The admission, hedging and breaker wrappers around the
+client stay in place. Install it before the app is imported, as
+scripts/gunicorn_stub.conf.py does for the gunicorn workers benchmark.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+import time
+from typing import Any
+
+STUB_JD = """## Role Overview
+Own the services behind our hiring assistant, from API design to production.
+
+## Key Responsibilities
+- Build and run Python APIs on PostgreSQL
+- Improve latency and reliability across the request path
+- Review code and mentor other engineers
+
+## Required Qualifications
+- 5+ years building backend services
+- Strong Python and SQL
+
+## Nice-to-Have
+- Experience with LLM-backed products
+
+## What We Offer
+- Competitive salary and equity
+- Remote-first team"""
+
+STUB_HIRING = {
+    "roles": ["Backend Engineer"], "count": 1, "budget": "$120k-$140k", "timeline": "6 weeks",
+    "skills": ["Python", "PostgreSQL"], "location": "Remote", "experience_level": "Senior",
+}
+
+
+def stub_reply(prompt: Any):
+    """Sleep like a provider call, then answer JSON prompts with a complete request and JD, others with the JD."""
+    from langchain_core.messages import AIMessage
+
+    latency_ms = float(os.getenv("LLM_STUB_LATENCY_MS", "300"))
+    time.sleep(latency_ms / 1000 * random.uniform(0.5, 1.5))
+    text = prompt.to_string() if hasattr(prompt, "to_string") else str(prompt)
+    if "JSON" in text:
+        return AIMessage(content=json.dumps({**STUB_HIRING, "job_description": STUB_JD}))
+    return AIMessage(content=STUB_JD)
+
+
+def _stub_client():
+    from langchain_core.runnables import RunnableLambda
+
+    return RunnableLambda(stub_reply)
+
+
+def install():
+    """Make every client from get_llm() (and its after-fork reconnect) the stub."""
+    from app.core import llm
+
+    llm._primary_client = _stub_client
+    for client in llm._clients:  # built before install()
+        client.primary.inner = _stub_client()
@@ -0,0 +1,297 @@
+# scripts/notion_standin.py
+
+"""
+Local stand-in for the Notion blocks API, for tests and benchmarks.
+
+Serves the endpoints save_to_notion uses:
+  PATCH  /v1/blocks/{id}/children   append (optionally "after" a child)
+  GET    /v1/blocks/{id}/children   list
+  PATCH  /v1/blocks/{id}            update a block's content
+  DELETE /v1/blocks/{id}            delete a block
+  GET    /_stats                    request/fault counters (stand-in only)
+
+Requests are validated against Notion's payload limits (100 children per
+append, 2000 characters per rich_text item, 100 rich_text items per block)
+and answered with Notion-shaped errors. Latency, 429s, 5xx and a per-server
+rate limit can be injected. Point the app at it with
+NOTION_API_URL=http://127.0.0.1:<port>.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+MAX_CHILDREN = 100
+MAX_TEXT = 2000
+MAX_RICH_TEXT_ITEMS = 100
+
+# ---------- Faults and limits ----------
+
+@dataclass
+class StandInConfig:
+    latency_ms: float = 0.0  # added to every request, +/- 50% jitter
+    error_429_rate: float = 0.0  # share of requests answered with a 429 regardless of the rate limit
+    error_5xx_rate: float = 0.0
+    rate_limit: float = 0.0  # requests per second (token bucket); 0 disables
+    burst: int = 10
+    retry_after: float = 1.0  # seconds, sent with every 429
+    seed: Optional[int] = None
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+# ---------- Block store ----------
+
+class ApiError(Exception):
+    def __init__(self, status: int, code: str, message: str):
+        super().__init__(message)
+        self.status, self.code, self.message = status, code, message
+
+@dataclass
+class Store:
+    """Blocks by id plus the ordered child ids of every parent (pages are implicit parents)."""
+    blocks: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    children: Dict[str, List[str]] = field(default_factory=dict)
+    parent: Dict[str, str] = field(default_factory=dict)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def append(self, parent_id: str, blocks: List[Dict[str, Any]], after: Optional[str]) -> List[Dict[str, Any]]:
+        with self.lock:
+            kids = self.children.setdefault(parent_id, [])
+            if after is None:
+                pos = len(kids)
+            elif after in kids:
+                pos = kids.index(after) + 1
+            else:
+                raise ApiError(400, "validation_error", f"Block {after} is not a child of {parent_id}.")
+            created = []
+            for block in blocks:
+                block_id = str(uuid.uuid4())
+                stored = {"object": "block", "id": block_id, "type": block["type"], block["type"]: block[block["type"]]}
+                self.blocks[block_id] = stored
+                self.parent[block_id] = parent_id
+                created.append(stored)
+            kids[pos:pos] = [b["id"] for b in created]
+            return created
+
+    def list(self, parent_id: str) -> List[Dict[str, Any]]:
+        with self.lock:
+            return [self.blocks[i] for i in self.children.get(parent_id, [])]
+
+    def update(self, block_id: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        with self.lock:
+            block = self._get(block_id)
+            if block["type"] not in body:
+                raise ApiError(400, "validation_error", f"Body must update the block's type ({block['type']}).")
+            block[block["type"]] = body[block["type"]]
+            return block
+
+    def delete(self, block_id: str) -> Dict[str, Any]:
+        with self.lock:
+            block = self._get(block_id)
+            del self.blocks[block_id]
+            self.children[self.parent.pop(block_id)].remove(block_id)
+            return {**block, "archived": True}
+
+    def _get(self, block_id: str) -> Dict[str, Any]:
+        if block_id not in self.blocks:
+            raise ApiError(404, "object_not_found", f"Could not find block with ID: {block_id}.")
+        return self.blocks[block_id]
+
+def validate_block(block: Any, where: str):
+    if not isinstance(block, dict) or not isinstance(block.get("type"), str) or not isinstance(block.get(block["type"]), dict):
+        raise ApiError(400, "validation_error", f"{where} should be a block object with a body for its type.")
+    rich_text = block[block["type"]].get("rich_text", [])
+    if len(rich_text) > MAX_RICH_TEXT_ITEMS:
+        raise ApiError(400, "validation_error",
+                       f"{where}.rich_text.length should be ≤ {MAX_RICH_TEXT_ITEMS}, instead was {len(rich_text)}.")
+    for n, item in enumerate(rich_text):
+        content = (item.get("text") or {}).get("content", "")
+        if len(content) > MAX_TEXT:
+            raise ApiError(400, "validation_error",
+                           f"{where}.rich_text[{n}].text.content.length should be ≤ {MAX_TEXT}, instead was {len(content)}.")
+
+# ---------- Server ----------
+
+_CHILDREN = re.compile(r"^/v1/blocks/([^/]+)/children$")
+_BLOCK = re.compile(r"^/v1/blocks/([^/]+)$")
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], cfg: StandInConfig):
+        super().__init__(address, _Handler)
+        self.cfg = cfg
+        self.store = Store()
+        self.bucket = TokenBucket(cfg.rate_limit, cfg.burst) if cfg.rate_limit > 0 else None
+        self.rng = random.Random(cfg.seed)
+        self.stats = dict.fromkeys(("requests", "ok", "rate_limited", "injected_429", "injected_5xx", "invalid"), 0)
+        self._stats_lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, key: str):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def fault(self) -> Optional[ApiError]:
+        """Decide (in arrival order) whether this request fails before reaching the store."""
+        with self._stats_lock:
+            roll = self.rng.random()
+        if self.bucket is not None and not self.bucket.take():
+            self.count("rate_limited")
+            return ApiError(429, "rate_limited", "You have been rate limited. Please try again in a few minutes.")
+        if roll < self.cfg.error_429_rate:
+            self.count("injected_429")
+            return ApiError(429, "rate_limited", "You have been rate limited. Please try again in a few minutes.")
+        if roll < self.cfg.error_429_rate + self.cfg.error_5xx_rate:
+            self.count("injected_5xx")
+            return ApiError(503, "service_unavailable", "Notion is unavailable, please try again later.")
+        return None
+
+class _Handler(BaseHTTPRequestHandler):
+    server: StandInServer
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):  # keep benchmark output clean
+        pass
+
+    def _send(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        try:
+            body = json.loads(self.rfile.read(length))
+        except json.JSONDecodeError:
+            raise ApiError(400, "invalid_json", "Error parsing JSON body.")
+        if not isinstance(body, dict):
+            raise ApiError(400, "validation_error", "Body should be an object.")
+        return body
+
+    def _handle(self, method: str):
+        srv = self.server
+        if method == "GET" and self.path == "/_stats":
+            self._send(200, srv.stats)
+            return
+        srv.count("requests")
+        try:
+            body = self._body()  # always drain the body so keep-alive connections stay usable
+            if srv.cfg.latency_ms:
+                time.sleep(srv.cfg.latency_ms / 1000 * srv.rng.uniform(0.5, 1.5))
+            err = srv.fault()
+            if err is not None:
+                raise err
+            if not self.headers.get("Notion-Version"):
+                raise ApiError(400, "missing_version", "Notion-Version header failed validation.")
+            payload = self._route(method, self.path.split("?")[0], body)
+        except ApiError as e:
+            if e.code == "validation_error":
+                srv.count("invalid")
+            headers = {"Retry-After": f"{srv.cfg.retry_after:g}"} if e.status == 429 else None
+            self._send(e.status, {"object": "error", "status": e.status, "code": e.code, "message": e.message}, headers)
+            return
+        srv.count("ok")
+        self._send(200, payload)
+
+    def _route(self, method: str, path: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        store = self.server.store
+        m = _CHILDREN.match(path)
+        if m and method == "PATCH":
+            children = body.get("children")
+            if not isinstance(children, list) or not children:
+                raise ApiError(400, "validation_error", "body.children should be a non-empty array.")
+            if len(children) > MAX_CHILDREN:
+                raise ApiError(400, "validation_error",
+                               f"body.children.length should be ≤ {MAX_CHILDREN}, instead was {len(children)}.")
+            for n, block in enumerate(children):
+                validate_block(block, f"body.children[{n}]")
+            return {"object": "list", "results": store.append(m.group(1), children, body.get("after")), "has_more": False}
+        if m and method == "GET":
+            return {"object": "list", "results": store.list(m.group(1)), "has_more": False, "next_cursor": None}
+        m = _BLOCK.match(path)
+        if m and method == "PATCH":
+            for key, value in body.items():
+                if isinstance(value, dict):
+                    validate_block({"type": key, key: value}, "body")
+            return store.update(m.group(1), body)
+        if m and method == "DELETE":
+            return store.delete(m.group(1))
+        raise ApiError(400, "invalid_request_url", "Invalid request URL.")
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_PATCH(self):
+        self._handle("PATCH")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+def start(cfg: Optional[StandInConfig] = None, host: str = "127.0.0.1", port: int = 0) -> StandInServer:
+    """Start a stand-in on a background thread (port 0 picks a free port); stop it with .shutdown()."""
+    server = StandInServer((host, port), cfg or StandInConfig())
+    threading.Thread(target=server.serve_forever, name="notion-standin", daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Notion blocks API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Mean added latency per request")
+    parser.add_argument("--error-429", type=float, default=0.0, help="Share of requests answered with 429")
+    parser.add_argument("--error-5xx", type=float, default=0.0, help="Share of requests answered with 503")
+    parser.add_argument("--rate-limit", type=float, default=3.0, help="Requests per second (0 disables); Notion allows ~3")
+    parser.add_argument("--burst", type=int, default=10)
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with 429s")
+    args = parser.parse_args()
+
+    cfg = StandInConfig(args.latency_ms, args.error_429, args.error_5xx, args.rate_limit, args.burst, args.retry_after)
+    server = StandInServer((args.host, args.port), cfg)
+    print(f"▶️  Notion stand-in on {server.url} (set NOTION_API_URL={server.url})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"✅ {server.stats}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+# scripts/run_batch.py
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing.util import Finalize
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Set
+
+
+# ---------- Input / checkpoint ----------
+
+def request_key(request: Dict[str, Any], raw: str) -> str:
+    """Stable id for a request: its own "id", else a hash of the line (identical lines run once)."""
+    return str(request.get("id") or hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16])
+
+
+def read_requests(path: Path) -> Iterator[Dict[str, Any]]:
+    """
+    Yield requests from a JSONL file. Each line is {"message": ...} plus
+    optional "id" and "hiring_data"; blank lines are skipped.
+    """
+    with path.open(encoding="utf-8") as f:
+        for n, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+            except json.JSONDecodeError as e:
+                print(f"⚠️  Skipping line {n}: {e}", file=sys.stderr)
+                continue
+            request["id"] = request_key(request, line)
+            yield request
+
+
+def load_checkpoint(results: Path, retry_failed: bool) -> Set[str]:
+    """
+    results.jsonl is the checkpoint: ids already recorded there are skipped.
+    A torn last line (crash mid-write) is dropped first; with retry_failed,
+    failed records are dropped too so each id appears once after the retry.
+    """
+    if not results.exists():
+        return set()
+    data = results.read_bytes()
+    complete = data[: data.rfind(b"\n") + 1]
+    records = [json.loads(line) for line in complete.splitlines()]
+    if retry_failed:
+        records = [r for r in records if r["status"] == "ok"]
+    if retry_failed or len(complete) != len(data):
+        atomic_write_text(results, "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records))
+    return {r["id"] for r in records}
+
+
+def atomic_write_text(path: Path, text: str):
+    tmp = path.with_name(f".{path.name}.tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+# ---------- Worker ----------
+
+_graph = None
+
+
+def _get_graph():
+    # Built once per process (and shared by threads in async mode)
+    global _graph
+    if _graph is None:
+        from app.core.agent import build_graph
+
+        _graph = build_graph()
+    return _graph
+
+
+def run_one(request: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one request through the graph; never raises, failures are recorded."""
+    from langchain_core.messages import HumanMessage
+
+    t0 = time.perf_counter()
+    record: Dict[str, Any] = {"id": request["id"]}
+    try:
+        result = _get_graph().invoke({
+            "messages": [HumanMessage(content=request["message"])],
+            "hiring_data": request.get("hiring_data") or {},
+            "current_step": "start",
+        })
+        record.update(
+            status="ok",
+            current_step=result.get("current_step"),
+            hiring_data=result.get("hiring_data") or {},
+            messages=[{"role": m.__class__.__name__, "content": m.content} for m in result.get("messages", [])],
+            artifacts=[
+                {"type": a.get("type"), "title": a.get("title"), "content_md": a.get("content_md")}
+                for a in result.get("artifacts") or []
+            ],
+        )
+    except Exception as e:
+        record.update(status="error", error=f"{type(e).__name__}: {e}")
+    record["elapsed_s"] = round(time.perf_counter() - t0, 3)
+    return record
+
+
+def _drain_worker():
+    # Background work the graph queued (Notion uploads) would die with the pool process
+    if "app.core.lifecycle" in sys.modules:
+        from app import config
+        from app.core import lifecycle
+
+        lifecycle.drain(config.SHUTDOWN_DRAIN_SECONDS)
+
+
+def _init_worker():
+    # Runs when the worker process exits, before the pool reaps it
+    Finalize(None, _drain_worker, exitpriority=10)
+
+
+_SAFE_NAME = re.compile(r"[A-Za-z0-9][A-Za-z0-9._-]{0,99}")
+
+
+def markdown_name(request_id: str) -> str:
+    """
+    File name under md/ for a request id. Ids come from the input file, so any
+    that is not a plain name ("team/42", "../x") is slugged and suffixed with
+    a hash of the id, keeping distinct ids in distinct files inside md/.
+    """
+    if _SAFE_NAME.fullmatch(request_id):
+        return f"{request_id}.md"
+    slug = re.sub(r"[^A-Za-z0-9._-]+", "_", request_id).strip("._-")[:80]
+    digest = hashlib.sha256(request_id.encode("utf-8")).hexdigest()[:12]
+    return f"{slug}-{digest}.md" if slug else f"{digest}.md"
+
+
+def render_markdown(record: Dict[str, Any]) -> str:
+    lines = [f"# Request {record['id']}\n"]
+    for i, msg in enumerate(record.get("messages", []), start=1):
+        lines.append(f"## Message {i} - {msg['role']}\n")
+        lines.append(msg["content"] + "\n")
+    for artifact in record.get("artifacts", []):
+        lines.append(f"## {artifact['type']}: {artifact['title']}\n")
+        lines.append((artifact["content_md"] or "") + "\n")
+    return "\n".join(lines)
+
+
+# ---------- Runner ----------
+
+class Progress:
+    def __init__(self, total: int, every: float = 2.0):
+        self.total = total
+        self.done = 0
+        self.failed = 0
+        self.every = every
+        self.started = time.perf_counter()
+        self._last = 0.0
+
+    def update(self, record: Dict[str, Any]):
+        self.done += 1
+        self.failed += record["status"] != "ok"
+        now = time.perf_counter()
+        if now - self._last >= self.every or self.done == self.total:
+            self._last = now
+            rate = self.done / max(now - self.started, 1e-9)
+            eta = (self.total - self.done) / rate if rate else float("inf")
+            print(f"  {self.done}/{self.total} ({self.failed} failed) {rate:.2f} req/s, ETA {eta / 60:.1f} min", file=sys.stderr)
+
+
+class ResultWriter:
+    """Appends one fsync'd JSONL line per result and writes its markdown atomically."""
+
+    def __init__(self, out_dir: Path):
+        self.md_dir = out_dir / "md"
+        self.md_dir.mkdir(parents=True, exist_ok=True)
+        self.results = out_dir / "results.jsonl"
+        self._fh = self.results.open("a", encoding="utf-8")
+
+    def write(self, record: Dict[str, Any]):
+        if record["status"] == "ok":
+            atomic_write_text(self.md_dir / markdown_name(record["id"]), render_markdown(record))
+        # One write per line so a crash can only tear the last line
+        self._fh.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+
+    def close(self):
+        self._fh.close()
+
+
+async def run_async(requests: List[Dict[str, Any]], concurrency: int, writer: ResultWriter, progress: Progress):
+    """Bounded asyncio fan-out; graph invocations run on worker threads."""
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(request):
+        async with sem:
+            record = await asyncio.to_thread(run_one, request)
+        writer.write(record)
+        progress.update(record)
+
+    await asyncio.gather(*(one(r) for r in requests))
+
+
+def run_processes(requests: List[Dict[str, Any]], concurrency: int, writer: ResultWriter, progress: Progress):
+    """One graph per worker process; results are written by the parent as they complete."""
+    with ProcessPoolExecutor(max_workers=concurrency, initializer=_init_worker) as pool:
+        for future in as_completed(pool.submit(run_one, r) for r in requests):
+            record = future.result()
+            writer.write(record)
+            progress.update(record)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a JSONL file of hiring requests through the agent graph.")
+    parser.add_argument("input", type=Path, help="JSONL with one {\"message\": ..., \"id\"?, \"hiring_data\"?} per line")
+    parser.add_argument("--out", type=Path, default=Path("output/batch"), help="Output directory (results.jsonl + md/)")
+    parser.add_argument("--mode", choices=["async", "process"], default="async", help="Concurrency model")
+    parser.add_argument("--concurrency", type=int, default=4, help="Requests in flight")
+    parser.add_argument("--retry-failed", action="store_true", help="Re-run requests that previously failed")
+    parser.add_argument("--limit", type=int, default=None, help="Process at most this many pending requests")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Don't post JDs to Notion or write to the semantic cache / research index")
+    args = parser.parse_args()
+
+    if args.dry_run:
+        # Read by app.config, which nothing has imported yet (worker processes inherit it)
+        os.environ["DRY_RUN"] = "1"
+
+    args.out.mkdir(parents=True, exist_ok=True)
+    results = args.out / "results.jsonl"
+    done = load_checkpoint(results, args.retry_failed)
+
+    pending = [r for r in read_requests(args.input) if r["id"] not in done]
+    pending = pending[: args.limit] if args.limit else pending
+    print(f"▶️  {len(pending)} pending, {len(done)} already done ({args.mode}, concurrency {args.concurrency}"
+          f"{', dry run' if args.dry_run else ''})", file=sys.stderr)
+
+    writer = ResultWriter(args.out)
+    progress = Progress(len(pending))
+    try:
+        if args.mode == "async":
+            asyncio.run(run_async(pending, args.concurrency, writer, progress))
+            _drain_worker()
+        else:
+            run_processes(pending, args.concurrency, writer, progress)
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - progress.started
+    print(f"✅ {progress.done} processed ({progress.failed} failed) in {elapsed:.1f}s "
+          f"({progress.done / max(elapsed, 1e-9):.2f} req/s) → {results}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
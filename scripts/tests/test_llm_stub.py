@@ -0,0 +1,46 @@
+"""LLM stub for load tests: installed through its gunicorn config, it answers every prompt shape the graph sends."""
+from __future__ import annotations
+
+import runpy
+from pathlib import Path
+
+import pytest
+
+from app.core import llm
+from scripts import llm_stub
+
+ROOT = Path(__file__).resolve().parents[2]
+
+
+@pytest.fixture
+def stubbed(monkeypatch):
+    monkeypatch.setenv("LLM_STUB_LATENCY_MS", "0")
+    # Restored after the test, as is every client install() swaps
+    monkeypatch.setattr(llm, "_primary_client", llm._primary_client)
+    for client in llm._clients:
+        monkeypatch.setattr(client.primary, "inner", client.primary.inner)
+
+
+def test_gunicorn_config_keeps_the_base_settings_and_installs_the_stub(stubbed):
+    from gunicorn.config import Config
+
+    base, stub = Config(), Config()
+    for cfg, path in ((base, ROOT / "gunicorn.conf.py"), (stub, ROOT / "scripts" / "gunicorn_stub.conf.py")):
+        for name, value in runpy.run_path(str(path)).items():
+            if name in cfg.settings:
+                cfg.set(name, value)
+    for name in ("bind", "workers", "worker_class", "preload_app", "graceful_timeout", "timeout"):
+        assert getattr(stub, name) == getattr(base, name)
+    assert stub.when_ready is not None
+    assert llm._primary_client is llm_stub._stub_client
+
+
+def test_installed_stub_answers_parse_and_jd_prompts(stubbed):
+    from app.core.nodes import _is_valid_jd
+    from app.core.parser import parse_and_draft_jd
+
+    llm_stub.install()
+    data, jd = parse_and_draft_jd({}, "hire a backend engineer")
+    assert data["roles"] == ["Backend Engineer"] and data["budget"] and data["timeline"]
+    assert jd == llm_stub.STUB_JD and _is_valid_jd(jd)
+    assert llm.get_llm().invoke("Write a job description").content == llm_stub.STUB_JD
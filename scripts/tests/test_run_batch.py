@@ -0,0 +1,128 @@
+"""Batch runner: checkpointing, request ids, markdown file names and draining each process worker's background jobs."""
+from __future__ import annotations
+
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from app import config
+from app.core import lifecycle
+from scripts import run_batch
+
+
+def _write_later(path: str, delay: float = 0.2):
+    time.sleep(delay)
+    Path(path).write_text("done")
+
+
+lifecycle.register_durable("test.write_later", _write_later)
+
+
+def _queue_uploads(path: str) -> str:
+    # Like create_jd_node: queue uploads on a TrackedExecutor and return before they run
+    executor = lifecycle.TrackedExecutor(f"test-upload-{Path(path).name}", max_workers=1)
+    executor.submit(_write_later, path + ".running", 0.5)
+    executor.submit(_write_later, path + ".queued")
+    return path
+
+
+def test_process_workers_drain_background_jobs_before_exiting(tmp_path, monkeypatch):
+    # Forked workers inherit these; the drain deadline passes while the first upload is running
+    spool = tmp_path / "spool.jsonl"
+    monkeypatch.setattr(config, "SHUTDOWN_DRAIN_SECONDS", 0.05)
+    monkeypatch.setattr(config, "SHUTDOWN_SPOOL_PATH", str(spool))
+
+    targets = [str(tmp_path / f"upload-{i}") for i in range(2)]
+    with ProcessPoolExecutor(max_workers=2, initializer=run_batch._init_worker) as pool:
+        assert list(pool.map(_queue_uploads, targets)) == targets
+
+    assert all(Path(t + ".running").read_text() == "done" for t in targets)
+    spooled = [json.loads(line) for line in spool.read_text().splitlines()]
+    assert sorted(r["args"][0] for r in spooled) == sorted(t + ".queued" for t in targets)
+    assert {r["job"] for r in spooled} == {"test.write_later"}
+
+
+def test_checkpoint_drops_torn_line_and_failed_records(tmp_path):
+    results = tmp_path / "results.jsonl"
+    records = [{"id": "a", "status": "ok"}, {"id": "b", "status": "error"}]
+    results.write_text("".join(json.dumps(r) + "\n" for r in records) + '{"id": "c", "sta')
+
+    assert run_batch.load_checkpoint(results, retry_failed=False) == {"a", "b"}
+    assert run_batch.load_checkpoint(results, retry_failed=True) == {"a"}
+    assert [json.loads(line)["id"] for line in results.read_text().splitlines()] == ["a"]
+
+
+def test_request_ids_are_stable(tmp_path):
+    path = tmp_path / "requests.jsonl"
+    path.write_text('{"message": "hire a PM"}\n\n{"id": 7, "message": "hire an SRE"}\nnot json\n')
+    first = [r["id"] for r in run_batch.read_requests(path)]
+    assert first == [run_batch.request_key({}, '{"message": "hire a PM"}\n'), "7"]
+    assert [r["id"] for r in run_batch.read_requests(path)] == first
+
+
+def test_checkpoint_without_torn_line_or_retry_is_left_alone(tmp_path):
+    results = tmp_path / "results.jsonl"
+    text = '{"id": "a", "status": "ok"}\n{"id": "b", "status": "error"}\n'
+    results.write_text(text)
+    before = results.stat().st_mtime_ns
+    assert run_batch.load_checkpoint(results, retry_failed=False) == {"a", "b"}
+    assert results.read_text() == text and results.stat().st_mtime_ns == before
+
+
+def test_checkpoint_torn_line_is_dropped_from_the_file(tmp_path):
+    results = tmp_path / "results.jsonl"
+    results.write_text('{"id": "a", "status": "ok"}\n{"id": "b", "sta')
+    assert run_batch.load_checkpoint(results, retry_failed=False) == {"a"}
+    assert results.read_text() == '{"id": "a", "status": "ok"}\n'
+
+
+def test_checkpoint_with_only_a_torn_line_is_empty(tmp_path):
+    results = tmp_path / "results.jsonl"
+    results.write_text('{"id": "a", "st')
+    assert run_batch.load_checkpoint(results, retry_failed=True) == set()
+    assert results.read_text() == ""
+    assert run_batch.load_checkpoint(tmp_path / "missing.jsonl", retry_failed=True) == set()
+
+
+def test_retry_failed_leaves_each_id_once_after_the_rerun(tmp_path):
+    results = tmp_path / "results.jsonl"
+    results.write_text("".join(json.dumps(r) + "\n" for r in (
+        {"id": "a", "status": "ok"}, {"id": "b", "status": "error", "error": "boom"}, {"id": "c", "status": "error"},
+    )))
+    assert run_batch.load_checkpoint(results, retry_failed=True) == {"a"}
+    writer = run_batch.ResultWriter(tmp_path)
+    for record in ({"id": "b", "status": "ok"}, {"id": "c", "status": "error"}):
+        writer.write(record)
+    writer.close()
+    ids = [json.loads(line)["id"] for line in results.read_text().splitlines()]
+    assert ids == ["a", "b", "c"]
+    assert run_batch.load_checkpoint(results, retry_failed=False) == {"a", "b", "c"}
+
+
+def test_request_key_prefers_the_id_and_hashes_identical_lines_alike():
+    line = '{"message": "hire a PM"}\n'
+    assert run_batch.request_key({"id": "abc"}, line) == "abc"
+    assert run_batch.request_key({"id": 7}, line) == "7"
+    assert run_batch.request_key({}, line) == run_batch.request_key({}, line)
+    assert len(run_batch.request_key({}, line)) == 16
+    assert run_batch.request_key({}, line) != run_batch.request_key({}, '{"message": "hire an SRE"}\n')
+
+
+@pytest.mark.parametrize("request_id", ["7", "req-001", "batch_2.v1"])
+def test_plain_ids_name_their_markdown(request_id):
+    assert run_batch.markdown_name(request_id) == f"{request_id}.md"
+
+
+def test_unsafe_ids_stay_inside_md_and_apart(tmp_path):
+    ids = ["team/42", "team_42", "../escape", "/etc/passwd", "..", "", "a" * 300, "naïve id"]
+    names = [run_batch.markdown_name(i) for i in ids]
+    assert len(set(names)) == len(ids)
+    assert all("/" not in n and not n.startswith(".") and len(n) < 120 for n in names)
+
+    writer = run_batch.ResultWriter(tmp_path)
+    writer.write({"id": "../escape", "status": "ok", "messages": [{"role": "AIMessage", "content": "hi"}]})
+    writer.close()
+    assert [p.parent for p in tmp_path.rglob("*.md")] == [tmp_path / "md"]
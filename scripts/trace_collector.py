@@ -0,0 +1,191 @@
+# scripts/trace_collector.py
+
+"""
+Local stand-in for a trace collector, and a viewer for exported traces.
+
+Serves what app.core.tracing's "collector" exporter sends:
+  POST /v1/traces          {"spans": [...]} batches of finished spans
+  GET  /traces             one summary per trace (root, span count, duration, session_id)
+  GET  /traces/{trace_id}  the trace's spans
+
+Point the app at it with TRACING_EXPORTER=collector
+TRACING_COLLECTOR_URL=http://127.0.0.1:<port>/v1/traces. On exit (or with
+--show FILE for a TRACING_EXPORTER=json file) traces are printed as trees.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import threading
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# ---------- Trace store ----------
+
+class TraceStore:
+    def __init__(self, out: Optional[Path] = None):
+        self.traces: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self.out = out
+        self._lock = threading.Lock()
+
+    def add(self, spans: List[Dict[str, Any]]):
+        with self._lock:
+            for s in spans:
+                self.traces[s["traceId"]].append(s)
+            if self.out is not None:
+                with self.out.open("a", encoding="utf-8") as f:
+                    f.writelines(json.dumps(s) + "\n" for s in spans)
+
+    def summaries(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [summarize(trace_id, spans) for trace_id, spans in self.traces.items()]
+
+    def get(self, trace_id: str) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            spans = self.traces.get(trace_id)
+            return list(spans) if spans is not None else None
+
+
+def summarize(trace_id: str, spans: List[Dict[str, Any]]) -> Dict[str, Any]:
+    root = next((s for s in spans if not s.get("parentSpanId")), None)
+    start = min(s["startTimeUnixNano"] for s in spans)
+    end = max(s["endTimeUnixNano"] for s in spans)
+    return {
+        "traceId": trace_id,
+        "root": root["name"] if root else None,
+        "spans": len(spans),
+        "errors": sum(1 for s in spans if s.get("status") == "error"),
+        "durationMs": round((end - start) / 1e6, 3),
+        "session_id": (root or spans[0]).get("attributes", {}).get("session_id"),
+    }
+
+# ---------- Rendering ----------
+
+def render_tree(spans: List[Dict[str, Any]]) -> str:
+    """Indented span tree with start offset and duration; spans whose parent is missing are shown as roots."""
+    ids = {s["spanId"] for s in spans}
+    children: Dict[Optional[str], List[Dict[str, Any]]] = defaultdict(list)
+    for s in spans:
+        children[s["parentSpanId"] if s.get("parentSpanId") in ids else None].append(s)
+    t0 = min(s["startTimeUnixNano"] for s in spans)
+    lines: List[str] = []
+
+    def walk(parent: Optional[str], depth: int):
+        for s in sorted(children.get(parent, []), key=lambda s: s["startTimeUnixNano"]):
+            offset = (s["startTimeUnixNano"] - t0) / 1e6
+            mark = " ❌ " + s["error"] if s.get("status") == "error" else ""
+            label = s["name"]
+            if s["name"] == "db.query":
+                label += f" {s['attributes'].get('operation', '')}"
+            elif s["name"] == "notion.request":
+                label += f" {s['attributes'].get('method', '')} {s['attributes'].get('status_code', '')}"
+            lines.append(f"{offset:9.1f}ms {s['durationMs']:9.1f}ms  {'  ' * depth}{label}{mark}")
+            walk(s["spanId"], depth + 1)
+
+    walk(None, 0)
+    return "\n".join(lines)
+
+
+def print_traces(traces: Dict[str, List[Dict[str, Any]]]):
+    for trace_id, spans in traces.items():
+        summary = summarize(trace_id, spans)
+        print(f"\n▶️  trace {trace_id} root={summary['root']} session={summary['session_id']} "
+              f"spans={summary['spans']} errors={summary['errors']} {summary['durationMs']:.1f}ms")
+        print(render_tree(spans))
+
+# ---------- Server ----------
+
+_TRACE_RE = re.compile(r"^/traces/([0-9a-f]{32})$")
+
+class CollectorServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, store: TraceStore):
+        super().__init__(address, _Handler)
+        self.store = store
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: CollectorServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, payload: Any):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if self.path != "/v1/traces":
+            return self._send(404, {"error": "not found"})
+        try:
+            spans = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)))["spans"]
+        except (ValueError, KeyError, TypeError):
+            return self._send(400, {"error": "expected {\"spans\": [...]}"})
+        self.server.store.add(spans)
+        self._send(200, {"accepted": len(spans)})
+
+    def do_GET(self):
+        if self.path == "/traces":
+            return self._send(200, self.server.store.summaries())
+        m = _TRACE_RE.match(self.path)
+        spans = self.server.store.get(m.group(1)) if m else None
+        if spans is None:
+            return self._send(404, {"error": "not found"})
+        self._send(200, spans)
+
+
+def start(store: Optional[TraceStore] = None, host: str = "127.0.0.1", port: int = 0) -> CollectorServer:
+    """Start a collector on a background thread (port 0 picks a free port); stop it with .shutdown()."""
+    server = CollectorServer((host, port), store or TraceStore())
+    threading.Thread(target=server.serve_forever, name="trace-collector", daemon=True).start()
+    return server
+
+# ---------- CLI ----------
+
+def load_file(path: Path) -> Dict[str, List[Dict[str, Any]]]:
+    traces: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for line in path.read_text(encoding="utf-8").splitlines():
+        if line.strip():
+            s = json.loads(line)
+            traces[s["traceId"]].append(s)
+    return traces
+
+def main():
+    parser = argparse.ArgumentParser(description="Local trace collector stand-in and trace viewer.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4318)
+    parser.add_argument("--out", type=Path, default=None, help="Also append received spans to this NDJSON file")
+    parser.add_argument("--show", type=Path, default=None, help="Print the traces in an exported NDJSON file and exit")
+    args = parser.parse_args()
+
+    if args.show:
+        print_traces(load_file(args.show))
+        return
+
+    server = CollectorServer((args.host, args.port), TraceStore(args.out))
+    print(f"▶️  Trace collector on {server.url} (set TRACING_EXPORTER=collector TRACING_COLLECTOR_URL={server.url}/v1/traces)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print_traces(server.store.traces)
+        print(f"\n✅ {len(server.store.traces)} trace(s) received")
+
+if __name__ == "__main__":
+    main()